@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Tuple
+
+ArbKey = Tuple[str, Tuple[Tuple[str, str, float], ...]]
+
+
+def get_arb_key(match: str, legs: Iterable[Tuple[str, str, float]]) -> ArbKey:
+    """Identity of an arb: the match and the (outcome, bookmaker, odds) backed on each leg."""
+    return match, tuple(legs)
+
+
+class ArbDedupCache:
+    """
+    Remembers the arb standing on each match, so it's published (and executed) once while it lasts rather than on every
+    unrelated update for its match, as the server-side Lua detection does. A match's entry is replaced when its best
+    combination changes, and dropped with `clear` when its arb vanishes, so an arb that comes back is published again.
+
+    `ttl_seconds` and `max_entries` only bound memory: matches not detected on for the TTL are forgotten, as are
+    the least recently detected beyond `max_entries`. A TTL of 0 disables de-duplication.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.standing: "OrderedDict[str, Tuple[ArbKey, float]]" = OrderedDict()  # Match -> (its standing arb, last detected), oldest first
+
+    def should_publish(self, key: ArbKey) -> bool:
+        """Return whether the arb is new for its match (not the one standing already), recording it as the standing arb."""
+        if self.ttl_seconds <= 0:
+            return True
+
+        now = self.clock()
+        self._evict_expired(now)
+
+        match = key[0]
+        previous = self.standing.pop(match, None)
+        self.standing[match] = (key, now)
+        if len(self.standing) > self.max_entries:
+            self.standing.popitem(last=False)
+        return previous is None or previous[0] != key
+
+    def clear(self, match: str):
+        """Forget the match's standing arb, once detection finds it has none."""
+        self.standing.pop(match, None)
+
+    def __len__(self) -> int:
+        return len(self.standing)
+
+    def _evict_expired(self, now: float):
+        while self.standing:
+            match, (_, detected_at) = next(iter(self.standing.items()))
+            if detected_at + self.ttl_seconds > now:
+                break
+            del self.standing[match]
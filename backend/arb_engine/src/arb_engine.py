@@ -1,159 +1,215 @@
 import uuid
 import redis
-import json
-from typing import List, Dict
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from backend.arb_engine.src.config import arb_engine_config
 from backend.shared.config import shared_config
 from backend.shared.arb_math import calculate_guaranteed_profit
 
-from backend.scraper.src.odds_publisher import OddsUpdateMessage
+from backend.arb_engine.src.arb_dedup_cache import ArbDedupCache, get_arb_key
+from backend.arb_engine.src.batch_arb_detector import BatchArbDetector
+from backend.arb_engine.src.odds_book import OddsBook
 
-from backend.shared.redis import ArbMessage, OddsValues
-from backend.shared.redis import get_odds_match_hash, get_bookmaker_key_full_name
-
-from pydantic import ValidationError
+from backend.shared.redis import AnyOddsUpdate, ArbLeg, ArbMessage, message_codec
+from backend.shared.transport import publish_message
 
 from backend.shared.utils import current_milli_time
 import logging
     
 
 class ArbOpportunity:
-    """Math for valid arb opportunities."""
+    """Math for valid arb opportunities across every outcome of a market. Implied probabilities are computed once, on creation."""
+
+    __slots__ = ("match", "bookmakers", "odds", "implied_probabilities", "combined_market_margin")
 
     match: str
-    bookmaker_home_win: str
-    bookmaker_away_win: str
-    odds_home_win: float
-    odds_away_win: float
+    bookmakers: Dict[str, str] # outcome -> bookmaker backed for it
+    odds: Dict[str, float] # outcome -> odds backed
 
-    def __init__(self, match: str, bookmaker_home_win: str, bookmaker_away_win: str, odds_home_win: float, odds_away_win: float):
+    def __init__(self, match: str, bookmakers: Dict[str, str], odds: Dict[str, float]):
         self.match = match
-        self.bookmaker_home_win = bookmaker_home_win
-        self.bookmaker_away_win = bookmaker_away_win
-        self.odds_home_win = odds_home_win
-        self.odds_away_win = odds_away_win
+        self.bookmakers = bookmakers
+        self.odds = odds
+        self.implied_probabilities = {outcome: 1.0 / outcome_odds for outcome, outcome_odds in odds.items()}
+        self.combined_market_margin = sum(self.implied_probabilities.values())
+
+    def get_implied_probability(self, outcome: str) -> float:
+        return self.implied_probabilities[outcome]
 
-    def get_probability_home_win(self) -> float:
-        return 1.0 / self.odds_home_win
-    
-    def get_probability_away_win(self) -> float:
-        return 1.0 / self.odds_away_win
-    
     def get_combined_market_margin(self) -> float:
-        return self.get_probability_home_win() + self.get_probability_away_win()
+        return self.combined_market_margin
 
     def is_net_gain(self) -> bool:
-        return self.get_combined_market_margin() < 1.0
+        return self.combined_market_margin < 1.0
 
     # Based on https://help.smarkets.com/hc/en-gb/articles/115001175531-How-to-calculate-arbitrage-betting#:~:text=stake%20%C2%A3100%20overall.-,Stake%20at%20each%20bookmaker%20%3D%20(Overall%20stake%20*%20Bookmaker%20implied%20probability)/Combined%20market%20margin,-Example%3A%20Bookmaker%20A 
-    def compute_stake_at_bookmaker(self, is_home_win_bookmaker: bool, overall_stake: float) -> float:
-        implied_probability = self.get_probability_home_win() if is_home_win_bookmaker else self.get_probability_away_win()
-        return (overall_stake * implied_probability) / self.get_combined_market_margin()
+    def compute_stake_at_bookmaker(self, outcome: str, overall_stake: float) -> float:
+        return (overall_stake * self.implied_probabilities[outcome]) / self.combined_market_margin
     
 
 class ArbEngine:
     """Detects and publishes valid arbitrage opportunities to Redis."""
     
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, odds_book: Optional[OddsBook] = None, batch_detector: Optional[BatchArbDetector] = None,
+                 dedup_cache: Optional[ArbDedupCache] = None):
         self.redis_client: redis.Redis = redis_client
+        self.odds_book: OddsBook = odds_book if odds_book is not None else OddsBook()
+        self.batch_detector: Optional[BatchArbDetector] = batch_detector  # Only set in batch detection mode
+        self.dirty_matches: Set[str] = set()  # Matches whose odds changed since the last batch scan
+        self.dedup_cache: ArbDedupCache = dedup_cache if dedup_cache is not None else ArbDedupCache(
+            arb_engine_config.ARB_DEDUP_TTL_SECONDS, arb_engine_config.ARB_DEDUP_MAX_ENTRIES
+        )
 
-    async def detect_arb_and_publish_bets(self, odds_update: OddsUpdateMessage):
-        all_bookmaker_odds = self.get_all_odds_for_match(odds_update.match)
+    async def resync_odds_book(self, partitions: Optional[Iterable[int]] = None):
+        """
+        Reload the in-memory odds book (or some odds partitions of it) from the Redis hashes, e.g. on startup or after missed updates.
+        Redis is read in a thread, so the event loop isn't blocked by the SCAN; the book is then replaced on the loop.
+        """
+        partitions = None if partitions is None else list(partitions)
+        odds = await asyncio.to_thread(self.odds_book.fetch_from_redis, self.redis_client, partitions)
+        self.odds_book.load(odds, partitions)
+        self.reload_batch_detector()
+
+    def retain_partitions(self, partitions: Iterable[int]):
+        """Forget the odds of matches outside the odds partitions this worker owns."""
+        self.odds_book.retain_partitions(partitions)
+        self.reload_batch_detector()
+
+    def reload_batch_detector(self):
+        if self.batch_detector is not None:
+            self.batch_detector.load_from_odds_book(self.odds_book)
+            self.dirty_matches.update(self.odds_book.odds)
+
+    def apply_odds_update(self, odds_update: AnyOddsUpdate):
+        """Apply an odds update to the odds book (and the batch detector's arrays, in batch mode) without detecting."""
+        self.odds_book.apply_odds_update(odds_update)
+
+        if self.batch_detector is not None:
+            self.batch_detector.apply_odds_update(odds_update)
+            self.dirty_matches.add(odds_update.match)
+
+    def apply_odds_updates(self, odds_updates: List[AnyOddsUpdate]) -> Set[str]:
+        """
+        Apply a batch of odds updates, keeping only the latest quote per (match, bookmaker) since each update
+        supersedes the previous one. Returns the matches whose odds changed.
+        """
+        latest_odds_updates: Dict[Tuple[str, str], AnyOddsUpdate] = {}
+        for odds_update in odds_updates:
+            latest_odds_updates[(odds_update.match, odds_update.bookmaker)] = odds_update
+
+        for odds_update in latest_odds_updates.values():
+            self.apply_odds_update(odds_update)
+
+        return {match for match, _ in latest_odds_updates}
+
+    async def detect_arb_and_publish_bets(self, odds_update: AnyOddsUpdate):
+        self.apply_odds_update(odds_update)
+        self.detect_arb_for_match_and_publish_bets(odds_update.match)
+
+    async def detect_arbs_and_publish_bets(self, odds_updates: List[AnyOddsUpdate]):
+        """Apply a batch of odds updates, then detect once per affected match rather than once per update."""
+        for match in self.apply_odds_updates(odds_updates):
+            self.detect_arb_for_match_and_publish_bets(match)
+
+    def detect_arb_for_match_and_publish_bets(self, match: str):
+        arb = self.find_best_arbitrage_opportunity(match)
+        if arb is None:
+            logging.info(f"No other odds found for match: {match}")
+            self.dedup_cache.clear(match)
+            return
 
-        if not all_bookmaker_odds:
-            logging.info(f"No other odds found for match: {odds_update.match}")
+        if not arb.is_net_gain():
+            self.dedup_cache.clear(match)  # The match's arb (if it had one) is gone, so the next one is new
             return
 
-        arbs = self.find_arbitrage_opportunities(odds_update, all_bookmaker_odds)
+        arb_key = get_arb_key(arb.match, ((outcome, arb.bookmakers[outcome], odds) for outcome, odds in arb.odds.items()))
+        if not self.dedup_cache.should_publish(arb_key):
+            logging.info(f"Suppressed duplicate ArbOpportunity: {arb.match}")
+            return
 
-        for arb in arbs:
-            if arb.is_net_gain():
-                arb_message = self.create_arb_message(arb)
-                self.publish_arb_message(arb_message)
-                logging.info(f"📢 Published ArbOpportunity: {arb.match} | {arb.bookmaker_home_win} vs {arb.bookmaker_away_win}")
+        arb_message = self.create_arb_message(arb)
+        self.publish_arb_message(arb_message)
+        logging.info(f"📢 Published ArbOpportunity: {arb.match} | {' vs '.join(arb.bookmakers.values())}")
 
-    def get_all_odds_for_match(self, match: str) -> Dict[str, OddsValues]:
-        """Retrieve all stored odds for a given match from Redis."""
-        match_hash = get_odds_match_hash(match)
-        odds_data = self.redis_client.hgetall(match_hash)
+    def find_best_arbitrage_opportunity(self, match: str) -> Optional[ArbOpportunity]:
+        """Find the combination of bookmakers with the lowest combined market margin for the match, using its best-price index."""
+        best_prices = self.odds_book.get_best_prices(match)
+        if best_prices is None:
+            return None
 
-        all_odds = {}
-        for bookmaker_key, odds_json in odds_data.items():
-            bookmaker = get_bookmaker_key_full_name(bookmaker_key)
+        best_combination = best_prices.get_best_combination()
+        if best_combination is None:
+            return None
 
-            try:
-                odds_dict = json.loads(odds_json)
-                odds = OddsValues(**odds_dict)
-                all_odds[bookmaker] = odds
-            except json.JSONDecodeError:
-                logging.error(f"Failed to decode JSON for match={match}, bookmaker={bookmaker}: {repr(odds_json)}", exc_info=True)
-            except ValidationError:
-                logging.error(f"Invalid OddsValues format for match={match}, bookmaker={bookmaker}", exc_info=True)
-
-        return all_odds
-
-    def find_arbitrage_opportunities(self, odds_update: OddsUpdateMessage, all_bookmaker_odds: Dict[str, OddsValues]) -> List[ArbOpportunity]:
-        """Find arbitrage opportunities using the newly received odds and other bookmakers' odds."""
-        if not odds_update.odds:
-            return []
-
-        arbs = []
-        used_bookmakers = {odds_update.bookmaker}
-
-        for bookmaker, odds in all_bookmaker_odds.items():
-            if bookmaker in used_bookmakers or odds is None:
-                continue
+        return ArbOpportunity(
+            match=match,
+            bookmakers={outcome: bookmaker for outcome, (bookmaker, _) in best_combination.items()},
+            odds={outcome: odds for outcome, (_, odds) in best_combination.items()}
+        )
 
-            # Create arbitrage opportunity where `odds_update.bookmaker` is home
-            arb1 = ArbOpportunity(
-                match=odds_update.match,
-                bookmaker_home_win=odds_update.bookmaker,
-                bookmaker_away_win=bookmaker,
-                odds_home_win=odds_update.odds.home_win,
-                odds_away_win=odds.away_win
-            )
+    async def run_batch_detection(self):
+        """Re-scan the whole book on a timer, skipping ticks with no odds updates since the last scan."""
+        while True:
+            await asyncio.sleep(arb_engine_config.BATCH_DETECTION_INTERVAL_SECONDS)
 
-            # Create arbitrage opportunity where `bookmaker` is home
-            arb2 = ArbOpportunity(
-                match=odds_update.match,
-                bookmaker_home_win=bookmaker,
-                bookmaker_away_win=odds_update.bookmaker,
-                odds_home_win=odds.home_win,
-                odds_away_win=odds_update.odds.away_win
-            )
+            if not self.dirty_matches:
+                continue
 
-            if arb1.is_net_gain():
-                arbs.append(arb1)
-                used_bookmakers.add(arb1.bookmaker_home_win)
-                used_bookmakers.add(arb1.bookmaker_away_win)
-            elif arb2.is_net_gain():
-                arbs.append(arb2)
-                used_bookmakers.add(arb2.bookmaker_home_win)
-                used_bookmakers.add(arb2.bookmaker_away_win)
+            try:
+                self.detect_batch_arbs_and_publish_bets()
+            except Exception:
+                logging.error("Batch arb detection error.", exc_info=True)
+
+    def detect_batch_arbs_and_publish_bets(self):
+        """
+        Detect arbs across every match in one vectorized pass, publishing those of the matches whose odds changed
+        since the last scan: the others' arbs were already published, and would otherwise be executed again every scan.
+        """
+        match_index = self.batch_detector.match_index
+        dirty_matches, self.dirty_matches = self.dirty_matches, set()
+        rows = sorted(match_index[match] for match in dirty_matches if match in match_index)
+        result = self.batch_detector.detect(arb_engine_config.TOTAL_STAKE_PER_ARB)
+
+        for arb in result.arbs(rows):
+            dirty_matches.discard(arb.match)
+            arb_key = get_arb_key(arb.match, ((leg.outcome, leg.bookmaker, leg.odds) for leg in arb.legs))
+            if not self.dedup_cache.should_publish(arb_key):
+                continue
 
-        return arbs
+            arb_message = ArbMessage.model_construct(  # Built from our own numbers, so no need to validate
+                id=str(uuid.uuid4()),
+                status="detected",
+                timestamp=current_milli_time(),
+                **arb._asdict()
+            )
+            self.publish_arb_message(arb_message)
+            logging.info(f"📢 Published ArbOpportunity: {arb.match} | {' vs '.join(leg.bookmaker for leg in arb.legs)}")
 
+        for match in dirty_matches:
+            self.dedup_cache.clear(match)  # Changed and no longer an arb, so its next arb is new
 
     def create_arb_message(self, arb: ArbOpportunity) -> ArbMessage:
-        """Create an ArbMessage for Redis publishing."""
+        """Create an ArbMessage for Redis publishing. Built from our own numbers, so validation is skipped."""
         overall_stake = arb_engine_config.TOTAL_STAKE_PER_ARB
 
-        stake_home = arb.compute_stake_at_bookmaker(is_home_win_bookmaker=True, overall_stake=overall_stake)
-        stake_away = arb.compute_stake_at_bookmaker(is_home_win_bookmaker=False, overall_stake=overall_stake)
+        legs = [
+            ArbLeg.model_construct(
+                outcome=outcome,
+                bookmaker=arb.bookmakers[outcome],
+                odds=odds,
+                stake=arb.compute_stake_at_bookmaker(outcome, overall_stake)
+            )
+            for outcome, odds in arb.odds.items()
+        ]
 
         guaranteed_profit = calculate_guaranteed_profit(
-            stake_home, stake_away, arb.odds_home_win, arb.odds_away_win
+            [leg.stake for leg in legs], [leg.odds for leg in legs]
         )
 
-        return ArbMessage(
+        return ArbMessage.model_construct(
             id=str(uuid.uuid4()),  # Generate unique ID for tracking
             match=arb.match,
-            home_win_bookmaker=arb.bookmaker_home_win,
-            away_win_bookmaker=arb.bookmaker_away_win,
-            home_win_odds=arb.odds_home_win,
-            away_win_odds=arb.odds_away_win,
-            home_win_stake=stake_home,
-            away_win_stake=stake_away,
+            legs=legs,
             guaranteed_profit=guaranteed_profit,
             status="detected",
             timestamp=current_milli_time()
@@ -161,6 +217,5 @@ class ArbEngine:
 
     def publish_arb_message(self, arb_message: ArbMessage):
         """Publish the detected arbitrage opportunity to Redis."""
-        arb_data = json.dumps(arb_message.model_dump())
-        self.redis_client.publish(shared_config.REDIS_ARB_DETECTIONS_CHANNEL, arb_data)
-        logging.info(f"Published ArbMessage to Redis: {arb_data}")
\ No newline at end of file
+        publish_message(self.redis_client, shared_config.REDIS_ARB_DETECTIONS_CHANNEL, message_codec.encode_arb_message(arb_message))
+        logging.info(f"Published ArbMessage to Redis: {arb_message}")
\ No newline at end of file
@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from backend.arb_engine.src.odds_book import OddsBook
+from backend.shared.redis import AnyOdds, AnyOddsUpdate, ArbLeg
+
+
+class BatchArb(NamedTuple):
+    """A profitable combination found by a batch scan, with stakes and profit already computed."""
+    match: str
+    legs: List[ArbLeg]
+    guaranteed_profit: float
+
+
+class BatchDetectionResult:
+    """Per-match arrays produced by one vectorized scan of the whole book."""
+
+    def __init__(self, matches: List[str], bookmakers: List[str], outcomes: List[str], market_outcomes: np.ndarray,
+                 bookmaker_idx: np.ndarray, odds: np.ndarray, combined_market_margin: np.ndarray,
+                 stakes: np.ndarray, guaranteed_profit: np.ndarray):
+        self.matches = matches
+        self.bookmakers = bookmakers
+        self.outcomes = outcomes
+        self.market_outcomes = market_outcomes  # (matches, outcomes) mask of the outcomes in each match's market
+        self.bookmaker_idx = bookmaker_idx  # (matches, outcomes) bookmaker backed for each outcome
+        self.odds = odds  # (matches, outcomes)
+        self.combined_market_margin = combined_market_margin  # (matches,)
+        self.stakes = stakes  # (matches, outcomes)
+        self.guaranteed_profit = guaranteed_profit  # (matches,)
+        self.is_net_gain = combined_market_margin < 1.0
+
+    def arbs(self, rows: Optional[Iterable[int]] = None) -> Iterator[BatchArb]:
+        """
+        Yield only the matches with an arb (among the match rows given, if any),
+        so Python objects are built for arbs rather than for every match.
+        """
+        for m in (np.flatnonzero(self.is_net_gain) if rows is None else [m for m in rows if self.is_net_gain[m]]):
+            legs = [
+                ArbLeg.model_construct(
+                    outcome=self.outcomes[o],
+                    bookmaker=self.bookmakers[self.bookmaker_idx[m, o]],
+                    odds=float(self.odds[m, o]),
+                    stake=float(self.stakes[m, o])
+                )
+                for o in np.flatnonzero(self.market_outcomes[m])
+            ]
+            yield BatchArb(match=self.matches[m], legs=legs, guaranteed_profit=float(self.guaranteed_profit[m]))
+
+
+class BatchArbDetector:
+    """
+    Holds the odds book as a dense matches × bookmakers × outcomes array (NaN for closed/missing quotes)
+    so that every match can be scanned for arbs in one vectorized pass.
+    """
+
+    def __init__(self, initial_matches: int = 16, initial_bookmakers: int = 8, initial_outcomes: int = 3):
+        self.matches: List[str] = []
+        self.bookmakers: List[str] = []
+        self.outcomes: List[str] = []
+        self.match_index: Dict[str, int] = {}
+        self.bookmaker_index: Dict[str, int] = {}
+        self.outcome_index: Dict[str, int] = {}
+        self.odds = np.full((initial_matches, initial_bookmakers, initial_outcomes), np.nan)
+        self.market_outcomes = np.zeros((initial_matches, initial_outcomes), dtype=bool)
+
+    def apply_odds_update(self, odds_update: AnyOddsUpdate):
+        if odds_update.event == "odds_close" or odds_update.odds is None:
+            self.remove_odds(odds_update.match, odds_update.bookmaker)
+        else:
+            self.set_odds(odds_update.match, odds_update.bookmaker, odds_update.odds)
+
+    def set_odds(self, match: str, bookmaker: str, odds: AnyOdds):
+        m = self._get_or_add_match(match)
+        b = self._get_or_add_bookmaker(bookmaker)
+        for outcome, outcome_odds in odds.outcomes.items():
+            o = self._get_or_add_outcome(outcome)
+            self.odds[m, b, o] = outcome_odds
+            self.market_outcomes[m, o] = True
+
+    def remove_odds(self, match: str, bookmaker: str):
+        m = self.match_index.get(match)
+        b = self.bookmaker_index.get(bookmaker)
+        if m is not None and b is not None:
+            self.odds[m, b, :] = np.nan
+
+    def load_from_odds_book(self, odds_book: OddsBook):
+        """Rebuild the arrays from an odds book, e.g. after it was resynced from Redis."""
+        self.odds[:] = np.nan
+        self.market_outcomes[:] = False
+        for match, match_odds in odds_book.odds.items():
+            for bookmaker, odds in match_odds.items():
+                self.set_odds(match, bookmaker, odds)
+
+    def detect(self, overall_stake: float) -> BatchDetectionResult:
+        """
+        Computes implied probabilities, the best price per outcome (with legs spanning at least two bookmakers),
+        the combined market margin, proportional stakes and guaranteed profit for every match at once.
+        """
+        n_matches = len(self.matches)
+        rows = np.arange(n_matches)[:, None]
+        outcome_cols = np.arange(max(len(self.outcomes), 1))[None, :]
+
+        # Missing quotes get an infinite implied probability so they never win the argmin and never form an arb.
+        # There's always at least one bookmaker/outcome column so argmin is defined even for an empty book.
+        odds = self.odds[:n_matches, :max(len(self.bookmakers), 1), :outcome_cols.shape[1]]
+        market_outcomes = self.market_outcomes[:n_matches, :outcome_cols.shape[1]]
+        with np.errstate(divide="ignore"):
+            probabilities = 1.0 / odds
+        probabilities = np.where(np.isnan(probabilities), np.inf, probabilities)
+
+        # Best price per outcome: O(outcomes × bookmakers) per match
+        best_idx = probabilities.argmin(axis=1)
+        best_prob = probabilities[rows, best_idx, outcome_cols]
+        combined_market_margin = np.where(market_outcomes, best_prob, 0.0).sum(axis=1)
+
+        # If a single bookmaker has every best price, swap the outcome whose runner-up adds the least to the margin.
+        # Runner-ups are read from the excluding array: with no other bookmaker quoting, argmin lands on the excluded one at inf.
+        probabilities_excluding_best = probabilities.copy()
+        probabilities_excluding_best[rows, best_idx, outcome_cols] = np.inf
+        runner_up_idx = probabilities_excluding_best.argmin(axis=1)
+        runner_up_prob = probabilities_excluding_best[rows, runner_up_idx, outcome_cols]
+
+        first_outcome = market_outcomes.argmax(axis=1)[:, None]
+        single_bookmaker = np.all((best_idx == np.take_along_axis(best_idx, first_outcome, axis=1)) | ~market_outcomes, axis=1)
+
+        with np.errstate(invalid="ignore"):
+            margin_increase = np.where(market_outcomes, runner_up_prob - best_prob, np.inf)
+        margin_increase = np.where(np.isnan(margin_increase), np.inf, margin_increase)
+        swap_outcome = margin_increase.argmin(axis=1)
+
+        swap_rows = np.flatnonzero(single_bookmaker)
+        bookmaker_idx = best_idx.copy()
+        bookmaker_idx[swap_rows, swap_outcome[swap_rows]] = runner_up_idx[swap_rows, swap_outcome[swap_rows]]
+        combined_market_margin[swap_rows] += margin_increase[swap_rows, swap_outcome[swap_rows]]
+
+        chosen_prob = probabilities[rows, bookmaker_idx, outcome_cols]
+        chosen_odds = odds[rows, bookmaker_idx, outcome_cols]
+
+        # Stake on each outcome = (overall stake * implied probability) / combined market margin
+        with np.errstate(invalid="ignore"):
+            stakes = np.where(market_outcomes, overall_stake * chosen_prob / combined_market_margin[:, None], 0.0)
+            payouts = np.where(market_outcomes, stakes * chosen_odds, np.inf)
+            guaranteed_profit = payouts.min(axis=1) - stakes.sum(axis=1)
+
+        return BatchDetectionResult(
+            matches=self.matches,
+            bookmakers=self.bookmakers,
+            outcomes=self.outcomes,
+            market_outcomes=market_outcomes,
+            bookmaker_idx=bookmaker_idx,
+            odds=chosen_odds,
+            combined_market_margin=combined_market_margin,
+            stakes=stakes,
+            guaranteed_profit=guaranteed_profit
+        )
+
+    def _get_or_add_match(self, match: str) -> int:
+        m = self.match_index.get(match)
+        if m is None:
+            m = self.match_index[match] = len(self.matches)
+            self.matches.append(match)
+            if m >= self.odds.shape[0]:
+                self._grow(n_matches=2 * self.odds.shape[0])
+        return m
+
+    def _get_or_add_bookmaker(self, bookmaker: str) -> int:
+        b = self.bookmaker_index.get(bookmaker)
+        if b is None:
+            b = self.bookmaker_index[bookmaker] = len(self.bookmakers)
+            self.bookmakers.append(bookmaker)
+            if b >= self.odds.shape[1]:
+                self._grow(n_bookmakers=2 * self.odds.shape[1])
+        return b
+
+    def _get_or_add_outcome(self, outcome: str) -> int:
+        o = self.outcome_index.get(outcome)
+        if o is None:
+            o = self.outcome_index[outcome] = len(self.outcomes)
+            self.outcomes.append(outcome)
+            if o >= self.odds.shape[2]:
+                self._grow(n_outcomes=2 * self.odds.shape[2])
+        return o
+
+    def _grow(self, n_matches: Optional[int] = None, n_bookmakers: Optional[int] = None, n_outcomes: Optional[int] = None):
+        """Double capacity along one axis so that adding matches/bookmakers/outcomes stays amortized O(1)."""
+        old_matches, old_bookmakers, old_outcomes = self.odds.shape
+        shape = (n_matches or old_matches, n_bookmakers or old_bookmakers, n_outcomes or old_outcomes)
+
+        odds = np.full(shape, np.nan)
+        odds[:old_matches, :old_bookmakers, :old_outcomes] = self.odds
+        self.odds = odds
+
+        market_outcomes = np.zeros((shape[0], shape[2]), dtype=bool)
+        market_outcomes[:old_matches, :old_outcomes] = self.market_outcomes
+        self.market_outcomes = market_outcomes
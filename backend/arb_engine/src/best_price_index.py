@@ -0,0 +1,124 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+
+class BestPriceHeap:
+    """Max-heap of the bookmaker prices for one outcome, with lazy deletion of superseded entries."""
+
+    # Rebuild the heap once stale entries outnumber live prices by this factor
+    COMPACTION_FACTOR = 2
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+        self.heap: List[Tuple[float, str]] = []  # (-odds, bookmaker)
+
+    def set_price(self, bookmaker: str, odds: float):
+        """Set a bookmaker's price in O(log n)."""
+        if self.prices.get(bookmaker) == odds:
+            return
+
+        self.prices[bookmaker] = odds
+        heapq.heappush(self.heap, (-odds, bookmaker))
+        self._compact_if_needed()
+
+    def remove_price(self, bookmaker: str):
+        """Remove a bookmaker's price in O(1); its heap entries are discarded lazily."""
+        self.prices.pop(bookmaker, None)
+        self._compact_if_needed()
+
+    def best(self) -> Optional[Tuple[str, float]]:
+        """Return the (bookmaker, odds) with the highest price."""
+        self._prune()
+        if not self.heap:
+            return None
+
+        neg_odds, bookmaker = self.heap[0]
+        return bookmaker, -neg_odds
+
+    def best_excluding(self, excluded_bookmaker: str) -> Optional[Tuple[str, float]]:
+        """Return the (bookmaker, odds) with the highest price offered by any other bookmaker."""
+        popped = []
+        best = None
+
+        while self.heap:
+            neg_odds, bookmaker = heapq.heappop(self.heap)
+            if not self._is_live(neg_odds, bookmaker):
+                continue
+
+            popped.append((neg_odds, bookmaker))
+            if bookmaker != excluded_bookmaker:
+                best = (bookmaker, -neg_odds)
+                break
+
+        for entry in popped:
+            heapq.heappush(self.heap, entry)
+
+        return best
+
+    def _is_live(self, neg_odds: float, bookmaker: str) -> bool:
+        return self.prices.get(bookmaker) == -neg_odds
+
+    def _prune(self):
+        while self.heap and not self._is_live(*self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def _compact_if_needed(self):
+        if len(self.heap) > self.COMPACTION_FACTOR * len(self.prices) + 16:
+            self.heap = [(-odds, bookmaker) for bookmaker, odds in self.prices.items()]
+            heapq.heapify(self.heap)
+
+
+class BestPriceIndex:
+    """Best price per outcome across bookmakers for a single match."""
+
+    def __init__(self):
+        self.outcomes: Dict[str, BestPriceHeap] = {}
+
+    def set_odds(self, bookmaker: str, odds: Dict[str, float]):
+        """Replace a bookmaker's quote: outcomes it no longer prices are withdrawn, so they can't back an arb."""
+        for outcome, outcome_odds in odds.items():
+            heap = self.outcomes.get(outcome)
+            if heap is None:
+                heap = self.outcomes[outcome] = BestPriceHeap()
+            heap.set_price(bookmaker, outcome_odds)
+
+        for outcome in [outcome for outcome in self.outcomes if outcome not in odds]:
+            heap = self.outcomes[outcome]
+            heap.remove_price(bookmaker)
+            if not heap.prices:
+                del self.outcomes[outcome]  # Nobody prices it any more
+
+    def remove_odds(self, bookmaker: str):
+        for heap in self.outcomes.values():
+            heap.remove_price(bookmaker)
+
+    def get_best_combination(self) -> Optional[Dict[str, Tuple[str, float]]]:
+        """
+        Returns the (bookmaker, odds) to back for each outcome with the lowest combined market margin, in O(outcomes) heap lookups.
+        The legs must span at least two bookmakers; None if that isn't possible or an outcome has no price.
+        """
+        best = {outcome: heap.best() for outcome, heap in self.outcomes.items()}
+        if not best or any(price is None for price in best.values()):
+            return None
+
+        bookmakers = {bookmaker for bookmaker, _ in best.values()}
+        if len(bookmakers) > 1:
+            return best
+
+        # One bookmaker has every best price, so swap the outcome whose runner-up adds the least to the margin
+        (only_bookmaker,) = bookmakers
+        best_swap = None
+        for outcome, (_, odds) in best.items():
+            runner_up = self.outcomes[outcome].best_excluding(only_bookmaker)
+            if runner_up is None:
+                continue
+
+            margin_increase = 1.0 / runner_up[1] - 1.0 / odds
+            if best_swap is None or margin_increase < best_swap[0]:
+                best_swap = (margin_increase, outcome, runner_up)
+
+        if best_swap is None:
+            return None
+
+        _, outcome, runner_up = best_swap
+        return {**best, outcome: runner_up}
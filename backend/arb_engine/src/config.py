@@ -1,8 +1,40 @@
 import os
+from backend.shared.config import get_default_process_name
 
 class ArbEngineConfig:
     TOTAL_STAKE_PER_ARB = float(os.getenv("TOTAL_STAKE_PER_ARB", 100))
 
+    # An arb is only published once while it stands (same match, bookmakers and odds); the TTL and max entries only bound memory,
+    # forgetting matches not detected on for the TTL. A TTL of 0 disables de-duplication
+    ARB_DEDUP_TTL_SECONDS = float(os.getenv("ARB_DEDUP_TTL_SECONDS", 300.0))
+    ARB_DEDUP_MAX_ENTRIES = int(os.getenv("ARB_DEDUP_MAX_ENTRIES", 10000))
+
+    # Odds book resync settings
+    ODDS_BOOK_SCAN_COUNT = int(os.getenv("ODDS_BOOK_SCAN_COUNT", 500))  # Keys per SCAN batch (and per pipeline flush)
+
+    # Detection mode: "per_update" detects on every odds update, "batch" re-scans the whole book on a timer
+    ARB_DETECTION_MODE = os.getenv("ARB_DETECTION_MODE", "per_update")
+    BATCH_DETECTION_INTERVAL_SECONDS = float(os.getenv("BATCH_DETECTION_INTERVAL_SECONDS", 0.1))
+
+    # Odds updates handled at once by the listener; 1 keeps updates applied in publish order
+    MAX_CONCURRENT_ODDS_UPDATES = int(os.getenv("MAX_CONCURRENT_ODDS_UPDATES", 1))
+
+    # Micro-batching: pending odds updates are drained into batches of up to this size, waiting at most the linger time
+    # for more after the first; only the latest quote per (match, bookmaker) in a batch is applied and detected on
+    ODDS_UPDATE_BATCH_SIZE = int(os.getenv("ODDS_UPDATE_BATCH_SIZE", 500))
+    ODDS_UPDATE_BATCH_LINGER_SECONDS = float(os.getenv("ODDS_UPDATE_BATCH_LINGER_SECONDS", 0.005))
+
+    # Sharding: every worker (process or container) registers itself in Redis and owns the odds partitions
+    # that the consistent hash ring of live workers maps to it. Also its consumer name, so a restarted worker resumes its entries
+    WORKER_ID = os.getenv("ARB_ENGINE_WORKER_ID", get_default_process_name())
+    WORKERS_KEY = os.getenv("ARB_ENGINE_WORKERS_KEY", "arb_engine:workers")
+    WORKER_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WORKER_HEARTBEAT_INTERVAL_SECONDS", 1.0))
+    WORKER_TTL_SECONDS = float(os.getenv("WORKER_TTL_SECONDS", 5.0))  # Workers without a heartbeat for this long are rebalanced away
+    HASH_RING_VIRTUAL_NODES = int(os.getenv("HASH_RING_VIRTUAL_NODES", 64))
+
+    # Consumer group the workers read the odds update streams through (streams transport only)
+    CONSUMER_GROUP = os.getenv("ARB_ENGINE_CONSUMER_GROUP", "arb_engine")
+
 arb_engine_config = ArbEngineConfig()
 
 
@@ -2,26 +2,37 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.arb_engine.src.arb_engine import ArbEngine
+from backend.arb_engine.src.batch_arb_detector import BatchArbDetector
+from backend.arb_engine.src.config import arb_engine_config
+from backend.arb_engine.src.partition_coordinator import PartitionCoordinator
 from backend.arb_engine.src.redis_listener import RedisListener
 from backend.shared.logging import setup_logging
-from backend.shared.redis_client import redis_client
+from backend.shared.redis_client import async_redis_client, redis_client
 
 setup_logging()
 
-arb_engine = ArbEngine(redis_client)
-redis_listener = RedisListener(redis_client, arb_engine)
+batch_detector = BatchArbDetector() if arb_engine_config.ARB_DETECTION_MODE == "batch" else None
+arb_engine = ArbEngine(redis_client, batch_detector=batch_detector)
+redis_listener = RedisListener(async_redis_client, arb_engine)
+partition_coordinator = PartitionCoordinator(redis_client, on_assignment=redis_listener.assign_partitions)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(redis_listener.listen())
+    tasks = [asyncio.create_task(redis_listener.listen()), asyncio.create_task(partition_coordinator.run())]
+    if batch_detector is not None:
+        tasks.append(asyncio.create_task(arb_engine.run_batch_detection()))
+
     try:
         yield
     finally:
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        partition_coordinator.leave()
 
 app = FastAPI(
     title="Arbitrage Engine",
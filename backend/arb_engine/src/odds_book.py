@@ -0,0 +1,130 @@
+import json
+import logging
+import redis
+from typing import Dict, Iterable, List, Optional
+from pydantic import ValidationError
+from backend.arb_engine.src.best_price_index import BestPriceIndex
+from backend.arb_engine.src.config import arb_engine_config
+from backend.shared.redis import AnyOdds, AnyOddsUpdate, OddsValues
+from backend.shared.redis import ODDS_MATCH_HASH_PREFIX, get_bookmaker_key_full_name, get_match_full_name
+from backend.shared.sharding import get_match_partition
+
+
+class OddsBook:
+    """In-memory view of the latest odds per (match, bookmaker), fed by the odds update stream."""
+
+    def __init__(self):
+        self.odds: Dict[str, Dict[str, AnyOdds]] = {}
+        self.best_prices: Dict[str, BestPriceIndex] = {}
+
+    def apply_odds_update(self, odds_update: AnyOddsUpdate):
+        """Apply an odds update or close to the book."""
+        if odds_update.event == "odds_close" or odds_update.odds is None:
+            self.remove_odds(odds_update.match, odds_update.bookmaker)
+        else:
+            self.set_odds(odds_update.match, odds_update.bookmaker, odds_update.odds)
+
+    def set_odds(self, match: str, bookmaker: str, odds: AnyOdds):
+        self.odds.setdefault(match, {})[bookmaker] = odds
+
+        best_prices = self.best_prices.get(match)
+        if best_prices is None:
+            best_prices = self.best_prices[match] = BestPriceIndex()
+        best_prices.set_odds(bookmaker, odds.outcomes)
+
+    def remove_odds(self, match: str, bookmaker: str):
+        match_odds = self.odds.get(match)
+        if match_odds is None:
+            return
+
+        match_odds.pop(bookmaker, None)
+        self.best_prices[match].remove_odds(bookmaker)
+        if not match_odds:
+            del self.odds[match]
+            del self.best_prices[match]
+
+    def get_odds_for_match(self, match: str) -> Dict[str, AnyOdds]:
+        """Return the live odds of every bookmaker for the given match."""
+        return self.odds.get(match, {})
+
+    def get_best_prices(self, match: str) -> Optional[BestPriceIndex]:
+        """Return the best-price index for the given match, if any bookmaker is quoting it."""
+        return self.best_prices.get(match)
+
+    def retain_partitions(self, partitions: Iterable[int]):
+        """Drop the matches outside the given odds partitions, e.g. after they were handed over to another worker."""
+        partitions = set(partitions)
+        for match in [match for match in self.odds if get_match_partition(match) not in partitions]:
+            del self.odds[match]
+            del self.best_prices[match]
+
+    def load_from_redis(self, redis_client: redis.Redis, partitions: Optional[Iterable[int]] = None):
+        """
+        Replace the book with the odds currently stored in the Redis hashes (SCAN + pipelined HGETALL).
+        If partitions are given, only the matches in those odds partitions are replaced.
+        """
+        self.load(self.fetch_from_redis(redis_client, partitions), partitions)
+
+    def fetch_from_redis(self, redis_client: redis.Redis, partitions: Optional[Iterable[int]] = None) -> Dict[str, Dict[str, OddsValues]]:
+        """
+        Read the odds of every match (or of the matches in the given partitions) from the Redis hashes in one SCAN pass.
+        Doesn't touch the book, so it can run in a thread while the event loop carries on.
+        """
+        partitions = None if partitions is None else set(partitions)
+        scan_count = arb_engine_config.ODDS_BOOK_SCAN_COUNT
+        odds: Dict[str, Dict[str, OddsValues]] = {}
+
+        match_hashes: List[str] = []
+        for match_hash in redis_client.scan_iter(match=f"{ODDS_MATCH_HASH_PREFIX}*", count=scan_count):
+            if partitions is not None and get_match_partition(get_match_full_name(match_hash)) not in partitions:
+                continue
+
+            match_hashes.append(match_hash)
+            if len(match_hashes) >= scan_count:
+                self._load_match_hashes(redis_client, match_hashes, odds)
+                match_hashes = []
+
+        if match_hashes:
+            self._load_match_hashes(redis_client, match_hashes, odds)
+
+        return odds
+
+    def load(self, odds: Dict[str, Dict[str, OddsValues]], partitions: Optional[Iterable[int]] = None):
+        """Replace the book (or the matches in the given partitions) with odds read by `fetch_from_redis`."""
+        partitions = None if partitions is None else set(partitions)
+        if partitions is None:
+            self.odds = {}
+            self.best_prices = {}
+        else:
+            for match in [match for match in self.odds if get_match_partition(match) in partitions]:
+                del self.odds[match]
+                del self.best_prices[match]
+
+        for match, match_odds in odds.items():
+            for bookmaker, bookmaker_odds in match_odds.items():
+                self.set_odds(match, bookmaker, bookmaker_odds)
+
+        partition_description = "" if partitions is None else f" (partitions {sorted(partitions)})"
+        logging.info(f"📚 Loaded odds book from Redis{partition_description}: {len(odds)} matches, {sum(len(o) for o in odds.values())} quotes")
+
+    def _load_match_hashes(self, redis_client: redis.Redis, match_hashes: List[str], odds: Dict[str, Dict[str, OddsValues]]):
+        pipeline = redis_client.pipeline(transaction=False)
+        for match_hash in match_hashes:
+            pipeline.hgetall(match_hash)
+
+        for match_hash, odds_data in zip(match_hashes, pipeline.execute()):
+            match = get_match_full_name(match_hash)
+            match_odds = {}
+
+            for bookmaker_key, odds_json in odds_data.items():
+                bookmaker = get_bookmaker_key_full_name(bookmaker_key)
+
+                try:
+                    match_odds[bookmaker] = OddsValues(**json.loads(odds_json))
+                except json.JSONDecodeError:
+                    logging.error(f"Failed to decode JSON for match={match}, bookmaker={bookmaker}: {repr(odds_json)}", exc_info=True)
+                except ValidationError:
+                    logging.error(f"Invalid OddsValues format for match={match}, bookmaker={bookmaker}", exc_info=True)
+
+            if match_odds:
+                odds[match] = match_odds
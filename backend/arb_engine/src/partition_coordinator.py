@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+import redis
+from typing import Awaitable, Callable, List, Set
+from backend.arb_engine.src.config import arb_engine_config
+from backend.shared.config import shared_config
+from backend.shared.sharding import ConsistentHashRing
+
+
+class PartitionCoordinator:
+    """
+    Registers this arb engine worker in Redis and keeps the odds partitions it owns in line with the live workers.
+    Partitions are placed on a consistent hash ring of the workers, so a worker joining or leaving only moves ~1/N of them.
+    """
+
+    def __init__(self, redis_client: redis.Redis, on_assignment: Callable[[Set[int]], Awaitable[None]],
+                 worker_id: str = arb_engine_config.WORKER_ID):
+        self.redis_client: redis.Redis = redis_client
+        self.on_assignment = on_assignment
+        self.worker_id = worker_id
+        self.workers: List[str] = []
+        self.partitions: Set[int] = set()
+
+    def heartbeat(self) -> List[str]:
+        """Refresh this worker's registration, expire workers that stopped heartbeating and return the live workers."""
+        now = time.time()
+        pipeline = self.redis_client.pipeline(transaction=True)
+        pipeline.zadd(arb_engine_config.WORKERS_KEY, {self.worker_id: now})
+        pipeline.zremrangebyscore(arb_engine_config.WORKERS_KEY, 0, now - arb_engine_config.WORKER_TTL_SECONDS)
+        pipeline.zrange(arb_engine_config.WORKERS_KEY, 0, -1)
+        return sorted(pipeline.execute()[-1])
+
+    def leave(self):
+        """Deregister so the other workers pick up this worker's partitions without waiting for it to expire."""
+        self.redis_client.zrem(arb_engine_config.WORKERS_KEY, self.worker_id)
+
+    def get_owned_partitions(self, workers: List[str]) -> Set[int]:
+        ring = ConsistentHashRing(workers, virtual_nodes=arb_engine_config.HASH_RING_VIRTUAL_NODES)
+        return {
+            partition for partition in range(shared_config.ODDS_UPDATE_PARTITIONS)
+            if ring.get_node(f"partition:{partition}") == self.worker_id
+        }
+
+    async def rebalance(self):
+        workers = await asyncio.to_thread(self.heartbeat)  # The sync client blocks, so keep it off the event loop
+        if workers == self.workers:
+            return
+
+        self.workers = workers
+        partitions = self.get_owned_partitions(workers)
+        if partitions != self.partitions:
+            logging.info(f"⚖️ Rebalanced across {len(workers)} workers: {self.worker_id} owns partitions {sorted(partitions)}")
+            self.partitions = partitions
+            await self.on_assignment(partitions)
+
+    async def run(self):
+        """Heartbeat on a timer, rebalancing whenever workers join or leave."""
+        while True:
+            try:
+                await self.rebalance()
+            except redis.RedisError:
+                logging.error("Failed to heartbeat arb engine worker.", exc_info=True)
+
+            await asyncio.sleep(arb_engine_config.WORKER_HEARTBEAT_INTERVAL_SECONDS)
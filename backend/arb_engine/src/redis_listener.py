@@ -1,43 +1,68 @@
 import logging
-import redis
-import json
-import asyncio
-from backend.shared.config import shared_config
+import redis.asyncio
+from typing import Iterable, List, Optional, Tuple
+from backend.shared.redis_listener import AsyncRedisListener, MessageData
+from backend.shared.sharding import get_channel_partition, get_partition_channel
 from backend.arb_engine.src.arb_engine import ArbEngine
-from backend.scraper.src.odds_publisher import OddsUpdateMessage
-from pydantic import ValidationError
+from backend.arb_engine.src.config import arb_engine_config
+from backend.shared.redis import MessageDecodeError, OddsUpdate, message_codec
 
-class RedisListener:
-    """Listens to redis for new odds and triggers the ArbDetector on them."""
+class RedisListener(AsyncRedisListener):
+    """
+    Listens to redis for new odds and triggers the ArbDetector on them, in coalesced micro-batches.
+    Only the channels of the odds partitions assigned to this worker are subscribed to.
+    """
 
-    def __init__(self, redis_client: redis.Redis, arb_engine: ArbEngine):
-        self.redis_client: redis.Redis = redis_client
+    def __init__(self, redis_client: redis.asyncio.Redis, arb_engine: ArbEngine):
+        super().__init__(
+            redis_client,
+            [],  # Subscribed once partitions are assigned
+            max_concurrency=arb_engine_config.MAX_CONCURRENT_ODDS_UPDATES,
+            max_batch_size=arb_engine_config.ODDS_UPDATE_BATCH_SIZE,
+            max_linger_seconds=arb_engine_config.ODDS_UPDATE_BATCH_LINGER_SECONDS,
+            consumer_group=arb_engine_config.CONSUMER_GROUP,
+            consumer_name=arb_engine_config.WORKER_ID
+        )
         self.arb_engine = arb_engine
 
-    async def listen(self):
-        pubsub = self.redis_client.pubsub()
-        pubsub.subscribe(shared_config.REDIS_ODDS_UPDATE_CHANNEL)
+    async def assign_partitions(self, partitions: Iterable[int]):
+        """Listen to the odds of the given partitions only, dropping the odds of partitions handed over to other workers."""
+        partitions = sorted(partitions)
+        self.arb_engine.retain_partitions(partitions)
+        await self.set_channels([get_partition_channel(partition) for partition in partitions])
 
-        logging.info(f"Subscribed to Redis channel: {shared_config.REDIS_ODDS_UPDATE_CHANNEL}")
+    async def on_subscribed(self, channels: List[str]):
+        # A (re)subscription means updates may have been missed while unsubscribed, so resync those partitions of the odds book,
+        # in one pass for every partition subscribed to together
+        partitions = sorted({get_channel_partition(channel) for channel in channels} - {None})
+        logging.info(f"Subscriptions confirmed on {', '.join(channels)}, resyncing odds book partitions {partitions}")
+        await self.arb_engine.resync_odds_book(partitions)
 
-        while True:
-            try:
-                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message:
-                    try:
-                        data = json.loads(message["data"])
-                        odds_update_message = OddsUpdateMessage(**data)
-                    
-                        logging.info(f"Received valid OddsUpdateMessage: {odds_update_message.model_dump_json()}")
+    async def handle_message(self, channel: str, data: MessageData):
+        await self.handle_batch([(channel, data)])
 
-                        await self.arb_engine.detect_arb_and_publish_bets(odds_update_message)
+    async def handle_batch(self, batch: List[Tuple[str, MessageData]]):
+        odds_updates = []
+        for _, data in batch:
+            odds_update = self.parse_odds_update(data)
+            if odds_update is not None:
+                odds_updates.append(odds_update)
 
-                    except json.JSONDecodeError:
-                        logging.error(f"Failed to decode JSON: {repr(message['data'])}", exc_info=True)
-                    except ValidationError:
-                        logging.error("Invalid OddsUpdateMessage", exc_info=True)
+        if not odds_updates:
+            return
 
-                await asyncio.sleep(0.001)  # Prevent high CPU usage
+        if self.arb_engine.batch_detector is not None:
+            self.arb_engine.apply_odds_updates(odds_updates)  # Detection runs on the batch timer
+        else:
+            await self.arb_engine.detect_arbs_and_publish_bets(odds_updates)
 
-            except Exception as e:
-                logging.error("Redis Listener Error", exc_info=True)
\ No newline at end of file
+    def parse_odds_update(self, data: MessageData) -> Optional[OddsUpdate]:
+        # Odds updates come from our own scraper, so they're decoded into records without pydantic validation
+        try:
+            odds_update = message_codec.decode_odds_update_record(data)
+            logging.info("Received OddsUpdate: %s", odds_update)
+            return odds_update
+
+        except MessageDecodeError:
+            logging.error(f"Failed to decode message: {repr(data)}", exc_info=True)
+        return None
@@ -0,0 +1,68 @@
+from backend.arb_engine.src.arb_dedup_cache import ArbDedupCache, get_arb_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_suppresses_standing_arb_however_long_it_stands():
+    """Ensure an arb is only published once while it's standing, however long that is, as long as it keeps being detected."""
+    clock = FakeClock()
+    cache = ArbDedupCache(ttl_seconds=5.0, max_entries=100, clock=clock)
+    arb_key = get_arb_key("Match1", [("home_win", "Smarkets", 1.9), ("away_win", "Bet365", 2.5)])
+
+    assert cache.should_publish(arb_key)
+    for now in [4.0, 8.0, 12.0, 16.0]:  # Past the TTL since it was first published
+        clock.now = now
+        assert not cache.should_publish(get_arb_key("Match1", [("home_win", "Smarkets", 1.9), ("away_win", "Bet365", 2.5)]))
+
+
+def test_publishes_again_when_the_best_combination_changes_or_the_arb_comes_back():
+    """Ensure a repriced arb is new, as is an arb coming back after the match was cleared, even if it's the same one as before."""
+    cache = ArbDedupCache(ttl_seconds=5.0, max_entries=100, clock=FakeClock())
+    arb_key = get_arb_key("Match1", [("home_win", "Smarkets", 1.9), ("away_win", "Bet365", 2.5)])
+    repriced_key = get_arb_key("Match1", [("home_win", "Smarkets", 1.9), ("away_win", "Bet365", 2.6)])
+
+    assert cache.should_publish(arb_key)
+    assert cache.should_publish(repriced_key)
+    assert cache.should_publish(arb_key)  # Back to the first combination: a different arb from the one standing
+    assert len(cache) == 1
+
+    cache.clear("Match1")
+    assert cache.should_publish(arb_key)
+
+
+def test_forgets_matches_not_detected_on_for_the_ttl():
+    """Ensure the TTL only bounds memory: a match's entry goes once it wasn't detected on for the TTL."""
+    clock = FakeClock()
+    cache = ArbDedupCache(ttl_seconds=5.0, max_entries=100, clock=clock)
+    cache.should_publish(get_arb_key("Match1", []))
+
+    clock.now = 5.0
+    cache.should_publish(get_arb_key("Match2", []))
+
+    assert len(cache) == 1
+
+
+def test_bounded_to_max_entries():
+    """Ensure the least recently detected matches are evicted once the cache is full."""
+    cache = ArbDedupCache(ttl_seconds=5.0, max_entries=2, clock=FakeClock())
+
+    for match in ["Match1", "Match2", "Match3"]:
+        assert cache.should_publish(get_arb_key(match, []))
+
+    assert len(cache) == 2
+    assert cache.should_publish(get_arb_key("Match1", []))
+    assert not cache.should_publish(get_arb_key("Match3", []))
+
+
+def test_zero_ttl_disables_deduplication():
+    cache = ArbDedupCache(ttl_seconds=0, max_entries=100)
+
+    assert cache.should_publish(get_arb_key("Match1", []))
+    assert cache.should_publish(get_arb_key("Match1", []))
+    assert len(cache) == 0
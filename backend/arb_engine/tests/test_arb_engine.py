@@ -1,11 +1,16 @@
 import pytest
 import json
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from backend.arb_engine.src.arb_dedup_cache import ArbDedupCache
 from backend.arb_engine.src.arb_engine import ArbEngine
-from backend.shared.redis import OddsUpdateMessage, OddsValues, get_odds_match_bookmaker_key
+from backend.arb_engine.src.batch_arb_detector import BatchArbDetector
+from backend.arb_engine.src.redis_listener import RedisListener
+from backend.shared.redis import get_odds_match_bookmaker_key, get_odds_match_hash
+from backend.shared.redis import ArbMessage, OddsQuote, OddsUpdate, OddsUpdateMessage, OddsValues
 from backend.shared.arb_math import calculate_guaranteed_profit
 from backend.arb_engine.src.config import arb_engine_config
 from backend.shared.config import shared_config
+from backend.shared.sharding import get_match_partition, get_partition_channel
 from backend.shared.utils import current_milli_time
 
 @pytest.fixture
@@ -22,12 +27,13 @@ async def test_detect_arb_and_publish_bets(arb_engine, mock_redis):
     """Test full arbitrage detection and ensure the correct arb is published to Redis."""
 
     # Arrange
-    mock_redis.hgetall.side_effect = lambda key: {
-        "odds:Match1": {
-            get_odds_match_bookmaker_key("Bet365"): json.dumps({"home_win": 2.0, "away_win": 2.5}),
-            get_odds_match_bookmaker_key("Smarkets"): json.dumps({"home_win": 1.9, "away_win": 2.1})
-        }
-    }.get(key, {})
+    arb_engine.odds_book.apply_odds_update(OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Smarkets",
+        odds=OddsValues(home_win=1.9, away_win=2.1),
+        timestamp=current_milli_time()
+    ))
     mock_redis.publish = MagicMock()
 
     # Act
@@ -42,8 +48,8 @@ async def test_detect_arb_and_publish_bets(arb_engine, mock_redis):
 
     ### Assert ###
 
-    # Ensure Redis was queried correctly
-    mock_redis.hgetall.assert_called_once_with("odds:Match1")
+    # Ensure detection was served from the in-memory odds book
+    mock_redis.hgetall.assert_not_called()
 
     mock_redis.publish.assert_called_once()  # Ensure something was published
     published_channel, published_message = mock_redis.publish.call_args[0]  # Extract call args
@@ -51,24 +57,23 @@ async def test_detect_arb_and_publish_bets(arb_engine, mock_redis):
     # Verify it was published to the correct channel
     assert published_channel == shared_config.REDIS_ARB_DETECTIONS_CHANNEL
 
-    # Validate the published arbitrage opportunity
+    # Validate the published arbitrage opportunity (Smarkets home + Bet365 away beats Bet365 home + Smarkets away)
     published_arb = json.loads(published_message)
     assert published_arb["match"] == "Match1"
-    assert published_arb["home_win_bookmaker"] == "Bet365"
-    assert published_arb["away_win_bookmaker"] == "Smarkets"
-    assert published_arb["home_win_odds"] == 2.0
-    assert published_arb["away_win_odds"] == 2.1
+    assert [leg["outcome"] for leg in published_arb["legs"]] == ["home_win", "away_win"]
+    assert [leg["bookmaker"] for leg in published_arb["legs"]] == ["Smarkets", "Bet365"]
+    assert [leg["odds"] for leg in published_arb["legs"]] == [1.9, 2.5]
     assert published_arb["status"] == "detected"
 
     # Validate stake calculations
     total_stake = arb_engine_config.TOTAL_STAKE_PER_ARB
-    expected_stake_home = (total_stake * (1 / 2.0)) / ((1 / 2.0) + (1 / 2.1))
-    expected_stake_away = (total_stake * (1 / 2.1)) / ((1 / 2.0) + (1 / 2.1))
+    expected_stake_home = (total_stake * (1 / 1.9)) / ((1 / 1.9) + (1 / 2.5))
+    expected_stake_away = (total_stake * (1 / 2.5)) / ((1 / 1.9) + (1 / 2.5))
     expected_profit = calculate_guaranteed_profit(
-        expected_stake_home, expected_stake_away, 2.0, 2.1
+        [expected_stake_home, expected_stake_away], [1.9, 2.5]
     )
-    assert published_arb["home_win_stake"] == pytest.approx(expected_stake_home, rel=1e-3)
-    assert published_arb["away_win_stake"] == pytest.approx(expected_stake_away, rel=1e-3)
+    assert published_arb["legs"][0]["stake"] == pytest.approx(expected_stake_home, rel=1e-3)
+    assert published_arb["legs"][1]["stake"] == pytest.approx(expected_stake_away, rel=1e-3)
     assert published_arb["guaranteed_profit"] == pytest.approx(expected_profit, rel=1e-3)
 
 
@@ -77,12 +82,13 @@ async def test_no_arb_detected(arb_engine, mock_redis):
     """Test that no arbitrage is detected when combined market margin is >= 1.0."""
 
     # Arrange
-    mock_redis.hgetall.side_effect = lambda key: {
-        "odds:Match1": {
-            get_odds_match_bookmaker_key("Bet365"): json.dumps({"home_win": 1.8, "away_win": 2.3}),
-            get_odds_match_bookmaker_key("Smarkets"): json.dumps({"home_win": 1.9, "away_win": 2.2})
-        }
-    }.get(key, {})
+    arb_engine.odds_book.apply_odds_update(OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Smarkets",
+        odds=OddsValues(home_win=1.9, away_win=2.2),
+        timestamp=current_milli_time()
+    ))
     mock_redis.publish = MagicMock()
 
     # Act
@@ -95,6 +101,317 @@ async def test_no_arb_detected(arb_engine, mock_redis):
     ))
 
     # Assert
-    mock_redis.hgetall.assert_called_once_with("odds:Match1")
+    mock_redis.hgetall.assert_not_called()
+    mock_redis.publish.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_odds_close_removes_bookmaker_from_detection(arb_engine, mock_redis):
+    """Test that a closed quote no longer takes part in arbitrage detection."""
+
+    # Arrange
+    arb_engine.odds_book.apply_odds_update(OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Smarkets",
+        odds=OddsValues(home_win=1.9, away_win=2.1),
+        timestamp=current_milli_time()
+    ))
+    await arb_engine.detect_arb_and_publish_bets(odds_update = OddsUpdateMessage(
+        event="odds_close",
+        match="Match1",
+        bookmaker="Smarkets",
+        odds=None,
+        timestamp=current_milli_time()
+    ))
+    mock_redis.publish = MagicMock()
+
+    # Act
+    await arb_engine.detect_arb_and_publish_bets(odds_update = OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Bet365",
+        odds=OddsValues(home_win=2.0, away_win=2.5),
+        timestamp=current_milli_time()
+    ))
+
+    # Assert
+    assert "Smarkets" not in arb_engine.odds_book.get_odds_for_match("Match1")
     mock_redis.publish.assert_not_called()
 
+
+@pytest.mark.asyncio
+async def test_publishes_globally_best_pairing(arb_engine, mock_redis):
+    """Test that the most profitable pairing across all bookmakers is published, not just one involving the updated bookmaker."""
+
+    # Arrange
+    for bookmaker, home_win, away_win in [("Smarkets", 2.3, 1.6), ("Betfair", 1.5, 2.4), ("Paddy Power", 1.9, 1.9)]:
+        arb_engine.odds_book.apply_odds_update(OddsUpdateMessage(
+            event="odds_update",
+            match="Match1",
+            bookmaker=bookmaker,
+            odds=OddsValues(home_win=home_win, away_win=away_win),
+            timestamp=current_milli_time()
+        ))
+    mock_redis.publish = MagicMock()
+
+    # Act
+    await arb_engine.detect_arb_and_publish_bets(odds_update = OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Bet365",
+        odds=OddsValues(home_win=2.1, away_win=1.7),
+        timestamp=current_milli_time()
+    ))
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = json.loads(mock_redis.publish.call_args[0][1])
+    assert [leg["bookmaker"] for leg in published_arb["legs"]] == ["Smarkets", "Betfair"]
+    assert [leg["odds"] for leg in published_arb["legs"]] == [2.3, 2.4]
+
+
+@pytest.mark.asyncio
+async def test_detect_three_way_arb(arb_engine, mock_redis):
+    """Test that 1X2 markets are detected by backing the best price per outcome."""
+
+    # Arrange
+    for bookmaker, home_win, draw, away_win in [("Smarkets", 2.5, 3.2, 3.0), ("Betfair", 2.1, 4.0, 3.1)]:
+        arb_engine.odds_book.apply_odds_update(OddsUpdateMessage(
+            event="odds_update",
+            match="Match1",
+            bookmaker=bookmaker,
+            odds=OddsValues(home_win=home_win, draw=draw, away_win=away_win),
+            timestamp=current_milli_time()
+        ))
+    mock_redis.publish = MagicMock()
+
+    # Act
+    await arb_engine.detect_arb_and_publish_bets(odds_update = OddsUpdateMessage(
+        event="odds_update",
+        match="Match1",
+        bookmaker="Bet365",
+        odds=OddsValues(home_win=1.9, draw=3.3, away_win=5.0),
+        timestamp=current_milli_time()
+    ))
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = json.loads(mock_redis.publish.call_args[0][1])
+    assert [(leg["outcome"], leg["bookmaker"], leg["odds"]) for leg in published_arb["legs"]] == [
+        ("home_win", "Smarkets", 2.5), ("draw", "Betfair", 4.0), ("away_win", "Bet365", 5.0)
+    ]
+    stakes = [leg["stake"] for leg in published_arb["legs"]]
+    assert sum(stakes) == pytest.approx(arb_engine_config.TOTAL_STAKE_PER_ARB)
+    assert published_arb["guaranteed_profit"] == pytest.approx(
+        arb_engine_config.TOTAL_STAKE_PER_ARB / (1 / 2.5 + 1 / 4.0 + 1 / 5.0) - arb_engine_config.TOTAL_STAKE_PER_ARB
+    )
+
+
+def test_detect_batch_arbs_and_publish_bets(mock_redis):
+    """Test that batch mode publishes arbs for every match found by the vectorized scan."""
+
+    # Arrange
+    arb_engine = ArbEngine(redis_client=mock_redis, batch_detector=BatchArbDetector())
+    for match in ["Match1", "Match2"]:
+        for bookmaker, home_win, away_win in [("Bet365", 2.0, 2.5), ("Smarkets", 1.9, 2.1)]:
+            arb_engine.apply_odds_update(OddsUpdateMessage(
+                event="odds_update",
+                match=match,
+                bookmaker=bookmaker,
+                odds=OddsValues(home_win=home_win, away_win=away_win),
+                timestamp=current_milli_time()
+            ))
+    mock_redis.publish = MagicMock()
+    assert arb_engine.dirty_matches == {"Match1", "Match2"}
+
+    # Act
+    arb_engine.detect_batch_arbs_and_publish_bets()
+
+    # Assert
+    assert not arb_engine.dirty_matches
+    assert mock_redis.publish.call_count == 2
+    published_arbs = [json.loads(call[0][1]) for call in mock_redis.publish.call_args_list]
+    assert {arb["match"] for arb in published_arbs} == {"Match1", "Match2"}
+    for published_arb in published_arbs:
+        assert [leg["bookmaker"] for leg in published_arb["legs"]] == ["Smarkets", "Bet365"]
+        assert published_arb["status"] == "detected"
+
+
+def test_batch_scan_only_publishes_arbs_of_changed_matches(mock_redis):
+    """Test that a scan doesn't re-publish the standing arbs of matches whose odds didn't change since the last scan."""
+
+    # Arrange
+    arb_engine = ArbEngine(redis_client=mock_redis, batch_detector=BatchArbDetector(), dedup_cache=ArbDedupCache(ttl_seconds=0, max_entries=0))
+    for match in ["Match1", "Match2"]:
+        for bookmaker, home_win, away_win in [("Bet365", 2.0, 2.5), ("Smarkets", 1.9, 2.1)]:
+            arb_engine.apply_odds_update(OddsUpdateMessage(
+                event="odds_update",
+                match=match,
+                bookmaker=bookmaker,
+                odds=OddsValues(home_win=home_win, away_win=away_win),
+                timestamp=current_milli_time()
+            ))
+    arb_engine.detect_batch_arbs_and_publish_bets()
+    mock_redis.publish = MagicMock()
+
+    # Act
+    arb_engine.apply_odds_update(OddsUpdateMessage(
+        event="odds_update",
+        match="Match2",
+        bookmaker="Betfair",
+        odds=OddsValues(home_win=1.5, away_win=2.0),
+        timestamp=current_milli_time()
+    ))
+    arb_engine.detect_batch_arbs_and_publish_bets()
+    arb_engine.detect_batch_arbs_and_publish_bets()  # Nothing changed since
+
+    # Assert
+    assert [json.loads(call[0][1])["match"] for call in mock_redis.publish.call_args_list] == ["Match2"]
+
+
+@pytest.mark.asyncio
+async def test_detect_arbs_coalesces_superseded_updates(arb_engine, mock_redis):
+    """Test that a batch only applies the latest quote per (match, bookmaker) and detects once per affected match."""
+
+    # Arrange
+    def odds_update(match, bookmaker, home_win, away_win, event="odds_update"):
+        return OddsUpdateMessage(
+            event=event,
+            match=match,
+            bookmaker=bookmaker,
+            odds=OddsValues(home_win=home_win, away_win=away_win) if event == "odds_update" else None,
+            timestamp=current_milli_time()
+        )
+
+    odds_updates = [
+        odds_update("Match1", "Smarkets", 1.9, 2.1),
+        odds_update("Match1", "Bet365", 2.0, 2.5),
+        odds_update("Match1", "Smarkets", 1.5, 2.0),  # Supersedes Smarkets' first quote: no arb at these prices
+        odds_update("Match2", "Bet365", 2.0, 2.5),
+        odds_update("Match2", "Bet365", None, None, event="odds_close"),  # Closed before it was ever detected on
+    ]
+    mock_redis.publish = MagicMock()
+    arb_engine.odds_book.set_odds = MagicMock(wraps=arb_engine.odds_book.set_odds)
+    arb_engine.find_best_arbitrage_opportunity = MagicMock(wraps=arb_engine.find_best_arbitrage_opportunity)
+
+    # Act
+    await arb_engine.detect_arbs_and_publish_bets(odds_updates)
+
+    # Assert
+    assert arb_engine.odds_book.set_odds.call_count == 2
+    assert arb_engine.odds_book.get_odds_for_match("Match1")["Smarkets"].outcomes == {"home_win": 1.5, "away_win": 2.0}
+    assert arb_engine.odds_book.get_odds_for_match("Match2") == {}
+    assert sorted(call.args[0] for call in arb_engine.find_best_arbitrage_opportunity.call_args_list) == ["Match1", "Match2"]
+    mock_redis.publish.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_arbs_are_published_once(arb_engine, mock_redis):
+    """Test that an arb that stays live isn't re-published on unrelated updates for its match, but a repriced one is."""
+
+    # Arrange
+    def odds_update(bookmaker, home_win, away_win):
+        return OddsUpdateMessage(
+            event="odds_update",
+            match="Match1",
+            bookmaker=bookmaker,
+            odds=OddsValues(home_win=home_win, away_win=away_win),
+            timestamp=current_milli_time()
+        )
+
+    mock_redis.publish = MagicMock()
+    await arb_engine.detect_arb_and_publish_bets(odds_update("Smarkets", 1.9, 2.1))
+
+    # Act
+    await arb_engine.detect_arb_and_publish_bets(odds_update("Bet365", 2.0, 2.5))  # Arb: Smarkets home, Bet365 away
+    await arb_engine.detect_arb_and_publish_bets(odds_update("Betfair", 1.5, 1.5))  # Unrelated update, same arb
+    await arb_engine.detect_arb_and_publish_bets(odds_update("Bet365", 2.0, 2.6))  # Repriced arb
+
+    # Assert
+    assert mock_redis.publish.call_count == 2
+    published_odds = [[leg["odds"] for leg in json.loads(call[0][1])["legs"]] for call in mock_redis.publish.call_args_list]
+    assert published_odds == [[1.9, 2.5], [1.9, 2.6]]
+
+
+@pytest.mark.asyncio
+async def test_arb_is_published_again_after_it_vanished(arb_engine, mock_redis):
+    """Test that once a match's arb has gone, the same arb coming back is published again, in both detection modes."""
+
+    # Arrange
+    def odds_update(bookmaker, home_win, away_win):
+        return OddsUpdateMessage(
+            event="odds_update",
+            match="Match1",
+            bookmaker=bookmaker,
+            odds=OddsValues(home_win=home_win, away_win=away_win),
+            timestamp=current_milli_time()
+        )
+
+    batch_engine = ArbEngine(redis_client=mock_redis, batch_detector=BatchArbDetector())
+    mock_redis.publish = MagicMock()
+    updates = [
+        odds_update("Smarkets", 1.9, 2.1),
+        odds_update("Bet365", 2.0, 2.5),  # Arb
+        odds_update("Bet365", 1.8, 1.8),  # Gone
+        odds_update("Bet365", 2.0, 2.5),  # The same arb again
+    ]
+
+    # Act
+    for update in updates:
+        await arb_engine.detect_arb_and_publish_bets(update)
+    per_update_publishes = mock_redis.publish.call_count
+    for update in updates:
+        batch_engine.apply_odds_update(update)
+        batch_engine.detect_batch_arbs_and_publish_bets()
+
+    # Assert
+    assert per_update_publishes == 2
+    assert mock_redis.publish.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_detect_arbs_from_odds_update_records(arb_engine, mock_redis):
+    """Test that validation-free odds update records go through detection and publish a valid ArbMessage."""
+
+    # Arrange
+    mock_redis.publish = MagicMock()
+    odds_updates = [
+        OddsUpdate("odds_update", "Match1", "Smarkets", OddsQuote({"home_win": 1.9, "away_win": 2.1}), current_milli_time()),
+        OddsUpdate("odds_update", "Match1", "Bet365", OddsQuote({"home_win": 2.0, "away_win": 2.5}), current_milli_time()),
+    ]
+
+    # Act
+    await arb_engine.detect_arbs_and_publish_bets(odds_updates)
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = ArbMessage(**json.loads(mock_redis.publish.call_args[0][1]))
+    assert [(leg.bookmaker, leg.odds) for leg in published_arb.legs] == [("Smarkets", 1.9), ("Bet365", 2.5)]
+    assert published_arb.guaranteed_profit == pytest.approx(
+        calculate_guaranteed_profit([leg.stake for leg in published_arb.legs], [1.9, 2.5])
+    )
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 4)
+async def test_partitions_subscribed_together_are_resynced_in_one_scan(mock_redis):
+    """Test that newly subscribed partitions are reloaded from Redis in a single SCAN pass, leaving other partitions alone."""
+
+    # Arrange
+    arb_engine = ArbEngine(redis_client=mock_redis)
+    listener = RedisListener(MagicMock(), arb_engine)
+    matches = [f"Match{i}" for i in range(20)]
+    partitions = sorted({get_match_partition(match) for match in matches})[:2]
+    resynced = [match for match in matches if get_match_partition(match) in partitions]
+    mock_redis.scan_iter.return_value = iter([get_odds_match_hash(match) for match in matches])
+    mock_redis.pipeline.return_value.execute.return_value = [
+        {get_odds_match_bookmaker_key("Bet365"): json.dumps({"home_win": 2.0, "away_win": 2.0})} for _ in resynced
+    ]
+
+    # Act
+    await listener.on_subscribed([get_partition_channel(partition) for partition in partitions])
+
+    # Assert
+    mock_redis.scan_iter.assert_called_once()
+    assert sorted(arb_engine.odds_book.odds) == sorted(resynced)
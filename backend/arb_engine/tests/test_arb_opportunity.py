@@ -2,19 +2,39 @@ import pytest
 from backend.arb_engine.src.arb_engine import ArbOpportunity
 
 def test_arb_opportunity_calculations():
-    arb = ArbOpportunity("Match1", "BookmakerA", "BookmakerB", odds_home_win=2.0, odds_away_win=2.5)
+    arb = ArbOpportunity("Match1", bookmakers={"home_win": "BookmakerA", "away_win": "BookmakerB"}, odds={"home_win": 2.0, "away_win": 2.5})
 
-    assert arb.get_probability_home_win() == pytest.approx(0.5, rel=1e-3), "Home win probability should be 1/odds."
-    assert arb.get_probability_away_win() == pytest.approx(0.4, rel=1e-3), "Away win probability should be 1/odds."
+    assert arb.get_implied_probability("home_win") == pytest.approx(0.5, rel=1e-3), "Home win probability should be 1/odds."
+    assert arb.get_implied_probability("away_win") == pytest.approx(0.4, rel=1e-3), "Away win probability should be 1/odds."
     assert arb.get_combined_market_margin() == pytest.approx(0.9, rel=1e-3), "Market margin should be sum of probabilities."
 
+def test_three_way_arb_opportunity_calculations():
+    arb = ArbOpportunity(
+        "Match1",
+        bookmakers={"home_win": "BookmakerA", "draw": "BookmakerB", "away_win": "BookmakerC"},
+        odds={"home_win": 2.5, "draw": 4.0, "away_win": 5.0}
+    )
+
+    assert arb.get_combined_market_margin() == pytest.approx(0.85, rel=1e-3), "Market margin should be sum of probabilities."
+    assert arb.compute_stake_at_bookmaker("draw", 100) == pytest.approx(100 * 0.25 / 0.85, rel=1e-3)
+    assert sum(arb.compute_stake_at_bookmaker(outcome, 100) for outcome in arb.odds) == pytest.approx(100, rel=1e-3)
+
 @pytest.mark.parametrize(
-    "odds_home, odds_away, expected, message",
+    "odds, expected, message",
     [
-        (2.0, 2.5, True, "Arbitrage should exist if market margin < 1."),
-        (2.0, 1.9, False, "Arbitrage should not exist if market margin >= 1."),
+        ({"home_win": 2.0, "away_win": 2.5}, True, "Arbitrage should exist if market margin < 1."),
+        ({"home_win": 2.0, "away_win": 1.9}, False, "Arbitrage should not exist if market margin >= 1."),
+        ({"home_win": 2.5, "draw": 4.0, "away_win": 5.0}, True, "Three-way arbitrage should exist if market margin < 1."),
+        ({"home_win": 2.5, "draw": 3.2, "away_win": 3.0}, False, "Three-way arbitrage should not exist if market margin >= 1."),
     ]
 )
-def test_arb_opportunity_arbitrage_exists(odds_home, odds_away, expected, message):
-    arb = ArbOpportunity("Match1", "BookmakerA", "BookmakerB", odds_home_win=odds_home, odds_away_win=odds_away)
-    assert arb.is_net_gain() == expected, message
\ No newline at end of file
+def test_arb_opportunity_arbitrage_exists(odds, expected, message):
+    arb = ArbOpportunity("Match1", bookmakers={outcome: f"Bookmaker{i}" for i, outcome in enumerate(odds)}, odds=odds)
+    assert arb.is_net_gain() == expected, message
+
+def test_implied_probabilities_computed_once():
+    arb = ArbOpportunity("Match1", bookmakers={"home_win": "BookmakerA", "away_win": "BookmakerB"}, odds={"home_win": 2.0, "away_win": 2.5})
+
+    assert not hasattr(arb, "__dict__"), "ArbOpportunity should be a slotted record."
+    assert arb.implied_probabilities == {"home_win": pytest.approx(0.5), "away_win": pytest.approx(0.4)}
+    assert arb.combined_market_margin == pytest.approx(0.9)
@@ -0,0 +1,90 @@
+import pytest
+import random
+import numpy as np
+from backend.arb_engine.src.arb_engine import ArbEngine
+from backend.arb_engine.src.batch_arb_detector import BatchArbDetector
+from backend.arb_engine.src.odds_book import OddsBook
+from backend.shared.redis import OddsValues
+
+
+def test_detect_empty_book():
+    result = BatchArbDetector().detect(overall_stake=100)
+    assert list(result.arbs()) == []
+
+
+def test_detect_matches_per_match_math():
+    """Ensure stakes, margin and profit match the ArbOpportunity formulas, and closed quotes are ignored."""
+    detector = BatchArbDetector()
+    detector.set_odds("Match1", "Bet365", OddsValues(home_win=2.0, away_win=2.5))
+    detector.set_odds("Match1", "Smarkets", OddsValues(home_win=1.9, away_win=2.1))
+    detector.set_odds("Match2", "Bet365", OddsValues(home_win=1.8, away_win=2.0))
+    detector.set_odds("Match2", "Smarkets", OddsValues(home_win=1.9, away_win=1.9))
+    detector.set_odds("Match3", "Bet365", OddsValues(home_win=3.0, away_win=3.0))  # Arb only if paired with itself
+
+    result = detector.detect(overall_stake=100)
+    arbs = list(result.arbs())
+
+    assert len(arbs) == 1
+    arb = arbs[0]
+    margin = 1 / 1.9 + 1 / 2.5
+    assert arb.match == "Match1"
+    assert [(leg.outcome, leg.bookmaker, leg.odds) for leg in arb.legs] == [("home_win", "Smarkets", 1.9), ("away_win", "Bet365", 2.5)]
+    assert arb.legs[0].stake == pytest.approx(100 * (1 / 1.9) / margin)
+    assert arb.legs[1].stake == pytest.approx(100 * (1 / 2.5) / margin)
+    assert arb.guaranteed_profit == pytest.approx(100 / margin - 100)
+
+    detector.remove_odds("Match1", "Bet365")
+    assert list(detector.detect(overall_stake=100).arbs()) == []
+
+
+def test_detect_mixed_markets():
+    """Ensure two-way and three-way matches are scanned together, each over its own outcomes."""
+    detector = BatchArbDetector(initial_outcomes=1)
+    detector.set_odds("Match1", "Bet365", OddsValues(home_win=2.0, away_win=2.5))
+    detector.set_odds("Match1", "Smarkets", OddsValues(home_win=2.2, away_win=1.9))
+    detector.set_odds("Match2", "Bet365", OddsValues(home_win=2.5, draw=3.2, away_win=3.0))
+    detector.set_odds("Match2", "Smarkets", OddsValues(home_win=2.1, draw=4.0, away_win=3.1))
+
+    arbs = {arb.match: arb for arb in detector.detect(overall_stake=100).arbs()}
+
+    assert [(leg.outcome, leg.bookmaker) for leg in arbs["Match1"].legs] == [("home_win", "Smarkets"), ("away_win", "Bet365")]
+    assert [(leg.outcome, leg.bookmaker) for leg in arbs["Match2"].legs] == [("home_win", "Bet365"), ("away_win", "Smarkets"), ("draw", "Smarkets")]
+    assert sum(leg.stake for leg in arbs["Match2"].legs) == pytest.approx(100)
+
+
+@pytest.mark.parametrize("outcomes", [("home_win", "away_win"), ("home_win", "draw", "away_win")])
+def test_detect_agrees_with_best_price_index(outcomes):
+    """Ensure the vectorized scan picks the same combination as the per-update path on a random book, including array growth."""
+    rng = random.Random(7)
+    detector = BatchArbDetector(initial_matches=2, initial_bookmakers=2, initial_outcomes=1)
+    odds_book = OddsBook()
+
+    for _ in range(3000):
+        match, bookmaker = f"Match{rng.randrange(40)}", f"Bookmaker{rng.randrange(12)}"
+        if rng.random() < 0.2:
+            detector.remove_odds(match, bookmaker)
+            odds_book.remove_odds(match, bookmaker)
+        else:
+            odds = OddsValues(**{outcome: round(rng.uniform(1.5, 1.2 * len(outcomes) + 0.4), 2) for outcome in outcomes})
+            detector.set_odds(match, bookmaker, odds)
+            odds_book.set_odds(match, bookmaker, odds)
+
+    result = detector.detect(overall_stake=100)
+    batch_arbs = {arb.match: arb for arb in result.arbs()}
+
+    engine = ArbEngine(redis_client=None, odds_book=odds_book)
+    expected_arbs = {}
+    for match in odds_book.odds:
+        arb = engine.find_best_arbitrage_opportunity(match)
+        if arb is not None and arb.is_net_gain():
+            expected_arbs[match] = arb
+
+    assert len(expected_arbs) > 0
+    assert batch_arbs.keys() == expected_arbs.keys()
+    for match, arb in expected_arbs.items():
+        batch_legs = {leg.outcome: leg for leg in batch_arbs[match].legs}
+        assert {outcome: leg.odds for outcome, leg in batch_legs.items()} == arb.odds
+        for outcome, leg in batch_legs.items():
+            assert leg.stake == pytest.approx(arb.compute_stake_at_bookmaker(outcome, 100))
+
+    assert np.count_nonzero(result.is_net_gain) == len(expected_arbs)
@@ -0,0 +1,95 @@
+import pytest
+from backend.arb_engine.src.best_price_index import BestPriceHeap, BestPriceIndex
+
+
+def test_best_price_heap_updates_and_removals():
+    """Ensure the heap always reports the highest live price as quotes move and close."""
+    heap = BestPriceHeap()
+    assert heap.best() is None
+
+    heap.set_price("Bet365", 2.0)
+    heap.set_price("Smarkets", 2.4)
+    heap.set_price("Betfair", 2.2)
+    assert heap.best() == ("Smarkets", 2.4)
+
+    heap.set_price("Smarkets", 1.8)  # Best price moves down
+    assert heap.best() == ("Betfair", 2.2)
+
+    heap.remove_price("Betfair")
+    assert heap.best() == ("Bet365", 2.0)
+    assert heap.best_excluding("Bet365") == ("Smarkets", 1.8)
+    assert heap.best() == ("Bet365", 2.0)  # Lookups leave the heap intact
+
+    heap.remove_price("Bet365")
+    heap.remove_price("Smarkets")
+    assert heap.best() is None
+    assert heap.best_excluding("Bet365") is None
+
+
+def test_best_price_heap_compacts_stale_entries():
+    """Ensure repeated updates don't grow the heap without bound."""
+    heap = BestPriceHeap()
+    for i in range(10_000):
+        heap.set_price(f"Bookmaker{i % 5}", 1.5 + (i % 97) / 100)
+
+    assert len(heap.heap) <= BestPriceHeap.COMPACTION_FACTOR * 5 + 16 + 1
+    assert heap.best()[1] == max(heap.prices.values())
+
+
+@pytest.mark.parametrize(
+    "quotes, expected_combination, message",
+    [
+        (
+            {"A": {"home_win": 2.0, "away_win": 2.5}, "B": {"home_win": 1.9, "away_win": 2.1}},
+            {"home_win": ("B", 1.9), "away_win": ("A", 2.5)},
+            "Same bookmaker has both best prices"
+        ),
+        (
+            {"A": {"home_win": 2.3, "away_win": 1.6}, "B": {"home_win": 1.5, "away_win": 2.4}, "C": {"home_win": 1.9, "away_win": 1.9}},
+            {"home_win": ("A", 2.3), "away_win": ("B", 2.4)},
+            "Best prices at different bookmakers"
+        ),
+        (
+            {"A": {"home_win": 2.5, "draw": 3.2, "away_win": 3.0}, "B": {"home_win": 2.1, "draw": 4.0, "away_win": 3.1}},
+            {"home_win": ("A", 2.5), "draw": ("B", 4.0), "away_win": ("B", 3.1)},
+            "Three-way legs may share a bookmaker as long as they span two"
+        ),
+        (
+            {"A": {"home_win": 2.5, "draw": 4.0, "away_win": 5.0}, "B": {"home_win": 2.4, "draw": 3.0, "away_win": 3.0}},
+            {"home_win": ("B", 2.4), "draw": ("A", 4.0), "away_win": ("A", 5.0)},
+            "Three-way swap of the cheapest runner-up when one bookmaker has every best price"
+        ),
+        ({"A": {"home_win": 2.0, "away_win": 2.5}}, None, "A single bookmaker can't form an arb"),
+    ]
+)
+def test_get_best_combination(quotes, expected_combination, message):
+    index = BestPriceIndex()
+    for bookmaker, odds in quotes.items():
+        index.set_odds(bookmaker, odds)
+
+    assert index.get_best_combination() == expected_combination, message
+
+
+def test_get_best_combination_after_close():
+    index = BestPriceIndex()
+    index.set_odds("A", {"home_win": 2.3, "away_win": 1.6})
+    index.set_odds("B", {"home_win": 1.5, "away_win": 2.4})
+    index.set_odds("C", {"home_win": 1.9, "away_win": 1.9})
+
+    index.remove_odds("B")
+
+    assert index.get_best_combination() == {"home_win": ("A", 2.3), "away_win": ("C", 1.9)}
+
+
+def test_get_best_combination_after_quote_drops_an_outcome():
+    index = BestPriceIndex()
+    index.set_odds("A", {"home_win": 2.3, "draw": 4.0, "away_win": 1.6})
+    index.set_odds("B", {"home_win": 1.5, "draw": 3.0, "away_win": 2.4})
+
+    index.set_odds("A", {"home_win": 2.3, "away_win": 1.6})  # A no longer offers the draw
+
+    assert index.get_best_combination() == {"home_win": ("A", 2.3), "draw": ("B", 3.0), "away_win": ("B", 2.4)}
+
+    index.set_odds("B", {"home_win": 1.5, "away_win": 2.4})
+
+    assert index.get_best_combination() == {"home_win": ("A", 2.3), "away_win": ("B", 2.4)}
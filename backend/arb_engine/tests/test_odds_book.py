@@ -0,0 +1,94 @@
+import pytest
+import json
+from unittest.mock import MagicMock, patch
+from backend.arb_engine.src.odds_book import OddsBook
+from backend.shared.config import shared_config
+from backend.shared.sharding import get_match_partition
+from backend.shared.redis import OddsUpdateMessage, OddsValues, get_odds_match_hash, get_odds_match_bookmaker_key
+from backend.shared.utils import current_milli_time
+
+
+@pytest.fixture
+def odds_book():
+    return OddsBook()
+
+
+def make_odds_update(match, bookmaker, odds):
+    return OddsUpdateMessage(
+        event="odds_update" if odds is not None else "odds_close",
+        match=match,
+        bookmaker=bookmaker,
+        odds=odds,
+        timestamp=current_milli_time()
+    )
+
+
+def test_apply_odds_update_and_close(odds_book):
+    """Ensure updates overwrite the latest quote and closes remove it."""
+    odds_book.apply_odds_update(make_odds_update("Match1", "Bet365", OddsValues(home_win=2.0, away_win=2.5)))
+    odds_book.apply_odds_update(make_odds_update("Match1", "Bet365", OddsValues(home_win=2.2, away_win=2.3)))
+    odds_book.apply_odds_update(make_odds_update("Match1", "Smarkets", OddsValues(home_win=1.9, away_win=2.1)))
+
+    assert odds_book.get_odds_for_match("Match1") == {
+        "Bet365": OddsValues(home_win=2.2, away_win=2.3),
+        "Smarkets": OddsValues(home_win=1.9, away_win=2.1),
+    }
+
+    odds_book.apply_odds_update(make_odds_update("Match1", "Bet365", None))
+    odds_book.apply_odds_update(make_odds_update("Match1", "Bet365", None))  # Repeated closes are harmless
+
+    assert odds_book.get_odds_for_match("Match1") == {"Smarkets": OddsValues(home_win=1.9, away_win=2.1)}
+
+    odds_book.apply_odds_update(make_odds_update("Match1", "Smarkets", None))
+    assert odds_book.get_odds_for_match("Match1") == {}
+    assert "Match1" not in odds_book.odds
+
+
+def test_load_from_redis(odds_book):
+    """Ensure the book is bulk-loaded with SCAN and a single pipeline, replacing any previous state."""
+    mock_redis = MagicMock()
+    mock_redis.scan_iter.return_value = iter([get_odds_match_hash("Man Utd vs Chelsea"), get_odds_match_hash("Match2")])
+    mock_pipeline = mock_redis.pipeline.return_value
+    mock_pipeline.execute.return_value = [
+        {
+            get_odds_match_bookmaker_key("Bet365"): json.dumps({"home_win": 2.0, "away_win": 2.5}),
+            get_odds_match_bookmaker_key("Some Bookie"): "not json",
+        },
+        {},
+    ]
+    odds_book.apply_odds_update(make_odds_update("Stale Match", "Bet365", OddsValues(home_win=2.0, away_win=2.0)))
+
+    odds_book.load_from_redis(mock_redis)
+
+    mock_redis.hgetall.assert_not_called()
+    assert mock_pipeline.hgetall.call_count == 2
+    mock_pipeline.execute.assert_called_once()
+    assert odds_book.odds == {"Man Utd vs Chelsea": {"Bet365": OddsValues(home_win=2.0, away_win=2.5)}}
+
+
+@patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 4)
+def test_load_partition_from_redis_and_retain_partitions(odds_book):
+    """Ensure a partition resync only touches that partition's matches, and retaining partitions drops the others."""
+    matches = [f"Match{i}" for i in range(20)]
+    partition = get_match_partition(matches[0])
+    in_partition = [match for match in matches if get_match_partition(match) == partition]
+    for match in matches:
+        odds_book.apply_odds_update(make_odds_update(match, "Bet365", OddsValues(home_win=2.0, away_win=2.0)))
+
+    mock_redis = MagicMock()
+    mock_redis.scan_iter.return_value = iter([get_odds_match_hash(match) for match in matches])
+    mock_redis.pipeline.return_value.execute.return_value = [
+        {get_odds_match_bookmaker_key("Smarkets"): json.dumps({"home_win": 1.9, "away_win": 2.1})} for _ in in_partition
+    ]
+
+    odds_book.load_from_redis(mock_redis, [partition])
+
+    assert mock_redis.pipeline.return_value.hgetall.call_count == len(in_partition)  # Other partitions' hashes are skipped
+    for match in matches:
+        expected_bookmaker = "Smarkets" if match in in_partition else "Bet365"
+        assert list(odds_book.get_odds_for_match(match)) == [expected_bookmaker]
+
+    odds_book.retain_partitions([partition])
+
+    assert sorted(odds_book.odds) == sorted(in_partition)
+    assert sorted(odds_book.best_prices) == sorted(in_partition)
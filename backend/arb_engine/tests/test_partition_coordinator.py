@@ -0,0 +1,76 @@
+import pytest
+import threading
+from unittest.mock import MagicMock, AsyncMock, patch
+from backend.arb_engine.src.config import arb_engine_config
+from backend.arb_engine.src.partition_coordinator import PartitionCoordinator
+from backend.shared.config import shared_config
+
+
+def make_coordinator(worker_id, live_workers):
+    mock_redis = MagicMock()
+    mock_redis.pipeline.return_value.execute.side_effect = lambda: [1, 0, list(live_workers)]
+    return PartitionCoordinator(mock_redis, on_assignment=AsyncMock(), worker_id=worker_id)
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 32)
+async def test_workers_own_disjoint_partitions_covering_all():
+    """Test that every partition is owned by exactly one of the live workers."""
+
+    # Arrange
+    workers = ["engine-1", "engine-2", "engine-3"]
+    coordinators = [make_coordinator(worker, workers) for worker in workers]
+
+    # Act
+    for coordinator in coordinators:
+        await coordinator.rebalance()
+
+    # Assert
+    owned = [coordinator.on_assignment.call_args[0][0] for coordinator in coordinators]
+    assert all(owned)
+    assert sorted(partition for partitions in owned for partition in partitions) == list(range(32))
+    key, heartbeat = coordinators[0].redis_client.pipeline.return_value.zadd.call_args[0]
+    assert key == arb_engine_config.WORKERS_KEY
+    assert list(heartbeat) == ["engine-1"]
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 32)
+async def test_rebalances_when_workers_join_and_leave():
+    """Test that a joining worker only takes partitions over, and they come back when it leaves."""
+
+    # Arrange
+    live_workers = ["engine-1", "engine-2"]
+    coordinator = make_coordinator("engine-1", live_workers)
+    await coordinator.rebalance()
+    owned_alone = coordinator.partitions
+
+    # Act
+    await coordinator.rebalance()  # No membership change
+    live_workers.append("engine-3")
+    await coordinator.rebalance()
+    owned_after_join = coordinator.partitions
+    live_workers.remove("engine-3")
+    await coordinator.rebalance()
+
+    # Assert
+    assert owned_after_join < owned_alone
+    assert coordinator.partitions == owned_alone
+    assert coordinator.on_assignment.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_runs_off_the_event_loop():
+    """Test that the blocking heartbeat pipeline runs in a worker thread rather than on the event loop's thread."""
+
+    # Arrange
+    coordinator = make_coordinator("engine-1", ["engine-1"])
+    threads = []
+    coordinator.redis_client.pipeline.return_value.execute.side_effect = lambda: threads.append(threading.get_ident()) or [1, 0, ["engine-1"]]
+
+    # Act
+    await coordinator.rebalance()
+
+    # Assert
+    assert threads and threads[0] != threading.get_ident()
+    coordinator.on_assignment.assert_awaited_once()
@@ -3,81 +3,264 @@ import logging
 from pydantic import ValidationError
 import redis
 import json
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from backend.arb_executor.src.arb_scheduler import ArbScheduler
 from backend.arb_executor.src.config import arb_executor_config
-from backend.shared.arb_math import calculate_guaranteed_profit
+from backend.arb_executor.src.exposure_book import ExposureBook, ExposureSnapshot
+from backend.shared.arb_math import calculate_arb_stakes, calculate_guaranteed_profit
 from backend.shared.config import shared_config
 
-from backend.shared.redis import ArbMessage, OddsValues
+from backend.shared.redis import AnyOddsUpdate, ArbMessage, ExposureSnapshotMessage, OddsValues, message_codec
 from backend.shared.redis import get_odds_match_hash, get_odds_match_bookmaker_key
+from backend.shared.transport import publish_message
+from backend.shared.utils import current_milli_time
 
 
 class ArbExecutor:
-    """Executes detected arbs after a simulated delay and publishes the result to Redis."""
+    """
+    Executes detected arbs after a simulated delay and publishes the result to Redis.
+    Arbs wait in a scheduler rather than in a task each, and every arb due in the same tick is settled in one batch:
+    one pipeline of HMGETs for their latest odds and one pipeline of publishes for the results.
 
-    def __init__(self, redis_client: redis.Redis):
+    In-flight arbs are indexed by the (match, bookmaker) of their legs, so odds updates can act on them straight away:
+    arbs with a leg whose odds closed, or that are no longer arbs at the new odds, are cancelled before anything is staked,
+    and the others are re-staked on the new odds (and reported as adjusted once executed).
+    Their stakes and odds are mirrored in an exposure book, marked to market in snapshots published at a bounded rate.
+    """
+
+    def __init__(self, redis_client: redis.Redis, scheduler: Optional[ArbScheduler] = None):
         self.redis_client: redis.Redis = redis_client
+        self.scheduler: ArbScheduler = scheduler if scheduler is not None else ArbScheduler(
+            delay_seconds=arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB,
+            tick_seconds=arb_executor_config.EXECUTION_TICK_SECONDS,
+            max_in_flight=arb_executor_config.MAX_CONCURRENT_ARB_EXECUTIONS,
+            overflow_policy=arb_executor_config.ARB_OVERFLOW_POLICY,
+            max_queued=arb_executor_config.MAX_QUEUED_ARB_EXECUTIONS
+        )
+        self.arbs_scheduled = asyncio.Event()
+        self.arbs_by_quote: Dict[Tuple[str, str], Dict[str, ArbMessage]] = {}  # (match, bookmaker) -> in-flight arbs with a leg on it, by ID
+        self.restaked: Set[str] = set()  # IDs of in-flight arbs re-staked on moved odds
+        self.exposure_book = ExposureBook()
+        self.exposure_changed = False
+        # Called with arbs once they're executed or cancelled, e.g. to ack their stream entries
+        self.on_arbs_settled: Optional[Callable[[List[ArbMessage]], None]] = None
 
-    async def execute_arb(self, arb_message: ArbMessage):
+    def submit_arb(self, arb_message: ArbMessage):
+        """Schedule an arb for execution. Arbs turned away because the executor is full are published as cancelled, with nothing staked."""
         logging.info(f"⏳ Waiting {arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB} seconds before executing arb: {arb_message.id}")
-        await asyncio.sleep(arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB)
+        turned_away = self.scheduler.schedule(arb_message)
+        self.arbs_scheduled.set()
+
+        self.track_arb(arb_message)
+        if turned_away:
+            for turned_away_arb in turned_away:
+                self.untrack_arb(turned_away_arb)
+            self.cancel_arbs(turned_away, f"the executor is full ({arb_executor_config.ARB_OVERFLOW_POLICY})")
+
+    def track_arb(self, arb_message: ArbMessage):
+        for leg in arb_message.legs:
+            self.arbs_by_quote.setdefault((arb_message.match, leg.bookmaker), {})[arb_message.id] = arb_message
+        self.exposure_book.set_arb(arb_message)
+        self.exposure_changed = True
 
-        # Fetch latest odds
-        try:
-            latest_home_odds, latest_away_odds, odds_changed = self.fetch_latest_odds(arb_message)
-        except (json.JSONDecodeError, ValidationError):
-            logging.error(f"Skipping execution for Arb ID {arb_message.id} due to odds deserialization error.", exc_info=True)
+    def untrack_arb(self, arb_message: ArbMessage):
+        self.restaked.discard(arb_message.id)
+        self.exposure_book.remove_arb(arb_message.id)
+        self.exposure_changed = True
+        for leg in arb_message.legs:
+            arbs = self.arbs_by_quote.get((arb_message.match, leg.bookmaker))
+            if arbs is not None:
+                arbs.pop(arb_message.id, None)
+                if not arbs:
+                    del self.arbs_by_quote[arb_message.match, leg.bookmaker]
+
+    def handle_odds_update(self, odds_update: AnyOddsUpdate):
+        """Cancel or re-stake the in-flight arbs with a leg on the updated quote."""
+        arbs = self.arbs_by_quote.get((odds_update.match, odds_update.bookmaker))
+        if not arbs:
             return
 
-        # Update the arb message with new odds
-        arb_message.home_win_odds = latest_home_odds
-        arb_message.away_win_odds = latest_away_odds
+        cancelled = []
+        for arb_message in list(arbs.values()):
+            moved = False
+            for leg in arb_message.legs:
+                if leg.bookmaker == odds_update.bookmaker:
+                    leg_odds = odds_update.odds.outcomes.get(leg.outcome) if odds_update.odds is not None else None
+                    moved = moved or leg_odds != leg.odds
+                    leg.odds = leg_odds
+
+            if not moved:
+                continue
+
+            if any(leg.odds is None for leg in arb_message.legs) or sum(1 / leg.odds for leg in arb_message.legs) >= 1:
+                cancelled.append(arb_message)
+                continue
+
+            total_stake = sum(leg.stake for leg in arb_message.legs)
+            for leg, stake in zip(arb_message.legs, calculate_arb_stakes([leg.odds for leg in arb_message.legs], total_stake)):
+                leg.stake = stake
+            self.calculate_and_update_profit(arb_message)
+            self.restaked.add(arb_message.id)
+            self.exposure_book.set_arb(arb_message)
+            self.exposure_changed = True
+            logging.info(f"🔁 Arb re-staked on moved odds from {odds_update.bookmaker} - ID: {arb_message.id}")
+
+        for arb_message in cancelled:
+            self.scheduler.remove(arb_message)
+            self.untrack_arb(arb_message)
+        if cancelled:
+            self.cancel_arbs(cancelled, f"{odds_update.bookmaker}'s odds for {odds_update.match} closed or moved")
+
+    async def publish_exposure_snapshots(self):
+        """Publish the mark-to-market of the arbs in flight whenever it changed, at most once per snapshot interval."""
+        while True:
+            await asyncio.sleep(arb_executor_config.EXPOSURE_SNAPSHOT_INTERVAL_SECONDS)
+            if not self.exposure_changed:
+                continue
+
+            self.exposure_changed = False
+            try:
+                self.publish_exposure_snapshot(self.exposure_book.mark_to_market())
+            except redis.RedisError:
+                logging.error("Failed to publish exposure snapshot.", exc_info=True)
+
+    def publish_exposure_snapshot(self, snapshot: ExposureSnapshot):
+        snapshot_message = ExposureSnapshotMessage(timestamp=current_milli_time(), **snapshot._asdict())
+        publish_message(self.redis_client, shared_config.REDIS_ARB_EXPOSURE_CHANNEL, snapshot_message.model_dump_json())
+        logging.info(f"📊 Exposure: {snapshot.arbs} arbs in flight, {snapshot.exposure:.2f} staked, {snapshot.guaranteed_profit:.2f} guaranteed profit")
+
+    async def run(self):
+        """Execute arbs as they fall due, a tick at a time."""
+        while True:
+            delay = self.scheduler.seconds_until_next_due()
+            if delay is None:
+                self.arbs_scheduled.clear()
+                await self.arbs_scheduled.wait()
+                continue
+
+            await asyncio.sleep(delay)
+            due = self.scheduler.pop_due()
+            if not due:
+                continue
+
+            try:
+                await self.execute_arbs(due)
+            except redis.RedisError:
+                logging.error(f"Failed to execute {len(due)} arbs.", exc_info=True)
 
-        # Update stakes if there was a cancellation (in which case no money was betted)
-        cancelled_home, cancelled_away = self.update_stakes(arb_message)
+    async def execute_arbs(self, arb_messages: List[ArbMessage]):
+        """
+        Settle a batch of due arbs against the latest odds and publish the results.
+        The Redis round trips run in a thread, so odds updates and requests are still served meanwhile.
+        """
+        restaked = {arb_message.id for arb_message in arb_messages if arb_message.id in self.restaked}
+        for arb_message in arb_messages:
+            self.untrack_arb(arb_message)  # No longer in flight, whether or not it can be settled
 
-        # Calculate new profit
-        self.calculate_and_update_profit(arb_message)
+        executed = []
+        for arb_message, latest in zip(arb_messages, await asyncio.to_thread(self.fetch_latest_odds, arb_messages)):
+            if latest is None:
+                continue  # Odds couldn't be deserialized
+            latest_odds, odds_changed = latest
+            odds_changed = odds_changed or arb_message.id in restaked
 
-        # Determine new status
-        arb_message.status = self.determine_status(cancelled_home, cancelled_away, odds_changed)
+            # Update the arb message with new odds
+            for leg, leg_odds in zip(arb_message.legs, latest_odds):
+                leg.odds = leg_odds
 
-        # Publish and log result
-        self.publish_arb_execution(arb_message)
-        self.log_execution_status(arb_message.status, arb_message.id)
+            # Update stakes if there was a cancellation (in which case no money was betted)
+            cancelled = self.update_stakes(arb_message)
 
-    def fetch_latest_odds(self, arb_message: ArbMessage):
-        """Fetches the latest odds for home and away and determines if they changed."""
-        latest_home_odds = self.get_latest_odds(arb_message.match, arb_message.home_win_bookmaker, is_home_win=True)
-        latest_away_odds = self.get_latest_odds(arb_message.match, arb_message.away_win_bookmaker, is_home_win=False)
+            # Calculate new profit
+            self.calculate_and_update_profit(arb_message)
 
-        odds_changed = latest_home_odds != arb_message.home_win_odds or latest_away_odds != arb_message.away_win_odds
-        return latest_home_odds, latest_away_odds, odds_changed
+            # Determine new status
+            arb_message.status = self.determine_status(cancelled, odds_changed)
+            executed.append(arb_message)
 
-    def update_stakes(self, arb_message: ArbMessage):
-        """Updates stake values if an outcome is cancelled."""
-        cancelled_home = arb_message.home_win_odds is None
-        cancelled_away = arb_message.away_win_odds is None
+        # Publish and log results
+        await asyncio.to_thread(self.publish_arb_executions, executed)
+        for arb_message in executed:
+            self.log_execution_status(arb_message.status, arb_message.id)
+        self.settle_arbs(arb_messages)
 
-        if cancelled_home:
-            arb_message.home_win_stake = 0
-        if cancelled_away:
-            arb_message.away_win_stake = 0
+    def cancel_arbs(self, arb_messages: List[ArbMessage], reason: str):
+        """Publish arbs that won't be executed as cancelled, with nothing staked."""
+        for arb_message in arb_messages:
+            for leg in arb_message.legs:
+                leg.stake = 0
+            arb_message.guaranteed_profit = 0
+            arb_message.status = "cancelled"
+            logging.warning(f"🚫 Arb cancelled before execution, {reason} - ID: {arb_message.id}")
 
-        return cancelled_home, cancelled_away
+        self.publish_arb_executions(arb_messages)
+        self.settle_arbs(arb_messages)
+
+    def settle_arbs(self, arb_messages: List[ArbMessage]):
+        """Report arbs that are done with: executed (or skipped as their odds couldn't be read) or cancelled."""
+        if self.on_arbs_settled is not None:
+            self.on_arbs_settled(arb_messages)
+
+    def fetch_latest_odds(self, arb_messages: List[ArbMessage]) -> List[Optional[Tuple[List[Optional[float]], bool]]]:
+        """
+        Fetches the latest odds for each leg of each arb, and whether they changed, with one HMGET per match in a single pipeline.
+        None for arbs whose odds couldn't be deserialized.
+        """
+        bookmaker_keys: Dict[str, List[str]] = {}  # Match hash -> bookmaker keys to fetch
+        for arb_message in arb_messages:
+            keys = bookmaker_keys.setdefault(get_odds_match_hash(arb_message.match), [])
+            for leg in arb_message.legs:
+                bookmaker_key = get_odds_match_bookmaker_key(leg.bookmaker)
+                if bookmaker_key not in keys:
+                    keys.append(bookmaker_key)
+
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for match_hash, keys in bookmaker_keys.items():
+            pipeline.hmget(match_hash, keys)
+        odds_json = {
+            (match_hash, bookmaker_key): leg_odds_json
+            for (match_hash, keys), values in zip(bookmaker_keys.items(), pipeline.execute())
+            for bookmaker_key, leg_odds_json in zip(keys, values)
+        }
+
+        results = []
+        for arb_message in arb_messages:
+            match_hash = get_odds_match_hash(arb_message.match)
+            try:
+                latest_odds = [
+                    self.parse_latest_odds(odds_json[match_hash, get_odds_match_bookmaker_key(leg.bookmaker)], leg.outcome)
+                    for leg in arb_message.legs
+                ]
+            except (json.JSONDecodeError, ValidationError):
+                logging.error(f"Skipping execution for Arb ID {arb_message.id} due to odds deserialization error.", exc_info=True)
+                results.append(None)
+                continue
+
+            odds_changed = any(leg_odds != leg.odds for leg, leg_odds in zip(arb_message.legs, latest_odds))
+            results.append((latest_odds, odds_changed))
+
+        return results
+
+    def update_stakes(self, arb_message: ArbMessage) -> bool:
+        """Updates stake values of cancelled legs, returning whether any leg was cancelled."""
+        cancelled = False
+        for leg in arb_message.legs:
+            if leg.odds is None:
+                leg.stake = 0
+                cancelled = True
+
+        return cancelled
 
     def calculate_and_update_profit(self, arb_message: ArbMessage):
         """Recalculates and updates the guaranteed profit."""
         arb_message.guaranteed_profit = calculate_guaranteed_profit(
-            arb_message.home_win_stake,
-            arb_message.away_win_stake,
-            arb_message.home_win_odds,
-            arb_message.away_win_odds
+            [leg.stake for leg in arb_message.legs],
+            [leg.odds for leg in arb_message.legs]
         )
 
-    def determine_status(self, cancelled_home: bool, cancelled_away: bool, odds_changed: bool) -> str:
+    def determine_status(self, cancelled: bool, odds_changed: bool) -> str:
         """Determines the new status of the arbitrage execution."""
-        if cancelled_home or cancelled_away:
+        if cancelled:
             return "cancelled"
         elif odds_changed:
             return "adjusted"
@@ -92,22 +275,21 @@ class ArbExecutor:
         }
         logging.info(f"{messages.get(status, '❓ Unknown status')} - ID: {id}")
 
-    def get_latest_odds(self, match: str, bookmaker: str, is_home_win: bool) -> Optional[float]:
-        """Fetch the latest odds for a given (match, bookmaker) from Redis."""
-        match_hash = get_odds_match_hash(match)
-        bookmaker_key = get_odds_match_bookmaker_key(bookmaker)
-
-        odds_json = self.redis_client.hget(match_hash, bookmaker_key)
+    def parse_latest_odds(self, odds_json: Optional[str], outcome: str) -> Optional[float]:
+        """The odds of an outcome from a bookmaker's quote in a match hash, or None if the quote was removed (cancelled)."""
         if odds_json is None:
-            return None  # Odds were removed (cancelled)
-
-        odds_data = json.loads(odds_json)
-        odds = OddsValues(**odds_data)
-        return odds.home_win if is_home_win else odds.away_win
-
-    
-    def publish_arb_execution(self, arb_message: ArbMessage):
-        """Publishes the updated arbitrage execution result to Redis."""
-        arb_data = json.dumps(arb_message.model_dump())
-        self.redis_client.publish(shared_config.REDIS_ARB_EXECUTIONS_CHANNEL, arb_data)
-        logging.info(f"Published ArbMessage to Redis: {arb_data}")
+            return None
+
+        odds = OddsValues(**json.loads(odds_json))
+        return odds.outcomes.get(outcome)
+
+    def publish_arb_executions(self, arb_messages: List[ArbMessage]):
+        """Publishes the updated arbitrage execution results to Redis in one pipeline."""
+        if not arb_messages:
+            return
+
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for arb_message in arb_messages:
+            publish_message(pipeline, shared_config.REDIS_ARB_EXECUTIONS_CHANNEL, message_codec.encode_arb_message(arb_message))
+        pipeline.execute()
+        logging.info(f"Published {len(arb_messages)} ArbMessages to Redis")
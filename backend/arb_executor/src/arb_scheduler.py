@@ -0,0 +1,146 @@
+import heapq
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Literal, Optional
+from backend.shared.redis import ArbMessage
+
+OverflowPolicy = Literal["reject", "queue", "drop_oldest"]
+
+# Slack when converting times to ticks, so a time on a tick boundary isn't pushed to the next tick by float error
+TICK_EPSILON = 1e-9
+
+
+class ArbScheduler:
+    """
+    Holds arbs until they're due for execution, `delay_seconds` after being admitted, instead of a sleeping task per arb.
+    Due times are rounded up to ticks of `tick_seconds`, and every arb due in the same tick is handed over together,
+    so they can be settled in one batch: a hashed timer wheel, with a heap of the occupied ticks.
+
+    At most `max_in_flight` arbs are waiting to execute. When full, the overflow policy decides what happens to a new arb:
+    "reject" turns it away, "queue" holds it (up to `max_queued`, rejecting beyond that) until a slot frees up,
+    and "drop_oldest" turns away the in-flight arb due soonest to make room.
+
+    Arbs can also be taken out before they fall due with `remove`, e.g. when their odds close, freeing their slot at once.
+    """
+
+    def __init__(self, delay_seconds: float, tick_seconds: float, max_in_flight: int, overflow_policy: OverflowPolicy = "queue",
+                 max_queued: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.delay_seconds = delay_seconds
+        self.tick_seconds = tick_seconds
+        self.max_in_flight = max_in_flight
+        self.overflow_policy = overflow_policy
+        self.max_queued = max_queued
+        self.clock = clock
+
+        self.buckets: Dict[int, Deque[ArbMessage]] = {}  # Tick -> arbs due in it, in admission order
+        self.ticks: List[int] = []  # Heap of the ticks in `buckets` (and of emptied ticks, skipped lazily)
+        self.arb_ticks: Dict[str, int] = {}  # Arb ID -> tick it's due in
+        self.in_flight = 0
+        self.queue: Deque[ArbMessage] = deque()  # Waiting for a slot ("queue" policy)
+
+        self.rejected = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.executed = 0
+
+    def schedule(self, arb_message: ArbMessage) -> List[ArbMessage]:
+        """Admit an arb for execution, returning any arbs turned away by the overflow policy (possibly the arb itself)."""
+        if self.in_flight < self.max_in_flight:
+            self._admit(arb_message, self.clock())
+            return []
+
+        if self.overflow_policy == "queue" and len(self.queue) < self.max_queued:
+            self.queue.append(arb_message)
+            return []
+
+        if self.overflow_policy == "drop_oldest" and self.in_flight > 0:
+            oldest = self._pop_oldest()
+            self.dropped += 1
+            self._admit(arb_message, self.clock())
+            return [oldest]
+
+        self.rejected += 1
+        return [arb_message]
+
+    def pop_due(self) -> List[ArbMessage]:
+        """Remove and return every arb whose tick has come, admitting queued arbs into the slots they free."""
+        now = self.clock()
+        current_tick = math.floor(now / self.tick_seconds + TICK_EPSILON)
+        due: List[ArbMessage] = []
+
+        while self.ticks and self.ticks[0] <= current_tick:
+            due.extend(self.buckets.pop(heapq.heappop(self.ticks), ()))
+        for arb_message in due:
+            del self.arb_ticks[arb_message.id]
+
+        self.in_flight -= len(due)
+        self.executed += len(due)
+        self._admit_queued(now)
+
+        return due
+
+    def remove(self, arb_message: ArbMessage) -> bool:
+        """Take an arb out before it falls due, admitting a queued arb into its slot. Returns whether the arb was held."""
+        tick = self.arb_ticks.pop(arb_message.id, None)
+        if tick is not None:
+            bucket = self.buckets[tick]
+            del bucket[next(i for i, held in enumerate(bucket) if held is arb_message)]
+            if not bucket:
+                del self.buckets[tick]
+            self.in_flight -= 1
+            self._admit_queued(self.clock())
+        else:
+            i = next((i for i, queued in enumerate(self.queue) if queued is arb_message), None)
+            if i is None:
+                return False
+            del self.queue[i]
+
+        self.cancelled += 1
+        return True
+
+    def seconds_until_next_due(self) -> Optional[float]:
+        """How long until the next tick with arbs due, or None if nothing is in flight."""
+        self._prune_ticks()
+        if not self.ticks:
+            return None
+        return max(self.ticks[0] * self.tick_seconds - self.clock(), 0.0)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self.queue),
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "executed": self.executed,
+        }
+
+    def _admit(self, arb_message: ArbMessage, now: float):
+        tick = math.ceil((now + self.delay_seconds) / self.tick_seconds - TICK_EPSILON)
+        if tick not in self.buckets:
+            self.buckets[tick] = deque()
+            heapq.heappush(self.ticks, tick)
+        self.buckets[tick].append(arb_message)
+        self.arb_ticks[arb_message.id] = tick
+        self.in_flight += 1
+
+    def _admit_queued(self, now: float):
+        while self.queue and self.in_flight < self.max_in_flight:
+            self._admit(self.queue.popleft(), now)
+
+    def _pop_oldest(self) -> ArbMessage:
+        self._prune_ticks()
+        tick = self.ticks[0]
+        bucket = self.buckets[tick]
+        oldest = bucket.popleft()
+        del self.arb_ticks[oldest.id]
+        if not bucket:
+            del self.buckets[tick]
+            heapq.heappop(self.ticks)
+        self.in_flight -= 1
+        return oldest
+
+    def _prune_ticks(self):
+        while self.ticks and self.ticks[0] not in self.buckets:
+            heapq.heappop(self.ticks)
@@ -3,4 +3,23 @@ import os
 class ArbExecutorConfig:
     DELAY_SECONDS_TO_EXECUTE_ARB = float(os.getenv("DELAY_SECONDS_TO_EXECUTE_ARB", 3.0))
 
+    # Arbs due in the same tick are executed together, in one batch
+    EXECUTION_TICK_SECONDS = float(os.getenv("EXECUTION_TICK_SECONDS", 0.05))
+
+    # Arbs being executed at once. When full, ARB_OVERFLOW_POLICY decides what happens to a new detection: "reject" it,
+    # "queue" it (up to MAX_QUEUED_ARB_EXECUTIONS, rejecting beyond that) until one completes, or "drop_oldest" in-flight arb.
+    # Arbs turned away are published as cancelled, with nothing staked
+    MAX_CONCURRENT_ARB_EXECUTIONS = int(os.getenv("MAX_CONCURRENT_ARB_EXECUTIONS", 1000))
+    ARB_OVERFLOW_POLICY = os.getenv("ARB_OVERFLOW_POLICY", "queue")
+    MAX_QUEUED_ARB_EXECUTIONS = int(os.getenv("MAX_QUEUED_ARB_EXECUTIONS", 10000))
+
+    # Watch odds updates to cancel in-flight arbs as soon as a leg's odds close (or the arb is gone), and re-stake them when odds move
+    EARLY_CANCELLATION = os.getenv("EARLY_CANCELLATION", "true").lower() == "true"
+
+    # Shortest time between exposure snapshots (mark-to-market of the arbs in flight), published only when arbs or their odds changed
+    EXPOSURE_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("EXPOSURE_SNAPSHOT_INTERVAL_SECONDS", 1.0))
+
+    # Consumer group executors share the arb detections stream through (streams transport only)
+    CONSUMER_GROUP = os.getenv("ARB_EXECUTOR_CONSUMER_GROUP", "arb_executor")
+
 arb_executor_config = ArbExecutorConfig()
\ No newline at end of file
@@ -0,0 +1,82 @@
+import numpy as np
+from typing import Dict, List, NamedTuple
+from backend.shared.arb_math import calculate_guaranteed_profits
+from backend.shared.redis import ArbMessage
+
+
+class ExposureSnapshot(NamedTuple):
+    """Aggregate exposure and mark-to-market P&L of the arbs in flight."""
+    arbs: int
+    exposure: float  # Total stake on the outcomes still quoted
+    guaranteed_profit: float  # Sum of each arb's guaranteed profit at the current odds
+    worst_guaranteed_profit: float  # Lowest guaranteed profit of a single arb (0 with no arbs)
+
+
+class ExposureBook:
+    """
+    The stakes and current odds of every in-flight arb, one row per arb in (arbs, legs) arrays kept up to date as arbs
+    come and go and their odds move, so the whole book is marked to market in one vectorized call.
+    """
+
+    def __init__(self, capacity: int = 1024, max_legs: int = 3):
+        self.stakes = np.zeros((capacity, max_legs))
+        self.odds = np.full((capacity, max_legs), np.nan)  # NaN for closed outcomes
+        self.legs = np.zeros((capacity, max_legs), dtype=bool)  # Legs each row actually has
+        self.in_use = np.zeros(capacity, dtype=bool)
+        self.rows: Dict[str, int] = {}  # Arb ID -> row
+        self.free_rows: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set_arb(self, arb_message: ArbMessage):
+        """Add an arb, or refresh its row after its odds or stakes changed."""
+        if len(arb_message.legs) > self.legs.shape[1]:
+            self._grow(self.legs.shape[0], len(arb_message.legs))
+
+        row = self.rows.get(arb_message.id)
+        if row is None:
+            if not self.free_rows:
+                self._grow(2 * self.legs.shape[0], self.legs.shape[1])
+            row = self.free_rows.pop()
+            self.rows[arb_message.id] = row
+            self.in_use[row] = True
+
+        n_legs = len(arb_message.legs)
+        self.stakes[row] = 0.0
+        self.odds[row] = np.nan
+        self.legs[row] = False
+        self.stakes[row, :n_legs] = [leg.stake for leg in arb_message.legs]
+        self.odds[row, :n_legs] = [np.nan if leg.odds is None else leg.odds for leg in arb_message.legs]
+        self.legs[row, :n_legs] = True
+
+    def remove_arb(self, arb_id: str):
+        row = self.rows.pop(arb_id, None)
+        if row is not None:
+            self.in_use[row] = False
+            self.free_rows.append(row)
+
+    def mark_to_market(self) -> ExposureSnapshot:
+        if not self.rows:
+            return ExposureSnapshot(arbs=0, exposure=0.0, guaranteed_profit=0.0, worst_guaranteed_profit=0.0)
+
+        stakes, odds, legs = self.stakes[self.in_use], self.odds[self.in_use], self.legs[self.in_use]
+        profits = calculate_guaranteed_profits(stakes, odds, legs)
+        return ExposureSnapshot(
+            arbs=len(self.rows),
+            exposure=float(np.where(legs & ~np.isnan(odds), stakes, 0.0).sum()),
+            guaranteed_profit=float(profits.sum()),
+            worst_guaranteed_profit=float(profits.min())
+        )
+
+    def _grow(self, capacity: int, max_legs: int):
+        old_capacity, old_legs = self.legs.shape
+        stakes, odds, legs = np.zeros((capacity, max_legs)), np.full((capacity, max_legs), np.nan), np.zeros((capacity, max_legs), dtype=bool)
+        stakes[:old_capacity, :old_legs] = self.stakes
+        odds[:old_capacity, :old_legs] = self.odds
+        legs[:old_capacity, :old_legs] = self.legs
+        in_use = np.zeros(capacity, dtype=bool)
+        in_use[:old_capacity] = self.in_use
+
+        self.stakes, self.odds, self.legs, self.in_use = stakes, odds, legs, in_use
+        self.free_rows = list(range(capacity - 1, old_capacity - 1, -1)) + self.free_rows
@@ -2,27 +2,37 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.arb_executor.src.arb_executor import ArbExecutor
-from backend.arb_executor.src.redis_listener import RedisListener
+from backend.arb_executor.src.config import arb_executor_config
+from backend.arb_executor.src.redis_listener import OddsListener, RedisListener
 from backend.shared.logging import setup_logging
-from backend.shared.redis_client import redis_client
+from backend.shared.redis_client import async_redis_client, redis_client
 
 setup_logging()
 
 arb_executor = ArbExecutor(redis_client)
-redis_listener = RedisListener(redis_client, arb_executor)
+redis_listener = RedisListener(async_redis_client, arb_executor)
+odds_listener = OddsListener(async_redis_client, arb_executor) if arb_executor_config.EARLY_CANCELLATION else None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(redis_listener.listen())
+    tasks = [
+        asyncio.create_task(redis_listener.listen()),
+        asyncio.create_task(arb_executor.run()),
+        asyncio.create_task(arb_executor.publish_exposure_snapshots()),
+    ]
+    if odds_listener is not None:
+        tasks.append(asyncio.create_task(odds_listener.listen()))
 
     try:
         yield
     finally:
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
 app = FastAPI(
     title="Arbitrage Executor",
@@ -37,3 +47,14 @@ app = FastAPI(
 @app.get("/health", tags=["System"])
 async def health_check():
     return {"status": "OK"}
+
+@app.get("/metrics", tags=["System"])
+async def metrics():
+    """Execution queue depth: arbs in flight and queued, and counts of arbs executed, turned away and cancelled early."""
+    return arb_executor.scheduler.get_metrics()
+
+
+@app.get("/exposure", tags=["System"])
+async def exposure():
+    """Mark-to-market of the arbs in flight: total stake and guaranteed profit at the current odds."""
+    return arb_executor.exposure_book.mark_to_market()._asdict()
@@ -1,45 +1,87 @@
-import logging
-import redis
-import json
 import asyncio
+import logging
+import redis.asyncio
+from typing import Dict, List, Optional, Tuple
 from backend.shared.config import shared_config
+from backend.shared.redis_listener import AsyncRedisListener, MessageData
+from backend.shared.sharding import get_all_odds_update_channels, get_odds_update_channel_patterns
 from backend.arb_executor.src.arb_executor import ArbExecutor
-from backend.shared.redis import ArbMessage
-from pydantic import ValidationError
+from backend.arb_executor.src.config import arb_executor_config
+from backend.shared.redis import ArbMessage, MessageDecodeError, message_codec
 
 
-class RedisListener:
-    """Listens to Redis for new arb detections and executes them asynchronously."""
+class RedisListener(AsyncRedisListener):
+    """
+    Listens to Redis for new arb detections and hands them to the executor's scheduler.
+    With streams, a detection's entry is only acked once its arb is executed or cancelled, so arbs still scheduled
+    when the executor stops are delivered again (to it after a restart, or claimed by another executor).
+    """
 
-    def __init__(self, redis_client: redis.Redis, arb_executor: ArbExecutor):
-        self.redis_client: redis.Redis = redis_client
+    def __init__(self, redis_client: redis.asyncio.Redis, arb_executor: ArbExecutor):
+        super().__init__(
+            redis_client,
+            [shared_config.REDIS_ARB_DETECTIONS_CHANNEL],
+            consumer_group=arb_executor_config.CONSUMER_GROUP,
+            ack_when_handled=False
+        )
         self.arb_executor = arb_executor
+        self.unacked_entries: Dict[str, Tuple[str, str]] = {}  # Arb ID -> (stream, entry ID) of the arbs not settled yet
+        arb_executor.on_arbs_settled = self.ack_settled_arbs
+
+    async def handle_message(self, channel: str, data: MessageData):
+        arb_message = self.decode_arb_message(data)
+        if arb_message is not None:
+            self.arb_executor.submit_arb(arb_message)
+
+    async def handle_entries(self, stream: str, entries: List[Tuple[str, MessageData]]):
+        malformed = []
+        for entry_id, data in entries:
+            arb_message = self.decode_arb_message(data)
+            if arb_message is None:
+                malformed.append(entry_id)  # Never going to be executed
+                continue
 
-    async def listen(self):
-        pubsub = self.redis_client.pubsub()
-        pubsub.subscribe(shared_config.REDIS_ARB_DETECTIONS_CHANNEL)
+            self.unacked_entries[arb_message.id] = (stream, entry_id)
+            self.arb_executor.submit_arb(arb_message)
 
-        logging.info(f"Subscribed to Redis channel: {shared_config.REDIS_ARB_DETECTIONS_CHANNEL}")
+        if malformed:
+            await self.ack(stream, malformed)
 
-        while True:
-            try:
-                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message:
-                    try:
-                        data = json.loads(message["data"])
-                        arb_message = ArbMessage(**data)
+    def ack_settled_arbs(self, arb_messages: List[ArbMessage]):
+        """Ack the entries of settled arbs, per stream, without holding up the executor."""
+        entry_ids: Dict[str, List[str]] = {}
+        for arb_message in arb_messages:
+            entry = self.unacked_entries.pop(arb_message.id, None)
+            if entry is not None:
+                entry_ids.setdefault(entry[0], []).append(entry[1])
 
-                        asyncio.create_task(self.arb_executor.execute_arb(arb_message))
+        for stream, stream_entry_ids in entry_ids.items():
+            task = asyncio.create_task(self.ack(stream, stream_entry_ids))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
 
-                    except json.JSONDecodeError:
-                        logging.error(f"Failed to decode JSON: {message['data']}", exc_info=True)
-                    except ValidationError:
-                        logging.error(f"Invalid ArbMessage format. Raw data: {message['data']}", exc_info=True)
+    def decode_arb_message(self, data: MessageData) -> Optional[ArbMessage]:
+        try:
+            return message_codec.decode_arb_message(data, trusted=True)  # Published by our own engine
+        except MessageDecodeError:
+            logging.error(f"Failed to decode message: {repr(data)}", exc_info=True)
+            return None
+
+
+class OddsListener(AsyncRedisListener):
+    """Listens to every odds update so the executor can cancel or re-stake in-flight arbs as soon as their odds close or move."""
+
+    def __init__(self, redis_client: redis.asyncio.Redis, arb_executor: ArbExecutor):
+        # No consumer group: every executor needs every odds update, for its own in-flight arbs
+        if shared_config.REDIS_TRANSPORT == "streams":
+            super().__init__(redis_client, get_all_odds_update_channels())
+        else:
+            super().__init__(redis_client, [], patterns=get_odds_update_channel_patterns())
+        self.arb_executor = arb_executor
 
-                await asyncio.sleep(0.001)  # Prevent high CPU usage
+    async def handle_message(self, channel: str, data: MessageData):
+        try:
+            self.arb_executor.handle_odds_update(message_codec.decode_odds_update_record(data))  # Published by our own scraper
 
-            except redis.ConnectionError:
-                logging.error("Redis Connection Error. Retrying in 5s...", exc_info=True)
-                await asyncio.sleep(5)  # Wait before retrying connection
-            except Exception:
-                logging.error("Unexpected Redis Listener Error.", exc_info=True)
+        except MessageDecodeError:
+            logging.error(f"Failed to decode message: {repr(data)}", exc_info=True)
@@ -1,16 +1,40 @@
 import pytest
 import json
-from unittest.mock import MagicMock, AsyncMock, patch
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
 from backend.arb_executor.src.arb_executor import ArbExecutor
-from backend.shared.redis import ArbMessage, get_odds_match_bookmaker_key
+from backend.arb_executor.src.arb_scheduler import ArbScheduler
+from backend.arb_executor.src.redis_listener import RedisListener
+from backend.shared.redis import message_codec, ArbLeg, ArbMessage, OddsQuote, OddsUpdate, get_odds_match_bookmaker_key, get_odds_match_hash
 from backend.shared.config import shared_config
-from backend.shared.arb_math import calculate_guaranteed_profit
-from backend.arb_executor.src.config import arb_executor_config
+from backend.shared.arb_math import calculate_arb_stakes, calculate_guaranteed_profit
+
+
+class FakePipeline:
+    """Runs queued HMGETs and publishes against the mock client on execute, as a redis-py pipeline would in one round trip."""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def hmget(self, key, fields):
+        self.redis_client.hmget(key, fields)
+        self.commands.append(lambda: [self.redis_client.hget(key, field) for field in fields])
+
+    def publish(self, channel, data):
+        self.commands.append(lambda: self.redis_client.publish(channel, data))
+
+    def execute(self):
+        results = [command() for command in self.commands]
+        self.commands = []
+        return results
 
 
 @pytest.fixture
 def mock_redis():
     mock = MagicMock()
+    mock.pipeline.side_effect = lambda **kwargs: FakePipeline(mock)
     mock.hget.side_effect = lambda key, field: json.dumps({
         "home_win": 2.1, "away_win": 2.2
     }) if field in [get_odds_match_bookmaker_key("Bet365"), get_odds_match_bookmaker_key("Smarkets")] else None
@@ -24,31 +48,27 @@ def arb_executor(mock_redis):
 
 
 @pytest.mark.asyncio
-@patch("asyncio.sleep", new_callable=AsyncMock)
-async def test_execute_arb_successful(mock_sleep, arb_executor, mock_redis):
+async def test_execute_arb_successful(arb_executor, mock_redis):
     """Test executing an arbitrage successfully when odds remain unchanged."""
     
     # Arrange
     arb_message = ArbMessage(
         id="test-arb-1",
         match="Match1",
-        home_win_bookmaker="Bet365",
-        away_win_bookmaker="Smarkets",
-        home_win_odds=2.1,
-        away_win_odds=2.2,
-        home_win_stake=50.0,
-        away_win_stake=50.0,
-        guaranteed_profit=calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2),
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.1, stake=50.0),
+            ArbLeg(outcome="away_win", bookmaker="Smarkets", odds=2.2, stake=50.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2]),
         status="detected",
         timestamp=1234567890
     )
 
     # Act
-    await arb_executor.execute_arb(arb_message)
+    await arb_executor.execute_arbs([arb_message])
 
     ### Assert ###
 
-    mock_sleep.assert_called_once_with(arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB) # Ensure the simulated delay
     mock_redis.publish.assert_called_once()
     published_channel, published_message = mock_redis.publish.call_args[0]
 
@@ -56,27 +76,23 @@ async def test_execute_arb_successful(mock_sleep, arb_executor, mock_redis):
 
     published_arb = json.loads(published_message)
     assert published_arb["status"] == "completed"
-    assert published_arb["home_win_odds"] == 2.1
-    assert published_arb["away_win_odds"] == 2.2
-    assert published_arb["guaranteed_profit"] == calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2)
+    assert [leg["odds"] for leg in published_arb["legs"]] == [2.1, 2.2]
+    assert published_arb["guaranteed_profit"] == calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2])
 
 
 @pytest.mark.asyncio
-@patch("asyncio.sleep", new_callable=AsyncMock)
-async def test_execute_arb_adjusted_odds(mock_sleep, arb_executor, mock_redis):
+async def test_execute_arb_adjusted_odds(arb_executor, mock_redis):
     """Test executing an arbitrage when the odds change before execution."""
 
     # Arrange
     arb_message = ArbMessage(
         id="test-arb-2",
         match="Match2",
-        home_win_bookmaker="Bet365",
-        away_win_bookmaker="Smarkets",
-        home_win_odds=2.1,
-        away_win_odds=2.2,
-        home_win_stake=50.0,
-        away_win_stake=50.0,
-        guaranteed_profit=calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2),
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.1, stake=50.0),
+            ArbLeg(outcome="away_win", bookmaker="Smarkets", odds=2.2, stake=50.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2]),
         status="detected",
         timestamp=1234567890
     )
@@ -87,11 +103,10 @@ async def test_execute_arb_adjusted_odds(mock_sleep, arb_executor, mock_redis):
     }) if field in [get_odds_match_bookmaker_key("Bet365"), get_odds_match_bookmaker_key("Smarkets")] else None
 
     # Act
-    await arb_executor.execute_arb(arb_message)
+    await arb_executor.execute_arbs([arb_message])
 
     ### Assert ###
 
-    mock_sleep.assert_called_once_with(arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB)
     mock_redis.publish.assert_called_once()
     published_channel, published_message = mock_redis.publish.call_args[0]
 
@@ -99,28 +114,24 @@ async def test_execute_arb_adjusted_odds(mock_sleep, arb_executor, mock_redis):
 
     published_arb = json.loads(published_message)
     assert published_arb["status"] == "adjusted"
-    assert published_arb["home_win_odds"] == 1.5
-    assert published_arb["away_win_odds"] == 1.9
-    assert published_arb["guaranteed_profit"] != calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2)
-    assert published_arb["guaranteed_profit"] == calculate_guaranteed_profit(50.0, 50.0, 1.5, 1.9)
+    assert [leg["odds"] for leg in published_arb["legs"]] == [1.5, 1.9]
+    assert published_arb["guaranteed_profit"] != calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2])
+    assert published_arb["guaranteed_profit"] == calculate_guaranteed_profit([50.0, 50.0], [1.5, 1.9])
 
 
 @pytest.mark.asyncio
-@patch("asyncio.sleep", new_callable=AsyncMock)
-async def test_execute_arb_cancelled_due_to_single_missing_odds(mock_sleep, arb_executor, mock_redis):
+async def test_execute_arb_cancelled_due_to_single_missing_odds(arb_executor, mock_redis):
     """Test arbitrage execution is cancelled if odds disappear on a single side (market closed)."""
 
     # Arrange
     arb_message = ArbMessage(
         id="test-arb-3",
         match="Match3",
-        home_win_bookmaker="Bet365",
-        away_win_bookmaker="Smarkets",
-        home_win_odds=2.1,
-        away_win_odds=2.2,
-        home_win_stake=49.0,
-        away_win_stake=50.0,
-        guaranteed_profit=calculate_guaranteed_profit(49.0, 50.0, 2.1, 2.2),
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.1, stake=49.0),
+            ArbLeg(outcome="away_win", bookmaker="Smarkets", odds=2.2, stake=50.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([49.0, 50.0], [2.1, 2.2]),
         status="detected",
         timestamp=1234567890
     )
@@ -131,11 +142,10 @@ async def test_execute_arb_cancelled_due_to_single_missing_odds(mock_sleep, arb_
     )
 
     # Act
-    await arb_executor.execute_arb(arb_message)
+    await arb_executor.execute_arbs([arb_message])
 
     ### Assert ###
 
-    mock_sleep.assert_called_once_with(arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB)
     mock_redis.publish.assert_called_once()
     published_channel, published_message = mock_redis.publish.call_args[0]
 
@@ -145,28 +155,26 @@ async def test_execute_arb_cancelled_due_to_single_missing_odds(mock_sleep, arb_
 
     # Verify cancellation due to one side missing
     assert published_arb["status"] == "cancelled"
-    assert published_arb["home_win_odds"] is None  # Home odds are missing
-    assert published_arb["away_win_odds"] == 2.2  # Away odds still present
+    assert published_arb["legs"][0]["odds"] is None  # Home odds are missing
+    assert published_arb["legs"][0]["stake"] == 0
+    assert published_arb["legs"][1]["odds"] == 2.2  # Away odds still present
     # Since one side is missing, we executed the other side but it's not guaranteed to payout, so we lose money in the worst case
     assert published_arb["guaranteed_profit"] == -50
 
 
 @pytest.mark.asyncio
-@patch("asyncio.sleep", new_callable=AsyncMock)
-async def test_execute_arb_cancelled_due_to_double_missing_odds(mock_sleep, arb_executor, mock_redis):
+async def test_execute_arb_cancelled_due_to_double_missing_odds(arb_executor, mock_redis):
     """Test arbitrage execution is cancelled if odds disappear on both sides (market closed)."""
 
     # Arrange
     arb_message = ArbMessage(
         id="test-arb-3",
         match="Match3",
-        home_win_bookmaker="Bet365",
-        away_win_bookmaker="Smarkets",
-        home_win_odds=2.1,
-        away_win_odds=2.2,
-        home_win_stake=50.0,
-        away_win_stake=50.0,
-        guaranteed_profit=calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2),
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.1, stake=50.0),
+            ArbLeg(outcome="away_win", bookmaker="Smarkets", odds=2.2, stake=50.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2]),
         status="detected",
         timestamp=1234567890
     )
@@ -175,11 +183,10 @@ async def test_execute_arb_cancelled_due_to_double_missing_odds(mock_sleep, arb_
     mock_redis.hget.side_effect = lambda key, field: None  # Simulate missing odds
 
     # Act
-    await arb_executor.execute_arb(arb_message)
+    await arb_executor.execute_arbs([arb_message])
 
     ### Assert ###
 
-    mock_sleep.assert_called_once_with(arb_executor_config.DELAY_SECONDS_TO_EXECUTE_ARB)
     mock_redis.publish.assert_called_once()
     published_channel, published_message = mock_redis.publish.call_args[0]
 
@@ -187,6 +194,261 @@ async def test_execute_arb_cancelled_due_to_double_missing_odds(mock_sleep, arb_
 
     published_arb = json.loads(published_message)
     assert published_arb["status"] == "cancelled"
-    assert published_arb["home_win_odds"] is None and published_arb["away_win_odds"] is None
-    assert published_arb["guaranteed_profit"] != calculate_guaranteed_profit(50.0, 50.0, 2.1, 2.2)
+    assert all(leg["odds"] is None for leg in published_arb["legs"])
+    assert published_arb["guaranteed_profit"] != calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2])
+    assert published_arb["guaranteed_profit"] == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_three_way_arb_adjusted_odds(arb_executor, mock_redis):
+    """Test executing a 1X2 arbitrage when the draw odds move before execution."""
+
+    # Arrange
+    arb_message = ArbMessage(
+        id="test-arb-4",
+        match="Match4",
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.2, stake=50.0),
+            ArbLeg(outcome="draw", bookmaker="Smarkets", odds=3.6, stake=30.0),
+            ArbLeg(outcome="away_win", bookmaker="Betfair", odds=5.5, stake=20.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([50.0, 30.0, 20.0], [2.2, 3.6, 5.5]),
+        status="detected",
+        timestamp=1234567890
+    )
+
+    latest_odds = {
+        get_odds_match_bookmaker_key("Bet365"): {"home_win": 2.2, "draw": 3.2, "away_win": 3.0},
+        get_odds_match_bookmaker_key("Smarkets"): {"home_win": 2.0, "draw": 3.3, "away_win": 3.4},
+        get_odds_match_bookmaker_key("Betfair"): {"home_win": 1.9, "draw": 3.4, "away_win": 5.5},
+    }
+    mock_redis.hget.side_effect = lambda key, field: json.dumps(latest_odds[field])
+
+    # Act
+    await arb_executor.execute_arbs([arb_message])
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = json.loads(mock_redis.publish.call_args[0][1])
+    assert published_arb["status"] == "adjusted"
+    assert [leg["odds"] for leg in published_arb["legs"]] == [2.2, 3.3, 5.5]
+    assert published_arb["guaranteed_profit"] == calculate_guaranteed_profit([50.0, 30.0, 20.0], [2.2, 3.3, 5.5])
+
+
+def make_arb_message(arb_id, match):
+    return ArbMessage(
+        id=arb_id,
+        match=match,
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Bet365", odds=2.1, stake=50.0),
+            ArbLeg(outcome="away_win", bookmaker="Smarkets", odds=2.2, stake=50.0),
+        ],
+        guaranteed_profit=calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2]),
+        status="detected",
+        timestamp=1234567890
+    )
+
+
+@pytest.mark.asyncio
+async def test_execute_arbs_batches_odds_reads_and_publishes(arb_executor, mock_redis):
+    """Test that a batch of arbs is settled with one HMGET per match in one pipeline, and all results published in another."""
+
+    # Arrange
+    arb_messages = [make_arb_message("arb-1", "Match1"), make_arb_message("arb-2", "Match1"), make_arb_message("arb-3", "Match2")]
+
+    # Act
+    await arb_executor.execute_arbs(arb_messages)
+
+    # Assert
+    assert mock_redis.pipeline.call_count == 2
+    assert [call.args for call in mock_redis.hmget.call_args_list] == [
+        (get_odds_match_hash("Match1"), [get_odds_match_bookmaker_key("Bet365"), get_odds_match_bookmaker_key("Smarkets")]),
+        (get_odds_match_hash("Match2"), [get_odds_match_bookmaker_key("Bet365"), get_odds_match_bookmaker_key("Smarkets")]),
+    ]
+    published = [json.loads(call.args[1]) for call in mock_redis.publish.call_args_list]
+    assert [(arb["id"], arb["status"]) for arb in published] == [("arb-1", "completed"), ("arb-2", "completed"), ("arb-3", "completed")]
+
+
+def test_submit_arb_publishes_arbs_turned_away_as_cancelled(mock_redis):
+    """Test that an arb rejected because the executor is full is published straight away as cancelled, with nothing staked."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=1, overflow_policy="reject")
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+
+    # Act
+    arb_executor.submit_arb(make_arb_message("arb-1", "Match1"))
+    arb_executor.submit_arb(make_arb_message("arb-2", "Match1"))
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = json.loads(mock_redis.publish.call_args[0][1])
+    assert published_arb["id"] == "arb-2"
+    assert published_arb["status"] == "cancelled"
+    assert [leg["stake"] for leg in published_arb["legs"]] == [0, 0]
     assert published_arb["guaranteed_profit"] == 0
+    assert scheduler.get_metrics()["in_flight"] == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_arbs_runs_redis_round_trips_off_the_event_loop(arb_executor, mock_redis):
+    """Test that the blocking odds read and publish pipelines run in a worker thread rather than on the event loop's thread."""
+
+    # Arrange
+    threads = []
+    mock_redis.pipeline.side_effect = lambda **kwargs: threads.append(threading.get_ident()) or FakePipeline(mock_redis)
+
+    # Act
+    await arb_executor.execute_arbs([make_arb_message("arb-1", "Match1")])
+
+    # Assert
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    mock_redis.publish.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_run_executes_arbs_once_due(mock_redis):
+    """Test that the run loop sleeps until submitted arbs fall due, then executes them."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=0.02, tick_seconds=0.01, max_in_flight=10)
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+    task = asyncio.create_task(arb_executor.run())
+
+    # Act
+    await asyncio.sleep(0.01)
+    arb_executor.submit_arb(make_arb_message("arb-1", "Match1"))
+    mock_redis.publish.assert_not_called()
+    await asyncio.sleep(0.1)
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    assert json.loads(mock_redis.publish.call_args[0][1])["status"] == "completed"
+    assert scheduler.get_metrics() == {"in_flight": 0, "queued": 0, "rejected": 0, "dropped": 0, "cancelled": 0, "executed": 1}
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_arb_detection_entries_are_acked_once_their_arbs_settle(mock_redis):
+    """Test that a detection read from a stream is only acked once its arb is executed or cancelled, not when scheduled."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=10)
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+    async_redis = AsyncMock()
+    listener = RedisListener(async_redis, arb_executor)
+    stream = shared_config.REDIS_ARB_DETECTIONS_CHANNEL
+    entries = [
+        ("1-0", message_codec.encode_arb_message(make_arb_message("arb-1", "Match1"))),
+        ("2-0", message_codec.encode_arb_message(make_arb_message("arb-2", "Match1"))),
+    ]
+
+    # Act
+    await listener.handle_entries(stream, entries)
+    await asyncio.gather(*listener.tasks)
+    acked_when_scheduled = async_redis.xack.await_count
+
+    arb_message = arb_executor.arbs_by_quote["Match1", "Bet365"]["arb-1"]
+    scheduler.remove(arb_message)
+    await arb_executor.execute_arbs([arb_message])
+    await asyncio.gather(*listener.tasks)
+
+    # Assert
+    assert acked_when_scheduled == 0
+    async_redis.xack.assert_awaited_once_with(stream, listener.consumer_group, "1-0")
+    assert list(listener.unacked_entries) == ["arb-2"]  # Still scheduled, so delivered again if the executor stops
+
+
+def odds_update(match, bookmaker, odds):
+    return OddsUpdate("odds_update" if odds is not None else "odds_close", match, bookmaker, OddsQuote(odds) if odds is not None else None, 0)
+
+
+def test_odds_close_cancels_in_flight_arbs_straight_away(mock_redis):
+    """Test that a leg's odds closing cancels its arbs before execution, with nothing staked, freeing their slots."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=10)
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+    arb_executor.submit_arb(make_arb_message("arb-1", "Match1"))
+    arb_executor.submit_arb(make_arb_message("arb-2", "Match2"))
+
+    # Act
+    arb_executor.handle_odds_update(odds_update("Match1", "Smarkets", None))
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    published_arb = json.loads(mock_redis.publish.call_args[0][1])
+    assert (published_arb["id"], published_arb["status"], published_arb["guaranteed_profit"]) == ("arb-1", "cancelled", 0)
+    assert [leg["stake"] for leg in published_arb["legs"]] == [0, 0]
+    assert scheduler.get_metrics()["in_flight"] == 1
+    assert scheduler.get_metrics()["cancelled"] == 1
+    assert ("Match1", "Bet365") not in arb_executor.arbs_by_quote
+
+
+@pytest.mark.asyncio
+async def test_odds_move_restakes_arbs_that_are_still_profitable(mock_redis):
+    """Test that an arb whose odds move but still make an arb is re-staked on them, and reported as adjusted once executed."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=10)
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+    arb_message = make_arb_message("arb-1", "Match1")
+    arb_executor.submit_arb(arb_message)
+
+    # Act
+    arb_executor.handle_odds_update(odds_update("Match1", "Bet365", {"home_win": 2.3, "away_win": 1.5}))
+
+    # Assert
+    mock_redis.publish.assert_not_called()
+    assert [leg.odds for leg in arb_message.legs] == [2.3, 2.2]
+    assert [leg.stake for leg in arb_message.legs] == pytest.approx(calculate_arb_stakes([2.3, 2.2], 100.0))
+
+    mock_redis.hget.side_effect = lambda key, field: json.dumps({"home_win": 2.3, "away_win": 2.2})
+    await arb_executor.execute_arbs([arb_message])
+    assert json.loads(mock_redis.publish.call_args[0][1])["status"] == "adjusted"
+    assert arb_executor.arbs_by_quote == {}
+
+
+def test_odds_move_cancels_arbs_that_are_gone(mock_redis):
+    """Test that an arb is cancelled straight away once its odds move so that it's no longer an arb."""
+
+    # Arrange
+    scheduler = ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=10)
+    arb_executor = ArbExecutor(mock_redis, scheduler)
+    arb_executor.submit_arb(make_arb_message("arb-1", "Match1"))
+
+    # Act
+    arb_executor.handle_odds_update(odds_update("Match1", "Bet365", {"home_win": 1.8, "away_win": 2.0}))
+    arb_executor.handle_odds_update(odds_update("Match1", "Bet365", {"home_win": 2.5, "away_win": 2.0}))  # No longer in flight
+
+    # Assert
+    mock_redis.publish.assert_called_once()
+    assert json.loads(mock_redis.publish.call_args[0][1])["status"] == "cancelled"
+    assert scheduler.get_metrics()["in_flight"] == 0
+
+
+def test_exposure_snapshot_marks_in_flight_arbs_to_market(mock_redis):
+    """Test that the exposure snapshot re-prices in-flight arbs at their latest odds, and is published as JSON."""
+
+    # Arrange
+    arb_executor = ArbExecutor(mock_redis, ArbScheduler(delay_seconds=3.0, tick_seconds=0.05, max_in_flight=10))
+    arb_executor.submit_arb(make_arb_message("arb-1", "Match1"))
+    arb_executor.submit_arb(make_arb_message("arb-2", "Match2"))
+    arb_executor.handle_odds_update(odds_update("Match1", "Bet365", {"home_win": 2.3, "away_win": 1.5}))
+
+    # Act
+    arb_executor.publish_exposure_snapshot(arb_executor.exposure_book.mark_to_market())
+
+    # Assert
+    channel, data = mock_redis.publish.call_args[0]
+    snapshot = json.loads(data)
+    assert channel == shared_config.REDIS_ARB_EXPOSURE_CHANNEL
+    assert snapshot["arbs"] == 2
+    assert snapshot["exposure"] == pytest.approx(200.0)
+    assert snapshot["guaranteed_profit"] == pytest.approx(
+        calculate_guaranteed_profit(calculate_arb_stakes([2.3, 2.2], 100.0), [2.3, 2.2]) + calculate_guaranteed_profit([50.0, 50.0], [2.1, 2.2])
+    )
@@ -0,0 +1,103 @@
+from backend.arb_executor.src.arb_scheduler import ArbScheduler
+from backend.shared.redis import ArbMessage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_arb_message(arb_id):
+    return ArbMessage.model_construct(id=arb_id, match="Match1", legs=[], guaranteed_profit=0.0, status="detected", timestamp=0)
+
+def ids(arb_messages):
+    return [arb_message.id for arb_message in arb_messages]
+
+
+def test_arbs_due_in_the_same_tick_are_popped_together():
+    """Ensure arbs are held for the delay, rounded up to a tick, and every arb due in a tick is popped at once."""
+    clock = FakeClock()
+    scheduler = ArbScheduler(delay_seconds=1.0, tick_seconds=0.1, max_in_flight=10, clock=clock)
+
+    scheduler.schedule(make_arb_message("arb-1"))
+    clock.now = 0.05
+    scheduler.schedule(make_arb_message("arb-2"))  # Due at 1.05, i.e. in the tick ending at 1.1
+    clock.now = 0.15
+    scheduler.schedule(make_arb_message("arb-3"))
+
+    assert scheduler.seconds_until_next_due() == 1.0 - 0.15
+    clock.now = 1.0
+    assert ids(scheduler.pop_due()) == ["arb-1"]
+    clock.now = 1.1
+    assert ids(scheduler.pop_due()) == ["arb-2"]
+    clock.now = 1.2
+    assert ids(scheduler.pop_due()) == ["arb-3"]
+    assert scheduler.seconds_until_next_due() is None
+    assert scheduler.get_metrics()["executed"] == 3
+
+
+def test_queue_policy_holds_arbs_until_a_slot_frees_up():
+    """Ensure queued arbs are admitted (and their delay started) as in-flight arbs are popped, rejecting beyond the queue size."""
+    clock = FakeClock()
+    scheduler = ArbScheduler(delay_seconds=1.0, tick_seconds=0.1, max_in_flight=1, overflow_policy="queue", max_queued=1, clock=clock)
+
+    assert scheduler.schedule(make_arb_message("arb-1")) == []
+    assert scheduler.schedule(make_arb_message("arb-2")) == []
+    assert ids(scheduler.schedule(make_arb_message("arb-3"))) == ["arb-3"]
+    assert scheduler.get_metrics() == {"in_flight": 1, "queued": 1, "rejected": 1, "dropped": 0, "cancelled": 0, "executed": 0}
+
+    clock.now = 1.0
+    assert ids(scheduler.pop_due()) == ["arb-1"]
+    assert scheduler.get_metrics()["in_flight"] == 1  # arb-2 took the slot
+    clock.now = 1.9
+    assert scheduler.pop_due() == []
+    clock.now = 2.0
+    assert ids(scheduler.pop_due()) == ["arb-2"]
+
+
+def test_reject_policy_turns_away_new_arbs():
+    """Ensure new arbs are rejected while the executor is full."""
+    scheduler = ArbScheduler(delay_seconds=1.0, tick_seconds=0.1, max_in_flight=1, overflow_policy="reject", clock=FakeClock())
+
+    scheduler.schedule(make_arb_message("arb-1"))
+
+    assert ids(scheduler.schedule(make_arb_message("arb-2"))) == ["arb-2"]
+    assert scheduler.get_metrics()["rejected"] == 1
+
+
+def test_drop_oldest_policy_makes_room_for_new_arbs():
+    """Ensure the in-flight arb due soonest is dropped to admit a new one."""
+    clock = FakeClock()
+    scheduler = ArbScheduler(delay_seconds=1.0, tick_seconds=0.1, max_in_flight=2, overflow_policy="drop_oldest", clock=clock)
+
+    scheduler.schedule(make_arb_message("arb-1"))
+    clock.now = 0.5
+    scheduler.schedule(make_arb_message("arb-2"))
+    dropped = scheduler.schedule(make_arb_message("arb-3"))
+
+    assert ids(dropped) == ["arb-1"]
+    clock.now = 2.0
+    assert ids(scheduler.pop_due()) == ["arb-2", "arb-3"]
+    assert scheduler.get_metrics() == {"in_flight": 0, "queued": 0, "rejected": 0, "dropped": 1, "cancelled": 0, "executed": 2}
+
+
+def test_remove_frees_the_slot_of_an_arb_before_it_is_due():
+    """Ensure removed arbs are never popped, and a queued arb takes the freed slot at once."""
+    clock = FakeClock()
+    scheduler = ArbScheduler(delay_seconds=1.0, tick_seconds=0.1, max_in_flight=1, overflow_policy="queue", max_queued=10, clock=clock)
+    arb_1, arb_2 = make_arb_message("arb-1"), make_arb_message("arb-2")
+    scheduler.schedule(arb_1)
+    scheduler.schedule(arb_2)
+
+    clock.now = 0.5
+    assert scheduler.remove(arb_1)
+    assert not scheduler.remove(arb_1)
+
+    assert scheduler.get_metrics()["in_flight"] == 1
+    assert scheduler.seconds_until_next_due() == 1.0  # arb-2 is due at 1.5
+    clock.now = 1.5
+    assert ids(scheduler.pop_due()) == ["arb-2"]
+    assert scheduler.get_metrics()["cancelled"] == 1
@@ -0,0 +1,47 @@
+import pytest
+from backend.arb_executor.src.exposure_book import ExposureBook
+from backend.shared.arb_math import calculate_guaranteed_profit
+from backend.shared.redis import ArbLeg, ArbMessage
+
+
+def make_arb_message(arb_id, stakes, odds):
+    legs = [
+        ArbLeg.model_construct(outcome=f"outcome_{i}", bookmaker=f"Bookmaker {i}", odds=leg_odds, stake=stake)
+        for i, (stake, leg_odds) in enumerate(zip(stakes, odds))
+    ]
+    return ArbMessage.model_construct(id=arb_id, match="Match1", legs=legs, guaranteed_profit=0.0, status="detected", timestamp=0)
+
+
+def test_mark_to_market_aggregates_every_arb():
+    """Ensure the snapshot sums stakes on quoted outcomes and guaranteed profits, over arbs with different numbers of legs."""
+    book = ExposureBook(capacity=2, max_legs=2)  # Grown to fit
+    arbs = [([100, 150], [3.0, 1.8]), ([50, 30, 20], [2.2, 3.6, 5.5]), ([100, 100], [None, 2.0])]
+    for i, (stakes, odds) in enumerate(arbs):
+        book.set_arb(make_arb_message(f"arb-{i}", stakes, odds))
+
+    snapshot = book.mark_to_market()
+
+    profits = [calculate_guaranteed_profit(stakes, odds) for stakes, odds in arbs]
+    assert snapshot.arbs == 3
+    assert snapshot.exposure == pytest.approx(250 + 100 + 100)
+    assert snapshot.guaranteed_profit == pytest.approx(sum(profits))
+    assert snapshot.worst_guaranteed_profit == pytest.approx(min(profits))
+
+
+def test_set_arb_refreshes_and_remove_arb_frees_rows():
+    """Ensure re-setting an arb replaces its row, and removed arbs no longer count towards the snapshot."""
+    book = ExposureBook(capacity=4)
+    arb_message = make_arb_message("arb-1", [100, 150], [3.0, 1.8])
+    book.set_arb(arb_message)
+    book.set_arb(make_arb_message("arb-2", [50, 50], [2.1, 2.2]))
+
+    arb_message.legs[0].odds = 2.0
+    book.set_arb(arb_message)
+    book.remove_arb("arb-2")
+
+    snapshot = book.mark_to_market()
+    assert len(book) == 1
+    assert snapshot.guaranteed_profit == pytest.approx(calculate_guaranteed_profit([100, 150], [2.0, 1.8]))
+
+    book.remove_arb("arb-1")
+    assert book.mark_to_market().arbs == 0
@@ -0,0 +1,76 @@
+"""
+Benchmarks a full re-scan of the odds book: the per-update path (best-price index + ArbOpportunity per match)
+against the NumPy batch detector.
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_arb_detection`
+"""
+import random
+import time
+from backend.arb_engine.src.arb_engine import ArbEngine
+from backend.arb_engine.src.batch_arb_detector import BatchArbDetector
+from backend.arb_engine.src.config import arb_engine_config
+from backend.arb_engine.src.odds_book import OddsBook
+from backend.shared.redis import OddsValues
+
+SIZES = [(100, 3), (1_000, 10), (1_000, 100), (10_000, 20)]  # (matches, bookmakers)
+REPEATS = 5
+
+
+def build_book(n_matches: int, n_bookmakers: int, seed: int = 42):
+    rng = random.Random(seed)
+    odds_book = OddsBook()
+    detector = BatchArbDetector()
+
+    for m in range(n_matches):
+        fair_home_probability = rng.uniform(0.3, 0.6)
+        for b in range(n_bookmakers):
+            # Each bookmaker prices near the fair probability with a 5% vig, so arbs are occasional as in production
+            home_probability = fair_home_probability + rng.gauss(0, 0.006)
+            odds = OddsValues(home_win=round(1 / (home_probability + 0.025), 2), away_win=round(1 / (1.025 - home_probability), 2))
+            odds_book.set_odds(f"Match {m}", f"Bookmaker {b}", odds)
+            detector.set_odds(f"Match {m}", f"Bookmaker {b}", odds)
+
+    return odds_book, detector
+
+
+def scan_per_match(engine: ArbEngine) -> int:
+    arbs = 0
+    for match in engine.odds_book.odds:
+        arb = engine.find_best_arbitrage_opportunity(match)
+        if arb is not None and arb.is_net_gain():
+            for outcome in arb.odds:
+                arb.compute_stake_at_bookmaker(outcome, arb_engine_config.TOTAL_STAKE_PER_ARB)
+            arbs += 1
+    return arbs
+
+
+def scan_batch(detector: BatchArbDetector) -> int:
+    return sum(1 for _ in detector.detect(arb_engine_config.TOTAL_STAKE_PER_ARB).arbs())
+
+
+def best_time(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'matches':>8} {'bookmakers':>10} {'arbs':>6} {'per-match (ms)':>15} {'batch (ms)':>11} {'speedup':>8}")
+
+    for n_matches, n_bookmakers in SIZES:
+        odds_book, detector = build_book(n_matches, n_bookmakers)
+        engine = ArbEngine(redis_client=None, odds_book=odds_book)
+
+        arbs = scan_per_match(engine)
+        assert arbs == scan_batch(detector), "Per-match and batch detection disagree"
+
+        per_match = best_time(scan_per_match, engine)
+        batch = best_time(scan_batch, detector)
+        print(f"{n_matches:>8} {n_bookmakers:>10} {arbs:>6} {per_match * 1e3:>15.2f} {batch * 1e3:>11.2f} {per_match / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmarks the Redis message codecs: per-message encode and decode (including building the pydantic model) cost,
+and bytes on the wire, for two- and three-way odds updates and arb messages.
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_codecs`
+"""
+import time
+import uuid
+from backend.shared.redis import MESSAGE_CODECS, ArbLeg, ArbMessage, OddsUpdateMessage, OddsValues
+
+ITERATIONS = 20_000
+
+MESSAGES = {
+    "odds update (2-way)": OddsUpdateMessage(
+        event="odds_update", match="Man Utd vs Chelsea", bookmaker="Bet365",
+        odds=OddsValues(home_win=2.1, away_win=1.8), timestamp=1741000000000
+    ),
+    "odds update (1x2)": OddsUpdateMessage(
+        event="odds_update", match="Man Utd vs Chelsea", bookmaker="William Hill",
+        odds=OddsValues(home_win=2.45, draw=3.4, away_win=2.9), timestamp=1741000000000
+    ),
+    "odds close": OddsUpdateMessage(
+        event="odds_close", match="Man Utd vs Chelsea", bookmaker="Bet365", odds=None, timestamp=1741000000000
+    ),
+    "arb (2-way)": ArbMessage(
+        id=str(uuid.uuid4()), match="Man Utd vs Chelsea",
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Smarkets", odds=2.1, stake=51.16),
+            ArbLeg(outcome="away_win", bookmaker="Bet365", odds=2.2, stake=48.84),
+        ],
+        guaranteed_profit=7.44, status="detected", timestamp=1741000000000
+    ),
+    "arb (1x2)": ArbMessage(
+        id=str(uuid.uuid4()), match="Man Utd vs Chelsea",
+        legs=[
+            ArbLeg(outcome="home_win", bookmaker="Smarkets", odds=2.5, stake=39.47),
+            ArbLeg(outcome="draw", bookmaker="Betfair", odds=4.0, stake=24.67),
+            ArbLeg(outcome="away_win", bookmaker="Bet365", odds=2.8, stake=35.86),
+        ],
+        guaranteed_profit=-1.33, status="detected", timestamp=1741000000000
+    ),
+}
+
+
+def time_per_call_us(function, argument) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        function(argument)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    print(f"{'message':<22}{'codec':<10}{'bytes':>8}{'encode (µs)':>14}{'decode (µs)':>14}")
+
+    for name, message in MESSAGES.items():
+        for codec in MESSAGE_CODECS.values():
+            if isinstance(message, ArbMessage):
+                encode, decode = codec.encode_arb_message, codec.decode_arb_message
+            else:
+                encode, decode = codec.encode_odds_update, codec.decode_odds_update
+
+            data = encode(message)
+            wire_bytes = len(data.encode() if isinstance(data, str) else data)
+            encode_us = time_per_call_us(encode, message)
+            decode_us = time_per_call_us(decode, data)
+            print(f"{name:<22}{codec.name:<10}{wire_bytes:>8}{encode_us:>14.2f}{decode_us:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
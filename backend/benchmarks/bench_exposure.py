@@ -0,0 +1,61 @@
+"""
+Benchmarks marking every in-flight arb to market: a Python loop of calculate_guaranteed_profit per arb
+against the executor's exposure book (one vectorized calculate_guaranteed_profits call).
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_exposure`
+"""
+import random
+import time
+from backend.arb_executor.src.exposure_book import ExposureBook
+from backend.shared.arb_math import calculate_arb_stakes, calculate_guaranteed_profit
+from backend.shared.redis import ArbLeg, ArbMessage
+
+SIZES = [100, 1_000, 10_000, 100_000]  # In-flight arbs
+REPEATS = 5
+
+
+def build_arbs(n_arbs: int, seed: int = 42):
+    rng = random.Random(seed)
+    arbs = []
+    for i in range(n_arbs):
+        outcomes = ["home_win", "draw", "away_win"] if rng.random() < 0.5 else ["home_win", "away_win"]
+        odds = [round(rng.uniform(len(outcomes) * 0.9, len(outcomes) * 1.1), 2) for _ in outcomes]
+        legs = [
+            ArbLeg.model_construct(outcome=outcome, bookmaker=f"Bookmaker {rng.randrange(10)}", odds=leg_odds, stake=stake)
+            for outcome, leg_odds, stake in zip(outcomes, odds, calculate_arb_stakes(odds, 100.0))
+        ]
+        arbs.append(ArbMessage.model_construct(id=str(i), match=f"Match {i}", legs=legs, guaranteed_profit=0.0, status="detected", timestamp=0))
+    return arbs
+
+
+def mark_to_market_loop(arbs) -> float:
+    return sum(calculate_guaranteed_profit([leg.stake for leg in arb.legs], [leg.odds for leg in arb.legs]) for arb in arbs)
+
+
+def best_time(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'arbs':>8} {'loop (ms)':>10} {'vectorized (ms)':>16} {'speedup':>8}")
+
+    for n_arbs in SIZES:
+        arbs = build_arbs(n_arbs)
+        exposure_book = ExposureBook()
+        for arb in arbs:
+            exposure_book.set_arb(arb)
+
+        assert abs(mark_to_market_loop(arbs) - exposure_book.mark_to_market().guaranteed_profit) < 1e-6 * n_arbs
+
+        loop = best_time(mark_to_market_loop, arbs)
+        vectorized = best_time(exposure_book.mark_to_market)
+        print(f"{n_arbs:>8} {loop * 1e3:>10.2f} {vectorized * 1e3:>16.2f} {loop / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
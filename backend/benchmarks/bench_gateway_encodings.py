@@ -0,0 +1,103 @@
+"""
+Benchmarks the gateway's WebSocket frame encodings on a stream of odds updates and arbs: bytes on the wire and CPU
+per message for JSON text frames and binary frames with interned names, each with and without permessage-deflate
+(emulated with one zlib stream per connection, as negotiated with context takeover).
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_gateway_encodings`
+"""
+import random
+import time
+import zlib
+from typing import Callable, List
+from backend.gateway.src.binary_frames import BinaryFrameEncoder, InternTable
+from backend.gateway.src.models import WebSocketMessage
+from backend.shared.arb_math import calculate_arb_stakes
+from backend.shared.redis import ArbLeg, construct_arb_message, construct_odds_update_message
+
+MATCHES = 50
+BOOKMAKERS = 10
+MESSAGES = 20_000
+ARB_FRACTION = 0.02
+REPEATS = 3
+
+
+def build_messages(seed: int = 42) -> List[WebSocketMessage]:
+    rng = random.Random(seed)
+    matches = [f"Team {2 * i} United vs Team {2 * i + 1} Rovers" for i in range(MATCHES)]
+    bookmakers = [f"Bookmaker {name}" for name in ["Alpha", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot", "Golf", "Hotel", "India", "Juliet"][:BOOKMAKERS]]
+    messages = []
+
+    for i in range(MESSAGES):
+        match = rng.choice(matches)
+        timestamp = 1_700_000_000_000 + i * 10
+        if rng.random() < ARB_FRACTION:
+            odds = [round(rng.uniform(2.0, 2.3), 2), round(rng.uniform(2.0, 2.3), 2)]
+            legs = [
+                ArbLeg.model_construct(outcome=outcome, bookmaker=rng.choice(bookmakers), odds=leg_odds, stake=round(stake, 2))
+                for outcome, leg_odds, stake in zip(["home_win", "away_win"], odds, calculate_arb_stakes(odds, 100.0))
+            ]
+            contents = construct_arb_message(
+                id=f"{rng.getrandbits(128):032x}", match=match, legs=[leg.model_dump() for leg in legs],
+                guaranteed_profit=round(rng.uniform(0.1, 5.0), 2), status="detected", timestamp=timestamp
+            )
+            messages.append(WebSocketMessage.model_construct(message_type="arb_detection", contents=contents))
+        else:
+            odds = {"home_win": round(rng.uniform(1.5, 2.5), 2), "away_win": round(rng.uniform(1.5, 2.5), 2)}
+            contents = construct_odds_update_message("odds_update", match, rng.choice(bookmakers), odds, timestamp)
+            messages.append(WebSocketMessage.model_construct(message_type="odds_update", contents=contents))
+
+    return messages
+
+
+def encode_json(messages: List[WebSocketMessage]) -> List[bytes]:
+    return [message.model_dump_json().encode() for message in messages]
+
+
+def encode_binary(messages: List[WebSocketMessage]) -> List[bytes]:
+    """Every message's frame, preceded by a definitions frame whenever it introduced new names (as a client would get them)."""
+    encoder = BinaryFrameEncoder(InternTable())
+    frames, interned = [], 0
+    for message in messages:
+        frame = encoder.encode_message(message)
+        if frame.interned > interned:
+            frames.append(encoder.intern_table.definitions_frame(interned, frame.interned))
+            interned = frame.interned
+        frames.append(frame.data)
+    return frames
+
+
+def deflate(encode: Callable[[List[WebSocketMessage]], List[bytes]]) -> Callable[[List[WebSocketMessage]], List[bytes]]:
+    def encode_deflated(messages: List[WebSocketMessage]) -> List[bytes]:
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        # permessage-deflate flushes each message and drops the flush's trailing empty block
+        return [compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)[:-4] for frame in encode(messages)]
+    return encode_deflated
+
+
+def main():
+    messages = build_messages()
+    encodings = [
+        ("json", encode_json),
+        ("json + deflate", deflate(encode_json)),
+        ("binary", encode_binary),
+        ("binary + deflate", deflate(encode_binary)),
+    ]
+
+    print(f"{MESSAGES} messages over {MATCHES} matches and {BOOKMAKERS} bookmakers ({ARB_FRACTION:.0%} arbs)")
+    print(f"{'encoding':>18} {'bytes/msg':>10} {'vs json':>8} {'us/msg':>8}")
+
+    json_bytes = None
+    for name, encode in encodings:
+        timings = []
+        for _ in range(REPEATS):
+            start = time.process_time()
+            frames = encode(messages)
+            timings.append(time.process_time() - start)
+
+        total_bytes = sum(len(frame) for frame in frames)
+        json_bytes = json_bytes or total_bytes
+        print(f"{name:>18} {total_bytes / MESSAGES:>10.1f} {json_bytes / total_bytes:>7.1f}x {min(timings) / MESSAGES * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmarks the gateway broadcasting odds updates to many WebSocket clients, a few of which are slow:
+the old sequential broadcast (send_json of model_dump, awaited client by client) against serializing once
+and queueing on every client's own writer. Reports the delivery latency of the healthy clients and the CPU
+time spent in the broadcast call itself.
+
+Then compares the gateway listener's CPU per message when decoding and re-encoding each payload against passing
+the raw payload through in its envelope, recording every update in the snapshot cache as the gateway does.
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_gateway_fanout`
+"""
+import asyncio
+import json
+import time
+from typing import List
+from unittest.mock import MagicMock, patch
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.models import WebSocketMessage
+from backend.gateway.src.redis_listener import RedisListener
+from backend.gateway.src.snapshot_cache import SnapshotCache
+from backend.gateway.src.subscriptions import SubscriptionIndex
+from backend.gateway.src.websocket_handler import ClientConnection, broadcast_message
+from backend.shared.config import shared_config
+from backend.shared.redis import construct_odds_update_message, message_codec
+
+CLIENTS = [100, 500]
+SLOW_CLIENTS = 5
+SLOW_SEND_SECONDS = 0.002  # Per message sent to a slow client
+MESSAGES = 50
+MESSAGE_INTERVAL_SECONDS = 0.005
+REPEATS = 3
+LISTENER_MESSAGES = 20_000
+LISTENER_CLIENTS = 1
+LISTENER_QUOTES = 1_000  # Distinct (match, bookmaker) the listener's odds updates are spread over
+
+
+class FakeWebSocket:
+    """Records when each message arrived, taking `send_delay` seconds per send."""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.received: List[float] = []
+        self.client = "bench"
+
+    async def send_text(self, text: str):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.received.append(time.perf_counter())
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def build_message(i: int, match: str = "Team A vs Team B", bookmaker: str = "Bookmaker 1") -> WebSocketMessage:
+    return WebSocketMessage.model_construct(
+        message_type="odds_update",
+        contents=construct_odds_update_message("odds_update", match, bookmaker, {"home_win": 1.9 + i / 1000, "away_win": 2.1}, i)
+    )
+
+
+async def sequential_broadcast(websockets: List[FakeWebSocket], data: WebSocketMessage):
+    """The gateway's previous broadcast: each client serialized for and awaited in turn."""
+    for ws in websockets:
+        await ws.send_json(data.model_dump())
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run(n_clients: int, queued: bool):
+    websockets = [FakeWebSocket(SLOW_SEND_SECONDS if i < SLOW_CLIENTS else 0.0) for i in range(n_clients)]
+    clients = {ClientConnection(ws, queue_size=MESSAGES) for ws in websockets}
+    subscriptions = SubscriptionIndex()
+    for client in clients:
+        subscriptions.subscribe(client)
+    writers = [asyncio.create_task(client.run_writer()) for client in clients] if queued else []
+    sent_at: List[float] = []
+    broadcast_cpu = 0.0
+
+    with patch.object(websocket_handler, "subscriptions", subscriptions):
+        for i in range(MESSAGES):
+            message = build_message(i)
+            sent_at.append(time.perf_counter())
+            cpu_start = time.process_time()
+            if queued:
+                await broadcast_message(message)
+            else:
+                await sequential_broadcast(websockets, message)
+            broadcast_cpu += time.process_time() - cpu_start
+            await asyncio.sleep(MESSAGE_INTERVAL_SECONDS)
+
+        await asyncio.sleep(MESSAGES * SLOW_SEND_SECONDS)
+
+    for writer in writers:
+        writer.cancel()
+    await asyncio.gather(*writers, return_exceptions=True)
+
+    latencies = [
+        (received - sent) * 1e3
+        for ws in websockets[SLOW_CLIENTS:] for received, sent in zip(ws.received, sent_at)
+    ]
+    return percentile(latencies, 0.5), percentile(latencies, 0.99), broadcast_cpu / MESSAGES * 1e3
+
+
+def run_listener(passthrough: bool) -> float:
+    """
+    Microseconds of CPU per odds update handled by the gateway listener, queueing it for a few clients
+    and recording it in a snapshot cache, with a snapshot built at the end as a client connecting would.
+    """
+    listener = RedisListener(MagicMock())
+    listener.passthrough = passthrough
+    payloads = [
+        message_codec.encode_odds_update(build_message(i, f"Team {i // 10} vs Team {i // 10 + 1}", f"Bookmaker {i % 10}").contents)
+        for i in range(LISTENER_QUOTES)
+    ]
+    channel = shared_config.REDIS_ODDS_UPDATE_CHANNEL
+    snapshot_cache = SnapshotCache()
+    subscriptions = SubscriptionIndex()
+    for _ in range(LISTENER_CLIENTS):
+        subscriptions.subscribe(ClientConnection(FakeWebSocket(), queue_size=LISTENER_MESSAGES))
+
+    async def handle_all():
+        for i in range(LISTENER_MESSAGES):
+            await listener.handle_message(channel, payloads[i % LISTENER_QUOTES])
+        snapshot_cache.get_snapshot()
+
+    with patch.object(websocket_handler, "subscriptions", subscriptions), patch.object(websocket_handler, "snapshot_cache", snapshot_cache):
+        start = time.process_time()
+        asyncio.run(handle_all())
+        return (time.process_time() - start) / LISTENER_MESSAGES * 1e6
+
+
+def main():
+    print(f"{SLOW_CLIENTS} slow clients ({SLOW_SEND_SECONDS * 1e3:.0f}ms per send), latencies of the others")
+    print(f"{'clients':>8} {'broadcast':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'cpu/msg (ms)':>13}")
+
+    for n_clients in CLIENTS:
+        for name, queued in (("sequential", False), ("queued", True)):
+            # Best of each figure over the repeats, to leave out scheduler hiccups
+            p50, p99, cpu = map(min, zip(*(asyncio.run(run(n_clients, queued)) for _ in range(REPEATS))))
+            print(f"{n_clients:>8} {name:>10} {p50:>9.2f} {p99:>9.2f} {cpu:>13.3f}")
+
+    print(f"\nListener CPU per odds update ({LISTENER_CLIENTS} clients)")
+    print(f"{'mode':>12} {'us/msg':>8}")
+    for name, passthrough in (("decode", False), ("passthrough", True)):
+        print(f"{name:>12} {min(run_listener(passthrough) for _ in range(REPEATS)):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
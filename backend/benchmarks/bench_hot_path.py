@@ -0,0 +1,168 @@
+"""
+Benchmarks the engine and executor hot paths with validated pydantic messages against validation-free records
+(slotted OddsUpdate records and model_construct-ed arbs): nanoseconds per message through each service,
+and objects/bytes allocated per decoded odds update.
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_hot_path`
+"""
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from unittest.mock import patch
+from backend.arb_engine.src.arb_dedup_cache import ArbDedupCache
+from backend.arb_engine.src.arb_engine import ArbEngine, ArbOpportunity
+from backend.arb_engine.src.config import arb_engine_config
+from backend.arb_executor.src.arb_executor import ArbExecutor
+from backend.shared.arb_math import calculate_guaranteed_profit
+from backend.shared.redis import (
+    ArbLeg, ArbMessage, OddsUpdateMessage, OddsValues, get_odds_match_bookmaker_key, get_odds_match_hash, message_codec
+)
+from backend.shared.utils import current_milli_time
+
+N_MATCHES = 200
+N_BOOKMAKERS = 8
+N_UPDATES = 50_000
+REPEATS = 3
+
+
+class NullRedis:
+    """Swallows publishes and serves odds hashes from memory, so only the services' own work is timed."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.results = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def publish(self, channel, data):
+        self.results.append(None)
+
+    def hmget(self, key, fields):
+        self.results.append([self.hashes.get(key, {}).get(field) for field in fields])
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class ValidatingArbEngine(ArbEngine):
+    """The engine as it was before: every arb built with pydantic validation."""
+
+    def create_arb_message(self, arb: ArbOpportunity) -> ArbMessage:
+        overall_stake = arb_engine_config.TOTAL_STAKE_PER_ARB
+        legs = [
+            ArbLeg(outcome=outcome, bookmaker=arb.bookmakers[outcome], odds=odds, stake=arb.compute_stake_at_bookmaker(outcome, overall_stake))
+            for outcome, odds in arb.odds.items()
+        ]
+        guaranteed_profit = calculate_guaranteed_profit([leg.stake for leg in legs], [leg.odds for leg in legs])
+        return ArbMessage(
+            id=str(uuid.uuid4()), match=arb.match, legs=legs, guaranteed_profit=guaranteed_profit,
+            status="detected", timestamp=current_milli_time()
+        )
+
+
+def generate_odds_updates(seed: int = 42):
+    rng = random.Random(seed)
+    fair_home_probabilities = [rng.uniform(0.3, 0.6) for _ in range(N_MATCHES)]
+    updates = []
+
+    for _ in range(N_UPDATES):
+        m = rng.randrange(N_MATCHES)
+        home_probability = fair_home_probabilities[m] + rng.gauss(0, 0.01)
+        updates.append(OddsUpdateMessage(
+            event="odds_update",
+            match=f"Match {m}",
+            bookmaker=f"Bookmaker {rng.randrange(N_BOOKMAKERS)}",
+            odds=OddsValues(home_win=round(1 / (home_probability + 0.02), 2), away_win=round(1 / (1.02 - home_probability), 2)),
+            timestamp=current_milli_time()
+        ))
+
+    return [message_codec.encode_odds_update(update) for update in updates]
+
+
+def run_engine(engine_class, decode, encoded_updates):
+    engine = engine_class(NullRedis(), dedup_cache=ArbDedupCache(ttl_seconds=0, max_entries=0))
+    published = []
+    engine.publish_arb_message = published.append
+
+    async def run():
+        for data in encoded_updates:
+            await engine.detect_arb_and_publish_bets(decode(data))
+
+    asyncio.run(run())
+    return published
+
+
+def run_executor(decode, encoded_arbs, redis_client, tick_size=100):
+    """Settle the arbs in ticks of `tick_size`, as the executor's scheduler hands them over."""
+    executor = ArbExecutor(redis_client)
+
+    async def run():
+        for i in range(0, len(encoded_arbs), tick_size):
+            await executor.execute_arbs([decode(data) for data in encoded_arbs[i:i + tick_size]])
+
+    asyncio.run(run())
+
+
+def best_time(fn, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def allocations_per_message(decode, encoded_updates):
+    """Objects (allocated blocks) and bytes still held per decoded odds update."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    decoded = [decode(data) for data in encoded_updates]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del decoded
+    return blocks / len(encoded_updates), size / len(encoded_updates)
+
+
+def main():
+    logging_disabled = patch("backend.arb_engine.src.arb_engine.logging"), patch("backend.arb_executor.src.arb_executor.logging")
+    with logging_disabled[0], logging_disabled[1]:
+        encoded_updates = generate_odds_updates()
+        validated_decode = message_codec.decode_odds_update
+        record_decode = message_codec.decode_odds_update_record
+
+        print(f"Engine: {N_UPDATES} odds updates over {N_MATCHES} matches x {N_BOOKMAKERS} bookmakers ({message_codec.name} codec)")
+        print(f"{'':<12}{'ns/update':>12}{'objects/update':>16}{'bytes/update':>14}")
+        for name, engine_class, decode in [("validated", ValidatingArbEngine, validated_decode), ("records", ArbEngine, record_decode)]:
+            seconds = best_time(run_engine, engine_class, decode, encoded_updates)
+            blocks, size = allocations_per_message(decode, encoded_updates[:10_000])
+            print(f"{name:<12}{seconds / N_UPDATES * 1e9:>12.0f}{blocks:>16.1f}{size:>14.0f}")
+
+        # Execute every arb the engine found, against the final odds
+        arb_messages = run_engine(ArbEngine, record_decode, encoded_updates)
+        encoded_arbs = [message_codec.encode_arb_message(arb_message) for arb_message in arb_messages]
+        redis_client = NullRedis()
+        for data in encoded_updates:
+            update = record_decode(data)
+            redis_client.hashes.setdefault(get_odds_match_hash(update.match), {})[get_odds_match_bookmaker_key(update.bookmaker)] = json.dumps(update.odds.outcomes)
+
+        print(f"\nExecutor: {len(encoded_arbs)} arbs")
+        print(f"{'':<12}{'ns/arb':>12}")
+        for name, decode in [
+            ("validated", message_codec.decode_arb_message),
+            ("trusted", lambda data: message_codec.decode_arb_message(data, trusted=True)),
+        ]:
+            seconds = best_time(run_executor, decode, encoded_arbs, redis_client)
+            print(f"{name:<12}{seconds / max(len(encoded_arbs), 1) * 1e9:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
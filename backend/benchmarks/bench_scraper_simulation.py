@@ -0,0 +1,66 @@
+"""
+Benchmarks generating quote changes in the scraper for thousands of matches: the tick loop (an action and fresh odds
+drawn per quote in Python) against the Poisson simulator (a period's changes drawn and random-walked in NumPy),
+as CPU per change and the changes per second one core could generate.
+
+Run from the root of the repository: `python -m backend.benchmarks.bench_scraper_simulation`
+"""
+import time
+from unittest.mock import MagicMock
+from backend.scraper.src.config import scraper_config
+from backend.scraper.src.odds_publisher import OddsPublisher
+from backend.scraper.src.odds_simulator import OddsSimulator
+from backend.shared.redis import MARKET_OUTCOMES
+
+SIZES = [(100, 10), (1_000, 20), (10_000, 20)]  # (Matches, bookmakers)
+RATE_PER_BOOKMAKER = 2_000.0  # Quote changes per second
+TICK_SECONDS = 0.05
+REPEATS = 5
+
+
+def tick_loop(publisher: OddsPublisher, matches, bookmakers) -> int:
+    """One tick of the tick simulation, without publishing: the changes it makes."""
+    changes = 0
+    for match in matches:
+        for bookmaker in bookmakers:
+            action = publisher.determine_action()
+            if action == "close":
+                publisher.close_quote(match, bookmaker)
+                changes += 1
+            elif action == "update":
+                publisher.update_quote(match, bookmaker)
+                changes += 1
+    return changes
+
+
+def best_time(fn, *args):
+    timings, result = [], None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    publisher = OddsPublisher(MagicMock(), seed=42)
+    print(f"{'matches':>8} {'bookmakers':>11} {'tick (us/change)':>17} {'poisson (us/change)':>20} {'poisson (changes/s/core)':>25}")
+
+    for n_matches, n_bookmakers in SIZES:
+        matches = [f"Team {i} vs Team {i + n_matches}" for i in range(n_matches)]
+        bookmakers = [f"Bookmaker {i}" for i in range(n_bookmakers)]
+        simulator = OddsSimulator(
+            matches, bookmakers, [RATE_PER_BOOKMAKER] * n_bookmakers, MARKET_OUTCOMES["1x2"], close_probability=0.25,
+            vig=0.05, volatility=0.05, mean_reversion=0.2,
+            first_outcome_odds_range=(scraper_config.HOME_WIN_ODDS_MIN, scraper_config.HOME_WIN_ODDS_MAX), seed=42
+        )
+
+        tick_seconds, tick_changes = best_time(tick_loop, publisher, matches, bookmakers)
+        poisson_seconds, poisson_changes = best_time(simulator.step, TICK_SECONDS)
+        per_tick = tick_seconds / tick_changes * 1e6
+        per_poisson = poisson_seconds / len(poisson_changes) * 1e6
+        print(f"{n_matches:>8} {n_bookmakers:>11} {per_tick:>17.2f} {per_poisson:>20.2f} {1e6 / per_poisson:>25,.0f}")
+
+
+if __name__ == "__main__":
+    main()
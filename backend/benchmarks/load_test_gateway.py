@@ -0,0 +1,153 @@
+"""
+Load test of the gateway's WebSocket fan-out with 1, 2 and 4 uvicorn worker processes sharing one feed.
+The test takes the feed leader's place (binding the feed socket before starting the gateway), so every worker
+follows it and no Redis is needed. It relays odds updates at a fixed rate to the workers while client processes
+hold WebSocket connections open, and reports how many connections were served, the fraction of messages delivered
+and their delivery latency. Each worker count is run twice: with every client taking the whole feed, so the workers
+pass the relayed JSON through without decoding it, and with every client subscribed to the matches by name, so every
+worker has to decode each relayed message to route it. Run it on a machine with spare cores for the clients: the gateway's capacity should
+scale with its worker count until it runs out of cores.
+
+Run from the root of the repository: `python -m backend.benchmarks.load_test_gateway`
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import List, Set
+import websockets
+from backend.gateway.src.feed_relay import encode_frame
+
+WORKERS = [1, 2, 4]
+CLIENTS = 2000
+CLIENT_PROCESSES = 4
+MESSAGES_PER_SECOND = 100
+DURATION_SECONDS = 10.0
+PORT = 8765
+MATCHES = [f"Team {i} vs Team {i + 50}" for i in range(50)]
+
+
+def run_clients(n_clients: int, port: int, duration: float, filtering: bool, results: multiprocessing.Queue):
+    """
+    Hold WebSocket connections open for the test, recording the latency of each odds update received.
+    With `filtering`, clients subscribe to every match of the test by name: they get the same messages, routed.
+    """
+    subscribe_request = json.dumps({"action": "subscribe", "matches": MATCHES})
+    latencies: List[float] = []
+    connected = 0
+
+    async def client():
+        nonlocal connected
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}/ws", open_timeout=30, max_queue=None) as websocket:
+                connected += 1
+                if filtering:
+                    await websocket.send(subscribe_request)
+                deadline = time.time() + duration
+                while (timeout := deadline - time.time()) > 0:
+                    try:
+                        message = json.loads(await asyncio.wait_for(websocket.recv(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                    if message["message_type"] == "odds_update":
+                        latencies.append(time.time() * 1000 - message["contents"]["timestamp"])
+        except (OSError, websockets.WebSocketException):
+            pass
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(n_clients)))
+
+    asyncio.run(main())
+    results.put((connected, latencies))
+
+
+async def run_feed(server_socket: socket.socket, n_workers: int) -> int:
+    """Lead the gateway's feed: wait for every worker to follow, then relay odds updates at the test rate."""
+    followers: Set[asyncio.StreamWriter] = set()
+
+    async def add_follower(reader, writer):
+        followers.add(writer)
+        await reader.read()
+
+    server = await asyncio.start_unix_server(add_follower, sock=server_socket)
+    while len(followers) < n_workers:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(2.0)  # Let the clients connect
+
+    sent = 0
+    start = time.time()
+    while time.time() - start < DURATION_SECONDS - 3.0:
+        contents = {
+            "event": "odds_update", "match": MATCHES[sent % len(MATCHES)], "bookmaker": f"Bookmaker {sent % 10}",
+            "odds": {"home_win": 1.9, "away_win": 2.1}, "timestamp": int(time.time() * 1000)
+        }
+        frame = encode_frame("odds_update", json.dumps(contents), "load-test", sent + 1)
+        for follower in followers:
+            follower.write(frame)
+        sent += 1
+        await asyncio.sleep(1 / MESSAGES_PER_SECOND)
+
+    server.close()
+    for follower in followers:
+        follower.close()
+    await asyncio.sleep(0.1)  # Let the followers' connections wind down
+    return sent
+
+
+def run(n_workers: int, filtering: bool):
+    socket_name = f"arb-gateway-load-test-{uuid.uuid4()}"
+    server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server_socket.bind("\0" + socket_name)
+
+    env = {**os.environ, "FEED_SOCKET_NAME": socket_name}
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.gateway.src.main:app", "--port", str(PORT), "--workers", str(n_workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=run_clients, args=(CLIENTS // CLIENT_PROCESSES, PORT, DURATION_SECONDS, filtering, results))
+            for _ in range(CLIENT_PROCESSES)
+        ]
+        time.sleep(2.0)  # Let the workers start
+        for process in clients:
+            process.start()
+
+        sent = asyncio.run(run_feed(server_socket, n_workers))
+        connected, latencies = 0, []
+        for _ in clients:
+            process_connected, process_latencies = results.get()
+            connected += process_connected
+            latencies += process_latencies
+        for process in clients:
+            process.join()
+    finally:
+        gateway.terminate()
+        gateway.wait()
+
+    latencies.sort()
+    delivered = len(latencies) / (sent * connected) if sent and connected else 0.0
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+    return connected, delivered, p50, p99
+
+
+def main():
+    print(f"{CLIENTS} clients, {MESSAGES_PER_SECOND} odds updates/s, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'clients':>10} {'connected':>10} {'delivered':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+
+    for n_workers in WORKERS:
+        for filtering in (False, True):
+            connected, delivered, p50, p99 = run(n_workers, filtering)
+            clients = "filtering" if filtering else "all"
+            print(f"{n_workers:>8} {clients:>10} {connected:>10} {delivered:>9.1%} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
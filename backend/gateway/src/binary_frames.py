@@ -0,0 +1,91 @@
+import msgpack
+from typing import Dict, List, NamedTuple, Optional
+from backend.gateway.src.models import WebSocketMessage
+from backend.shared.redis import ArbMessage, OddsUpdateMessage
+
+# WebSocket subprotocol clients request to be sent binary frames instead of JSON text
+BINARY_SUBPROTOCOL = "arb.msgpack.v1"
+
+# First element of every binary frame
+DEFINITIONS = 0
+MESSAGE_TYPE_CODES = {"odds_update": 1, "arb_detection": 2, "arb_execution": 3, "odds_batch": 4}
+EVENT_CODES = {"odds_update": 0, "odds_close": 1}
+STATUS_CODES = {"detected": 0, "completed": 1, "cancelled": 2, "adjusted": 3}
+
+
+class BinaryFrame(NamedTuple):
+    data: bytes
+    interned: int  # Strings interned when it was encoded: the client must have had the definitions of all of them
+
+
+class InternTable:
+    """
+    Numbers the match, bookmaker and outcome names in binary frames, so each name goes over a connection once.
+    The numbers are shared by every connection, so a message is still encoded once for all of them: each connection
+    only tracks how many of the names it has been sent, and is sent the definitions of newer ones before a frame using them.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def definitions_frame(self, start: int, end: int) -> bytes:
+        """[DEFINITIONS, first ID, [name, ...]]: the names numbered from `start` up to `end`."""
+        return msgpack.packb([DEFINITIONS, start, self.strings[start:end]])
+
+
+class BinaryFrameEncoder:
+    """
+    Messages as msgpack arrays with interned names and coded enums, in place of JSON objects:
+    - odds update: [1, event, match, bookmaker, [outcome, odds, ...] | None, timestamp]
+    - arb detection/execution: [2 | 3, id, match, [[outcome, bookmaker, odds, stake], ...], guaranteed profit, status, timestamp]
+    - odds batch: [4, [odds update, ...]]
+    """
+
+    def __init__(self, intern_table: Optional[InternTable] = None):
+        self.intern_table = intern_table or InternTable()
+
+    def encode_message(self, data: WebSocketMessage) -> BinaryFrame:
+        if data.message_type == "odds_update":
+            return self.encode_odds_update(data.contents)
+        return BinaryFrame(msgpack.packb(self._arb_fields(data.message_type, data.contents)), len(self.intern_table))
+
+    def encode_odds_update(self, odds_update: OddsUpdateMessage) -> BinaryFrame:
+        return BinaryFrame(msgpack.packb(self._odds_update_fields(odds_update)), len(self.intern_table))
+
+    def encode_odds_batch(self, odds_updates: List[BinaryFrame]) -> BinaryFrame:
+        """An odds batch from already encoded odds updates, spliced into the batch array without re-encoding them."""
+        packer = msgpack.Packer()
+        data = packer.pack_array_header(2) + packer.pack(MESSAGE_TYPE_CODES["odds_batch"]) + packer.pack_array_header(len(odds_updates))
+        return BinaryFrame(data + b"".join(frame.data for frame in odds_updates), max(frame.interned for frame in odds_updates))
+
+    def _odds_update_fields(self, odds_update: OddsUpdateMessage) -> list:
+        intern = self.intern_table.intern
+        fields = [MESSAGE_TYPE_CODES["odds_update"], EVENT_CODES[odds_update.event], intern(odds_update.match), intern(odds_update.bookmaker)]
+
+        odds = None
+        if odds_update.odds is not None:
+            odds = []
+            for outcome, outcome_odds in odds_update.odds.outcomes.items():
+                odds += [intern(outcome), outcome_odds]
+
+        fields += [odds, odds_update.timestamp]
+        return fields
+
+    def _arb_fields(self, message_type: str, arb_message: ArbMessage) -> list:
+        intern = self.intern_table.intern
+        legs = [[intern(leg.outcome), intern(leg.bookmaker), leg.odds, leg.stake] for leg in arb_message.legs]
+        return [
+            MESSAGE_TYPE_CODES[message_type], arb_message.id, intern(arb_message.match), legs,
+            arb_message.guaranteed_profit, STATUS_CODES[arb_message.status], arb_message.timestamp
+        ]
@@ -0,0 +1,34 @@
+import os
+
+class GatewayConfig:
+    # Messages waiting to be sent to each client. When a client can't keep up and its queue is full, SLOW_CLIENT_POLICY
+    # either "drop"s its oldest queued message or "disconnect"s it (it can reconnect and carry on from the latest messages)
+    CLIENT_SEND_QUEUE_SIZE = int(os.getenv("CLIENT_SEND_QUEUE_SIZE", 1000))
+    SLOW_CLIENT_POLICY = os.getenv("SLOW_CLIENT_POLICY", "drop")
+
+    # Seconds without messages after which a keep-alive ping is sent
+    KEEPALIVE_INTERVAL_SECONDS = float(os.getenv("KEEPALIVE_INTERVAL_SECONDS", 30.0))
+
+    # Frames per second in which odds updates are sent to clients that subscribe with "conflate" (only the latest
+    # update per match and bookmaker since the last frame, batched into one message)
+    CONFLATED_ODDS_FRAME_RATE = float(os.getenv("CONFLATED_ODDS_FRAME_RATE", 10.0))
+
+    # Forward JSON messages from Redis to clients as they are, wrapped in the WebSocket message envelope, instead of
+    # decoding and re-encoding them (when no client needs them decoded to filter or conflate them).
+    # A sample of them can still be validated, logging any that are invalid.
+    RAW_PASSTHROUGH = os.getenv("RAW_PASSTHROUGH", "true").lower() == "true"
+    PASSTHROUGH_VALIDATION_SAMPLE_RATE = float(os.getenv("PASSTHROUGH_VALIDATION_SAMPLE_RATE", 0.0))
+
+    # Recent arb detections and executions (each) kept for the snapshot sent to new clients
+    SNAPSHOT_ARB_HISTORY = int(os.getenv("SNAPSHOT_ARB_HISTORY", 100))
+
+    # Messages kept for SSE clients to resume from after reconnecting (with Last-Event-ID); ones that missed more get a snapshot
+    SSE_EVENT_LOG_SIZE = int(os.getenv("SSE_EVENT_LOG_SIZE", 10000))
+
+    # Gateway worker processes (WEB_CONCURRENCY) share one Redis feed: the worker holding this abstract Unix socket
+    # subscribes to Redis and relays messages to the others, disconnecting any with more than the max bytes unsent
+    FEED_SOCKET_NAME = os.getenv("FEED_SOCKET_NAME", "arb-gateway-feed")
+    FEED_MAX_FOLLOWER_BUFFER_BYTES = int(os.getenv("FEED_MAX_FOLLOWER_BUFFER_BYTES", 16 * 1024 * 1024))
+    FEED_RETRY_SECONDS = float(os.getenv("FEED_RETRY_SECONDS", 0.5))
+
+gateway_config = GatewayConfig()
@@ -0,0 +1,80 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Deque, List, Optional, Union
+from pydantic import BaseModel
+
+# An event's message, encoded the first time it's read if it was logged decoded
+EventMessage = Union[str, BaseModel]
+
+
+class EventLog:
+    """
+    The last `capacity` messages the gateway forwarded, numbered in sequence, for clients to resume from
+    the last one they saw. Event IDs are "<log ID>-<sequence>": the log ID changes with every gateway process,
+    so an ID from another process (e.g. before a restart) is never mistaken for one of this log's.
+    Workers following the feed `align` their log with the leader's, so every worker gives an event the same ID.
+    """
+
+    def __init__(self, capacity: int, log_id: Optional[str] = None):
+        self.log_id = log_id or str(time.time_ns())
+        self.events: Deque[List] = deque(maxlen=capacity)  # [sequence, message]
+        self.last_sequence = 0
+        self.appended = asyncio.Event()  # Replaced on every append, waking everyone waiting on the previous one
+
+    def append(self, message: EventMessage) -> int:
+        self.last_sequence += 1
+        self.events.append([self.last_sequence, message])
+        self.appended.set()
+        self.appended = asyncio.Event()
+        return self.last_sequence
+
+    def align(self, log_id: str, sequence: int):
+        """
+        Make the next event appended `sequence` of log `log_id`, as the feed leader numbered it. The events kept
+        are dropped when they don't run on into it (another log, or messages missed), as they can't be resumed from.
+        """
+        if log_id != self.log_id or sequence != self.last_sequence + 1:
+            self.log_id = log_id
+            self.events.clear()
+            self.last_sequence = sequence - 1
+
+    def get_event_id(self, sequence: int) -> str:
+        return f"{self.log_id}-{sequence}"
+
+    def parse_event_id(self, event_id: str) -> Optional[int]:
+        """The sequence of one of this log's event IDs, or None for an ID from another log (or malformed)."""
+        log_id, _, sequence = event_id.rpartition("-")
+        if log_id != self.log_id or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def since(self, sequence: int) -> Optional[List[tuple]]:
+        """
+        The (sequence, encoded message) of every event after `sequence`, or None if some of them are no longer kept
+        (or `sequence` is from the future), so the reader has to start over from a snapshot.
+        """
+        first_sequence = self.last_sequence - len(self.events) + 1
+        if not first_sequence - 1 <= sequence <= self.last_sequence:
+            return None
+
+        events = []
+        for event in itertools.islice(self.events, sequence - first_sequence + 1, None):
+            if not isinstance(event[1], str):
+                event[1] = event[1].model_dump_json()
+            events.append((event[0], event[1]))
+        return events
+
+    async def wait_for_events(self, sequence: int, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for an event after `sequence`, returning whether there is one
+        (or the log was renumbered from below it by `align`, so the reader has to start over).
+        """
+        if self.last_sequence != sequence:
+            return True
+        try:
+            await asyncio.wait_for(self.appended.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.last_sequence != sequence
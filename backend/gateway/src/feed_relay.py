@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import socket
+import struct
+from typing import List, Optional, Set
+from backend.gateway.src.config import gateway_config
+from backend.gateway.src.models import MESSAGE_TYPES, MessageType
+from backend.shared.redis_listener import MessageData
+
+# Frame header: payload length, message type (index in MESSAGE_TYPES), event log ID length, event sequence.
+# The header is followed by the event log ID, then the payload
+FRAME_HEADER = struct.Struct(">IBBQ")
+
+
+def encode_frame(message_type: MessageType, data: MessageData, log_id: str, sequence: int) -> bytes:
+    payload = data.encode() if isinstance(data, str) else data
+    encoded_log_id = log_id.encode()
+    return FRAME_HEADER.pack(len(payload), MESSAGE_TYPES.index(message_type), len(encoded_log_id), sequence) + encoded_log_id + payload
+
+
+class FeedRelay:
+    """
+    Shares one upstream Redis feed between the gateway's worker processes, each of which serves its own clients.
+    Workers elect a leader by binding a Unix socket in the abstract namespace (so it's freed the moment its process dies):
+    the one that binds it subscribes to Redis with the listener and relays every message to the others over the socket,
+    as its message type and JSON contents, with the event ID it has in the leader's SSE event log. The others connect as followers
+    and hand the relayed messages to the same listener, never touching Redis, logging them under the leader's event IDs
+    so an SSE client can resume on any worker. When the leader goes, its followers race to bind the socket and one of them takes over.
+    """
+
+    def __init__(self, listener, socket_name: str = gateway_config.FEED_SOCKET_NAME,
+                 max_follower_buffer_bytes: int = gateway_config.FEED_MAX_FOLLOWER_BUFFER_BYTES):
+        self.listener = listener  # The gateway RedisListener
+        self.address = "\0" + socket_name
+        self.max_follower_buffer_bytes = max_follower_buffer_bytes
+        self.followers: Set[asyncio.StreamWriter] = set()
+        self.leading = False
+
+    def relay(self, message_type: MessageType, data: MessageData, log_id: str, sequence: int):
+        """Send a message to every follower without waiting, disconnecting followers too far behind to catch up."""
+        if not self.followers:
+            return
+
+        frame = encode_frame(message_type, data, log_id, sequence)
+        for follower in list(self.followers):
+            if follower.transport.get_write_buffer_size() > self.max_follower_buffer_bytes:
+                logging.warning("Disconnecting a gateway worker that fell behind the feed")
+                self.followers.discard(follower)
+                follower.close()
+                continue
+            follower.write(frame)
+
+    async def run(self):
+        while True:
+            listening_socket = self.try_bind()
+            if listening_socket is not None:
+                await self.lead(listening_socket)
+            else:
+                await self.follow()
+            await asyncio.sleep(gateway_config.FEED_RETRY_SECONDS)
+
+    def try_bind(self) -> Optional[socket.socket]:
+        listening_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listening_socket.bind(self.address)
+        except OSError:
+            listening_socket.close()
+            return None
+        return listening_socket
+
+    async def lead(self, listening_socket: socket.socket):
+        logging.info("📡 Leading the gateway feed: subscribing to Redis for all workers")
+        server = await asyncio.start_unix_server(self.add_follower, sock=listening_socket)
+        self.leading = True
+        self.listener.feed_relay = self
+        try:
+            await self.listener.listen()
+        finally:
+            self.leading = False
+            self.listener.feed_relay = None
+            server.close()
+            for follower in self.followers:
+                follower.close()
+            self.followers.clear()
+
+    async def add_follower(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.followers.add(writer)
+        logging.info(f"Gateway worker joined the feed ({len(self.followers)} following)")
+        try:
+            await reader.read()  # Followers never send anything: returns when they disconnect
+        finally:
+            self.followers.discard(writer)
+            writer.close()
+
+    async def follow(self):
+        # Connected here rather than by path, as uvloop rejects abstract socket addresses
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(connection, self.address)
+            reader, writer = await asyncio.open_unix_connection(sock=connection)
+        except OSError:
+            connection.close()
+            return  # The leader is gone (or not listening yet): try to take over, then to connect again
+
+        logging.info("📡 Following the gateway feed")
+        try:
+            while True:
+                length, type_index, log_id_length, sequence = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                log_id = (await reader.readexactly(log_id_length)).decode()
+                data = await reader.readexactly(length)
+                await self.listener.forward_relayed_message(MESSAGE_TYPES[type_index], data, log_id, sequence)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logging.warning("Lost the gateway feed leader")
+        finally:
+            writer.close()
+
+    def get_metrics(self) -> dict:
+        return {"leading": self.leading, "followers": len(self.followers)}
@@ -1,20 +1,24 @@
 from fastapi import FastAPI
-from backend.gateway.src.websocket_handler import websocket_endpoint
+from backend.gateway.src.websocket_handler import connected_clients, flush_conflated_odds, websocket_endpoint
+from backend.gateway.src.feed_relay import FeedRelay
 from backend.gateway.src.redis_listener import RedisListener
+from backend.gateway.src.sse import sse_endpoint
 from contextlib import asynccontextmanager
 import asyncio
 from backend.shared.logging import setup_logging
-from backend.shared.redis_client import redis_client
+from backend.shared.redis_client import async_redis_client
 
 setup_logging()
 
-redis_listener = RedisListener(redis_client)
+redis_listener = RedisListener(async_redis_client)
+feed_relay = FeedRelay(redis_listener)  # Runs the listener in one worker, relaying its messages to the others
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(redis_listener.listen())
+    tasks = [asyncio.create_task(feed_relay.run()), asyncio.create_task(flush_conflated_odds())]
     yield
-    task.cancel()
+    for task in tasks:
+        task.cancel()
 
 app = FastAPI(
     title="Gateway API",
@@ -30,4 +34,15 @@ app = FastAPI(
 async def health_check():
     return {"status": "OK"}
 
+@app.get("/metrics", tags=["System"])
+async def metrics():
+    return {
+        "clients": len(connected_clients),
+        "queued_messages": sum(client.queue.qsize() for client in connected_clients),
+        "dropped_messages": sum(client.dropped_messages for client in connected_clients),
+        "conflated_messages": sum(client.conflated_messages for client in connected_clients),
+        "feed": feed_relay.get_metrics(),
+    }
+
 app.add_api_websocket_route("/ws", websocket_endpoint)
+app.add_api_route("/events", sse_endpoint, methods=["GET"], tags=["Streaming"])
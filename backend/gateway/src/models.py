@@ -1,7 +1,38 @@
-from typing import Literal, Union
+from typing import List, Literal, Optional, Union
 from pydantic import BaseModel
 from backend.shared.redis import OddsUpdateMessage, ArbMessage
 
+MessageType = Literal["odds_update", "arb_detection", "arb_execution"]
+MESSAGE_TYPES: List[MessageType] = ["odds_update", "arb_detection", "arb_execution"]
+
 class WebSocketMessage(BaseModel):
-    message_type: Literal["odds_update", "arb_detection", "arb_execution"]
+    message_type: MessageType
     contents: Union[OddsUpdateMessage, ArbMessage]
+
+class OddsBatchMessage(BaseModel):
+    """The latest odds update per match and bookmaker since the previous frame, sent to clients conflating odds."""
+    message_type: Literal["odds_batch"]
+    contents: List[OddsUpdateMessage]
+
+class SnapshotContents(BaseModel):
+    odds: List[OddsUpdateMessage]  # Latest update of every open quote
+    arb_detections: List[ArbMessage]  # Most recent, oldest first
+    arb_executions: List[ArbMessage]
+
+class SnapshotMessage(BaseModel):
+    """The current state, sent to clients as they connect, ahead of the live messages."""
+    message_type: Literal["snapshot"]
+    contents: SnapshotContents
+
+class SubscribeRequest(BaseModel):
+    """
+    Sent by a client to choose the messages it receives, replacing its previous subscription.
+    Unset filters match everything; with both matches and bookmakers, a message has to match both
+    (an arb matches a bookmaker if any of its legs is with it).
+    With `conflate`, odds updates come in odds batch frames instead of one by one.
+    """
+    action: Literal["subscribe"]
+    message_types: List[MessageType] = MESSAGE_TYPES
+    matches: Optional[List[str]] = None
+    bookmakers: Optional[List[str]] = None
+    conflate: bool = False
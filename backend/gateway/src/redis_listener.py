@@ -1,70 +1,121 @@
 import logging
-import redis
-import json
-import asyncio
-from backend.gateway.src.websocket_handler import broadcast_message
+import random
+import redis.asyncio
+from pydantic import BaseModel
+from typing import Optional
+from backend.gateway.src.config import gateway_config
+from backend.gateway.src.feed_relay import FeedRelay
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.websocket_handler import broadcast_encoded, broadcast_message, wrap_encoded_message
 from backend.shared.config import shared_config
-from backend.gateway.src.models import WebSocketMessage
-from backend.shared.redis import OddsUpdateMessage, ArbMessage
-from pydantic import ValidationError
+from backend.shared.redis_listener import AsyncRedisListener, MessageData
+from backend.shared.sharding import get_all_odds_update_channels, get_odds_update_channel_patterns, is_odds_update_channel
+from backend.gateway.src.models import MessageType, WebSocketMessage
+from backend.shared.redis import MESSAGE_CODECS, MessageDecodeError, message_codec
 
-class RedisListener:
+# The codec of messages relayed between gateway workers by the feed leader
+json_codec = MESSAGE_CODECS["json"]
+
+
+class RedisListener(AsyncRedisListener):
     """Handles Redis pub/sub listening and broadcasts messages to WebSockets."""
 
-    def __init__(self, redis_client: redis.Redis):
-        self.redis_client: redis.Redis = redis_client
-
-    async def listen(self):
-        pubsub = self.redis_client.pubsub()
-        
-        # Subscribe to all relevant Redis channels
-        pubsub.subscribe(
-            shared_config.REDIS_ODDS_UPDATE_CHANNEL,
-            shared_config.REDIS_ARB_DETECTIONS_CHANNEL,
-            shared_config.REDIS_ARB_EXECUTIONS_CHANNEL
-        )
-
-        logging.info(f"Subscribed to Redis channels")
-
-        while True:
-            try:
-                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message:
-                    channel = message["channel"]
-                    raw_data = message["data"]
-
-                    try:
-                        data = json.loads(raw_data)
-
-                        # Determine message type
-                        if channel == shared_config.REDIS_ODDS_UPDATE_CHANNEL:
-                            parsed_message = WebSocketMessage(
-                                message_type="odds_update",
-                                contents=OddsUpdateMessage(**data)
-                            )
-                        elif channel == shared_config.REDIS_ARB_DETECTIONS_CHANNEL:
-                            parsed_message = WebSocketMessage(
-                                message_type="arb_detection",
-                                contents=ArbMessage(**data)
-                            )
-                        elif channel == shared_config.REDIS_ARB_EXECUTIONS_CHANNEL:
-                            parsed_message = WebSocketMessage(
-                                message_type="arb_execution",
-                                contents=ArbMessage(**data)
-                            )
-                        else:
-                            logging.warning(f"Unrecognized message from {channel}: {data}")
-                            continue
-
-                        logging.info(f"Sending WebSocket message: {parsed_message.model_dump_json()}")
-                        await broadcast_message(parsed_message)
-
-                    except json.JSONDecodeError:
-                        logging.error(f"Failed to decode JSON: {raw_data}", exc_info=True)
-                    except ValidationError:
-                        logging.error(f"Validation error. Raw data: {raw_data}", exc_info=True)
-
-                await asyncio.sleep(0.001)  # Prevent high CPU usage
-
-            except Exception:
-                logging.error("Redis Listener Error.", exc_info=True)
+    def __init__(self, redis_client: redis.asyncio.Redis):
+        # Subscribe to all relevant Redis channels, including the odds update channel of every partition
+        # (by pattern with pub/sub; streams have no patterns, so every partition stream is read).
+        # Broadcasts run one at a time so clients see messages in order. No consumer group: every gateway sees every message.
+        channels = [shared_config.REDIS_ARB_DETECTIONS_CHANNEL, shared_config.REDIS_ARB_EXECUTIONS_CHANNEL]
+        if shared_config.REDIS_TRANSPORT == "streams":
+            super().__init__(redis_client, get_all_odds_update_channels() + channels, max_concurrency=1)
+        else:
+            super().__init__(redis_client, channels, max_concurrency=1, patterns=get_odds_update_channel_patterns())
+
+        # JSON payloads are already what clients are sent, so they can be passed through; msgpack ones have to be decoded
+        # (relayed payloads are always JSON, so followers of the feed can pass them through whatever the codec)
+        self.passthrough = gateway_config.RAW_PASSTHROUGH and message_codec.name == "json"
+        self.relayed_passthrough = gateway_config.RAW_PASSTHROUGH
+        self.validation_sample_rate = gateway_config.PASSTHROUGH_VALIDATION_SAMPLE_RATE
+
+        # Set while this worker leads the feed shared with the gateway's other workers
+        self.feed_relay: Optional[FeedRelay] = None
+
+    def get_message_type(self, channel: str) -> Optional[MessageType]:
+        if is_odds_update_channel(channel):
+            return "odds_update"
+        if channel == shared_config.REDIS_ARB_DETECTIONS_CHANNEL:
+            return "arb_detection"
+        if channel == shared_config.REDIS_ARB_EXECUTIONS_CHANNEL:
+            return "arb_execution"
+        return None
+
+    async def handle_message(self, channel: str, raw_data: MessageData):
+        message_type = self.get_message_type(channel)
+        if message_type is None:
+            logging.warning(f"Unrecognized message from {channel}: {repr(raw_data)}")
+            return
+
+        if self.feed_relay is None or message_codec.name == "json":
+            if self.feed_relay is not None:
+                self.relay(message_type, raw_data)
+            await self.forward_message(message_type, raw_data)
+            return
+
+        # Followers are relayed the JSON contents rather than msgpack, so they can pass them through without decoding
+        contents = self.decode_message(message_type, raw_data, message_codec)
+        if contents is not None:
+            self.relay(message_type, contents.model_dump_json())
+            await self.forward_decoded(message_type, contents)
+
+    def relay(self, message_type: MessageType, contents: MessageData):
+        """Relay a message to the workers following the feed, with the event ID it's about to be logged under here."""
+        event_log = websocket_handler.event_log
+        self.feed_relay.relay(message_type, contents, event_log.log_id, event_log.last_sequence + 1)
+
+    async def forward_relayed_message(self, message_type: MessageType, contents: MessageData, log_id: str, sequence: int):
+        """Forward a message relayed by the feed leader, logging it under the leader's event ID."""
+        websocket_handler.event_log.align(log_id, sequence)
+        await self.forward_message(message_type, contents, relayed=True)
+
+    async def forward_message(self, message_type: MessageType, raw_data: MessageData, relayed: bool = False):
+        """
+        Forward a message to this worker's clients, whether received from Redis or `relayed` by the feed leader
+        (always as JSON contents, whatever the codec on Redis).
+        """
+        codec = json_codec if relayed else message_codec
+        passthrough = self.relayed_passthrough if relayed else self.passthrough
+        if passthrough and not websocket_handler.needs_decoding(message_type):
+            if self.validation_sample_rate and random.random() < self.validation_sample_rate:
+                self.validate_message(message_type, raw_data, codec)
+            contents = raw_data.decode() if isinstance(raw_data, bytes) else raw_data
+            websocket_handler.snapshot_cache.add_encoded(message_type, contents)
+            await broadcast_encoded(message_type, wrap_encoded_message(message_type, contents))
+            return
+
+        contents = self.decode_message(message_type, raw_data, codec)
+        if contents is not None:
+            await self.forward_decoded(message_type, contents)
+
+    async def forward_decoded(self, message_type: MessageType, contents: BaseModel):
+        websocket_handler.snapshot_cache.add_message(message_type, contents)
+        await broadcast_message(WebSocketMessage.model_construct(message_type=message_type, contents=contents))
+
+    def decode_message(self, message_type: MessageType, raw_data: MessageData, codec) -> Optional[BaseModel]:
+        """Decode a message, or log and return None if it's malformed."""
+        try:
+            # Messages come from our own services, so they're not re-validated before being forwarded
+            if message_type == "odds_update":
+                return codec.decode_odds_update(raw_data, trusted=True)
+            return codec.decode_arb_message(raw_data, trusted=True)
+        except MessageDecodeError:
+            logging.error(f"Failed to decode message: {repr(raw_data)}", exc_info=True)
+            return None
+
+    def validate_message(self, message_type: MessageType, raw_data: MessageData, codec=message_codec):
+        """Fully decode and validate a passed through message, logging it if it's invalid (it's forwarded regardless)."""
+        try:
+            if message_type == "odds_update":
+                codec.decode_odds_update(raw_data)
+            else:
+                codec.decode_arb_message(raw_data)
+        except ValueError:  # MessageDecodeError or a pydantic ValidationError
+            logging.error(f"Invalid {message_type} message passed through: {repr(raw_data)}", exc_info=True)
@@ -0,0 +1,93 @@
+import json
+from collections import deque
+from json.decoder import scanstring
+from typing import Deque, Dict, Optional, Tuple, Union
+from pydantic import BaseModel
+from backend.gateway.src.models import MessageType
+
+# Messages are kept as received: JSON contents when passed through, decoded models otherwise (encoded when a snapshot is built)
+CachedContents = Union[str, BaseModel]
+
+# How the JSON of an odds update starts, as our services encode it (pydantic's field order, no whitespace), by whether it's a close
+ODDS_UPDATE_PREFIXES = {'{"event":"odds_update","match":"': False, '{"event":"odds_close","match":"': True}
+BOOKMAKER_FIELD = ',"bookmaker":"'
+
+
+def parse_odds_update_key(contents: str) -> Optional[Tuple[str, str, bool]]:
+    """
+    The match and bookmaker of an odds update's JSON and whether it closes the quote, read off its start without
+    parsing the rest (the odds). JSON laid out any other way is parsed in full; None if it isn't an odds update.
+    """
+    for prefix, closed in ODDS_UPDATE_PREFIXES.items():
+        if contents.startswith(prefix):
+            match, end = scanstring(contents, len(prefix))
+            if contents.startswith(BOOKMAKER_FIELD, end):
+                bookmaker, _ = scanstring(contents, end + len(BOOKMAKER_FIELD))
+                return match, bookmaker, closed
+
+    try:
+        fields = json.loads(contents)
+        return fields["match"], fields["bookmaker"], fields["odds"] is None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class SnapshotCache:
+    """
+    The gateway's view of the current state, fed by every message it forwards: the latest odds update per
+    (match, bookmaker) still open, and the last `max_arbs` arb detections and executions, each in a ring buffer.
+
+    New clients are sent it as one snapshot message. The encoded snapshot is cached until the next message, so any
+    number of clients connecting at once cost one encoding (and no Redis reads). Passed through odds updates are kept
+    as their JSON, keyed by the match and bookmaker read off its start, so they're never decoded.
+    """
+
+    def __init__(self, max_arbs: int = 100):
+        self.odds: Dict[Tuple[str, str], CachedContents] = {}
+        self.arbs: Dict[MessageType, Deque[CachedContents]] = {
+            "arb_detection": deque(maxlen=max_arbs),
+            "arb_execution": deque(maxlen=max_arbs),
+        }
+        self.encoded_snapshot: Optional[str] = None
+
+    def add_encoded(self, message_type: MessageType, contents: str):
+        """Record a message from its JSON contents."""
+        self.encoded_snapshot = None
+        if message_type != "odds_update":
+            self.arbs[message_type].append(contents)
+            return
+
+        key = parse_odds_update_key(contents)
+        if key is not None:  # Else it can't be placed in the snapshot (invalid messages passed through are still forwarded)
+            self._set_odds(*key, contents)
+
+    def add_message(self, message_type: MessageType, contents: BaseModel):
+        """Record a decoded message."""
+        self.encoded_snapshot = None
+        if message_type != "odds_update":
+            self.arbs[message_type].append(contents)
+            return
+
+        self._set_odds(contents.match, contents.bookmaker, contents.odds is None, contents)
+
+    def get_snapshot(self) -> str:
+        """The JSON of a SnapshotMessage of the current state."""
+        if self.encoded_snapshot is None:
+            self.encoded_snapshot = (
+                '{"message_type":"snapshot","contents":{'
+                '"odds":' + self._encode_list(self.odds.values()) +
+                ',"arb_detections":' + self._encode_list(self.arbs["arb_detection"]) +
+                ',"arb_executions":' + self._encode_list(self.arbs["arb_execution"]) +
+                "}}"
+            )
+        return self.encoded_snapshot
+
+    def _set_odds(self, match: str, bookmaker: str, closed: bool, contents: CachedContents):
+        if closed:
+            self.odds.pop((match, bookmaker), None)
+        else:
+            self.odds[(match, bookmaker)] = contents
+
+    @staticmethod
+    def _encode_list(entries) -> str:
+        return "[" + ",".join(entry if isinstance(entry, str) else entry.model_dump_json() for entry in entries) + "]"
@@ -0,0 +1,48 @@
+import logging
+from typing import AsyncIterator, Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.config import gateway_config
+
+
+def format_event(event_id: str, data: str) -> str:
+    return f"id: {event_id}\ndata: {data}\n\n"
+
+
+async def stream_events(last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    The gateway's messages as Server-Sent Events, each with its ID in the event log. A client resuming with the ID
+    of the last event it got is sent the events after it from the log; a new client, or one that missed events
+    no longer in the log (including falling that far behind while connected), is sent a snapshot event first.
+    """
+    event_log = websocket_handler.event_log
+    sequence = event_log.parse_event_id(last_event_id) if last_event_id else None
+    log_id = event_log.log_id
+
+    while True:
+        # The log is renumbered when a worker starts following another leader's, so the sequence is meaningless then
+        events = event_log.since(sequence) if sequence is not None and event_log.log_id == log_id else None
+        if events is None:
+            sequence, log_id = event_log.last_sequence, event_log.log_id
+            yield format_event(event_log.get_event_id(sequence), websocket_handler.snapshot_cache.get_snapshot())
+            continue
+
+        for event_sequence, data in events:
+            yield format_event(event_log.get_event_id(event_sequence), data)
+        if events:
+            sequence = events[-1][0]
+
+        if not await event_log.wait_for_events(sequence, gateway_config.KEEPALIVE_INTERVAL_SECONDS):
+            yield ": ping\n\n"  # Comment line keep-alive, ignored by EventSource
+
+
+async def sse_endpoint(request: Request) -> StreamingResponse:
+    """Streams real-time updates as Server-Sent Events, resuming after the Last-Event-ID header when reconnecting."""
+    last_event_id = request.headers.get("last-event-id")
+    logging.info(f"SSE client connected: {request.client} (Last-Event-ID: {last_event_id})")
+    return StreamingResponse(
+        stream_events(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # Don't let proxies buffer the stream
+    )
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from typing import Dict, Generic, Hashable, Iterable, Optional, Set, Tuple, TypeVar
+from backend.gateway.src.models import MessageType, SubscribeRequest
+
+Subscriber = TypeVar("Subscriber", bound=Hashable)
+Topic = Tuple[MessageType, str]  # (message type, match or bookmaker)
+
+
+class SubscriptionIndex(Generic[Subscriber]):
+    """
+    Which subscribers want which messages, indexed by topic so a broadcast only looks at interested subscribers
+    rather than filtering every connection:
+    - subscribers to every message of a type, by type
+    - subscribers filtering on matches, by (type, match), checked against their bookmaker filter if they have one
+    - subscribers filtering on bookmakers only, by (type, bookmaker)
+
+    Messages of a type nobody filters (or conflates) can go to `by_type` subscribers without being decoded for routing.
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[Subscriber, SubscribeRequest] = {}
+        self.by_type: Dict[MessageType, Set[Subscriber]] = defaultdict(set)
+        self.by_match: Dict[Topic, Set[Subscriber]] = defaultdict(set)
+        self.by_bookmaker: Dict[Topic, Set[Subscriber]] = defaultdict(set)
+        self.bookmaker_filters: Dict[Subscriber, Set[str]] = {}  # Of subscribers indexed by match
+        self.decoding_subscribers: Dict[MessageType, int] = defaultdict(int)  # Filtering or conflating, by type
+
+    def subscribe(self, subscriber: Subscriber, request: Optional[SubscribeRequest] = None):
+        """Set a subscriber's filters, replacing any it had. Without a request, it gets every message."""
+        self.unsubscribe(subscriber)
+        request = request or SubscribeRequest(action="subscribe")
+        self.subscriptions[subscriber] = request
+
+        for message_type in set(request.message_types):
+            if self._needs_decoding(request, message_type):
+                self.decoding_subscribers[message_type] += 1
+
+            if request.matches is not None:
+                for match in request.matches:
+                    self.by_match[(message_type, match)].add(subscriber)
+            elif request.bookmakers is not None:
+                for bookmaker in request.bookmakers:
+                    self.by_bookmaker[(message_type, bookmaker)].add(subscriber)
+            else:
+                self.by_type[message_type].add(subscriber)
+
+        if request.matches is not None and request.bookmakers is not None:
+            self.bookmaker_filters[subscriber] = set(request.bookmakers)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        request = self.subscriptions.pop(subscriber, None)
+        if request is None:
+            return
+
+        for message_type in set(request.message_types):
+            if self._needs_decoding(request, message_type):
+                self.decoding_subscribers[message_type] -= 1
+
+            self._discard(self.by_type, message_type, subscriber)
+            for match in request.matches or ():
+                self._discard(self.by_match, (message_type, match), subscriber)
+            for bookmaker in request.bookmakers or ():
+                self._discard(self.by_bookmaker, (message_type, bookmaker), subscriber)
+        self.bookmaker_filters.pop(subscriber, None)
+
+    def get_subscribers(self, message_type: MessageType, match: str, bookmakers: Iterable[str]) -> Set[Subscriber]:
+        """The subscribers to a message about a match, quoted by (or with legs at) the given bookmakers."""
+        bookmakers = set(bookmakers)
+        subscribers = set(self.by_type.get(message_type, ()))
+
+        for subscriber in self.by_match.get((message_type, match), ()):
+            bookmaker_filter = self.bookmaker_filters.get(subscriber)
+            if bookmaker_filter is None or not bookmaker_filter.isdisjoint(bookmakers):
+                subscribers.add(subscriber)
+
+        for bookmaker in bookmakers:
+            subscribers.update(self.by_bookmaker.get((message_type, bookmaker), ()))
+
+        return subscribers
+
+    def needs_decoding(self, message_type: MessageType) -> bool:
+        """Whether messages of a type have to be decoded to find or serve their subscribers."""
+        return self.decoding_subscribers.get(message_type, 0) > 0
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    @staticmethod
+    def _needs_decoding(request: SubscribeRequest, message_type: MessageType) -> bool:
+        return request.matches is not None or request.bookmakers is not None or (request.conflate and message_type == "odds_update")
+
+    @staticmethod
+    def _discard(index: dict, key, subscriber):
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del index[key]
+
@@ -1,37 +1,260 @@
 import logging
 from fastapi import WebSocket
 import asyncio
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Set, Tuple, Union
 
-from backend.gateway.src.models import WebSocketMessage
+from backend.gateway.src.binary_frames import BINARY_SUBPROTOCOL, BinaryFrame, BinaryFrameEncoder
+from backend.gateway.src.config import gateway_config
+from backend.gateway.src.event_log import EventLog
+from backend.gateway.src.models import MessageType, SubscribeRequest, WebSocketMessage
+from backend.gateway.src.snapshot_cache import SnapshotCache
+from backend.gateway.src.subscriptions import SubscriptionIndex
+from backend.shared.redis import OddsUpdateMessage
 
-# Maintains the connected clients
-connected_clients = set()
+# Queued in place of messages to close a slow client's connection
+CLOSE = None
+
+# A message as queued for a client: JSON text, or a binary frame for clients that negotiated them
+EncodedMessage = Union[str, BinaryFrame]
+
+# (id() of an odds update, binary) -> (the update, kept so its id isn't reused while cached, its encoding)
+EncodedOddsCache = Dict[Tuple[int, bool], Tuple[OddsUpdateMessage, EncodedMessage]]
+
+# Binary frames are encoded once for all binary clients, with names interned across all of them
+binary_encoder = BinaryFrameEncoder()
+
+
+def wrap_encoded_message(message_type: MessageType, contents: str) -> str:
+    """The JSON of a WebSocketMessage, put together around already encoded (JSON) contents."""
+    return '{"message_type":"' + message_type + '","contents":' + contents + "}"
+
+
+def encode_odds_batch(encoded_odds_updates: List[str]) -> str:
+    """The JSON of an OddsBatchMessage, put together from already encoded odds updates."""
+    return '{"message_type":"odds_batch","contents":[' + ",".join(encoded_odds_updates) + "]}"
+
+
+class ClientConnection:
+    """
+    A connected WebSocket client with its own bounded queue of encoded messages, drained by its own writer,
+    so a slow socket only ever holds itself up. When the queue is full, the slow client policy applies.
+
+    Binary clients are sent messages as binary frames, each preceded by the definitions of any names in it
+    the client hasn't been sent yet. The writer sends those, so definitions are never lost to dropped messages.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = gateway_config.CLIENT_SEND_QUEUE_SIZE,
+                 slow_client_policy: str = gateway_config.SLOW_CLIENT_POLICY, binary: bool = False):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[Optional[EncodedMessage]]" = asyncio.Queue(maxsize=queue_size)
+        self.slow_client_policy = slow_client_policy
+        self.dropped_messages = 0
+        self.closing = False
+        self.binary = binary
+        self.interned = 0  # Names whose definitions the client has been sent
+
+        # With conflation, the latest odds update per (match, bookmaker) waiting for the next frame
+        self.conflate = False
+        self.pending_odds: Dict[Tuple[str, str], OddsUpdateMessage] = {}
+        self.conflated_messages = 0
+
+    def send(self, text: EncodedMessage):
+        """Queue an encoded message without waiting on the socket."""
+        if self.closing:
+            return
+
+        try:
+            self.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.slow_client_policy == "disconnect":
+            logging.warning(f"Disconnecting slow WebSocket client: {self.websocket.client}")
+            self.closing = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSE)
+        else:
+            self.queue.get_nowait()  # Drop the oldest message, so the client stays on the latest ones
+            self.queue.put_nowait(text)
+            self.dropped_messages += 1
+
+    def conflate_odds(self, odds_update: OddsUpdateMessage):
+        """Hold an odds update for the next frame, in place of any earlier one for the same quote."""
+        key = (odds_update.match, odds_update.bookmaker)
+        if key in self.pending_odds:
+            self.conflated_messages += 1
+        self.pending_odds[key] = odds_update
+
+    def flush_odds(self, encoded: Optional[EncodedOddsCache] = None):
+        """Send the pending odds updates in one odds batch frame, encoding each update at most once per `encoded` cache."""
+        if not self.pending_odds:
+            return
+
+        encoded = {} if encoded is None else encoded
+        parts = []
+        for odds_update in self.pending_odds.values():
+            cached = encoded.get((id(odds_update), self.binary))
+            if cached is None:
+                part = binary_encoder.encode_odds_update(odds_update) if self.binary else odds_update.model_dump_json()
+                cached = encoded[(id(odds_update), self.binary)] = (odds_update, part)
+            parts.append(cached[1])
+
+        self.pending_odds = {}
+        self.send(binary_encoder.encode_odds_batch(parts) if self.binary else encode_odds_batch(parts))
+
+    async def run_writer(self):
+        """Send queued messages until the client disconnects (or is disconnected), pinging it when idle."""
+        while True:
+            try:
+                text = self.queue.get_nowait()  # Skips setting up a timeout while messages are backed up
+            except asyncio.QueueEmpty:
+                try:
+                    text = await asyncio.wait_for(self.queue.get(), timeout=gateway_config.KEEPALIVE_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    text = "ping"  # Simple keep-alive message
+
+            if text is CLOSE:
+                await self.websocket.close(code=1013)  # Try again later
+                return
+            if isinstance(text, BinaryFrame):
+                await self.send_binary(text)
+            else:
+                await self.websocket.send_text(text)
+
+    async def send_binary(self, frame: BinaryFrame):
+        if frame.interned > self.interned:
+            await self.websocket.send_bytes(binary_encoder.intern_table.definitions_frame(self.interned, frame.interned))
+            self.interned = frame.interned
+        await self.websocket.send_bytes(frame.data)
+
+
+# Maintains the connected clients, the messages each of them is subscribed to, and the state sent to new ones
+connected_clients: Set[ClientConnection] = set()
+binary_clients: Set[ClientConnection] = set()
+subscriptions: SubscriptionIndex[ClientConnection] = SubscriptionIndex()
+snapshot_cache = SnapshotCache(gateway_config.SNAPSHOT_ARB_HISTORY)
+event_log = EventLog(gateway_config.SSE_EVENT_LOG_SIZE)  # Every message forwarded, for SSE clients to resume from
 
 async def websocket_endpoint(websocket: WebSocket):
-    """Handles WebSocket connections for real-time updates."""
-    await websocket.accept()
-    connected_clients.add(websocket)
+    """
+    Handles WebSocket connections for real-time updates. Clients are sent a snapshot of the current state first,
+    then get every message until they subscribe to some. Clients requesting the binary subprotocol get binary frames
+    (but the snapshot and keep-alive pings are still text).
+    """
+    binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
+    client = ClientConnection(websocket, binary=binary)
+    client.send(snapshot_cache.get_snapshot())  # Subscribed in the same step, so no message falls between the two
+    connected_clients.add(client)
+    if binary:
+        binary_clients.add(client)
+    subscriptions.subscribe(client)
     logging.info(f"WebSocket connected: {websocket.client}")
 
+    tasks = [asyncio.create_task(client.run_writer()), asyncio.create_task(receive_subscriptions(client))]
     try:
-        while True:
-            await asyncio.sleep(30)  # Keep the connection alive
-            await websocket.send_text("ping")  # Simple keep-alive message
+        # Either the writer fails to send or the reader sees the client go
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     except Exception:
         logging.warning(f"WebSocket disconnected: {websocket.client}")
     finally:
-        connected_clients.discard(websocket)
+        for task in tasks:
+            task.cancel()
+        connected_clients.discard(client)
+        binary_clients.discard(client)
+        subscriptions.unsubscribe(client)
 
 
-async def broadcast_message(data: WebSocketMessage):
-    """Send data to all connected WebSocket clients."""
-    disconnected_clients = set()
+async def receive_subscriptions(client: ClientConnection):
+    """Apply the subscribe requests a client sends until it disconnects, ignoring binary frames (requests are JSON text)."""
+    while True:
+        message = await client.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+        text = message.get("text")
+        if text is None:
+            logging.warning(f"Ignoring binary frame from {client.websocket.client}: subscribe requests are sent as text")
+            continue
 
-    for ws in connected_clients:
         try:
-            await ws.send_json(data.model_dump())
-        except Exception:
-            disconnected_clients.add(ws)
+            request = SubscribeRequest.model_validate_json(text)
+        except ValidationError:
+            logging.warning(f"Invalid subscribe request from {client.websocket.client}: {text}")
+            continue
+
+        subscriptions.subscribe(client, request)
+        client.conflate = request.conflate
+        if not client.conflate:
+            client.flush_odds()
+
+
+def get_message_bookmakers(data: WebSocketMessage) -> List[str]:
+    if isinstance(data.contents, OddsUpdateMessage):
+        return [data.contents.bookmaker]
+    return [leg.bookmaker for leg in data.contents.legs]
+
+
+async def broadcast_message(data: WebSocketMessage):
+    """
+    Send data to the WebSocket clients subscribed to it, serialized once for all of them (and not at all if there are none)
+    and queued on each without waiting. Clients conflating odds get odds updates in their next frame instead,
+    and have their pending odds flushed ahead of an arb, so it never arrives before the odds it was found on.
+    """
+    clients = subscriptions.get_subscribers(data.message_type, data.contents.match, get_message_bookmakers(data))
+    text = None
+    frame = None
+
+    for client in clients:
+        if client.conflate:
+            if data.message_type == "odds_update":
+                client.conflate_odds(data.contents)
+                continue
+            client.flush_odds()
+
+        if client.binary:
+            if frame is None:
+                frame = binary_encoder.encode_message(data)
+            client.send(frame)
+            continue
+
+        if text is None:
+            text = data.model_dump_json()
+            logging.debug("Broadcasting WebSocket message to %d clients: %s", len(clients), text)
+        client.send(text)
+
+    event_log.append(data if text is None else text)
+
+
+def needs_decoding(message_type: MessageType) -> bool:
+    """Whether messages of a type have to be decoded, to route them or to encode them for binary clients."""
+    return bool(binary_clients) or subscriptions.needs_decoding(message_type)
+
+
+async def broadcast_encoded(message_type: MessageType, text: str):
+    """
+    Send an already encoded message to the clients subscribed to every message of its type. Only for message types
+    that don't need decoding (see `needs_decoding`), as it isn't routed or re-encoded any further.
+    """
+    clients = subscriptions.by_type.get(message_type, ())
+    logging.debug("Broadcasting WebSocket message to %d clients: %s", len(clients), text)
+
+    for client in clients:
+        client.send(text)
+
+    event_log.append(text)
+
+
+async def flush_conflated_odds():
+    """Every frame, send each conflating client its pending odds updates, encoding every update once across clients."""
+    while True:
+        await asyncio.sleep(1 / gateway_config.CONFLATED_ODDS_FRAME_RATE)
 
-    # Remove disconnected clients
-    connected_clients.difference_update(disconnected_clients)
+        encoded: EncodedOddsCache = {}
+        for client in connected_clients:
+            client.flush_odds(encoded)
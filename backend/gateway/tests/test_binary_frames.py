@@ -0,0 +1,102 @@
+import pytest
+import msgpack
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.binary_frames import BINARY_SUBPROTOCOL, DEFINITIONS, BinaryFrameEncoder, InternTable
+from backend.gateway.src.models import WebSocketMessage
+from backend.gateway.src.websocket_handler import ClientConnection, websocket_endpoint
+from backend.shared.redis import ArbLeg, ArbMessage, OddsUpdateMessage, OddsValues
+
+
+class FakeWebSocket:
+    client = "client"
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_bytes(self, data):
+        self.sent.append(msgpack.unpackb(data))
+
+
+def odds_update(bookmaker="Bookmaker 1", timestamp=1):
+    return OddsUpdateMessage(
+        event="odds_update", match="Team A vs Team B", bookmaker=bookmaker, odds=OddsValues(home_win=1.9, away_win=2.1), timestamp=timestamp
+    )
+
+
+def test_binary_frames_intern_names():
+    """Test that messages are encoded as arrays of coded fields, with names replaced by their interned IDs."""
+
+    # Arrange
+    encoder = BinaryFrameEncoder(InternTable())
+    arb = ArbMessage(
+        id="arb", match="Team A vs Team B", guaranteed_profit=2.5, status="completed", timestamp=3,
+        legs=[ArbLeg(outcome="home_win", bookmaker="Bookmaker 2", odds=2.2, stake=48.0), ArbLeg(outcome="away_win", bookmaker="Bookmaker 1", odds=None, stake=52.0)]
+    )
+
+    # Act
+    odds_frame = encoder.encode_odds_update(odds_update())
+    arb_frame = encoder.encode_message(WebSocketMessage(message_type="arb_execution", contents=arb))
+
+    # Assert
+    assert encoder.intern_table.strings == ["Team A vs Team B", "Bookmaker 1", "home_win", "away_win", "Bookmaker 2"]
+    assert msgpack.unpackb(odds_frame.data) == [1, 0, 0, 1, [2, 1.9, 3, 2.1], 1]
+    assert odds_frame.interned == 4
+    assert msgpack.unpackb(arb_frame.data) == [3, "arb", 0, [[2, 4, 2.2, 48.0], [3, 1, None, 52.0]], 2.5, 1, 3]
+    assert arb_frame.interned == 5
+
+
+def test_binary_odds_batch_splices_encoded_updates():
+    """Test that an odds batch is an array of the already encoded odds updates."""
+
+    # Arrange
+    encoder = BinaryFrameEncoder(InternTable())
+    updates = [encoder.encode_odds_update(odds_update("Bookmaker 1")), encoder.encode_odds_update(odds_update("Bookmaker 2"))]
+
+    # Act
+    batch = encoder.encode_odds_batch(updates)
+
+    # Assert
+    assert msgpack.unpackb(batch.data) == [4, [msgpack.unpackb(update.data) for update in updates]]
+    assert batch.interned == 5
+
+
+@pytest.mark.asyncio
+async def test_binary_client_is_sent_each_definition_once_before_use():
+    """Test that a binary client gets the names it hasn't seen before the frame using them, including names from dropped frames."""
+
+    # Arrange
+    encoder = BinaryFrameEncoder(InternTable())
+    websocket = FakeWebSocket()
+    client = ClientConnection(websocket, binary=True)
+    encoder.encode_odds_update(odds_update("Bookmaker 0"))  # Never sent to this client
+    frames = [encoder.encode_odds_update(odds_update("Bookmaker 1", timestamp=1)), encoder.encode_odds_update(odds_update("Bookmaker 1", timestamp=2))]
+
+    # Act
+    with patch.object(websocket_handler, "binary_encoder", encoder):
+        for frame in frames:
+            await client.send_binary(frame)
+
+    # Assert
+    assert websocket.sent[0] == [DEFINITIONS, 0, ["Team A vs Team B", "Bookmaker 0", "home_win", "away_win", "Bookmaker 1"]]
+    assert [frame[-1] for frame in websocket.sent[1:]] == [1, 2]
+
+
+def test_binary_subprotocol_is_negotiated():
+    """Test that a client requesting the binary subprotocol gets it accepted and is registered as a binary client."""
+
+    # Arrange
+    app = FastAPI()
+    app.add_api_websocket_route("/ws", websocket_endpoint)
+
+    # Act
+    with TestClient(app).websocket_connect("/ws", subprotocols=[BINARY_SUBPROTOCOL]) as websocket:
+        snapshot = websocket.receive_json()
+        binary = [client.binary for client in websocket_handler.connected_clients]
+
+    # Assert
+    assert websocket.accepted_subprotocol == BINARY_SUBPROTOCOL
+    assert snapshot["message_type"] == "snapshot"
+    assert binary == [True]
@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock
+from backend.gateway.src.event_log import EventLog
+
+
+def test_event_log_returns_events_after_sequence():
+    """Test that the events after a sequence are returned in order, with IDs only this log accepts."""
+
+    # Arrange
+    event_log = EventLog(capacity=10, log_id="log")
+    for i in range(3):
+        event_log.append(f"event {i}")
+
+    # Act
+    events = event_log.since(1)
+
+    # Assert
+    assert events == [(2, "event 1"), (3, "event 2")]
+    assert event_log.since(3) == []
+    assert event_log.parse_event_id(event_log.get_event_id(2)) == 2
+    assert event_log.parse_event_id("other-log-2") is None
+    assert event_log.parse_event_id("log-x") is None
+
+
+def test_event_log_reports_gaps_beyond_capacity():
+    """Test that resuming from before the oldest event kept (or after the latest) is refused, so a snapshot is sent instead."""
+
+    # Arrange
+    event_log = EventLog(capacity=2, log_id="log")
+    for i in range(5):
+        event_log.append(f"event {i}")
+
+    # Act / Assert
+    assert event_log.since(3) == [(4, "event 3"), (5, "event 4")]
+    assert event_log.since(2) is None
+    assert event_log.since(6) is None
+
+
+def test_event_log_aligns_with_the_feed_leaders_log():
+    """Test that a follower's log takes the leader's log ID and sequence, keeping its events only while they run on unbroken."""
+
+    # Arrange
+    event_log = EventLog(capacity=10, log_id="follower")
+    event_log.append("own event")
+
+    # Act
+    event_log.align("leader", 5)
+    event_log.append("event 5")
+    event_log.align("leader", 6)
+    event_log.append("event 6")
+
+    # Assert
+    assert event_log.since(4) == [(5, "event 5"), (6, "event 6")]
+    assert event_log.parse_event_id("leader-5") == 5
+    assert event_log.parse_event_id("follower-1") is None
+
+    event_log.align("leader", 9)  # Messages 7 and 8 were missed
+    assert event_log.since(6) is None
+    assert event_log.since(8) == []
+
+
+def test_event_log_encodes_decoded_messages_once_when_read():
+    """Test that messages logged decoded are encoded on the first read, and the encoding kept."""
+
+    # Arrange
+    event_log = EventLog(capacity=2, log_id="log")
+    message = MagicMock()
+    message.model_dump_json.return_value = "{}"
+    event_log.append(message)
+
+    # Act
+    first, second = event_log.since(0), event_log.since(0)
+
+    # Assert
+    assert first == second == [(1, "{}")]
+    message.model_dump_json.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_event_log_wakes_waiters_on_append():
+    """Test that readers waiting for new events are woken by an append, and time out without one."""
+
+    # Arrange
+    event_log = EventLog(capacity=2, log_id="log")
+    waiter = asyncio.create_task(event_log.wait_for_events(0, timeout=1.0))
+    await asyncio.sleep(0)
+
+    # Act
+    event_log.append("event")
+
+    # Assert
+    assert await waiter
+    assert not await event_log.wait_for_events(1, timeout=0.01)
@@ -0,0 +1,113 @@
+import pytest
+import asyncio
+import uuid
+from unittest.mock import patch
+from backend.gateway.src.config import gateway_config
+from backend.gateway.src.feed_relay import FeedRelay
+
+
+class FakeListener:
+    """Stands in for the gateway RedisListener: listens until cancelled and records the messages forwarded to it."""
+
+    def __init__(self):
+        self.feed_relay = None
+        self.listening = asyncio.Event()
+        self.forwarded = []
+
+    async def listen(self):
+        self.listening.set()
+        await asyncio.Event().wait()
+
+    async def forward_relayed_message(self, message_type, data, log_id, sequence):
+        self.forwarded.append((message_type, data, log_id, sequence))
+
+
+async def wait_until(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "Timed out"
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def socket_name():
+    with patch.object(gateway_config, "FEED_RETRY_SECONDS", 0.01):
+        yield f"test-feed-{uuid.uuid4()}"
+
+
+@pytest.mark.asyncio
+async def test_one_worker_leads_and_relays_to_the_others(socket_name):
+    """Test that only the first worker subscribes to Redis, and that the others get the messages it relays, in order, with their event IDs."""
+
+    # Arrange
+    listeners = [FakeListener() for _ in range(3)]
+    relays = [FeedRelay(listener, socket_name) for listener in listeners]
+    leader_task = asyncio.create_task(relays[0].run())
+    await listeners[0].listening.wait()
+    follower_tasks = [asyncio.create_task(relay.run()) for relay in relays[1:]]
+    await wait_until(lambda: len(relays[0].followers) == 2)
+
+    # Act
+    relays[0].relay("odds_update", b'{"n": 1}', "log", 1)
+    relays[0].relay("arb_detection", '{"n": 2}', "log", 2)
+    await wait_until(lambda: all(len(listener.forwarded) == 2 for listener in listeners[1:]))
+
+    # Assert
+    assert listeners[0].feed_relay is relays[0]
+    assert not any(listener.listening.is_set() for listener in listeners[1:])
+    for listener in listeners[1:]:
+        assert listener.forwarded == [("odds_update", b'{"n": 1}', "log", 1), ("arb_detection", b'{"n": 2}', "log", 2)]
+
+    for task in [leader_task] + follower_tasks:
+        task.cancel()
+    await asyncio.gather(leader_task, *follower_tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_stops(socket_name):
+    """Test that when the leader goes, a follower binds the socket and starts listening to Redis itself."""
+
+    # Arrange
+    leader, follower = FakeListener(), FakeListener()
+    leader_task = asyncio.create_task(FeedRelay(leader, socket_name).run())
+    await leader.listening.wait()
+    follower_relay = FeedRelay(follower, socket_name)
+    follower_task = asyncio.create_task(follower_relay.run())
+    await asyncio.sleep(0.02)
+    assert not follower.listening.is_set()
+
+    # Act
+    leader_task.cancel()
+    await asyncio.gather(leader_task, return_exceptions=True)
+    await asyncio.wait_for(follower.listening.wait(), timeout=1.0)
+
+    # Assert
+    assert follower_relay.leading
+
+    follower_task.cancel()
+    await asyncio.gather(follower_task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_leader_drops_followers_too_far_behind(socket_name):
+    """Test that a follower with too much unsent data is disconnected rather than buffered without bound."""
+
+    # Arrange
+    leader, follower = FakeListener(), FakeListener()
+    relay = FeedRelay(leader, socket_name, max_follower_buffer_bytes=0)
+    leader_task = asyncio.create_task(relay.run())
+    await leader.listening.wait()
+    follower_task = asyncio.create_task(FeedRelay(follower, socket_name).run())
+    await wait_until(lambda: len(relay.followers) == 1)
+    writer = next(iter(relay.followers))
+
+    # Act
+    with patch.object(writer.transport, "get_write_buffer_size", return_value=1):
+        relay.relay("odds_update", b"{}", "log", 1)
+
+    # Assert
+    assert not relay.followers
+
+    for task in (leader_task, follower_task):
+        task.cancel()
+    await asyncio.gather(leader_task, follower_task, return_exceptions=True)
@@ -0,0 +1,170 @@
+import pytest
+import json
+from unittest.mock import MagicMock, patch
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.event_log import EventLog
+from backend.gateway.src.models import SubscribeRequest, WebSocketMessage
+from backend.gateway.src.redis_listener import RedisListener
+from backend.gateway.src.snapshot_cache import SnapshotCache
+from backend.gateway.src.subscriptions import SubscriptionIndex
+from backend.gateway.src.websocket_handler import ClientConnection
+from backend.shared.config import shared_config
+from backend.shared.redis import MESSAGE_CODECS, OddsUpdateMessage, OddsValues
+
+ODDS_UPDATE = OddsUpdateMessage(
+    event="odds_update", match="Team A vs Team B", bookmaker="Bookmaker 1", odds=OddsValues(home_win=1.9, away_win=2.1), timestamp=1
+).model_dump_json().encode()
+
+
+class FakeWebSocket:
+    client = "client"
+
+
+@pytest.fixture
+def subscriptions():
+    with patch.object(websocket_handler, "subscriptions", SubscriptionIndex()) as index, \
+         patch.object(websocket_handler, "snapshot_cache", SnapshotCache()):
+        yield index
+
+
+@pytest.fixture
+def listener():
+    listener = RedisListener(MagicMock())
+    listener.passthrough = True
+    return listener
+
+
+@pytest.mark.asyncio
+async def test_passthrough_forwards_raw_payload_without_decoding(subscriptions, listener):
+    """Test that with nobody filtering, a payload is wrapped as it is, giving the same message as decoding it would."""
+
+    # Arrange
+    client = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(client)
+
+    # Act
+    with patch("backend.gateway.src.redis_listener.message_codec") as message_codec:
+        await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, ODDS_UPDATE)
+
+    # Assert
+    message_codec.decode_odds_update.assert_not_called()
+    sent = json.loads(client.queue.get_nowait())
+    assert sent == json.loads(WebSocketMessage(message_type="odds_update", contents=json.loads(ODDS_UPDATE)).model_dump_json())
+
+
+@pytest.mark.asyncio
+async def test_passthrough_decodes_when_a_client_filters(subscriptions, listener):
+    """Test that messages are still decoded and routed when a client filters their type."""
+
+    # Arrange
+    everything = ClientConnection(FakeWebSocket())
+    other_match = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(everything)
+    subscriptions.subscribe(other_match, SubscribeRequest(action="subscribe", matches=["Team C vs Team D"]))
+
+    # Act
+    await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, ODDS_UPDATE)
+
+    # Assert
+    assert json.loads(everything.queue.get_nowait())["contents"] == json.loads(ODDS_UPDATE)
+    assert other_match.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_passthrough_validates_sampled_messages(subscriptions, listener):
+    """Test that sampled messages are validated, logging invalid ones, and forwarded either way."""
+
+    # Arrange
+    client = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(client)
+    listener.validation_sample_rate = 1.0
+    invalid = b'{"event": "odds_update", "match": "Team A vs Team B"}'
+
+    # Act
+    with patch("backend.gateway.src.redis_listener.logging") as logging:
+        await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, ODDS_UPDATE)
+        await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, invalid)
+
+    # Assert
+    logging.error.assert_called_once()
+    assert client.queue.qsize() == 2
+
+
+@pytest.mark.asyncio
+async def test_listener_records_messages_for_snapshot(subscriptions, listener):
+    """Test that messages are recorded in the snapshot cache, whether passed through or decoded."""
+
+    # Arrange
+    subscriptions.subscribe(ClientConnection(FakeWebSocket()), SubscribeRequest(action="subscribe", message_types=["arb_detection"], matches=["Team C vs Team D"]))
+    arb = b'{"id": "arb", "match": "Team A vs Team B", "legs": [], "guaranteed_profit": 1.0, "status": "detected", "timestamp": 1}'
+
+    # Act
+    await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, ODDS_UPDATE)
+    await listener.handle_message(shared_config.REDIS_ARB_DETECTIONS_CHANNEL, arb)  # Decoded, as a client filters arbs
+
+    # Assert
+    snapshot = json.loads(websocket_handler.snapshot_cache.get_snapshot())["contents"]
+    assert snapshot["odds"] == [json.loads(ODDS_UPDATE)]
+    assert [arb["id"] for arb in snapshot["arb_detections"]] == ["arb"]
+
+
+@pytest.mark.asyncio
+async def test_feed_leader_relays_msgpack_messages_as_json_contents(subscriptions, listener):
+    """Test that with msgpack on Redis, the feed leader decodes a message once and relays its JSON contents to the followers, with its event ID."""
+
+    # Arrange
+    client = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(client)
+    listener.feed_relay = MagicMock()
+    msgpack_codec = MESSAGE_CODECS["msgpack"]
+    raw_data = msgpack_codec.encode_odds_update(OddsUpdateMessage.model_validate_json(ODDS_UPDATE))
+
+    event_log = EventLog(capacity=10, log_id="leader")
+
+    # Act
+    with patch("backend.gateway.src.redis_listener.message_codec", msgpack_codec), \
+         patch.object(websocket_handler, "event_log", event_log):
+        await listener.handle_message(shared_config.REDIS_ODDS_UPDATE_CHANNEL, raw_data)
+
+    # Assert
+    message_type, relayed, log_id, sequence = listener.feed_relay.relay.call_args.args
+    assert message_type == "odds_update"
+    assert json.loads(relayed) == json.loads(ODDS_UPDATE)
+    assert (log_id, sequence) == ("leader", event_log.last_sequence)
+    assert json.loads(client.queue.get_nowait())["contents"] == json.loads(ODDS_UPDATE)
+
+
+@pytest.mark.asyncio
+async def test_feed_follower_passes_relayed_messages_through_whatever_the_codec(subscriptions, listener):
+    """Test that a follower wraps relayed JSON contents as they are, without decoding them, even with msgpack on Redis."""
+
+    # Arrange
+    client = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(client)
+    listener.passthrough = False  # As with msgpack on Redis
+
+    # Act
+    with patch("backend.gateway.src.redis_listener.json_codec") as json_codec:
+        await listener.forward_message("odds_update", ODDS_UPDATE, relayed=True)
+
+    # Assert
+    json_codec.decode_odds_update.assert_not_called()
+    assert client.queue.get_nowait() == '{"message_type":"odds_update","contents":' + ODDS_UPDATE.decode() + "}"
+
+
+@pytest.mark.asyncio
+async def test_feed_follower_logs_relayed_messages_under_the_leaders_event_ids(subscriptions, listener):
+    """Test that a follower logs relayed messages under the event IDs the leader gave them, so SSE clients can resume on any worker."""
+
+    # Arrange
+    event_log = EventLog(capacity=10, log_id="follower")
+    event_log.append("missed")
+
+    # Act
+    with patch.object(websocket_handler, "event_log", event_log):
+        await listener.forward_relayed_message("odds_update", ODDS_UPDATE, "leader", 7)
+        await listener.forward_relayed_message("odds_update", ODDS_UPDATE, "leader", 8)
+
+    # Assert
+    assert event_log.parse_event_id("leader-6") == 6
+    assert [sequence for sequence, _ in event_log.since(6)] == [7, 8]
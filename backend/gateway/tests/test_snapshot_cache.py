@@ -0,0 +1,89 @@
+import json
+from unittest.mock import patch
+from backend.gateway.src.models import SnapshotMessage
+from backend.gateway.src.snapshot_cache import SnapshotCache, parse_odds_update_key
+from backend.shared.redis import ArbMessage, OddsUpdateMessage, OddsValues
+
+
+def odds_update(bookmaker="Bookmaker 1", home_win=1.9, closed=False):
+    return OddsUpdateMessage(
+        event="odds_close" if closed else "odds_update", match="Team A vs Team B", bookmaker=bookmaker,
+        odds=None if closed else OddsValues(home_win=home_win, away_win=2.1), timestamp=1
+    )
+
+def arb(arb_id):
+    return ArbMessage(id=arb_id, match="Team A vs Team B", legs=[], guaranteed_profit=1.0, status="detected", timestamp=1)
+
+
+def test_snapshot_holds_latest_open_odds_per_quote():
+    """Test that the snapshot has the latest update of each open quote, whether passed through or decoded, in order."""
+
+    # Arrange
+    cache = SnapshotCache()
+
+    # Act
+    cache.add_encoded("odds_update", odds_update("Bookmaker 1", home_win=1.8).model_dump_json())
+    cache.add_encoded("odds_update", odds_update("Bookmaker 2").model_dump_json())
+    cache.add_message("odds_update", odds_update("Bookmaker 1", home_win=1.9))
+    cache.add_encoded("odds_update", odds_update("Bookmaker 2", closed=True).model_dump_json())
+    snapshot = SnapshotMessage.model_validate_json(cache.get_snapshot())
+
+    # Assert
+    assert snapshot.contents.odds == [odds_update("Bookmaker 1", home_win=1.9)]
+
+
+def test_snapshot_keeps_most_recent_arbs():
+    """Test that only the last max_arbs arb detections and executions are kept, oldest first."""
+
+    # Arrange
+    cache = SnapshotCache(max_arbs=2)
+
+    # Act
+    for i in range(3):
+        cache.add_encoded("arb_detection", arb(str(i)).model_dump_json())
+    cache.add_message("arb_execution", arb("execution"))
+    snapshot = json.loads(cache.get_snapshot())
+
+    # Assert
+    assert [arb["id"] for arb in snapshot["contents"]["arb_detections"]] == ["1", "2"]
+    assert [arb["id"] for arb in snapshot["contents"]["arb_executions"]] == ["execution"]
+
+
+def test_snapshot_is_encoded_once_until_state_changes():
+    """Test that clients connecting between messages share one encoded snapshot."""
+
+    # Arrange
+    cache = SnapshotCache()
+    cache.add_message("odds_update", odds_update())
+
+    # Act
+    with patch.object(OddsUpdateMessage, "model_dump_json", return_value="{}") as model_dump_json:
+        first, second = cache.get_snapshot(), cache.get_snapshot()
+        cache.add_message("arb_detection", arb("0"))
+        cache.get_snapshot()
+
+    # Assert
+    assert first is second
+    assert model_dump_json.call_count == 2
+
+
+def test_odds_update_key_is_read_without_decoding_the_odds():
+    """Test that the match and bookmaker are read off the start of our services' JSON, with escapes, and that other JSON is parsed in full."""
+
+    # Arrange
+    update = OddsUpdateMessage(
+        event="odds_update", match='Team "A" vs Team B', bookmaker="Bookmaker é", odds=OddsValues(home_win=1.9, away_win=2.1), timestamp=1
+    )
+    reordered = json.dumps({"bookmaker": "Bookmaker 1", "match": "Team A vs Team B", "odds": None, "event": "odds_close"})
+
+    # Act
+    with patch("backend.gateway.src.snapshot_cache.json.loads") as loads:
+        key = parse_odds_update_key(update.model_dump_json())
+        closed_key = parse_odds_update_key(odds_update(closed=True).model_dump_json())
+
+    # Assert
+    loads.assert_not_called()
+    assert key == ('Team "A" vs Team B', "Bookmaker é", False)
+    assert closed_key == ("Team A vs Team B", "Bookmaker 1", True)
+    assert parse_odds_update_key(reordered) == ("Team A vs Team B", "Bookmaker 1", True)
+    assert parse_odds_update_key('{"event": "odds_update"}') is None
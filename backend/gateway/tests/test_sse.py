@@ -0,0 +1,96 @@
+import pytest
+import json
+from unittest.mock import patch
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.event_log import EventLog
+from backend.gateway.src.snapshot_cache import SnapshotCache
+from backend.gateway.src.sse import stream_events
+
+
+@pytest.fixture
+def event_log():
+    event_log = EventLog(capacity=3, log_id="log")
+    snapshot_cache = SnapshotCache()
+    with patch.object(websocket_handler, "event_log", event_log), patch.object(websocket_handler, "snapshot_cache", snapshot_cache):
+        yield event_log
+
+
+def parse_event(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+    return fields["id"], json.loads(fields["data"])
+
+
+@pytest.mark.asyncio
+async def test_new_sse_client_gets_snapshot_then_live_events(event_log):
+    """Test that a client without Last-Event-ID gets a snapshot with the latest event ID, then the events after it."""
+
+    # Arrange
+    event_log.append('{"n": 1}')
+    stream = stream_events()
+
+    # Act
+    snapshot = parse_event(await stream.__anext__())
+    event_log.append('{"n": 2}')
+    live = parse_event(await stream.__anext__())
+
+    # Assert
+    assert snapshot[0] == "log-1"
+    assert snapshot[1]["message_type"] == "snapshot"
+    assert live == ("log-2", {"n": 2})
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sse_client_resumes_after_last_event_id(event_log):
+    """Test that a reconnecting client is replayed the events after its Last-Event-ID, without a snapshot."""
+
+    # Arrange
+    for n in range(3):
+        event_log.append(json.dumps({"n": n}))
+    stream = stream_events("log-1")
+
+    # Act
+    events = [parse_event(await stream.__anext__()) for _ in range(2)]
+
+    # Assert
+    assert events == [("log-2", {"n": 1}), ("log-3", {"n": 2})]
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("last_event_id", ["log-0", "other-log-2", "garbage"])
+async def test_sse_client_gets_snapshot_when_it_cannot_resume(event_log, last_event_id):
+    """Test that a Last-Event-ID older than the log, or from another gateway process, falls back to a snapshot."""
+
+    # Arrange
+    for n in range(5):
+        event_log.append(json.dumps({"n": n}))
+    stream = stream_events(last_event_id)
+
+    # Act
+    event_id, data = parse_event(await stream.__anext__())
+
+    # Assert
+    assert event_id == "log-5"
+    assert data["message_type"] == "snapshot"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sse_client_gets_snapshot_when_the_log_is_renumbered(event_log):
+    """Test that a client streaming from a log that starts following another leader's numbering is sent a snapshot under the new IDs."""
+
+    # Arrange
+    event_log.append('{"n": 1}')
+    stream = stream_events("log-0")
+    await stream.__anext__()
+
+    # Act
+    event_log.align("leader", 8)
+    event_log.append('{"n": 8}')
+    event_id, data = parse_event(await stream.__anext__())
+
+    # Assert
+    assert event_id == "leader-8"
+    assert data["message_type"] == "snapshot"
+    await stream.aclose()
@@ -0,0 +1,278 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+from backend.gateway.src import websocket_handler
+from backend.gateway.src.models import OddsBatchMessage, SubscribeRequest, WebSocketMessage
+from backend.gateway.src.subscriptions import SubscriptionIndex
+from backend.gateway.src.websocket_handler import CLOSE, ClientConnection, broadcast_message, flush_conflated_odds, receive_subscriptions
+from backend.shared.redis import ArbLeg, ArbMessage, construct_odds_update_message
+
+
+class FakeWebSocket:
+    """Records sent messages, taking `send_delay` seconds per message to simulate a slow client."""
+
+    def __init__(self, send_delay=0.0):
+        self.send_delay = send_delay
+        self.sent = []
+        self.close = AsyncMock()
+        self.client = "client"
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(text)
+
+
+def odds_update(match="Team A vs Team B", bookmaker="Bookmaker 1", timestamp=0):
+    return WebSocketMessage.model_construct(
+        message_type="odds_update",
+        contents=construct_odds_update_message("odds_update", match, bookmaker, {"home_win": 1.9, "away_win": 2.1}, timestamp)
+    )
+
+def arb_detection(match="Team A vs Team B", bookmakers=("Bookmaker 1", "Bookmaker 2")):
+    legs = [ArbLeg.model_construct(outcome=f"outcome {i}", bookmaker=bookmaker, odds=2.1, stake=50.0) for i, bookmaker in enumerate(bookmakers)]
+    return WebSocketMessage.model_construct(
+        message_type="arb_detection",
+        contents=ArbMessage.model_construct(id="arb", match=match, legs=legs, guaranteed_profit=5.0, status="detected", timestamp=0)
+    )
+
+def subscribe(**filters):
+    return SubscribeRequest(action="subscribe", **filters)
+
+
+@pytest.fixture
+def subscriptions():
+    with patch.object(websocket_handler, "subscriptions", SubscriptionIndex()) as index:
+        yield index
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once_for_every_client(subscriptions):
+    """Test that a broadcast message is encoded once and queued on every client."""
+
+    # Arrange
+    clients = [ClientConnection(FakeWebSocket()) for _ in range(3)]
+    for client in clients:
+        subscriptions.subscribe(client)
+
+    # Act
+    with patch.object(WebSocketMessage, "model_dump_json", return_value='{"message_type": "odds_update"}') as model_dump_json:
+        await broadcast_message(odds_update())
+
+    # Assert
+    model_dump_json.assert_called_once()
+    assert all(client.queue.get_nowait() == '{"message_type": "odds_update"}' for client in clients)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_hold_up_others(subscriptions):
+    """Test that each client is written to by its own writer, so a slow socket doesn't delay the others."""
+
+    # Arrange
+    fast, slow = FakeWebSocket(), FakeWebSocket(send_delay=1.0)
+    clients = [ClientConnection(fast), ClientConnection(slow)]
+    for client in clients:
+        subscriptions.subscribe(client)
+    writers = [asyncio.create_task(client.run_writer()) for client in clients]
+
+    # Act
+    await broadcast_message(odds_update(timestamp=1))
+    await broadcast_message(odds_update(timestamp=2))
+    await asyncio.sleep(0.05)
+
+    # Assert
+    assert [json.loads(text)["contents"]["timestamp"] for text in fast.sent] == [1, 2]
+    assert slow.sent == []
+
+    for writer in writers:
+        writer.cancel()
+    await asyncio.gather(*writers, return_exceptions=True)
+
+
+def test_drop_policy_drops_oldest_messages_when_queue_is_full():
+    """Test that a full queue drops its oldest message for the newest, counting drops."""
+
+    # Arrange
+    client = ClientConnection(FakeWebSocket(), queue_size=2, slow_client_policy="drop")
+
+    # Act
+    for text in ["1", "2", "3"]:
+        client.send(text)
+
+    # Assert
+    assert [client.queue.get_nowait() for _ in range(2)] == ["2", "3"]
+    assert client.dropped_messages == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_clients():
+    """Test that a full queue is replaced by a close, which the writer acts on, and that nothing more is queued."""
+
+    # Arrange
+    websocket = FakeWebSocket()
+    client = ClientConnection(websocket, queue_size=2, slow_client_policy="disconnect")
+
+    # Act
+    for text in ["1", "2", "3", "4"]:
+        client.send(text)
+    await client.run_writer()
+
+    # Assert
+    assert websocket.sent == []
+    websocket.close.assert_awaited_once_with(code=1013)
+    assert client.queue.empty()
+    assert CLOSE is None
+
+
+@pytest.mark.asyncio
+async def test_broadcast_only_reaches_subscribed_clients(subscriptions):
+    """Test that messages only go to clients whose type, match and bookmaker filters they pass."""
+
+    # Arrange
+    everything = ClientConnection(FakeWebSocket())
+    arbs_only = ClientConnection(FakeWebSocket())
+    one_match = ClientConnection(FakeWebSocket())
+    one_bookmaker = ClientConnection(FakeWebSocket())
+    match_at_bookmaker = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(everything)
+    subscriptions.subscribe(arbs_only, subscribe(message_types=["arb_detection", "arb_execution"]))
+    subscriptions.subscribe(one_match, subscribe(matches=["Team C vs Team D"]))
+    subscriptions.subscribe(one_bookmaker, subscribe(bookmakers=["Bookmaker 2"]))
+    subscriptions.subscribe(match_at_bookmaker, subscribe(matches=["Team A vs Team B"], bookmakers=["Bookmaker 3"]))
+
+    # Act
+    await broadcast_message(odds_update(bookmaker="Bookmaker 1"))
+    await broadcast_message(odds_update(match="Team C vs Team D", bookmaker="Bookmaker 2"))
+    await broadcast_message(arb_detection(bookmakers=("Bookmaker 1", "Bookmaker 3")))
+
+    # Assert
+    assert everything.queue.qsize() == 3
+    assert arbs_only.queue.qsize() == 1
+    assert one_match.queue.qsize() == 1
+    assert one_bookmaker.queue.qsize() == 1
+    assert match_at_bookmaker.queue.qsize() == 1  # Only the arb has a leg at Bookmaker 3
+
+
+@pytest.mark.asyncio
+async def test_broadcast_without_subscribers_skips_serializing(subscriptions):
+    """Test that a message nobody is subscribed to isn't encoded at all."""
+
+    # Arrange
+    subscriptions.subscribe(ClientConnection(FakeWebSocket()), subscribe(matches=["Team C vs Team D"]))
+
+    # Act
+    with patch.object(WebSocketMessage, "model_dump_json") as model_dump_json:
+        await broadcast_message(odds_update())
+
+    # Assert
+    model_dump_json.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_client_subscribe_requests_replace_their_subscription(subscriptions):
+    """Test that each subscribe request a client sends replaces its filters, ignoring invalid ones and binary frames, until it disconnects."""
+
+    # Arrange
+    websocket = FakeWebSocket()
+    websocket.receive = AsyncMock(side_effect=[
+        {"type": "websocket.receive", "text": '{"action": "subscribe", "matches": ["Team A vs Team B"]}'},
+        {"type": "websocket.receive", "text": '{"action": "subscribe", "message_types": ["arb_detection"]}'},
+        {"type": "websocket.receive", "text": '{"action": "unknown"}'},
+        {"type": "websocket.receive", "bytes": b'{"action": "subscribe", "message_types": ["odds_update"]}'},
+        {"type": "websocket.disconnect", "code": 1000},
+    ])
+    client = ClientConnection(websocket)
+    subscriptions.subscribe(client)
+
+    # Act
+    await receive_subscriptions(client)
+
+    # Assert
+    assert subscriptions.subscriptions[client].message_types == ["arb_detection"]
+    assert subscriptions.get_subscribers("odds_update", "Team A vs Team B", ["Bookmaker 1"]) == set()
+    assert subscriptions.get_subscribers("arb_detection", "Team C vs Team D", ["Bookmaker 1"]) == {client}
+    assert not subscriptions.by_match  # The match filter was removed from the index
+
+
+def test_unsubscribe_removes_client_from_index():
+    """Test that unsubscribing leaves no trace of a client in the index."""
+
+    # Arrange
+    index = SubscriptionIndex()
+    client = object()
+    index.subscribe(client, subscribe(matches=["Team A vs Team B"], bookmakers=["Bookmaker 1"]))
+
+    # Act
+    index.unsubscribe(client)
+
+    # Assert
+    assert len(index) == 0
+    assert not index.by_type and not index.by_match and not index.by_bookmaker and not index.bookmaker_filters
+
+
+def conflating_client(subscriptions):
+    client = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(client, subscribe(conflate=True))
+    client.conflate = True
+    return client
+
+
+@pytest.mark.asyncio
+async def test_conflating_client_gets_latest_odds_per_quote_in_one_frame(subscriptions):
+    """Test that a conflating client gets one odds batch frame per flush, with only the latest update per (match, bookmaker)."""
+
+    # Arrange
+    client = conflating_client(subscriptions)
+    other = ClientConnection(FakeWebSocket())
+    subscriptions.subscribe(other)
+    updates = [odds_update(timestamp=1), odds_update(bookmaker="Bookmaker 2", timestamp=2), odds_update(timestamp=3)]
+
+    # Act
+    for update in updates:
+        await broadcast_message(update)
+    client.flush_odds()
+
+    # Assert
+    assert other.queue.qsize() == 3
+    assert client.queue.qsize() == 1
+    frame = client.queue.get_nowait()
+    assert frame == OddsBatchMessage(message_type="odds_batch", contents=[updates[2].contents, updates[1].contents]).model_dump_json()
+    assert client.conflated_messages == 1
+
+
+@pytest.mark.asyncio
+async def test_arbs_pass_conflation_after_pending_odds(subscriptions):
+    """Test that an arb goes straight to a conflating client, right after the odds pending for it."""
+
+    # Arrange
+    client = conflating_client(subscriptions)
+    await broadcast_message(odds_update(timestamp=1))
+
+    # Act
+    await broadcast_message(arb_detection())
+
+    # Assert
+    frames = [json.loads(client.queue.get_nowait()) for _ in range(2)]
+    assert [frame["message_type"] for frame in frames] == ["odds_batch", "arb_detection"]
+    assert client.pending_odds == {}
+
+
+@pytest.mark.asyncio
+async def test_frame_flush_encodes_each_odds_update_once(subscriptions):
+    """Test that the frame flush sends every conflating client its frame, encoding shared odds updates only once."""
+
+    # Arrange
+    clients = [conflating_client(subscriptions) for _ in range(3)]
+    await broadcast_message(odds_update())
+
+    # Act
+    with patch.object(websocket_handler, "connected_clients", set(clients)), \
+         patch.object(websocket_handler.gateway_config, "CONFLATED_ODDS_FRAME_RATE", 1000.0), \
+         patch("backend.shared.redis.OddsUpdateMessage.model_dump_json", return_value="{}") as model_dump_json:
+        flusher = asyncio.create_task(flush_conflated_odds())
+        await asyncio.sleep(0.05)
+        flusher.cancel()
+
+    # Assert
+    model_dump_json.assert_called_once()
+    assert all(client.queue.get_nowait() == '{"message_type":"odds_batch","contents":[{}]}' for client in clients)
@@ -1,21 +1,58 @@
+import json
 import os
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+def load_matches(path: Optional[str], default: List[str]) -> List[str]:
+    """Match names from a JSON list file, or the default list without one."""
+    if path is None:
+        return default
+    with open(path) as f:
+        return [str(match) for match in json.load(f)]
+
+def load_bookmakers(path: Optional[str], default: List[str]) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Bookmaker names, and the quote change rates of those given one, from a JSON list file of names
+    or `{"name": ..., "rate": ...}` objects. The default names (without rates) without a file.
+    """
+    if path is None:
+        return default, {}
+    with open(path) as f:
+        entries = [entry if isinstance(entry, dict) else {"name": entry} for entry in json.load(f)]
+    rates = {str(entry["name"]): float(entry["rate"]) for entry in entries if entry.get("rate") is not None}
+    return [str(entry["name"]) for entry in entries], rates
 
 class ScraperConfig:
     # Odds update settings
-    ODDS_PUBLISH_INTERVAL = float(os.getenv("ODDS_PUBLISH_INTERVAL", 5.0))
+    ODDS_PUBLISH_INTERVAL = float(os.getenv("ODDS_PUBLISH_INTERVAL", 5.0))  # Seconds between ticks, each changing any quote in one batch
     ODDS_UPDATE_PROBABILITY = float(os.getenv("ODDS_UPDATE_PROBABILITY", 0.2))  # 20% chance of updating
     ODDS_CLOSE_PROBABILITY = float(os.getenv("ODDS_CLOSE_PROBABILITY", 0.1))  # 10% chance of closing
 
     # Vig (Bookmaker's margin)
     VIG_PROBABILITY = float(os.getenv("VIG_PROBABILITY", 0.05))  # 5% vig
 
-    # Odds range
+    # Market quoted for every match (see MARKET_OUTCOMES), e.g. "home_away" or "1x2"
+    ODDS_MARKET = os.getenv("ODDS_MARKET", "home_away")
+
+    # Odds range (of the market's first outcome, e.g. home win)
     HOME_WIN_ODDS_MIN = float(os.getenv("HOME_WIN_ODDS_MIN", 1.6))
     HOME_WIN_ODDS_MAX = float(os.getenv("HOME_WIN_ODDS_MAX", 3.2))
 
-    MATCHES = ["Man Utd vs Chelsea", "Liverpool vs Arsenal", "Barcelona vs Real Madrid"]
-    BOOKMAKERS = ["Bet365", "Smarkets", "Betfair"]
+    # Detect arbs in Redis as each quote is written (see RedisArbScript) rather than in the arb engine, which should then not be run
+    SERVER_SIDE_ARB_DETECTION = os.getenv("SERVER_SIDE_ARB_DETECTION", "false").lower() == "true"
+    TOTAL_STAKE_PER_ARB = float(os.getenv("TOTAL_STAKE_PER_ARB", 100))  # Only used for server-side arb detection
+
+    # Simulation: "tick" changes any quote (with the probabilities above) every ODDS_PUBLISH_INTERVAL, all matches in turn;
+    # "poisson" has each bookmaker change its quotes as a Poisson process at its own rate, the change being a close or an
+    # update in the same proportions, and odds random-walk around each match's fair price
+    ODDS_SIMULATION = os.getenv("ODDS_SIMULATION", "tick")
+    ODDS_SIMULATION_TICK_SECONDS = float(os.getenv("ODDS_SIMULATION_TICK_SECONDS", 0.05))  # Changes are generated and published in batches this often
+    ODDS_ARRIVAL_RATE = float(os.getenv("ODDS_ARRIVAL_RATE", 1.0))  # Quote changes per second of a bookmaker without its own rate
+    ODDS_WALK_VOLATILITY = float(os.getenv("ODDS_WALK_VOLATILITY", 0.05))  # Std dev of an outcome's log probability step per change
+    ODDS_WALK_MEAN_REVERSION = float(os.getenv("ODDS_WALK_MEAN_REVERSION", 0.2))  # Fraction of the way back to the fair price per change
+
+    # Matches and bookmakers, from JSON files if given (see load_matches and load_bookmakers)
+    MATCHES = load_matches(os.getenv("MATCHES_FILE"), ["Man Utd vs Chelsea", "Liverpool vs Arsenal", "Barcelona vs Real Madrid"])
+    BOOKMAKERS, BOOKMAKER_RATES = load_bookmakers(os.getenv("BOOKMAKERS_FILE"), ["Bet365", "Smarkets", "Betfair"])
 
     # Seed
     ODDS_SEED: Optional[int] = os.getenv("ODDS_SEED")
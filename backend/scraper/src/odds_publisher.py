@@ -2,10 +2,13 @@ import redis
 import asyncio
 import random
 import logging
-from typing import Optional, Dict
+from typing import Iterable, Optional, Dict, List
 from backend.scraper.src.config import scraper_config
-from backend.shared.config import shared_config
-from backend.shared.redis import OddsUpdateMessage, OddsValues, get_odds_match_hash, get_odds_match_bookmaker_key
+from backend.scraper.src.odds_simulator import OddsChange, OddsSimulator
+from backend.scraper.src.redis_arb_script import RedisArbScript
+from backend.shared.redis import MARKET_OUTCOMES, OddsUpdateMessage, OddsValues, get_odds_match_hash, get_odds_match_bookmaker_key, message_codec
+from backend.shared.sharding import get_odds_update_channel
+from backend.shared.transport import publish_message
 from backend.shared.utils import current_milli_time
 
 logging.basicConfig(level=logging.INFO)  # Configure logging
@@ -16,27 +19,69 @@ class OddsPublisher:
     def __init__(self, redis_client: redis.Redis, seed: Optional[int] = None):
         self.redis_client: redis.Redis = redis_client
         self.odds_state: Dict[str, Optional[OddsValues]] = {}
+        self.arb_script: Optional[RedisArbScript] = RedisArbScript(redis_client) if scraper_config.SERVER_SIDE_ARB_DETECTION else None
 
         # Allow determinism
         if seed is not None:
             random.seed(seed)
             logging.info(f"🔢 Random seed set to {seed}")
 
+        self.simulator: Optional[OddsSimulator] = self.create_simulator(seed) if scraper_config.ODDS_SIMULATION == "poisson" else None
+
+    def create_simulator(self, seed: Optional[int] = None) -> OddsSimulator:
+        change_probability = scraper_config.ODDS_UPDATE_PROBABILITY + scraper_config.ODDS_CLOSE_PROBABILITY
+        return OddsSimulator(
+            matches=scraper_config.MATCHES,
+            bookmakers=scraper_config.BOOKMAKERS,
+            rates=[scraper_config.BOOKMAKER_RATES.get(bookmaker, scraper_config.ODDS_ARRIVAL_RATE) for bookmaker in scraper_config.BOOKMAKERS],
+            outcomes=MARKET_OUTCOMES[scraper_config.ODDS_MARKET],
+            close_probability=scraper_config.ODDS_CLOSE_PROBABILITY / change_probability if change_probability else 0.0,
+            vig=scraper_config.VIG_PROBABILITY,
+            volatility=scraper_config.ODDS_WALK_VOLATILITY,
+            mean_reversion=scraper_config.ODDS_WALK_MEAN_REVERSION,
+            first_outcome_odds_range=(scraper_config.HOME_WIN_ODDS_MIN, scraper_config.HOME_WIN_ODDS_MAX),
+            seed=seed
+        )
+
     async def publish_odds(self):
-        """Continuously publish odds updates with probabilistic changes."""
+        """Continuously publish odds updates with probabilistic changes, every quote changed in a tick in one batch."""
+        if self.simulator is not None:
+            await self.publish_simulated_odds()
+            return
+
         while True:
+            await asyncio.sleep(scraper_config.ODDS_PUBLISH_INTERVAL)
+
+            changes: List[OddsChange] = []
             for match in scraper_config.MATCHES:
                 for bookmaker in scraper_config.BOOKMAKERS:
-                    await asyncio.sleep(scraper_config.ODDS_PUBLISH_INTERVAL)
-
                     action = self.determine_action()
                     if action == "close":
-                        self.close_odds(match, bookmaker)
+                        if (bookmaker, match) in self.odds_state:  # Never opened otherwise
+                            changes.append(self.close_quote(match, bookmaker))
                     elif action == "update":
-                        self.update_odds(match, bookmaker)
+                        changes.append(self.update_quote(match, bookmaker))
                     else:
                         logging.info(f"🔄 {bookmaker} keeps current odds for {match}")
 
+            if changes:
+                self.publish_batch(changes)
+
+    async def publish_simulated_odds(self):
+        """Publish the simulator's quote changes in a batch every simulation tick, for the time since the previous batch."""
+        loop = asyncio.get_running_loop()
+        last_tick = loop.time()
+        while True:
+            await asyncio.sleep(scraper_config.ODDS_SIMULATION_TICK_SECONDS)
+
+            now = loop.time()  # Simulating the actual time elapsed keeps the rates right when publishing runs late
+            changes = self.simulator.step(now - last_tick)
+            last_tick = now
+
+            if changes:
+                self.publish_batch(changes, log_changes=False)
+                logging.debug(f"Published {len(changes)} simulated quote changes")
+
     def determine_action(self) -> str:
         """Decide whether to update, keep, or close odds based on probabilities."""
         p = random.random()
@@ -47,39 +92,72 @@ class OddsPublisher:
         return "keep"
 
     def generate_realistic_odds(self) -> OddsValues:
-        """Generate realistic home and away odds using implied probability and vig."""
-        home_win_odds = round(random.uniform(scraper_config.HOME_WIN_ODDS_MIN, scraper_config.HOME_WIN_ODDS_MAX), 2)
-        away_win_odds = self.calculate_away_odds(home_win_odds)
-        return OddsValues(home_win=home_win_odds, away_win=away_win_odds)
+        """Generate realistic odds for every outcome of the market using implied probability and vig."""
+        first_outcome, *other_outcomes = MARKET_OUTCOMES[scraper_config.ODDS_MARKET]
+        first_outcome_odds = round(random.uniform(scraper_config.HOME_WIN_ODDS_MIN, scraper_config.HOME_WIN_ODDS_MAX), 2)
+        return OddsValues(**{first_outcome: first_outcome_odds}, **self.calculate_other_odds(first_outcome_odds, other_outcomes))
+
+    def calculate_other_odds(self, first_outcome_odds: float, other_outcomes: List[str]) -> Dict[str, float]:
+        """
+        Calculate the odds of the remaining outcomes so the market's implied probabilities add up to 1 + vig.
+        The remaining probability is split randomly between the other outcomes (all of it for a two-way market).
+        """
+        remaining_prob = 1 + scraper_config.VIG_PROBABILITY - 1 / first_outcome_odds
+        weights = [random.uniform(0.5, 1.0) for _ in other_outcomes] if len(other_outcomes) > 1 else [1.0]
+        total_weight = sum(weights)
+        return {outcome: round(total_weight / (remaining_prob * weight), 2) for outcome, weight in zip(other_outcomes, weights)}
+
+    def close_quote(self, match: str, bookmaker: str) -> OddsChange:
+        self.odds_state[(bookmaker, match)] = None  # Mark odds as closed
+        return match, bookmaker, None
 
-    def calculate_away_odds(self, home_win_odds: float) -> float:
-        """Calculate away odds based on home win odds, adjusting for vig."""
-        home_prob = 1 / home_win_odds
-        away_prob = 1 + scraper_config.VIG_PROBABILITY - home_prob
-        return round(1 / away_prob, 2)
+    def update_quote(self, match: str, bookmaker: str) -> OddsChange:
+        new_odds = self.generate_realistic_odds()
+        self.odds_state[(bookmaker, match)] = new_odds  # Store the updated odds
+        return match, bookmaker, new_odds
 
     def close_odds(self, match: str, bookmaker: str):
         """Close the odds market, publish an update, and remove from Redis hash."""
         if (bookmaker, match) not in self.odds_state:
             return  # Already closed
 
-        self.odds_state[(bookmaker, match)] = None  # Mark odds as closed
-
-        odds_data = OddsUpdateMessage(event="odds_close", match=match, bookmaker=bookmaker, odds=None, timestamp=current_milli_time())
-        self.redis_client.publish(shared_config.REDIS_ODDS_UPDATE_CHANNEL, odds_data.model_dump_json())
-
-        self.redis_client.hdel(get_odds_match_hash(match), get_odds_match_bookmaker_key(bookmaker))
-
-        logging.info(f"❌ {bookmaker} closed odds for {match}")
+        self.publish_batch([self.close_quote(match, bookmaker)])
 
     def update_odds(self, match: str, bookmaker: str):
         """Update and publish new odds, and store in Redis hash."""
-        new_odds = self.generate_realistic_odds()
-        self.odds_state[(bookmaker, match)] = new_odds  # Store the updated odds
-
-        odds_data = OddsUpdateMessage(event="odds_update", match=match, bookmaker=bookmaker, odds=new_odds, timestamp=current_milli_time())
-        self.redis_client.publish(shared_config.REDIS_ODDS_UPDATE_CHANNEL, odds_data.model_dump_json())
-
-        self.redis_client.hset(get_odds_match_hash(match), get_odds_match_bookmaker_key(bookmaker), new_odds.model_dump_json())
-
-        logging.info(f"✅ {bookmaker} updated odds for {match}: {new_odds}")
+        self.publish_batch([self.update_quote(match, bookmaker)])
+
+    def publish_batch(self, changes: Iterable[OddsChange], log_changes: bool = True):
+        """
+        Write many quote changes in one round trip: a MULTI/EXEC pipeline storing each quote in (or removing it from)
+        its match's Redis hash and publishing its update, so consumers never see an update before the hash reflects it.
+        With server-side arb detection, each change is a run of the arb script instead.
+        Logging every change can be turned off for high rates.
+        """
+        timestamp = current_milli_time()
+        pipeline = self.redis_client.pipeline(transaction=True)
+
+        for match, bookmaker, odds in changes:
+            event = "odds_close" if odds is None else "odds_update"
+            odds_data = message_codec.encode_odds_update(
+                OddsUpdateMessage(event=event, match=match, bookmaker=bookmaker, odds=odds, timestamp=timestamp)
+            )
+
+            if self.arb_script is not None:
+                self.arb_script.write_quote(match, bookmaker, odds, odds_data, timestamp, client=pipeline)
+            else:
+                match_hash, bookmaker_key = get_odds_match_hash(match), get_odds_match_bookmaker_key(bookmaker)
+                if odds is None:
+                    pipeline.hdel(match_hash, bookmaker_key)
+                else:
+                    pipeline.hset(match_hash, bookmaker_key, odds.model_dump_json())
+                publish_message(pipeline, get_odds_update_channel(match), odds_data)
+
+            if not log_changes:
+                continue
+            if odds is None:
+                logging.info(f"❌ {bookmaker} closed odds for {match}")
+            else:
+                logging.info(f"✅ {bookmaker} updated odds for {match}: {odds}")
+
+        pipeline.execute()
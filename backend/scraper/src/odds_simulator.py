@@ -0,0 +1,90 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from backend.shared.redis import OddsValues
+
+# A quote change: (match, bookmaker, new odds), with None odds when the bookmaker closes the market
+OddsChange = Tuple[str, str, Optional[OddsValues]]
+
+MIN_ODDS = 1.01
+
+
+class OddsSimulator:
+    """
+    Simulates bookmakers changing their quotes independently, for any number of matches and bookmakers.
+    Each bookmaker changes quotes as a Poisson process at its own rate (changes per second, over all its matches), each
+    change being on a random match and closing the quote with probability `close_probability`, else updating it.
+
+    Every match has a fair probability per outcome, and every open quote a log probability per outcome in a
+    (bookmakers, matches, outcomes) array, which takes a mean-reverting random walk step around the fair price on each
+    update: `x += mean_reversion * (fair - x) + volatility * N(0, 1)`. A reopened quote starts again from the fair price.
+    Quoted odds are the walked probabilities, normalised and marked up by the vig. A whole period's changes are
+    drawn in a few vectorized calls, so the cost per change stays flat however many matches and bookmakers there are.
+    """
+
+    def __init__(self, matches: Sequence[str], bookmakers: Sequence[str], rates: Sequence[float], outcomes: Sequence[str],
+                 close_probability: float, vig: float, volatility: float, mean_reversion: float,
+                 first_outcome_odds_range: Tuple[float, float], seed: Optional[int] = None):
+        self.matches = list(matches)
+        self.bookmakers = list(bookmakers)
+        self.match_names, self.bookmaker_names = np.array(self.matches, dtype=object), np.array(self.bookmakers, dtype=object)
+        self.rates = np.asarray(rates, dtype=float)
+        self.outcomes = list(outcomes)
+        self.close_probability = close_probability
+        self.vig = vig
+        self.volatility = volatility
+        self.mean_reversion = mean_reversion
+        self.rng = np.random.default_rng(seed)
+
+        self.fair = self.generate_fair_log_probabilities(*first_outcome_odds_range)  # (matches, outcomes)
+        self.log_probabilities = np.broadcast_to(self.fair, (len(self.bookmakers),) + self.fair.shape).copy()
+        self.open = np.zeros((len(self.bookmakers), len(self.matches)), dtype=bool)
+
+    def generate_fair_log_probabilities(self, odds_min: float, odds_max: float) -> np.ndarray:
+        """
+        Fair log probabilities of every match's outcomes: the first outcome's from odds drawn in the range,
+        the rest of the probability split randomly between the other outcomes.
+        """
+        first = 1 / self.rng.uniform(odds_min, odds_max, size=len(self.matches))
+        weights = self.rng.uniform(0.5, 1.0, size=(len(self.matches), len(self.outcomes) - 1))
+        others = (1 - first)[:, None] * weights / weights.sum(axis=1, keepdims=True)
+        return np.log(np.column_stack([first, others]))
+
+    def step(self, seconds: float) -> List[OddsChange]:
+        """Simulate `seconds` of quote changes, returning one change per quote that changed: closes, then updates."""
+        counts = self.rng.poisson(self.rates * seconds)
+        total = int(counts.sum())
+        if total == 0:
+            return []
+
+        bookmaker_indices = np.repeat(np.arange(len(self.bookmakers)), counts)
+        match_indices = self.rng.integers(len(self.matches), size=total)
+        bookmaker_indices, match_indices = np.divmod(np.unique(bookmaker_indices * len(self.matches) + match_indices), len(self.matches))
+
+        closing = self.rng.random(len(bookmaker_indices)) < self.close_probability
+        closed = closing & self.open[bookmaker_indices, match_indices]  # Closing a quote that isn't open changes nothing
+        updated = ~closing
+
+        updated_bookmakers, updated_matches = bookmaker_indices[updated], match_indices[updated]
+        fair = self.fair[updated_matches]
+        walked = np.where(self.open[updated_bookmakers, updated_matches][:, None], self.log_probabilities[updated_bookmakers, updated_matches], fair)
+        walked += self.mean_reversion * (fair - walked) + self.volatility * self.rng.standard_normal(walked.shape)
+        self.log_probabilities[updated_bookmakers, updated_matches] = walked
+        self.open[updated_bookmakers, updated_matches] = True
+        self.open[bookmaker_indices[closed], match_indices[closed]] = False
+
+        outcomes, matches, bookmakers = self.outcomes, self.match_names, self.bookmaker_names
+        changes: List[OddsChange] = [
+            (match, bookmaker, None)
+            for match, bookmaker in zip(matches[match_indices[closed]].tolist(), bookmakers[bookmaker_indices[closed]].tolist())
+        ]
+        changes.extend(
+            (match, bookmaker, OddsValues.model_construct(**dict(zip(outcomes, odds))))
+            for match, bookmaker, odds in zip(matches[updated_matches].tolist(), bookmakers[updated_bookmakers].tolist(), self.get_odds(walked).tolist())
+        )
+        return changes
+
+    def get_odds(self, log_probabilities: np.ndarray) -> np.ndarray:
+        """Decimal odds of each row of outcome log probabilities, normalised to add up to 1 + vig once implied."""
+        probabilities = np.exp(log_probabilities - log_probabilities.max(axis=-1, keepdims=True))
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        return np.maximum(np.round(1 / (probabilities * (1 + self.vig)), 2), MIN_ODDS)
@@ -0,0 +1,54 @@
+import uuid
+import redis
+from pathlib import Path
+from typing import Optional, Union
+from backend.scraper.src.config import scraper_config
+from backend.shared.config import shared_config
+from backend.shared.redis import (
+    MARKET_OUTCOMES, OddsValues, get_odds_best_prices_hash, get_odds_match_bookmaker_key, get_odds_match_hash, get_odds_outcome_prices_key
+)
+from backend.shared.sharding import get_odds_update_channel
+
+SCRIPT_PATH = Path(__file__).with_name("write_quote_and_detect_arb.lua")
+
+
+class RedisArbScript:
+    """
+    Server-side arb detection: a Lua script that writes a quote, keeps the match's prices sorted per outcome (updating
+    them with that quote alone) and publishes an arb when the best ones form one, atomically inside Redis. Quotes that don't make an arb never leave Redis,
+    and the hash can't race with the odds update. Runs on EVALSHA, loading the script on first use.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.script = redis_client.register_script(SCRIPT_PATH.read_text())
+
+    def write_quote(self, match: str, bookmaker: str, odds: Optional[OddsValues], odds_update_data: Union[str, bytes], timestamp: int,
+                    client: Optional[Union[redis.Redis, redis.client.Pipeline]] = None):
+        """
+        Store (or, with no odds, remove) a quote, publish its already encoded odds update and publish any arb it makes.
+        Returns 1 if an arb was published, else 0, or queues the script when `client` is a pipeline.
+        """
+        outcomes = MARKET_OUTCOMES[scraper_config.ODDS_MARKET]
+        return self.script(
+            keys=[
+                get_odds_match_hash(match),
+                get_odds_best_prices_hash(match),
+                get_odds_update_channel(match),
+                shared_config.REDIS_ARB_DETECTIONS_CHANNEL,
+                *(get_odds_outcome_prices_key(match, outcome) for outcome in outcomes),
+            ],
+            args=[
+                get_odds_match_bookmaker_key(bookmaker),
+                odds.model_dump_json() if odds is not None else "",
+                odds_update_data,
+                str(uuid.uuid4()),
+                timestamp,
+                match,
+                scraper_config.TOTAL_STAKE_PER_ARB,
+                shared_config.REDIS_MESSAGE_CODEC,
+                shared_config.REDIS_TRANSPORT,
+                shared_config.REDIS_STREAM_MAXLEN,
+                *outcomes,
+            ],
+            client=client
+        )
@@ -0,0 +1,125 @@
+-- Writes (or removes) a bookmaker's quote for a match and publishes its odds update, then updates the match's best
+-- prices and publishes an arb if they form one. Runs atomically in Redis, so the hash never races with the update.
+--
+-- Each outcome's prices are kept in a sorted set (bookmaker key scored by odds), updated with the written quote alone,
+-- so a write costs O(outcomes * log bookmakers) however many bookmakers quote the match, rather than a rescan of its quotes.
+--
+-- KEYS: match odds hash, match best prices hash (its standing arb), odds update channel, arb detections channel,
+--       then one prices sorted set per market outcome, in the order of the outcomes
+-- ARGV: bookmaker key, quote JSON ("" to close), encoded odds update, arb ID, timestamp (ms), match, total stake,
+--       codec ("json" or "msgpack"), transport ("pubsub" or "streams"), stream max length, market outcomes...
+-- Returns 1 if an arb was published, else 0.
+
+local match_hash, best_hash, odds_channel, arb_channel = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local bookmaker_key, quote, odds_update = ARGV[1], ARGV[2], ARGV[3]
+local arb_id, timestamp, match, total_stake = ARGV[4], tonumber(ARGV[5]), ARGV[6], tonumber(ARGV[7])
+local codec, transport, stream_maxlen = ARGV[8], ARGV[9], ARGV[10]
+local outcomes = {}
+for i = 11, #ARGV do
+    outcomes[#outcomes + 1] = ARGV[i]
+end
+
+local function publish(channel, data)
+    if transport == 'streams' then
+        redis.call('XADD', channel, 'MAXLEN', '~', stream_maxlen, '*', 'data', data)
+    else
+        redis.call('PUBLISH', channel, data)
+    end
+end
+
+-- Forget the match's standing arb, so it's published again if it comes back
+local function no_arb()
+    redis.call('HDEL', best_hash, 'arb')
+    return 0
+end
+
+local odds = {}
+if quote == '' then
+    redis.call('HDEL', match_hash, bookmaker_key)
+else
+    redis.call('HSET', match_hash, bookmaker_key, quote)
+    odds = cjson.decode(quote)
+end
+publish(odds_channel, odds_update)
+
+-- Best and runner-up price of each outcome, as {bookmaker key, odds}: the top two of its prices. Each bookmaker
+-- quotes an outcome once, so the runner-up is always from another bookmaker than the best
+local legs, runner_up = {}, {}
+for i, outcome in ipairs(outcomes) do
+    local prices_key = KEYS[4 + i]
+    local price = tonumber(odds[outcome])
+    if price == nil then
+        redis.call('ZREM', prices_key, bookmaker_key)  -- Closed, or no longer quoted
+    else
+        redis.call('ZADD', prices_key, price, bookmaker_key)
+    end
+
+    local top = redis.call('ZREVRANGE', prices_key, 0, 1, 'WITHSCORES')
+    if #top > 0 then
+        legs[#legs + 1] = {outcome, top[1], tonumber(top[2])}
+    end
+    if #top > 2 then
+        runner_up[outcome] = {top[3], tonumber(top[4])}
+    end
+end
+if #legs < #outcomes then
+    return no_arb()  -- Some outcome has no price
+end
+
+-- The legs must span at least two bookmakers: if one has every best price, swap the outcome whose runner-up adds the least to the margin
+local one_bookmaker = true
+for _, leg in ipairs(legs) do
+    one_bookmaker = one_bookmaker and leg[2] == legs[1][2]
+end
+if one_bookmaker then
+    local swap, swap_increase = nil, nil
+    for i, leg in ipairs(legs) do
+        local other = runner_up[leg[1]]
+        if other ~= nil and (swap == nil or 1 / other[2] - 1 / leg[3] < swap_increase) then
+            swap, swap_increase = i, 1 / other[2] - 1 / leg[3]
+        end
+    end
+    if swap == nil then
+        return no_arb()
+    end
+    legs[swap] = {legs[swap][1], runner_up[legs[swap][1]][1], runner_up[legs[swap][1]][2]}
+end
+
+local margin, signature = 0, {}
+for _, leg in ipairs(legs) do
+    margin = margin + 1 / leg[3]
+    signature[#signature + 1] = leg[1] .. '|' .. leg[2] .. '|' .. leg[3]
+end
+if margin >= 1 then
+    return no_arb()
+end
+
+-- Publish each arb once while it lasts, rather than on every unrelated update for the match
+signature = table.concat(signature, ',')
+if redis.call('HGET', best_hash, 'arb') == signature then
+    return 0
+end
+redis.call('HSET', best_hash, 'arb', signature)
+
+-- Stake on each outcome = (Overall stake * Implied probability) / Combined market margin, so every outcome pays out the same
+local json_legs, msgpack_legs, payout = {}, {}, nil
+for _, leg in ipairs(legs) do
+    local outcome, bookmaker, price = leg[1], (string.gsub(leg[2], '_', ' ')), leg[3]
+    local stake = total_stake * (1 / price) / margin
+    payout = math.min(payout or stake * price, stake * price)
+    json_legs[#json_legs + 1] = {outcome = outcome, bookmaker = bookmaker, odds = price, stake = stake}
+    msgpack_legs[#msgpack_legs + 1] = {outcome, bookmaker, price, stake}
+end
+local guaranteed_profit = payout - total_stake
+
+local arb
+if codec == 'msgpack' then
+    arb = cmsgpack.pack({arb_id, match, msgpack_legs, guaranteed_profit, 'detected', timestamp})
+else
+    arb = cjson.encode({
+        id = arb_id, match = match, legs = json_legs, guaranteed_profit = guaranteed_profit,
+        status = 'detected', timestamp = timestamp
+    })
+end
+publish(arb_channel, arb)
+return 1
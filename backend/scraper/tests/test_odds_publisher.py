@@ -16,6 +16,7 @@ def mock_redis():
     mock.publish = MagicMock()
     mock.hset = MagicMock()
     mock.hdel = MagicMock()
+    mock.pipeline.return_value = mock  # Pipelined commands are recorded on the client mock itself
     return mock
 
 
@@ -152,15 +153,53 @@ def test_update_odds(mock_redis, odds_publisher):
     assert json.loads(called_args[0][2]) == json.loads(expected_serialized_odds)
 
 
+def test_publish_batch_writes_hash_and_publishes_in_one_transaction(mock_redis, odds_publisher):
+    """Ensure a batch of changes is written in a single MULTI/EXEC pipeline, each hash write alongside its publish."""
+    odds = OddsValues(home_win=2.0, away_win=3.0)
+    changes = [("Match1", "Bet365", odds), ("Match2", "Betfair", None), ("Match3", "Smarkets", odds)]
+
+    odds_publisher.publish_batch(changes)
+
+    mock_redis.pipeline.assert_called_once_with(transaction=True)
+    mock_redis.execute.assert_called_once()
+    assert [call[0][:2] for call in mock_redis.hset.call_args_list] == [
+        (get_odds_match_hash("Match1"), get_odds_match_bookmaker_key("Bet365")),
+        (get_odds_match_hash("Match3"), get_odds_match_bookmaker_key("Smarkets")),
+    ]
+    mock_redis.hdel.assert_called_once_with(get_odds_match_hash("Match2"), get_odds_match_bookmaker_key("Betfair"))
+    published = [json.loads(call[0][1]) for call in mock_redis.publish.call_args_list]
+    assert [(message["event"], message["match"]) for message in published] == [
+        ("odds_update", "Match1"), ("odds_close", "Match2"), ("odds_update", "Match3")
+    ]
+
+
+def test_publish_batch_runs_arb_script_with_server_side_detection(mock_redis, monkeypatch):
+    """Ensure each change is written by the arb script in the pipeline, instead of by HSET/HDEL and a publish."""
+    monkeypatch.setattr(scraper_config, "SERVER_SIDE_ARB_DETECTION", True)
+    odds_publisher = OddsPublisher(redis_client=mock_redis, seed=42)
+    odds = OddsValues(home_win=2.0, away_win=3.0)
+
+    odds_publisher.publish_batch([("Match1", "Bet365", odds), ("Match2", "Betfair", None)])
+
+    script = mock_redis.register_script.return_value
+    assert script.call_count == 2
+    assert script.call_args_list[0].kwargs["args"][:2] == ["Bet365", odds.model_dump_json()]
+    assert script.call_args_list[1].kwargs["args"][:2] == ["Betfair", ""]
+    assert all(call.kwargs["client"] is mock_redis for call in script.call_args_list)
+    mock_redis.hset.assert_not_called()
+    mock_redis.publish.assert_not_called()
+    mock_redis.execute.assert_called_once()
+
+
 @pytest.mark.parametrize("home_odds, vig", [
     (2.0, 0.05),
     (1.8, 0.05),
     (3.0, 0.05),
 ])
-def test_calculate_away_odds_with_vig(odds_publisher, home_odds, vig):
-    """Ensure `calculate_away_odds` correctly applies vig."""
+def test_calculate_other_odds_with_vig(odds_publisher, home_odds, vig):
+    """Ensure `calculate_other_odds` correctly applies vig for a two-way market."""
     scraper_config.VIG_PROBABILITY = vig
-    calculated_away_odds = odds_publisher.calculate_away_odds(home_odds)
+    calculated_away_odds = odds_publisher.calculate_other_odds(home_odds, ["away_win"])["away_win"]
 
     home_prob = 1 / home_odds
     away_prob = 1 + vig - home_prob
@@ -168,3 +207,15 @@ def test_calculate_away_odds_with_vig(odds_publisher, home_odds, vig):
 
     assert pytest.approx(calculated_away_odds, rel=0.05) == expected_away_odds, \
         f"Expected {expected_away_odds} but got {calculated_away_odds}"
+
+
+def test_generate_realistic_odds_1x2(odds_publisher, monkeypatch):
+    """Ensure three-way markets quote every outcome with the vig spread across them."""
+    monkeypatch.setattr(scraper_config, "ODDS_MARKET", "1x2")
+    monkeypatch.setattr(scraper_config, "VIG_PROBABILITY", 0.05)
+
+    odds = odds_publisher.generate_realistic_odds()
+
+    assert list(odds.outcomes) == ["home_win", "draw", "away_win"]
+    assert all(outcome_odds > 1.0 for outcome_odds in odds.outcomes.values())
+    assert sum(1 / outcome_odds for outcome_odds in odds.outcomes.values()) == pytest.approx(1.05, abs=0.02)
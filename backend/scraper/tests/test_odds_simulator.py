@@ -0,0 +1,138 @@
+import pytest
+import json
+import asyncio
+import numpy as np
+from collections import Counter
+from unittest.mock import MagicMock
+from backend.scraper.src.config import load_bookmakers, load_matches, scraper_config
+from backend.scraper.src.odds_publisher import OddsPublisher
+from backend.scraper.src.odds_simulator import OddsSimulator
+
+
+def create_simulator(n_matches=1000, rates=(100.0, 300.0), outcomes=("home_win", "away_win"), close_probability=0.25, **settings):
+    settings = {"vig": 0.05, "volatility": 0.05, "mean_reversion": 0.2, "first_outcome_odds_range": (1.7, 2.5), "seed": 42, **settings}
+    return OddsSimulator(
+        [f"Match {i}" for i in range(n_matches)], [f"Bookmaker {i}" for i in range(len(rates))], rates, outcomes,
+        close_probability=close_probability, **settings
+    )
+
+
+def test_simulator_changes_quotes_at_each_bookmakers_rate():
+    """Test that every bookmaker changes quotes at its own rate, in the configured proportion of closes and updates."""
+
+    # Arrange
+    simulator = create_simulator(n_matches=100_000, close_probability=0.0)
+
+    # Act
+    changes = [change for _ in range(100) for change in simulator.step(0.1)]
+
+    # Assert
+    counts = Counter(bookmaker for _, bookmaker, _ in changes)
+    assert counts["Bookmaker 0"] == pytest.approx(1000, rel=0.1)
+    assert counts["Bookmaker 1"] == pytest.approx(3000, rel=0.1)
+
+    assert all(odds is not None for _, _, odds in changes)
+
+    simulator.close_probability = 0.25
+    simulator.open[:] = True  # So every close drawn is published
+    closes = [odds for _, _, odds in simulator.step(10.0)]
+    assert closes.count(None) / len(closes) == pytest.approx(0.25, abs=0.02)
+
+
+def test_simulator_only_closes_open_quotes_and_changes_each_quote_once_per_step():
+    """Test that closing a quote that was never opened publishes nothing, and that a step has one change per quote at most."""
+
+    # Arrange
+    simulator = create_simulator(n_matches=2, rates=(1000.0,), close_probability=1.0)
+
+    # Act
+    closes = simulator.step(1.0)
+    simulator.close_probability = 0.0
+    updates = simulator.step(1.0)
+    simulator.close_probability = 1.0
+    closes_after_opening = simulator.step(1.0)
+
+    # Assert
+    assert closes == []
+    assert sorted(match for match, _, _ in updates) == ["Match 0", "Match 1"]
+    assert sorted(match for match, _, odds in closes_after_opening if odds is None) == ["Match 0", "Match 1"]
+    assert not simulator.open.any()
+
+
+def test_simulator_walks_odds_around_the_fair_price_with_the_vig():
+    """Test that quoted odds imply 1 + vig, and that each quote wanders about its match's fair price rather than drifting off."""
+
+    # Arrange
+    simulator = create_simulator(n_matches=10, rates=(1000.0, 1000.0), outcomes=("home_win", "draw", "away_win"), close_probability=0.0, vig=0.05)
+
+    # Act
+    changes = [change for _ in range(200) for change in simulator.step(0.1)]
+
+    # Assert
+    for _, _, odds in changes:
+        assert sum(1 / outcome_odds for outcome_odds in odds.outcomes.values()) == pytest.approx(1.05, abs=0.02)
+        assert list(odds.outcomes) == ["home_win", "draw", "away_win"]
+
+    drift = simulator.log_probabilities - simulator.fair
+    assert np.abs(drift).max() < 0.5  # ~2000 steps each: an unchecked walk would have drifted ~2 from the fair price
+    assert len({odds.outcomes["home_win"] for _, _, odds in changes}) > 10  # Prices actually move
+
+
+def test_simulator_is_deterministic_with_a_seed():
+    """Test that two simulators with the same seed make the same changes."""
+
+    # Arrange
+    simulators = [create_simulator(seed=7), create_simulator(seed=7)]
+
+    # Act
+    runs = [[(match, bookmaker, odds and odds.outcomes) for match, bookmaker, odds in simulator.step(1.0)] for simulator in simulators]
+
+    # Assert
+    assert runs[0] == runs[1]
+    assert len(runs[0]) > 0
+
+
+def test_config_loads_matches_and_bookmakers_from_files(tmp_path):
+    """Test that matches and bookmakers (with or without their own rates) are read from JSON files, and default without."""
+
+    # Arrange
+    matches_file, bookmakers_file = tmp_path / "matches.json", tmp_path / "bookmakers.json"
+    matches_file.write_text(json.dumps([f"Team {i} vs Team {i + 1}" for i in range(0, 2000, 2)]))
+    bookmakers_file.write_text(json.dumps(["Bet365", {"name": "Smarkets", "rate": 50}, {"name": "Betfair"}]))
+
+    # Act
+    matches = load_matches(str(matches_file), ["Default"])
+    bookmakers, rates = load_bookmakers(str(bookmakers_file), ["Default"])
+
+    # Assert
+    assert len(matches) == 1000 and matches[0] == "Team 0 vs Team 1"
+    assert bookmakers == ["Bet365", "Smarkets", "Betfair"]
+    assert rates == {"Smarkets": 50.0}
+    assert load_matches(None, ["Default"]) == ["Default"]
+    assert load_bookmakers(None, ["Default"]) == (["Default"], {})
+
+
+@pytest.mark.asyncio
+async def test_publisher_publishes_simulated_changes_in_batches(monkeypatch):
+    """Test that in poisson mode the publisher writes each tick's simulated changes in one pipeline, at the bookmakers' rates."""
+
+    # Arrange
+    monkeypatch.setattr(scraper_config, "ODDS_SIMULATION", "poisson")
+    monkeypatch.setattr(scraper_config, "ODDS_SIMULATION_TICK_SECONDS", 0.01)
+    monkeypatch.setattr(scraper_config, "BOOKMAKER_RATES", {"Bet365": 2000.0})
+    mock_redis = MagicMock()
+    mock_redis.pipeline.return_value = mock_redis
+    publisher = OddsPublisher(redis_client=mock_redis, seed=42)
+
+    # Act
+    task = asyncio.create_task(publisher.publish_odds())
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Assert
+    assert mock_redis.execute.call_count > 1
+    bookmakers = Counter(json.loads(call[0][1])["bookmaker"] for call in mock_redis.publish.call_args_list)
+    assert bookmakers["Bet365"] > 10 * (bookmakers["Smarkets"] + bookmakers["Betfair"])  # The others change at the default rate
+    assert mock_redis.hset.call_count > 0
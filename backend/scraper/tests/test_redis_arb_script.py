@@ -0,0 +1,141 @@
+import os
+import uuid
+import fakeredis
+import pytest
+import redis
+from unittest.mock import patch
+from backend.scraper.src.config import scraper_config
+from backend.scraper.src.redis_arb_script import RedisArbScript
+from backend.shared.config import shared_config
+from backend.shared.redis import (
+    MARKET_OUTCOMES, OddsUpdateMessage, OddsValues, get_odds_best_prices_hash, get_odds_match_hash, get_odds_outcome_prices_key,
+    message_codec
+)
+from backend.shared.sharding import get_odds_update_channel
+from backend.shared.utils import current_milli_time
+
+# These tests run the script in a real Redis when one is reachable, else in fakeredis (which runs Lua with lupa)
+TEST_REDIS_HOST = os.getenv("TEST_REDIS_HOST", "localhost")
+TEST_REDIS_PORT = int(os.getenv("TEST_REDIS_PORT", 6379))
+
+
+@pytest.fixture
+def local_redis():
+    client = redis.Redis(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, db=0, decode_responses=True)
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        client = fakeredis.FakeRedis(decode_responses=True)
+
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def match(local_redis):
+    """A match no one else is writing to, whose keys are removed afterwards."""
+    match = f"Test {uuid.uuid4().hex} vs Script"
+    yield match
+    local_redis.delete(
+        get_odds_match_hash(match), get_odds_best_prices_hash(match),
+        *(get_odds_outcome_prices_key(match, outcome) for outcome in MARKET_OUTCOMES["home_away"])
+    )
+
+
+@pytest.fixture
+def arb_subscription(local_redis):
+    pubsub = local_redis.pubsub()
+    pubsub.subscribe(shared_config.REDIS_ARB_DETECTIONS_CHANNEL)
+    pubsub.get_message(timeout=1.0)  # Subscription confirmation
+    yield pubsub
+    pubsub.close()
+
+
+def write_quote(script, match, bookmaker, odds):
+    timestamp = current_milli_time()
+    odds_update = OddsUpdateMessage(
+        event="odds_close" if odds is None else "odds_update", match=match, bookmaker=bookmaker, odds=odds, timestamp=timestamp
+    )
+    return script.write_quote(match, bookmaker, odds, message_codec.encode_odds_update(odds_update), timestamp)
+
+def best_prices(local_redis, match, outcome):
+    return local_redis.zrevrange(get_odds_outcome_prices_key(match, outcome), 0, -1, withscores=True)
+
+def published_arbs(pubsub, match):
+    arbs = []
+    while (message := pubsub.get_message(timeout=0.1)) is not None:
+        arb = message_codec.decode_arb_message(message["data"])
+        if arb.match == match:
+            arbs.append(arb)
+    return arbs
+
+
+@patch.object(scraper_config, "ODDS_MARKET", "home_away")
+def test_script_keeps_best_prices_without_publishing_arbs(local_redis, match, arb_subscription):
+    """Ensure quotes that don't make an arb are stored, and only update the best prices."""
+    script = RedisArbScript(local_redis)
+
+    assert write_quote(script, match, "Bet365", OddsValues(home_win=1.9, away_win=1.8)) == 0
+    assert write_quote(script, match, "Betfair", OddsValues(home_win=1.7, away_win=1.95)) == 0
+
+    assert set(local_redis.hgetall(get_odds_match_hash(match))) == {"Bet365", "Betfair"}
+    assert best_prices(local_redis, match, "home_win") == [("Bet365", 1.9), ("Betfair", 1.7)]
+    assert best_prices(local_redis, match, "away_win") == [("Betfair", 1.95), ("Bet365", 1.8)]
+    assert published_arbs(arb_subscription, match) == []
+
+
+@patch.object(scraper_config, "ODDS_MARKET", "home_away")
+def test_script_falls_back_to_the_runner_up_when_the_best_price_worsens_or_goes(local_redis, match, arb_subscription):
+    """Ensure the best prices follow a bookmaker worsening its best price, or no longer quoting it, without other quotes being rewritten."""
+    script = RedisArbScript(local_redis)
+    write_quote(script, match, "Bet365", OddsValues(home_win=2.5, away_win=1.5))
+    write_quote(script, match, "Betfair", OddsValues(home_win=2.0, away_win=1.6))
+    write_quote(script, match, "Smarkets", OddsValues(home_win=1.5, away_win=1.55))
+
+    assert write_quote(script, match, "Bet365", OddsValues(home_win=1.8, away_win=1.5)) == 0
+    assert best_prices(local_redis, match, "home_win")[0] == ("Betfair", 2.0)
+
+    assert write_quote(script, match, "Betfair", None) == 0
+    assert best_prices(local_redis, match, "home_win") == [("Bet365", 1.8), ("Smarkets", 1.5)]
+    assert best_prices(local_redis, match, "away_win") == [("Smarkets", 1.55), ("Bet365", 1.5)]
+
+    # Bet365 back at 2.5, then Smarkets' away win at 1.9, make an arb (1 / 2.5 + 1 / 1.9 < 1)
+    assert write_quote(script, match, "Bet365", OddsValues(home_win=2.5, away_win=1.5)) == 0
+    assert write_quote(script, match, "Smarkets", OddsValues(home_win=1.5, away_win=1.9)) == 1
+    (arb,) = published_arbs(arb_subscription, match)
+    assert [(leg.bookmaker, leg.odds) for leg in arb.legs] == [("Bet365", 2.5), ("Smarkets", 1.9)]
+
+
+@patch.object(scraper_config, "ODDS_MARKET", "home_away")
+def test_script_publishes_each_arb_once_until_it_closes(local_redis, match, arb_subscription):
+    """Ensure an arb is published with the engine's stakes and profit, not re-published while it lasts, and cleared on close."""
+    script = RedisArbScript(local_redis)
+    write_quote(script, match, "Bet365", OddsValues(home_win=2.2, away_win=1.6))
+
+    assert write_quote(script, match, "Betfair", OddsValues(home_win=1.6, away_win=2.2)) == 1
+    assert write_quote(script, match, "Smarkets", OddsValues(home_win=1.5, away_win=1.5)) == 0  # Same arb
+    assert write_quote(script, match, "Betfair", None) == 0
+
+    (arb,) = published_arbs(arb_subscription, match)
+    assert [(leg.outcome, leg.bookmaker, leg.odds) for leg in arb.legs] == [("home_win", "Bet365", 2.2), ("away_win", "Betfair", 2.2)]
+    assert sum(leg.stake for leg in arb.legs) == pytest.approx(scraper_config.TOTAL_STAKE_PER_ARB)
+    assert arb.guaranteed_profit == pytest.approx(scraper_config.TOTAL_STAKE_PER_ARB * (1.1 - 1))
+    assert arb.status == "detected"
+    assert "Betfair" not in local_redis.hgetall(get_odds_match_hash(match))
+    assert "arb" not in local_redis.hgetall(get_odds_best_prices_hash(match))
+
+
+@patch.object(scraper_config, "ODDS_MARKET", "home_away")
+def test_script_publishes_the_odds_update(local_redis, match):
+    """Ensure the script publishes the odds update it was given on the match's channel."""
+    pubsub = local_redis.pubsub()
+    pubsub.subscribe(get_odds_update_channel(match))
+    pubsub.get_message(timeout=1.0)
+    script = RedisArbScript(local_redis)
+
+    write_quote(script, match, "Bet365", OddsValues(home_win=2.0, away_win=1.8))
+
+    message = pubsub.get_message(timeout=1.0)
+    pubsub.close()
+    odds_update = message_codec.decode_odds_update(message["data"])
+    assert (odds_update.match, odds_update.bookmaker, odds_update.odds.home_win) == (match, "Bet365", 2.0)
@@ -1,19 +1,45 @@
-from typing import Optional
+import numpy as np
+from typing import List, Optional, Sequence
 
-def calculate_guaranteed_payout(S_H: float, S_A: float, O_H: Optional[float], O_A: Optional[float]) -> float:
+def calculate_guaranteed_payout(stakes: Sequence[float], odds: Sequence[Optional[float]]) -> float:
     """
-    Calculates the guaranteed payout, considering possible cancellations.
-    If one side is cancelled, it assumes the worst-case scenario (zero payout).
+    Calculates the guaranteed payout over all outcomes of a market, considering possible cancellations.
+    If an outcome is cancelled, it assumes the worst-case scenario (zero payout).
     """
-    payout_home = (S_H * O_H) if O_H is not None else 0
-    payout_away = (S_A * O_A) if O_A is not None else 0
-    return min(payout_home, payout_away)
+    return min((stake * outcome_odds) if outcome_odds is not None else 0 for stake, outcome_odds in zip(stakes, odds))
 
-def calculate_guaranteed_profit(S_H: float, S_A: float, O_H: Optional[float], O_A: Optional[float]) -> float:
+def calculate_guaranteed_profit(stakes: Sequence[float], odds: Sequence[Optional[float]]) -> float:
     """
     Calculates the guaranteed profit, handling cancellations correctly.
-    If a side is cancelled, its stake is considered zero as the bet will not take place.
+    If an outcome is cancelled, its stake is considered zero as the bet will not take place.
     """
-    guaranteed_payout = calculate_guaranteed_payout(S_H, S_A, O_H, O_A)
-    total_stake = (S_H if O_H is not None else 0) + (S_A if O_A is not None else 0)
+    guaranteed_payout = calculate_guaranteed_payout(stakes, odds)
+    total_stake = sum(stake for stake, outcome_odds in zip(stakes, odds) if outcome_odds is not None)
     return guaranteed_payout - total_stake
+
+def calculate_guaranteed_payouts(stakes: np.ndarray, odds: np.ndarray, legs: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized `calculate_guaranteed_payout` over many arbs at once: stakes and odds are (arbs, legs) arrays, with NaN odds
+    for cancelled outcomes (zero payout). `legs` masks the legs each arb actually has, for arbs of different sizes padded to one array.
+    """
+    payouts = np.where(np.isnan(odds), 0.0, stakes * odds)
+    if legs is not None:
+        payouts = np.where(legs, payouts, np.inf)
+    return payouts.min(axis=1)
+
+def calculate_guaranteed_profits(stakes: np.ndarray, odds: np.ndarray, legs: Optional[np.ndarray] = None) -> np.ndarray:
+    """Vectorized `calculate_guaranteed_profit`: the guaranteed payout of each arb minus its stakes on the outcomes not cancelled."""
+    placed_stakes = np.where(np.isnan(odds), 0.0, stakes)
+    if legs is not None:
+        placed_stakes = np.where(legs, placed_stakes, 0.0)
+    return calculate_guaranteed_payouts(stakes, odds, legs) - placed_stakes.sum(axis=1)
+
+# Based on https://help.smarkets.com/hc/en-gb/articles/115001175531-How-to-calculate-arbitrage-betting#:~:text=stake%20%C2%A3100%20overall.-,Stake%20at%20each%20bookmaker%20%3D%20(Overall%20stake%20*%20Bookmaker%20implied%20probability)/Combined%20market%20margin,-Example%3A%20Bookmaker%20A
+def calculate_arb_stakes(odds: Sequence[float], overall_stake: float) -> List[float]:
+    """
+    Splits the overall stake across outcomes proportionally to their implied probabilities, so that every outcome pays out the same.
+    Stake on each outcome = (Overall stake * Implied probability) / Combined market margin.
+    """
+    implied_probabilities = [1.0 / outcome_odds for outcome_odds in odds]
+    combined_market_margin = sum(implied_probabilities)
+    return [(overall_stake * probability) / combined_market_margin for probability in implied_probabilities]
@@ -1,4 +1,13 @@
 import os
+import socket
+
+def get_default_process_name() -> str:
+    """
+    A name for this process that survives its restarts, so it can pick up where it left off: the hostname (the container
+    or pod name), plus the pid only when several worker processes (WEB_CONCURRENCY) share the host.
+    """
+    hostname = socket.gethostname()
+    return hostname if int(os.getenv("WEB_CONCURRENCY", 1)) <= 1 else f"{hostname}:{os.getpid()}"
 
 class SharedConfig:
     REDIS_HOST = os.getenv("REDIS_HOST", "redis")
@@ -7,5 +16,31 @@ class SharedConfig:
     REDIS_ODDS_UPDATE_CHANNEL = os.getenv("REDIS_ODDS_UPDATE_CHANNEL", "odds_update")
     REDIS_ARB_DETECTIONS_CHANNEL = os.getenv("REDIS_ARB_DETECTIONS_CHANNEL", "arb_detection")
     REDIS_ARB_EXECUTIONS_CHANNEL = os.getenv("REDIS_ARB_EXECUTIONS_CHANNEL", "arb_execution")
+    REDIS_ARB_EXPOSURE_CHANNEL = os.getenv("REDIS_ARB_EXPOSURE_CHANNEL", "arb_exposure")
+
+    # Odds updates are split by match into this many partitions, each on its own "<odds update channel>:<partition>" channel,
+    # so they can be spread across arb engine workers. Must be the same for every service; 1 keeps the single odds update channel
+    ODDS_UPDATE_PARTITIONS = int(os.getenv("ODDS_UPDATE_PARTITIONS", 1))
+
+    # Transport for the channels above: "pubsub" (fire and forget) or "streams" (Redis Streams: consumer groups, acks and replay)
+    REDIS_TRANSPORT = os.getenv("REDIS_TRANSPORT", "pubsub")
+    REDIS_STREAM_MAXLEN = int(os.getenv("REDIS_STREAM_MAXLEN", 100000))  # Approximate number of entries kept per stream
+    REDIS_STREAM_BLOCK_MS = int(os.getenv("REDIS_STREAM_BLOCK_MS", 1000))  # Longest a read blocks, so channel changes are picked up
+    # Most entries fetched per stream in one read, whatever the handlers' batch size: entries are handed to them in their batches
+    REDIS_STREAM_READ_COUNT = int(os.getenv("REDIS_STREAM_READ_COUNT", 500))
+    # Where new consumer groups (and readers without one) start: "$" for new entries only, "0" to replay everything kept, or an entry ID
+    REDIS_STREAM_START_ID = os.getenv("REDIS_STREAM_START_ID", "$")
+    # Name of this process in consumer groups: its unacked entries are re-read under the same name after a restart
+    REDIS_CONSUMER_NAME = os.getenv("REDIS_CONSUMER_NAME", get_default_process_name())
+    # Entries another consumer of the group read but hasn't acked for this long (e.g. it died, or its partition moved) are
+    # claimed with XAUTOCLAIM and handled here; consumers look for them on joining a stream and at most this often after
+    REDIS_STREAM_CLAIM_MIN_IDLE_MS = int(os.getenv("REDIS_STREAM_CLAIM_MIN_IDLE_MS", 30000))
+
+    # Wire format of the messages on the channels above: "json" or "msgpack" (compact binary)
+    REDIS_MESSAGE_CODEC = os.getenv("REDIS_MESSAGE_CODEC", "json")
+
+    # Listener reconnect backoff (doubles after each failed attempt, up to the max)
+    REDIS_RECONNECT_BACKOFF_MIN_SECONDS = float(os.getenv("REDIS_RECONNECT_BACKOFF_MIN_SECONDS", 0.5))
+    REDIS_RECONNECT_BACKOFF_MAX_SECONDS = float(os.getenv("REDIS_RECONNECT_BACKOFF_MAX_SECONDS", 30.0))
 
 shared_config = SharedConfig()
@@ -1,9 +1,30 @@
-from typing import Literal, Optional
-from pydantic import BaseModel
+import json
+import msgpack
+from typing import Dict, List, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, model_validator
+from backend.shared.config import shared_config
+
+# Outcomes of each supported market, in display order
+MARKET_OUTCOMES: Dict[str, Tuple[str, ...]] = {
+    "home_away": ("home_win", "away_win"),
+    "1x2": ("home_win", "draw", "away_win"),
+    "over_under": ("over", "under"),
+}
 
 class OddsValues(BaseModel):
-    home_win: float
-    away_win: float
+    """Decimal odds per outcome of a market, e.g. `OddsValues(home_win=2.1, draw=3.4, away_win=3.8)` for 1X2."""
+    model_config = ConfigDict(extra="allow")
+    __pydantic_extra__: Dict[str, float]
+
+    @model_validator(mode="after")
+    def check_outcomes(self) -> "OddsValues":
+        if len(self.__pydantic_extra__) < 2:
+            raise ValueError("A market needs at least two outcomes")
+        return self
+
+    @property
+    def outcomes(self) -> Dict[str, float]:
+        return self.__pydantic_extra__
 
 class OddsUpdateMessage(BaseModel):
     """Represents a message for an odds update."""
@@ -13,24 +34,239 @@ class OddsUpdateMessage(BaseModel):
     odds: Optional[OddsValues]
     timestamp: int # ms since epoch
 
+class ArbLeg(BaseModel):
+    """The bet on one outcome of an arb."""
+    outcome: str
+    bookmaker: str
+    odds: Optional[float] # None if the odds closed before execution
+    stake: float
+
 class ArbMessage(BaseModel):
     id: str
     match: str
-    home_win_bookmaker: str
-    away_win_bookmaker: str
-    home_win_odds: Optional[float]
-    away_win_odds: Optional[float]
-    home_win_stake: float
-    away_win_stake: float
+    legs: List[ArbLeg] # One per outcome of the market
     guaranteed_profit: float
     status: Literal["detected", "completed", "cancelled", "adjusted"] # Adjusted if the odds changed. Cancelled if one of the odds closed.
     timestamp: int # ms since epoch
 
+class ExposureSnapshotMessage(BaseModel):
+    """Mark-to-market of the arbs in flight in an executor. Published at a low, bounded rate, so always as JSON."""
+    arbs: int
+    exposure: float # Total stake on the outcomes still quoted
+    guaranteed_profit: float # Sum over the arbs, at the current odds
+    worst_guaranteed_profit: float
+    timestamp: int # ms since epoch
+
+class OddsQuote:
+    """A bookmaker's decimal odds per outcome; the validation-free counterpart of OddsValues."""
+
+    __slots__ = ("outcomes",)
+
+    def __init__(self, outcomes: Dict[str, float]):
+        self.outcomes = outcomes
+
+    def __repr__(self) -> str:
+        return f"OddsQuote({self.outcomes})"
+
+class OddsUpdate:
+    """
+    Validation-free odds update for trusted internal traffic, with the same fields as OddsUpdateMessage.
+    Messages from our own services are decoded straight into these; pydantic only runs at system boundaries.
+    """
+
+    __slots__ = ("event", "match", "bookmaker", "odds", "timestamp")
+
+    def __init__(self, event: str, match: str, bookmaker: str, odds: Optional[OddsQuote], timestamp: int):
+        self.event = event
+        self.match = match
+        self.bookmaker = bookmaker
+        self.odds = odds
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_message(cls, message: OddsUpdateMessage) -> "OddsUpdate":
+        odds = OddsQuote(message.odds.outcomes) if message.odds is not None else None
+        return cls(message.event, message.match, message.bookmaker, odds, message.timestamp)
+
+    def to_message(self) -> OddsUpdateMessage:
+        """Validate into an OddsUpdateMessage, e.g. before handing it to an external consumer."""
+        odds = OddsValues(**self.odds.outcomes) if self.odds is not None else None
+        return OddsUpdateMessage(event=self.event, match=self.match, bookmaker=self.bookmaker, odds=odds, timestamp=self.timestamp)
+
+    def __repr__(self) -> str:
+        return f"OddsUpdate({self.event}, {self.match}, {self.bookmaker}, {self.odds}, {self.timestamp})"
+
+# Anything the odds book accepts: validated messages from boundaries or records from trusted internal traffic
+AnyOddsUpdate = Union[OddsUpdateMessage, OddsUpdate]
+AnyOdds = Union[OddsValues, OddsQuote]
+
+ODDS_MATCH_HASH_PREFIX = "odds:"
+
 def get_odds_match_hash(match: str) -> str:
-    return f"odds:{match.replace(' ', '_')}"
+    return f"{ODDS_MATCH_HASH_PREFIX}{match.replace(' ', '_')}"
+
+# Best prices of a match, kept by the server-side arb detection script (see SERVER_SIDE_ARB_DETECTION): a hash of its
+# standing arb, and a sorted set per outcome of every bookmaker's price
+ODDS_BEST_PRICES_HASH_PREFIX = "odds_best:"
+
+def get_odds_best_prices_hash(match: str) -> str:
+    return f"{ODDS_BEST_PRICES_HASH_PREFIX}{match.replace(' ', '_')}"
+
+def get_odds_outcome_prices_key(match: str, outcome: str) -> str:
+    return f"{get_odds_best_prices_hash(match)}:{outcome}"
+
+def get_match_full_name(match_hash: str) -> str:
+    return match_hash[len(ODDS_MATCH_HASH_PREFIX):].replace('_', ' ')
 
 def get_odds_match_bookmaker_key(bookmaker: str) -> str:
     return bookmaker.replace(' ', '_')
 
 def get_bookmaker_key_full_name(bookmaker_key: str) -> str:
-    return bookmaker_key.replace('_', ' ')
\ No newline at end of file
+    return bookmaker_key.replace('_', ' ')
+
+class MessageDecodeError(ValueError):
+    """Raised when a message on the wire can't be decoded by the configured codec (a malformed payload, not an invalid model)."""
+
+
+def construct_odds_update_message(event: str, match: str, bookmaker: str, odds: Optional[Dict[str, float]], timestamp: int) -> OddsUpdateMessage:
+    """Build an OddsUpdateMessage from trusted fields without validating them."""
+    return OddsUpdateMessage.model_construct(
+        event=event,
+        match=match,
+        bookmaker=bookmaker,
+        odds=OddsValues.model_construct(**odds) if odds is not None else None,
+        timestamp=timestamp
+    )
+
+def construct_arb_message(id: str, match: str, legs: List[Dict], guaranteed_profit: float, status: str, timestamp: int) -> ArbMessage:
+    """Build an ArbMessage from trusted fields (legs as dicts) without validating them."""
+    return ArbMessage.model_construct(
+        id=id,
+        match=match,
+        legs=[ArbLeg.model_construct(**leg) for leg in legs],
+        guaranteed_profit=guaranteed_profit,
+        status=status,
+        timestamp=timestamp
+    )
+
+
+class JsonCodec:
+    """
+    Messages as JSON objects, as sent to the frontend. Readable, but the field names are repeated in every message.
+    Decoding validates the message, unless `trusted` (it was published by one of our own services).
+    """
+
+    name = "json"
+
+    def encode_odds_update(self, message: OddsUpdateMessage) -> str:
+        return message.model_dump_json()
+
+    def decode_odds_update(self, data: Union[str, bytes], trusted: bool = False) -> OddsUpdateMessage:
+        fields = self._loads(data)
+        if not trusted:
+            return OddsUpdateMessage(**fields)
+        return self._construct(construct_odds_update_message, fields)
+
+    def decode_odds_update_record(self, data: Union[str, bytes]) -> OddsUpdate:
+        """Decode a trusted odds update into a validation-free record."""
+        fields = self._loads(data)
+        try:
+            odds = fields["odds"]
+            return OddsUpdate(fields["event"], fields["match"], fields["bookmaker"], OddsQuote(odds) if odds is not None else None, fields["timestamp"])
+        except (KeyError, TypeError) as e:
+            raise MessageDecodeError(f"Malformed odds update: {e}") from e
+
+    def encode_arb_message(self, message: ArbMessage) -> str:
+        return message.model_dump_json()
+
+    def decode_arb_message(self, data: Union[str, bytes], trusted: bool = False) -> ArbMessage:
+        fields = self._loads(data)
+        if not trusted:
+            return ArbMessage(**fields)
+        return self._construct(construct_arb_message, fields)
+
+    def _construct(self, construct, fields):
+        try:
+            return construct(**fields)
+        except TypeError as e:
+            raise MessageDecodeError(f"Malformed message: {e}") from e
+
+    def _loads(self, data: Union[str, bytes]) -> dict:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError as e:
+            raise MessageDecodeError(f"Failed to decode JSON: {e}") from e
+
+
+class MsgpackCodec:
+    """
+    Messages as msgpack arrays in field order, so only the values go on the wire:
+    odds updates as [event, match, bookmaker, {outcome: odds} | None, timestamp],
+    arbs as [id, match, [[outcome, bookmaker, odds, stake], ...], guaranteed_profit, status, timestamp].
+    """
+
+    name = "msgpack"
+
+    def encode_odds_update(self, message: OddsUpdateMessage) -> bytes:
+        odds = message.odds.outcomes if message.odds is not None else None
+        return msgpack.packb([message.event, message.match, message.bookmaker, odds, message.timestamp])
+
+    def decode_odds_update(self, data: bytes, trusted: bool = False) -> OddsUpdateMessage:
+        event, match, bookmaker, odds, timestamp = self._unpack_odds_update(data)
+        if trusted:
+            return construct_odds_update_message(event, match, bookmaker, odds, timestamp)
+
+        return OddsUpdateMessage(
+            event=event,
+            match=match,
+            bookmaker=bookmaker,
+            odds=OddsValues(**odds) if odds is not None else None,
+            timestamp=timestamp
+        )
+
+    def decode_odds_update_record(self, data: bytes) -> OddsUpdate:
+        """Decode a trusted odds update into a validation-free record."""
+        event, match, bookmaker, odds, timestamp = self._unpack_odds_update(data)
+        return OddsUpdate(event, match, bookmaker, OddsQuote(odds) if odds is not None else None, timestamp)
+
+    def encode_arb_message(self, message: ArbMessage) -> bytes:
+        legs = [[leg.outcome, leg.bookmaker, leg.odds, leg.stake] for leg in message.legs]
+        return msgpack.packb([message.id, message.match, legs, message.guaranteed_profit, message.status, message.timestamp])
+
+    def decode_arb_message(self, data: bytes, trusted: bool = False) -> ArbMessage:
+        arb_id, match, legs, guaranteed_profit, status, timestamp = self._unpack(data, 6)
+        if not isinstance(legs, list) or not all(isinstance(leg, list) and len(leg) == 4 for leg in legs):
+            raise MessageDecodeError(f"Expected an array of [outcome, bookmaker, odds, stake] legs, got {repr(legs)}")
+
+        legs = [dict(outcome=outcome, bookmaker=bookmaker, odds=odds, stake=stake) for outcome, bookmaker, odds, stake in legs]
+        if trusted:
+            return construct_arb_message(arb_id, match, legs, guaranteed_profit, status, timestamp)
+
+        return ArbMessage(id=arb_id, match=match, legs=legs, guaranteed_profit=guaranteed_profit, status=status, timestamp=timestamp)
+
+    def _unpack_odds_update(self, data: bytes) -> list:
+        fields = self._unpack(data, 5)
+        if fields[3] is not None and not isinstance(fields[3], dict):
+            raise MessageDecodeError(f"Expected a map of odds, got {repr(fields[3])}")
+        return fields
+
+    def _unpack(self, data: bytes, n_fields: int) -> list:
+        try:
+            fields = msgpack.unpackb(data)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            raise MessageDecodeError(f"Failed to decode msgpack: {e}") from e
+
+        if not isinstance(fields, list) or len(fields) != n_fields:
+            raise MessageDecodeError(f"Expected a msgpack array of {n_fields} fields, got {repr(fields)}")
+        return fields
+
+
+MESSAGE_CODECS = {codec.name: codec for codec in (JsonCodec(), MsgpackCodec())}
+
+def get_message_codec(name: str):
+    if name not in MESSAGE_CODECS:
+        raise ValueError(f"Unknown message codec {name}, expected one of {', '.join(MESSAGE_CODECS)}")
+    return MESSAGE_CODECS[name]
+
+# Codec for every message published to or read from Redis channels; every service must use the same one
+message_codec = get_message_codec(shared_config.REDIS_MESSAGE_CODEC)
@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio
 from backend.shared.config import shared_config
 
 redis_client = redis.Redis(
@@ -6,4 +7,13 @@ redis_client = redis.Redis(
     port=shared_config.REDIS_PORT,
     db=0,
     decode_responses=True
-)
\ No newline at end of file
+)
+
+# For listeners, so that waiting on pub/sub messages doesn't block the event loop.
+# Responses are left as bytes since messages may be binary (see REDIS_MESSAGE_CODEC); the listener decodes channel names itself.
+async_redis_client = redis.asyncio.Redis(
+    host=shared_config.REDIS_HOST,
+    port=shared_config.REDIS_PORT,
+    db=0,
+    decode_responses=False
+)
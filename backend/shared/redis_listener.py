@@ -0,0 +1,346 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import redis
+import redis.asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from backend.shared.config import shared_config
+from backend.shared.transport import STREAM_DATA_FIELD
+
+# Message payloads are passed on as received: bytes from clients without decode_responses, as they may be binary
+MessageData = Union[str, bytes]
+
+
+def decode_name(name: Union[str, bytes]) -> str:
+    """Channel/stream names and entry IDs as str, whether or not the client decodes responses."""
+    return name.decode() if isinstance(name, bytes) else name
+
+
+class AsyncRedisListener(ABC):
+    """
+    Base for services listening to Redis pub/sub channels (and channel patterns).
+    Awaits messages on the socket (no polling), dispatches `handle_message` with bounded concurrency
+    and resubscribes with exponential backoff when the connection drops.
+
+    With `max_batch_size` > 1, messages already pending are drained into a batch of up to that size,
+    waiting at most `max_linger_seconds` after the first one, and the batch is handed to `handle_batch`.
+
+    The channels can be changed while listening with `set_channels`, e.g. when partitions are rebalanced.
+
+    With the "streams" transport, the channels are read as Redis Streams instead: through `consumer_group`
+    (XREADGROUP, acking each batch once handled, so consumers share the load and resume after a restart,
+    and claiming entries other consumers left unacked, e.g. as they died)
+    or, without a group, with XREAD so every listener sees every message. Patterns are pub/sub only.
+    Listeners whose work on a message outlives its handler pass `ack_when_handled=False`: they're handed each batch with
+    its entry IDs in `handle_entries`, and `ack` the entries once done with them.
+    """
+
+    def __init__(self, redis_client: redis.asyncio.Redis, channels: List[str], max_concurrency: int = 1,
+                 max_batch_size: int = 1, max_linger_seconds: float = 0.0, patterns: Optional[List[str]] = None,
+                 consumer_group: Optional[str] = None, consumer_name: Optional[str] = None, ack_when_handled: bool = True):
+        self.redis_client: redis.asyncio.Redis = redis_client
+        self.channels = list(channels)
+        self.patterns = patterns or []
+        self.consumer_group = consumer_group
+        self.consumer_name = consumer_name or shared_config.REDIS_CONSUMER_NAME
+        self.ack_when_handled = ack_when_handled
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+        self.max_linger_seconds = max_linger_seconds
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.tasks: Set[asyncio.Task] = set()
+        self.pubsub: Optional[redis.asyncio.client.PubSub] = None  # Set while connected
+        self.subscribed_channels: Set[str] = set()
+        self.unconfirmed_channels: Set[str] = set()  # Subscribed to, awaiting confirmation
+        self.confirmed_channels: List[str] = []  # Confirmed since on_subscribed was last called
+        self.channels_changed = asyncio.Event()
+        self.stream_ids: Dict[str, str] = {}  # Next ID to read per stream: ">" for new group messages, else the last ID seen
+        self.claim_cursors: Dict[str, str] = {}  # XAUTOCLAIM cursor per stream while looking for other consumers' idle entries
+        self.next_claim_time = 0.0
+
+    @abstractmethod
+    async def handle_message(self, channel: str, data: MessageData):
+        """Handle a single message published to one of the channels."""
+
+    async def handle_batch(self, batch: List[Tuple[str, MessageData]]):
+        """Handle a batch of (channel, data) messages in publish order. Defaults to handling them one by one."""
+        for channel, data in batch:
+            try:
+                await self.handle_message(channel, data)
+            except Exception:
+                logging.error(f"Unhandled error handling message from {channel}: {repr(data)}", exc_info=True)
+
+    async def handle_entries(self, stream: str, entries: List[Tuple[str, MessageData]]):
+        """Handle a batch of (entry ID, data) read through the consumer group, for listeners that `ack` entries themselves."""
+        raise NotImplementedError("Listeners with ack_when_handled=False handle entries themselves")
+
+    async def ack(self, stream: str, entry_ids: List[str]):
+        """Acknowledge entries read through the consumer group, so they're not delivered again."""
+        try:
+            await self.redis_client.xack(stream, self.consumer_group, *entry_ids)
+        except redis.RedisError:
+            logging.error(f"Failed to ack {len(entry_ids)} entries on {stream}", exc_info=True)
+
+    async def on_subscribed(self, channels: List[str]):
+        """
+        Called once the channels subscribed to together are all confirmed, i.e. on startup, after each reconnect
+        and when channels are added, so work per subscription (e.g. a resync) can be done for all of them at once.
+        """
+
+    async def set_channels(self, channels: Iterable[str]):
+        """Change the subscribed channels, on the live connection if there is one."""
+        self.channels = list(channels)
+        if self.pubsub is not None:
+            await self._sync_subscriptions(self.pubsub)
+        self.channels_changed.set()
+
+    async def _sync_subscriptions(self, pubsub: redis.asyncio.client.PubSub):
+        wanted = set(self.channels)
+        removed = [channel for channel in self.subscribed_channels if channel not in wanted]
+        added = [channel for channel in self.channels if channel not in self.subscribed_channels]
+        self.subscribed_channels = wanted
+        self.unconfirmed_channels.difference_update(removed)
+        self.unconfirmed_channels.update(added)
+
+        if removed:
+            await pubsub.unsubscribe(*removed)
+            await self.confirm_subscription()  # The channels still awaited may have been the removed ones
+        if added:
+            await pubsub.subscribe(*added)
+
+    async def listen(self):
+        if shared_config.REDIS_TRANSPORT == "streams":
+            await self.listen_streams()
+        else:
+            await self.listen_pubsub()
+
+    async def wait_for_channels(self):
+        while not self.channels and not self.patterns:
+            # Nothing to subscribe to yet (e.g. no partitions assigned), so wait for channels rather than connecting
+            self.channels_changed.clear()
+            await self.channels_changed.wait()
+
+    async def listen_pubsub(self):
+        backoff = shared_config.REDIS_RECONNECT_BACKOFF_MIN_SECONDS
+
+        while True:
+            await self.wait_for_channels()
+
+            pubsub = self.redis_client.pubsub()
+            try:
+                self.subscribed_channels = set()
+                self.unconfirmed_channels = set(self.patterns)
+                self.confirmed_channels = []
+                if self.patterns:
+                    await pubsub.psubscribe(*self.patterns)
+                await self._sync_subscriptions(pubsub)
+                self.pubsub = pubsub
+                logging.info(f"Subscribed to Redis channels: {', '.join(self.channels + self.patterns)}")
+
+                batch: List[Tuple[str, MessageData]] = []
+                batch_deadline = 0.0
+
+                while True:
+                    # Wait on the socket until a message arrives; once a batch is open, only until its linger time is up
+                    timeout = None if not batch else max(batch_deadline - asyncio.get_running_loop().time(), 0.0)
+                    message = await pubsub.get_message(timeout=timeout)
+
+                    if message is not None and message["type"] in ("subscribe", "psubscribe"):
+                        if batch:
+                            await self.dispatch(batch)
+                            batch = []
+                        backoff = shared_config.REDIS_RECONNECT_BACKOFF_MIN_SECONDS
+                        await self.confirm_subscription(decode_name(message["channel"]))
+                    elif message is not None and message["type"] in ("message", "pmessage"):
+                        if not batch:
+                            batch_deadline = asyncio.get_running_loop().time() + self.max_linger_seconds
+                        batch.append((decode_name(message["channel"]), message["data"]))
+
+                    if batch and (message is None or len(batch) >= self.max_batch_size):
+                        await self.dispatch(batch)
+                        batch = []
+
+            except (redis.ConnectionError, redis.TimeoutError):
+                logging.error(f"Redis Connection Error. Retrying in {backoff}s...", exc_info=True)
+            except Exception:
+                logging.error(f"Unexpected Redis Listener Error. Retrying in {backoff}s...", exc_info=True)
+            finally:
+                self.pubsub = None
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    logging.warning("Failed to close Redis pubsub.", exc_info=True)
+
+            await asyncio.sleep(backoff)
+            backoff = min(2 * backoff, shared_config.REDIS_RECONNECT_BACKOFF_MAX_SECONDS)
+
+    async def confirm_subscription(self, channel: Optional[str] = None):
+        """Record a subscription confirmation, calling on_subscribed once none are outstanding."""
+        if channel in self.unconfirmed_channels:
+            self.unconfirmed_channels.discard(channel)
+            self.confirmed_channels.append(channel)
+        if self.confirmed_channels and not self.unconfirmed_channels:
+            confirmed_channels, self.confirmed_channels = self.confirmed_channels, []
+            await self.on_subscribed(confirmed_channels)
+
+    async def listen_streams(self):
+        backoff = shared_config.REDIS_RECONNECT_BACKOFF_MIN_SECONDS
+
+        while True:
+            await self.wait_for_channels()
+            connected_streams: Set[str] = set()
+            try:
+                while True:
+                    # Join streams added since the last read (all of them after a reconnect), then block for new entries
+                    joined_streams = [stream for stream in self.channels if stream not in connected_streams]
+                    for stream in joined_streams:
+                        await self._join_stream(stream)
+                        connected_streams.add(stream)
+                        backoff = shared_config.REDIS_RECONNECT_BACKOFF_MIN_SECONDS
+                    if joined_streams:
+                        await self.on_subscribed(joined_streams)
+                    connected_streams.intersection_update(self.channels)
+                    for stream in [stream for stream in self.stream_ids if stream not in connected_streams]:
+                        del self.stream_ids[stream]
+
+                    if not connected_streams:
+                        await self.wait_for_channels()
+                        continue
+
+                    for stream, entries in await self._read_streams(connected_streams):
+                        await self._dispatch_stream_entries(decode_name(stream), entries)
+
+            except (redis.ConnectionError, redis.TimeoutError):
+                logging.error(f"Redis Connection Error. Retrying in {backoff}s...", exc_info=True)
+            except Exception:
+                logging.error(f"Unexpected Redis Listener Error. Retrying in {backoff}s...", exc_info=True)
+
+            await asyncio.sleep(backoff)
+            backoff = min(2 * backoff, shared_config.REDIS_RECONNECT_BACKOFF_MAX_SECONDS)
+
+    async def _join_stream(self, stream: str):
+        if stream in self.stream_ids:
+            return  # Rejoining after a reconnect: carry on from where we were
+
+        if self.consumer_group is None:
+            self.stream_ids[stream] = await self._resolve_start_id(stream)
+            return
+
+        try:
+            await self.redis_client.xgroup_create(stream, self.consumer_group, id=shared_config.REDIS_STREAM_START_ID, mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise  # The group already exists, so it resumes from its last delivered ID
+
+        self.stream_ids[stream] = "0"  # Start with our own unacked entries from before a restart
+
+    async def _resolve_start_id(self, stream: str) -> str:
+        """
+        The ID a reader without a group starts after. "$" is resolved to the stream's last entry once, as passing it on
+        every read would skip anything added between reads (e.g. while the previous entries are being dispatched).
+        """
+        if shared_config.REDIS_STREAM_START_ID != "$":
+            return shared_config.REDIS_STREAM_START_ID
+
+        last_entries = await self.redis_client.xrevrange(stream, count=1)
+        return decode_name(last_entries[0][0]) if last_entries else "0-0"
+
+    async def _read_streams(self, streams: Set[str]) -> list:
+        count = shared_config.REDIS_STREAM_READ_COUNT
+
+        if self.consumer_group is None:
+            return await self.redis_client.xread(
+                {stream: self.stream_ids[stream] for stream in streams}, count=count, block=shared_config.REDIS_STREAM_BLOCK_MS
+            )
+
+        pending = {stream: self.stream_ids[stream] for stream in streams if self.stream_ids[stream] != ">"}
+        if pending:
+            response = await self.redis_client.xreadgroup(self.consumer_group, self.consumer_name, pending, count=count)
+            for stream, entries in response:
+                if not entries:
+                    self.stream_ids[decode_name(stream)] = ">"  # Caught up on our unacked entries
+            return response
+
+        claimed = await self._claim_idle_entries(streams, count)
+        if claimed:
+            return claimed
+
+        return await self.redis_client.xreadgroup(
+            self.consumer_group, self.consumer_name, {stream: ">" for stream in streams},
+            count=count, block=shared_config.REDIS_STREAM_BLOCK_MS
+        )
+
+    async def _claim_idle_entries(self, streams: Set[str], count: int) -> list:
+        """
+        Take over entries other consumers of the group read but left unacked for REDIS_STREAM_CLAIM_MIN_IDLE_MS, as a consumer
+        that died (or whose partition moved) never will, a page per read. A pass over the streams starts at most that often.
+        """
+        now = asyncio.get_running_loop().time()
+        if not self.claim_cursors and now >= self.next_claim_time:
+            self.claim_cursors = {stream: "0-0" for stream in streams}
+            self.next_claim_time = now + shared_config.REDIS_STREAM_CLAIM_MIN_IDLE_MS / 1000
+
+        response = []
+        for stream in [stream for stream in self.claim_cursors if stream in streams]:
+            next_cursor, entries, *_ = await self.redis_client.xautoclaim(
+                stream, self.consumer_group, self.consumer_name, shared_config.REDIS_STREAM_CLAIM_MIN_IDLE_MS,
+                start_id=self.claim_cursors[stream], count=count
+            )
+            if decode_name(next_cursor) == "0-0":
+                del self.claim_cursors[stream]  # Done with this stream for this pass
+            else:
+                self.claim_cursors[stream] = decode_name(next_cursor)
+            if entries:
+                logging.info(f"Claimed {len(entries)} idle entries of other consumers on {stream}")
+                response.append([stream, entries])
+
+        for stream in [stream for stream in self.claim_cursors if stream not in streams]:
+            del self.claim_cursors[stream]
+        return response
+
+    async def _dispatch_stream_entries(self, stream: str, entries: list):
+        if not entries:
+            return
+
+        if self.stream_ids[stream] != ">":
+            self.stream_ids[stream] = decode_name(entries[-1][0])
+
+        # Handed to the handlers in batches of up to `max_batch_size`, each acked once handled (unless the listener acks them itself)
+        batch_size = max(self.max_batch_size, 1)
+        for start in range(0, len(entries), batch_size):
+            chunk = entries[start:start + batch_size]
+            # Entries trimmed while pending come back without fields; they're only acked
+            batch = [
+                (stream, fields.get(STREAM_DATA_FIELD, fields.get(STREAM_DATA_FIELD.encode())))
+                for _, fields in chunk if fields
+            ]
+            if self.consumer_group is None:
+                await self.dispatch(batch)
+            elif self.ack_when_handled:
+                await self.dispatch(batch, stream, [decode_name(entry_id) for entry_id, _ in chunk])
+            else:
+                entry_ids = [decode_name(entry_id) for entry_id, fields in chunk if fields]
+                await self.dispatch(batch, stream, [decode_name(entry_id) for entry_id, fields in chunk if not fields], entry_ids)
+
+    async def dispatch(self, batch: List[Tuple[str, MessageData]], stream: Optional[str] = None, acks: Optional[List[str]] = None,
+                       entry_ids: Optional[List[str]] = None):
+        """Run the batch handler in its own task, waiting first if `max_concurrency` handlers are already running (backpressure)."""
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._run_handler(batch, stream, acks, entry_ids))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run_handler(self, batch: List[Tuple[str, MessageData]], stream: Optional[str] = None, acks: Optional[List[str]] = None,
+                           entry_ids: Optional[List[str]] = None):
+        try:
+            if batch and entry_ids is not None:
+                await self.handle_entries(stream, [(entry_id, data) for entry_id, (_, data) in zip(entry_ids, batch)])
+            elif batch:
+                await self.handle_batch(batch)
+        except Exception:
+            logging.error(f"Unhandled error handling a batch of {len(batch)} messages", exc_info=True)
+        finally:
+            self.semaphore.release()
+
+        if acks:
+            await self.ack(stream, acks)
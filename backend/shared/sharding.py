@@ -0,0 +1,82 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.shared.config import shared_config
+from backend.shared.redis import get_odds_match_hash
+
+
+def stable_hash(key: str) -> int:
+    """64-bit hash of a key that every process agrees on (unlike the salted built-in hash())."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+def get_match_partition(match: str, partitions: Optional[int] = None) -> int:
+    """The odds partition a match belongs to, hashed on its odds hash key so it never changes while the partition count doesn't."""
+    partitions = partitions or shared_config.ODDS_UPDATE_PARTITIONS
+    return stable_hash(get_odds_match_hash(match)) % partitions
+
+def get_partition_channel(partition: int) -> str:
+    """The odds update channel of a partition. Unpartitioned, every update goes on the plain odds update channel."""
+    if shared_config.ODDS_UPDATE_PARTITIONS == 1:
+        return shared_config.REDIS_ODDS_UPDATE_CHANNEL
+    return f"{shared_config.REDIS_ODDS_UPDATE_CHANNEL}:{partition}"
+
+def get_odds_update_channel(match: str) -> str:
+    """The channel odds updates for a match are published on."""
+    return get_partition_channel(get_match_partition(match))
+
+def get_channel_partition(channel: str) -> Optional[int]:
+    """The partition of an odds update channel, or None if it isn't one."""
+    if channel == shared_config.REDIS_ODDS_UPDATE_CHANNEL:
+        return 0 if shared_config.ODDS_UPDATE_PARTITIONS == 1 else None
+
+    prefix, _, partition = channel.rpartition(":")
+    if prefix != shared_config.REDIS_ODDS_UPDATE_CHANNEL or not partition.isdigit():
+        return None
+    return int(partition)
+
+def is_odds_update_channel(channel: str) -> bool:
+    return get_channel_partition(channel) is not None
+
+def get_all_odds_update_channels() -> List[str]:
+    return [get_partition_channel(partition) for partition in range(shared_config.ODDS_UPDATE_PARTITIONS)]
+
+def get_odds_update_channel_patterns() -> List[str]:
+    """Patterns matching the odds update channels of every partition, for consumers that want all odds."""
+    if shared_config.ODDS_UPDATE_PARTITIONS == 1:
+        return [shared_config.REDIS_ODDS_UPDATE_CHANNEL]
+    return [f"{shared_config.REDIS_ODDS_UPDATE_CHANNEL}:*"]
+
+
+class ConsistentHashRing:
+    """
+    Maps keys to nodes so that adding or removing a node only moves the keys of that node (~1/N of them),
+    rather than reshuffling everything as `hash % N` would. Each node is placed at several virtual points to even out the load.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 64):
+        self.virtual_nodes = virtual_nodes
+        self.nodes: Dict[str, List[int]] = {}
+        self.ring: List[Tuple[int, str]] = []  # Sorted (point, node)
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        if node in self.nodes:
+            return
+
+        points = [stable_hash(f"{node}#{i}") for i in range(self.virtual_nodes)]
+        self.nodes[node] = points
+        for point in points:
+            bisect.insort(self.ring, (point, node))
+
+    def remove_node(self, node: str):
+        if self.nodes.pop(node, None) is not None:
+            self.ring = [(point, ring_node) for point, ring_node in self.ring if ring_node != node]
+
+    def get_node(self, key: str) -> Optional[str]:
+        """The node owning a key: the first node point clockwise from the key's hash."""
+        if not self.ring:
+            return None
+
+        i = bisect.bisect(self.ring, (stable_hash(key), ""))
+        return self.ring[i % len(self.ring)][1]
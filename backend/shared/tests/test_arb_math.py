@@ -1,27 +1,74 @@
 import pytest
-from backend.shared.arb_math import calculate_guaranteed_payout, calculate_guaranteed_profit
+import numpy as np
+from backend.shared.arb_math import (
+    calculate_guaranteed_payout, calculate_guaranteed_profit, calculate_arb_stakes, calculate_guaranteed_payouts, calculate_guaranteed_profits
+)
+
+@pytest.mark.parametrize(
+    "stakes, odds, expected_payout, message",
+    [
+        ([100, 100], [2.0, 2.0], 200, "Equal stakes and odds"),
+        ([50, 150], [3.0, 1.5], 150, "Different stakes and odds"),
+        ([100, 100], [None, 2.0], 0, "Home odds missing, payout should be 0"),
+        ([100, 100], [2.0, None], 0, "Away odds missing, payout should be 0"),
+        ([100, 100], [None, None], 0, "Both odds missing, payout should be 0"),
+        ([50, 30, 20], [2.2, 3.6, 5.5], 108, "Three-way market"),
+        ([50, 30, 20], [2.2, None, 5.5], 0, "Draw odds missing, payout should be 0"),
+    ]
+)
+def test_calculate_guaranteed_payout(stakes, odds, expected_payout, message):
+    assert calculate_guaranteed_payout(stakes, odds) == pytest.approx(expected_payout), message
 
 @pytest.mark.parametrize(
-    "stake_home, stake_away, odds_home, odds_away, expected_payout, message",
+    "stakes, odds, expected_profit, message",
     [
-        (100, 100, 2.0, 2.0, 200, "Equal stakes and odds"),
-        (50, 150, 3.0, 1.5, 150, "Different stakes and odds"),
-        (100, 100, None, 2.0, 0, "Home odds missing, payout should be 0"),
-        (100, 100, 2.0, None, 0, "Away odds missing, payout should be 0"),
-        (100, 100, None, None, 0, "Both odds missing, payout should be 0"),
+        ([100, 100], [2.0, 2.0], 0, "No profit when odds are perfectly balanced"),
+        ([100, 150], [3.0, 1.8], 20, "Arbitrage should yield a profit"),
+        ([100, 100], [None, 2.0], -100, "Missing home odds should result in a loss",),
+        ([100, 100], [None, None], 0, "Missing both odds should result in neutral",),
+        ([50, 30, 20], [2.2, 3.6, 5.5], 8, "Three-way arbitrage should yield a profit"),
+        ([50, 30, 20], [2.2, None, 5.5], -70, "Missing draw odds should result in a loss"),
     ]
 )
-def test_calculate_guaranteed_payout(stake_home, stake_away, odds_home, odds_away, expected_payout, message):
-    assert calculate_guaranteed_payout(stake_home, stake_away, odds_home, odds_away) == expected_payout, message
+def test_calculate_guaranteed_profit(stakes, odds, expected_profit, message):
+    assert calculate_guaranteed_profit(stakes, odds) == pytest.approx(expected_profit), message
 
 @pytest.mark.parametrize(
-    "stake_home, stake_away, odds_home, odds_away, expected_profit, message",
+    "odds, overall_stake",
     [
-        (100, 100, 2.0, 2.0, 0, "No profit when odds are perfectly balanced"),
-        (100, 150, 3.0, 1.8, 20, "Arbitrage should yield a profit"),
-        (100, 100, None, 2.0, -100, "Missing home odds should result in a loss",),
-        (100, 100, None, None, 0, "Missing both odds should result in neutral",),
+        ([2.0, 2.5], 100),
+        ([2.2, 3.6, 5.5], 100),
+        ([1.9, 4.0, 6.5, 9.0], 250),
     ]
 )
-def test_calculate_guaranteed_profit(stake_home, stake_away, odds_home, odds_away, expected_profit, message):
-    assert calculate_guaranteed_profit(stake_home, stake_away, odds_home, odds_away) == expected_profit, message
+def test_calculate_arb_stakes(odds, overall_stake):
+    """Stakes should add up to the overall stake and pay out the same whichever outcome wins."""
+    stakes = calculate_arb_stakes(odds, overall_stake)
+
+    assert sum(stakes) == pytest.approx(overall_stake)
+    payouts = [stake * outcome_odds for stake, outcome_odds in zip(stakes, odds)]
+    assert payouts == pytest.approx([payouts[0]] * len(odds))
+    assert calculate_guaranteed_profit(stakes, odds) == pytest.approx(overall_stake / sum(1 / o for o in odds) - overall_stake)
+
+def test_batch_payouts_and_profits_match_the_scalar_functions():
+    """Ensure the vectorized functions agree with the scalar ones, arb by arb, including cancelled outcomes and padded legs."""
+    arbs = [
+        ([100, 150], [3.0, 1.8]),
+        ([100, 100], [None, 2.0]),
+        ([100, 100], [None, None]),
+        ([50, 30, 20], [2.2, 3.6, 5.5]),
+        ([50, 30, 20], [2.2, None, 5.5]),
+    ]
+    stakes = np.zeros((len(arbs), 3))
+    odds = np.full((len(arbs), 3), np.nan)
+    legs = np.zeros((len(arbs), 3), dtype=bool)
+    for i, (arb_stakes, arb_odds) in enumerate(arbs):
+        stakes[i, :len(arb_stakes)] = arb_stakes
+        odds[i, :len(arb_odds)] = [np.nan if outcome_odds is None else outcome_odds for outcome_odds in arb_odds]
+        legs[i, :len(arb_stakes)] = True
+
+    payouts = calculate_guaranteed_payouts(stakes, odds, legs)
+    profits = calculate_guaranteed_profits(stakes, odds, legs)
+
+    assert payouts.tolist() == pytest.approx([calculate_guaranteed_payout(arb_stakes, arb_odds) for arb_stakes, arb_odds in arbs])
+    assert profits.tolist() == pytest.approx([calculate_guaranteed_profit(arb_stakes, arb_odds) for arb_stakes, arb_odds in arbs])
@@ -0,0 +1,109 @@
+import pytest
+import json
+from pydantic import ValidationError
+from backend.shared.redis import (
+    ArbLeg, ArbMessage, JsonCodec, MessageDecodeError, MsgpackCodec, OddsUpdate, OddsUpdateMessage, OddsValues, get_message_codec
+)
+
+CODECS = [JsonCodec(), MsgpackCodec()]
+
+ODDS_UPDATES = [
+    OddsUpdateMessage(event="odds_update", match="Man Utd vs Chelsea", bookmaker="Bet365",
+                      odds=OddsValues(home_win=2.1, away_win=1.8), timestamp=1741000000000),
+    OddsUpdateMessage(event="odds_update", match="Arsenal vs Spurs", bookmaker="William Hill",
+                      odds=OddsValues(home_win=2.5, draw=3.4, away_win=2.9), timestamp=1741000000001),
+    OddsUpdateMessage(event="odds_close", match="Arsenal vs Spurs", bookmaker="Smarkets", odds=None, timestamp=1741000000002),
+]
+
+ARB_MESSAGE = ArbMessage(
+    id="5b8e5c1e-0f0c-4d0e-9f5e-2f4c8f0b6a11",
+    match="Arsenal vs Spurs",
+    legs=[
+        ArbLeg(outcome="home_win", bookmaker="Smarkets", odds=2.5, stake=39.4),
+        ArbLeg(outcome="draw", bookmaker="Betfair", odds=4.0, stake=24.6),
+        ArbLeg(outcome="away_win", bookmaker="Bet365", odds=None, stake=0.0),
+    ],
+    guaranteed_profit=-39.4,
+    status="cancelled",
+    timestamp=1741000000003
+)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("odds_update", ODDS_UPDATES)
+def test_odds_update_round_trip(codec, odds_update):
+    assert codec.decode_odds_update(codec.encode_odds_update(odds_update)) == odds_update
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_arb_message_round_trip(codec):
+    assert codec.decode_arb_message(codec.encode_arb_message(ARB_MESSAGE)) == ARB_MESSAGE
+
+
+def test_json_codec_is_the_frontend_format():
+    """The JSON codec keeps the field names, so it stays readable and matches what the frontend receives."""
+    assert json.loads(JsonCodec().encode_arb_message(ARB_MESSAGE)) == ARB_MESSAGE.model_dump()
+
+
+def test_msgpack_codec_is_smaller():
+    json_codec, msgpack_codec = JsonCodec(), MsgpackCodec()
+
+    for odds_update in ODDS_UPDATES:
+        assert len(msgpack_codec.encode_odds_update(odds_update)) < len(json_codec.encode_odds_update(odds_update).encode())
+    assert len(msgpack_codec.encode_arb_message(ARB_MESSAGE)) < len(json_codec.encode_arb_message(ARB_MESSAGE).encode())
+
+
+@pytest.mark.parametrize("codec, data", [
+    (JsonCodec(), "not json"),
+    (MsgpackCodec(), b"\xc1"),  # Never-used msgpack byte
+    (MsgpackCodec(), MsgpackCodec().encode_arb_message(ARB_MESSAGE)),  # Wrong message type: 6 fields, not 5
+    (MsgpackCodec(), b"\x95\xabodds_update\xa1M\xa1B\x01\x01"),  # Odds that aren't a map
+])
+def test_malformed_messages_raise_decode_error(codec, data):
+    with pytest.raises(MessageDecodeError):
+        codec.decode_odds_update(data)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_invalid_messages_raise_validation_error(codec):
+    invalid_update = ODDS_UPDATES[0].model_copy(update={"event": "odds_suspended"})
+
+    with pytest.raises(ValidationError):
+        codec.decode_odds_update(codec.encode_odds_update(invalid_update))
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_message_codec("protobuf")
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("odds_update", ODDS_UPDATES)
+def test_odds_update_record_round_trip(codec, odds_update):
+    """Trusted odds updates decode into slotted records that convert back to the same validated message."""
+    record = codec.decode_odds_update_record(codec.encode_odds_update(odds_update))
+
+    assert isinstance(record, OddsUpdate)
+    assert not hasattr(record, "__dict__")
+    assert record.to_message() == odds_update
+    assert OddsUpdate.from_message(odds_update).to_message() == odds_update
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+def test_trusted_decode_skips_validation(codec):
+    """Trusted decoding builds the same models without validating them."""
+    assert codec.decode_odds_update(codec.encode_odds_update(ODDS_UPDATES[1]), trusted=True) == ODDS_UPDATES[1]
+    assert codec.decode_arb_message(codec.encode_arb_message(ARB_MESSAGE), trusted=True) == ARB_MESSAGE
+
+    invalid_update = ODDS_UPDATES[0].model_copy(update={"event": "odds_suspended"})
+    assert codec.decode_odds_update(codec.encode_odds_update(invalid_update), trusted=True).event == "odds_suspended"
+
+
+@pytest.mark.parametrize("codec, data", [
+    (JsonCodec(), '{"event": "odds_update", "match": "M"}'),
+    (JsonCodec(), '[1, 2, 3]'),
+    (MsgpackCodec(), b"\x93\x01\x02\x03"),
+])
+def test_malformed_records_raise_decode_error(codec, data):
+    with pytest.raises(MessageDecodeError):
+        codec.decode_odds_update_record(data)
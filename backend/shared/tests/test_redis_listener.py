@@ -0,0 +1,436 @@
+import pytest
+import asyncio
+import redis
+from unittest.mock import MagicMock, AsyncMock, patch
+from backend.shared.config import shared_config
+from backend.shared.redis_listener import AsyncRedisListener
+
+# Kept so the tests can still wait while the listener's asyncio.sleep is patched
+real_sleep = asyncio.sleep
+
+
+class FakePubSub:
+    """Replays a scripted list of messages, raising any exceptions in it, then blocks forever."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.subscribe = AsyncMock()
+        self.psubscribe = AsyncMock()
+        self.unsubscribe = AsyncMock()
+        self.aclose = AsyncMock()
+
+    async def get_message(self, timeout=None):
+        if not self.messages:
+            await asyncio.Event().wait()
+        message = self.messages.pop(0)
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+
+class RecordingListener(AsyncRedisListener):
+    def __init__(self, redis_client, max_concurrency=1, handler_delay=0.0, **settings):
+        super().__init__(redis_client, ["channel"], max_concurrency=max_concurrency, **settings)
+        self.handler_delay = handler_delay
+        self.handled = []
+        self.subscribed = []
+        self.running = 0
+        self.max_running = 0
+
+    async def handle_message(self, channel, data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await real_sleep(self.handler_delay)
+        self.handled.append((channel, data))
+        self.running -= 1
+
+    async def on_subscribed(self, channels):
+        self.subscribed.extend(channels)
+
+
+def subscribe_message():
+    return {"type": "subscribe", "channel": "channel", "data": 1}
+
+def data_message(data):
+    return {"type": "message", "channel": "channel", "data": data}
+
+async def run_listener(listener, duration=0.05):
+    task = asyncio.create_task(listener.listen())
+    await real_sleep(duration)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.gather(*listener.tasks)
+
+
+@pytest.mark.asyncio
+async def test_listener_dispatches_messages_in_order():
+    """Test that with a concurrency of 1 messages are handled one at a time, in publish order."""
+
+    # Arrange
+    pubsub = FakePubSub([subscribe_message()] + [data_message(str(i)) for i in range(5)])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client, handler_delay=0.001)
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    pubsub.subscribe.assert_awaited_once_with("channel")
+    assert listener.subscribed == ["channel"]
+    assert [data for _, data in listener.handled] == [str(i) for i in range(5)]
+    assert listener.max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_listener_bounds_concurrency():
+    """Test that no more than max_concurrency handlers run at once."""
+
+    # Arrange
+    pubsub = FakePubSub([data_message(str(i)) for i in range(10)])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client, max_concurrency=3, handler_delay=0.005)
+
+    # Act
+    await run_listener(listener, duration=0.1)
+
+    # Assert
+    assert len(listener.handled) == 10
+    assert listener.max_running == 3
+
+
+@pytest.mark.asyncio
+async def test_listener_survives_handler_errors():
+    """Test that an exception in a handler is logged and doesn't stop the listener."""
+
+    # Arrange
+    pubsub = FakePubSub([data_message("bad"), data_message("good")])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client)
+    handled = []
+
+    async def handle_message(channel, data):
+        if data == "bad":
+            raise ValueError("boom")
+        handled.append(data)
+
+    listener.handle_message = handle_message
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert handled == ["good"]
+    assert listener.semaphore._value == 1
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_with_backoff():
+    """Test that connection errors resubscribe after an exponentially increasing, capped backoff that resets on subscribe."""
+
+    # Arrange
+    pubsubs = [
+        FakePubSub([redis.ConnectionError()]),
+        FakePubSub([redis.ConnectionError()]),
+        FakePubSub([redis.ConnectionError()]),
+        FakePubSub([subscribe_message(), redis.ConnectionError()]),
+        FakePubSub([subscribe_message(), data_message("after reconnect")]),
+    ]
+    redis_client = MagicMock()
+    redis_client.pubsub.side_effect = pubsubs
+    listener = RecordingListener(redis_client)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    # Act
+    with patch.object(shared_config, "REDIS_RECONNECT_BACKOFF_MIN_SECONDS", 1.0), \
+         patch.object(shared_config, "REDIS_RECONNECT_BACKOFF_MAX_SECONDS", 3.0), \
+         patch("backend.shared.redis_listener.asyncio.sleep", side_effect=fake_sleep):
+        await run_listener(listener)
+
+    # Assert
+    assert sleeps == [1.0, 2.0, 3.0, 1.0]
+    assert listener.subscribed == ["channel", "channel"]
+    assert listener.handled == [("channel", "after reconnect")]
+    for pubsub in pubsubs:
+        pubsub.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_listener_drains_pending_messages_into_batches():
+    """Test that pending messages are handed over in batches of at most max_batch_size, flushed once nothing is pending."""
+
+    # Arrange
+    pubsub = FakePubSub([data_message(str(i)) for i in range(5)] + [None])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client, max_batch_size=2, max_linger_seconds=1.0)
+    batches = []
+
+    async def handle_batch(batch):
+        batches.append([data for _, data in batch])
+
+    listener.handle_batch = handle_batch
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert batches == [["0", "1"], ["2", "3"], ["4"]]
+
+
+@pytest.mark.asyncio
+async def test_listener_flushes_batch_after_linger_time():
+    """Test that an open batch is flushed after the linger time even while more messages keep coming later."""
+
+    # Arrange
+    class SlowPubSub(FakePubSub):
+        async def get_message(self, timeout=None):
+            self.timeouts.append(timeout)
+            if len(self.timeouts) == 2:
+                return None  # Nothing arrived within the linger time
+            return await super().get_message(timeout)
+
+    pubsub = SlowPubSub([data_message("0"), data_message("1")])
+    pubsub.timeouts = []
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client, max_batch_size=10, max_linger_seconds=0.01)
+    batches = []
+
+    async def handle_batch(batch):
+        batches.append([data for _, data in batch])
+
+    listener.handle_batch = handle_batch
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert batches == [["0"]]  # "1" is still waiting for its own batch's linger time
+    assert pubsub.timeouts[0] is None
+    assert 0.0 <= pubsub.timeouts[1] <= 0.01
+
+
+@pytest.mark.asyncio
+async def test_listener_changes_channels_while_listening():
+    """Test that channels can be added and removed on the live connection, and that it waits while there are none."""
+
+    # Arrange
+    pubsub = FakePubSub([])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client)
+    await listener.set_channels([])
+    task = asyncio.create_task(listener.listen())
+    await real_sleep(0.01)
+    assert not redis_client.pubsub.called  # Nothing to subscribe to yet
+
+    # Act
+    await listener.set_channels(["odds_update:0", "odds_update:1"])
+    await real_sleep(0.01)
+    await listener.set_channels(["odds_update:1", "odds_update:2"])
+
+    # Assert
+    pubsub.subscribe.assert_any_await("odds_update:0", "odds_update:1")
+    pubsub.unsubscribe.assert_awaited_once_with("odds_update:0")
+    pubsub.subscribe.assert_awaited_with("odds_update:2")
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_listener_reports_channels_subscribed_together_once_all_are_confirmed():
+    """Test that on_subscribed is called once with every channel subscribed together, after the last confirmation."""
+
+    # Arrange
+    pubsub = FakePubSub([
+        {"type": "subscribe", "channel": b"odds_update:0", "data": 1},
+        {"type": "subscribe", "channel": b"odds_update:1", "data": 2},
+    ])
+    redis_client = MagicMock()
+    redis_client.pubsub.return_value = pubsub
+    listener = RecordingListener(redis_client)
+    await listener.set_channels(["odds_update:0", "odds_update:1"])
+    calls = []
+
+    async def on_subscribed(channels):
+        calls.append(channels)
+
+    listener.on_subscribed = on_subscribed
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert calls == [["odds_update:0", "odds_update:1"]]
+
+
+def test_listener_without_handle_message_cannot_be_created():
+    """Test that a listener subclass must implement handle_message, failing on creation rather than on its first message."""
+
+    # Arrange
+    class IncompleteListener(AsyncRedisListener):
+        pass
+
+    # Act / Assert
+    with pytest.raises(TypeError, match="handle_message"):
+        IncompleteListener(MagicMock(), ["channel"])
+
+
+class FakeStreamRedis:
+    """Replays scripted XREADGROUP/XREAD responses, then blocks forever."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.reads = []
+        self.xgroup_create = AsyncMock()
+        self.xack = AsyncMock()
+        self.xautoclaim = AsyncMock(return_value=["0-0", [], []])  # No idle entries to claim
+        self.xrevrange = AsyncMock(return_value=[])  # Empty stream
+
+    async def _read(self, streams, **kwargs):
+        self.reads.append((dict(streams), kwargs))
+        if not self.responses:
+            await asyncio.Event().wait()
+        return self.responses.pop(0)
+
+    async def xreadgroup(self, group, consumer, streams, **kwargs):
+        return await self._read(streams, **kwargs)
+
+    async def xread(self, streams, **kwargs):
+        return await self._read(streams, **kwargs)
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "REDIS_TRANSPORT", "streams")
+async def test_stream_listener_replays_pending_then_reads_new_entries_and_acks():
+    """Test that a consumer group reader first re-reads its unacked entries, then blocks for new ones, acking each batch."""
+
+    # Arrange
+    redis_client = FakeStreamRedis([
+        [["channel", [("1-0", {"data": "pending"})]]],
+        [["channel", []]],  # Caught up on unacked entries
+        [["channel", [("2-0", {"data": "new 1"}), ("3-0", {"data": "new 2"})]]],
+    ])
+    listener = RecordingListener(redis_client, max_batch_size=10, consumer_group="group", consumer_name="consumer")
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    redis_client.xgroup_create.assert_awaited_once_with(
+        "channel", "group", id=shared_config.REDIS_STREAM_START_ID, mkstream=True
+    )
+    assert [streams for streams, _ in redis_client.reads] == [{"channel": "0"}, {"channel": "1-0"}, {"channel": ">"}, {"channel": ">"}]
+    assert redis_client.reads[2][1] == {"count": shared_config.REDIS_STREAM_READ_COUNT, "block": shared_config.REDIS_STREAM_BLOCK_MS}
+    assert [data for _, data in listener.handled] == ["pending", "new 1", "new 2"]
+    assert listener.subscribed == ["channel"]
+    assert redis_client.xack.await_args_list[0].args == ("channel", "group", "1-0")
+    assert redis_client.xack.await_args_list[1].args == ("channel", "group", "2-0", "3-0")
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "REDIS_TRANSPORT", "streams")
+async def test_stream_listener_claims_entries_a_dead_consumer_left_unacked():
+    """Test that once caught up on its own entries, a consumer takes over entries idle in another's pending list, handling and acking them."""
+
+    # Arrange
+    redis_client = FakeStreamRedis([[["channel", []]]])  # No unacked entries of its own
+    redis_client.xautoclaim.side_effect = [
+        ["0-0", [("1-0", {"data": "orphaned"})], []],  # Read by a consumer that died before acking it
+        ["0-0", [], []],
+    ]
+    listener = RecordingListener(redis_client, max_batch_size=10, consumer_group="group", consumer_name="survivor")
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert redis_client.xautoclaim.await_args_list[0].args == ("channel", "group", "survivor", shared_config.REDIS_STREAM_CLAIM_MIN_IDLE_MS)
+    assert redis_client.xautoclaim.await_args_list[0].kwargs == {"start_id": "0-0", "count": shared_config.REDIS_STREAM_READ_COUNT}
+    assert listener.handled == [("channel", "orphaned")]
+    redis_client.xack.assert_awaited_once_with("channel", "group", "1-0")
+    assert redis_client.xautoclaim.await_count == 1  # Next pass only after the min idle time
+    assert [streams for streams, _ in redis_client.reads] == [{"channel": "0"}, {"channel": ">"}]
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "REDIS_TRANSPORT", "streams")
+async def test_stream_listener_without_group_reads_on_from_last_id():
+    """Test that a reader without a consumer group starts after the stream's last entry and uses XREAD from the last ID it saw, never acking."""
+
+    # Arrange
+    redis_client = FakeStreamRedis([
+        [["channel", [("5-0", {"data": "first"})]]],
+        [["channel", [("6-0", {"data": "second"})]]],
+    ])
+    redis_client.xrevrange.return_value = [(b"4-0", {b"data": b"before joining"})]
+    listener = RecordingListener(redis_client)
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    redis_client.xgroup_create.assert_not_awaited()
+    redis_client.xack.assert_not_awaited()
+    assert [streams for streams, _ in redis_client.reads] == [
+        {"channel": "4-0"}, {"channel": "5-0"}, {"channel": "6-0"}  # Not "$", which would skip entries added between reads
+    ]
+    redis_client.xrevrange.assert_awaited_once_with("channel", count=1)
+    assert [data for _, data in listener.handled] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "REDIS_TRANSPORT", "streams")
+@patch.object(shared_config, "REDIS_STREAM_READ_COUNT", 100)
+async def test_stream_listener_reads_many_entries_at_once_and_hands_them_over_in_batches():
+    """Test that the read count doesn't depend on the handlers' batch size, and that each batch read is handled and acked in batches."""
+
+    # Arrange
+    redis_client = FakeStreamRedis([
+        [["channel", []]],
+        [["channel", [(f"{i}-0", {"data": f"entry {i}"}) for i in range(1, 6)]]],
+    ])
+    listener = RecordingListener(redis_client, max_batch_size=2, consumer_group="group", consumer_name="consumer")
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert redis_client.reads[1][1]["count"] == 100
+    assert [data for _, data in listener.handled] == [f"entry {i}" for i in range(1, 6)]
+    assert [call.args[2:] for call in redis_client.xack.await_args_list] == [("1-0", "2-0"), ("3-0", "4-0"), ("5-0",)]
+
+
+class SelfAckingListener(RecordingListener):
+    async def handle_entries(self, stream, entries):
+        self.handled.extend(entries)
+
+
+@pytest.mark.asyncio
+@patch.object(shared_config, "REDIS_TRANSPORT", "streams")
+async def test_stream_listener_leaves_acking_to_listeners_that_ack_themselves():
+    """Test that with ack_when_handled=False, entries are handed over with their IDs and left unacked, except those trimmed while pending."""
+
+    # Arrange
+    redis_client = FakeStreamRedis([
+        [["channel", [("1-0", {"data": "pending"}), ("2-0", {})]]],
+        [["channel", []]],
+    ])
+    listener = SelfAckingListener(redis_client, max_batch_size=10, consumer_group="group", consumer_name="consumer", ack_when_handled=False)
+
+    # Act
+    await run_listener(listener)
+
+    # Assert
+    assert listener.handled == [("1-0", "pending")]
+    redis_client.xack.assert_awaited_once_with("channel", "group", "2-0")
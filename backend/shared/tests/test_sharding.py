@@ -0,0 +1,70 @@
+import pytest
+from collections import Counter
+from unittest.mock import patch
+from backend.shared.config import shared_config
+from backend.shared.sharding import (
+    ConsistentHashRing, get_channel_partition, get_match_partition, get_odds_update_channel,
+    get_odds_update_channel_patterns, get_partition_channel, stable_hash
+)
+
+
+def test_stable_hash_is_deterministic():
+    """Test that the hash doesn't depend on the process (Python's hash() is salted per process)."""
+    assert stable_hash("odds:Man Utd vs Chelsea") == 0x604f0b61faf31adc
+
+
+def test_unpartitioned_channels():
+    """Test that with a single partition every odds update stays on the plain odds update channel."""
+    with patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 1):
+        assert get_odds_update_channel("Match1") == shared_config.REDIS_ODDS_UPDATE_CHANNEL
+        assert get_channel_partition(shared_config.REDIS_ODDS_UPDATE_CHANNEL) == 0
+        assert get_odds_update_channel_patterns() == [shared_config.REDIS_ODDS_UPDATE_CHANNEL]
+
+
+def test_partitioned_channels():
+    """Test that matches are spread over the partition channels and channels map back to their partition."""
+    with patch.object(shared_config, "ODDS_UPDATE_PARTITIONS", 8):
+        partitions = Counter(get_match_partition(f"Match{i}") for i in range(800))
+
+        assert set(partitions) == set(range(8))
+        assert min(partitions.values()) > 50
+        for partition in range(8):
+            channel = get_partition_channel(partition)
+            assert channel == f"{shared_config.REDIS_ODDS_UPDATE_CHANNEL}:{partition}"
+            assert get_channel_partition(channel) == partition
+        assert get_channel_partition(shared_config.REDIS_ODDS_UPDATE_CHANNEL) is None
+        assert get_channel_partition(shared_config.REDIS_ARB_DETECTIONS_CHANNEL) is None
+        assert get_odds_update_channel_patterns() == [f"{shared_config.REDIS_ODDS_UPDATE_CHANNEL}:*"]
+
+
+def test_hash_ring_only_moves_keys_of_joining_node():
+    """Test that a joining node only takes keys over (from any node) and a leaving node only hands its own keys over."""
+    keys = [f"partition:{i}" for i in range(1000)]
+    ring = ConsistentHashRing(["worker-a", "worker-b", "worker-c"])
+    before = {key: ring.get_node(key) for key in keys}
+
+    ring.add_node("worker-d")
+    after_join = {key: ring.get_node(key) for key in keys}
+
+    moved = [key for key in keys if before[key] != after_join[key]]
+    assert all(after_join[key] == "worker-d" for key in moved)
+    assert 150 < len(moved) < 350  # ~1/4 of the keys
+
+    ring.remove_node("worker-d")
+    assert {key: ring.get_node(key) for key in keys} == before
+
+
+@pytest.mark.parametrize("nodes", [["worker-a"], ["worker-a", "worker-b", "worker-c", "worker-d"]])
+def test_hash_ring_assigns_every_key(nodes):
+    """Test that every key maps to a live node, independently of the order nodes were added in."""
+    ring = ConsistentHashRing(nodes)
+    reversed_ring = ConsistentHashRing(reversed(nodes))
+
+    owners = Counter(ring.get_node(f"partition:{i}") for i in range(1000))
+
+    assert set(owners) == set(nodes)
+    assert all(ring.get_node(f"partition:{i}") == reversed_ring.get_node(f"partition:{i}") for i in range(1000))
+
+
+def test_empty_hash_ring():
+    assert ConsistentHashRing().get_node("partition:0") is None
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock, patch
+from backend.shared.config import shared_config
+from backend.shared.transport import STREAM_DATA_FIELD, publish_message
+
+
+def test_publish_message_with_pubsub():
+    redis_client = MagicMock()
+
+    with patch.object(shared_config, "REDIS_TRANSPORT", "pubsub"):
+        publish_message(redis_client, "odds_update", "{}")
+
+    redis_client.publish.assert_called_once_with("odds_update", "{}")
+    redis_client.xadd.assert_not_called()
+
+
+def test_publish_message_with_streams_trims_stream():
+    redis_client = MagicMock()
+
+    with patch.object(shared_config, "REDIS_TRANSPORT", "streams"):
+        publish_message(redis_client, "odds_update", "{}")
+
+    redis_client.xadd.assert_called_once_with(
+        "odds_update", {STREAM_DATA_FIELD: "{}"}, maxlen=shared_config.REDIS_STREAM_MAXLEN, approximate=True
+    )
+    redis_client.publish.assert_not_called()
@@ -0,0 +1,17 @@
+import redis
+from typing import Union
+from backend.shared.config import shared_config
+
+# Field holding the message in each stream entry
+STREAM_DATA_FIELD = "data"
+
+
+def publish_message(redis_client: Union[redis.Redis, redis.client.Pipeline], channel: str, data: str):
+    """
+    Publish a message on a channel with the configured transport: PUBLISH for pub/sub, or XADD to the
+    stream of the same name, trimmed to roughly REDIS_STREAM_MAXLEN entries. Works on pipelines too.
+    """
+    if shared_config.REDIS_TRANSPORT == "streams":
+        redis_client.xadd(channel, {STREAM_DATA_FIELD: data}, maxlen=shared_config.REDIS_STREAM_MAXLEN, approximate=True)
+    else:
+        redis_client.publish(channel, data)
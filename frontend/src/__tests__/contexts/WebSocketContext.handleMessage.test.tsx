@@ -88,4 +88,21 @@ describe("handleMessage", () => {
     expect(updateOddsWithArbitrage).toHaveBeenCalledWith(message.contents);
     expect(updateProfit).not.toHaveBeenCalled();
   });
+
+  test("replays the odds and arbs of a 'snapshot' message from web socket", () => {
+    const odds = { match: "Team A vs Team B" };
+    const detection = { status: "detected" };
+    const execution = { guaranteed_profit: 100, timestamp: 123456789, status: "completed" };
+    const message: WebSocketMessage = {
+      message_type: "snapshot",
+      contents: { odds: [odds], arb_detections: [detection], arb_executions: [execution] },
+    };
+
+    handleMessage(message, handlers);
+
+    expect(updateOdds).toHaveBeenCalledWith(odds);
+    expect(updateArbitrages.mock.calls).toEqual([[detection], [execution]]);
+    expect(updateOddsWithArbitrage.mock.calls).toEqual([[detection], [execution]]);
+    expect(updateProfit).toHaveBeenCalledWith(100, 123456789);
+  });
 });
@@ -9,12 +9,10 @@ describe("useArbitrages hook", () => {
     const arb: ArbMessage = {
       id: "arb-1",
       match: "Team A vs Team B",
-      home_win_bookmaker: "Bookmaker 1",
-      away_win_bookmaker: "Bookmaker 2",
-      home_win_odds: 1.9,
-      away_win_odds: 2.4,
-      home_win_stake: 100,
-      away_win_stake: 50,
+      legs: [
+        { outcome: "home_win", bookmaker: "Bookmaker 1", odds: 1.9, stake: 100 },
+        { outcome: "away_win", bookmaker: "Bookmaker 2", odds: 2.4, stake: 50 },
+      ],
       guaranteed_profit: 20,
       status: "detected",
       timestamp: Date.now(),
@@ -39,12 +37,10 @@ describe("useArbitrages hook", () => {
     const validArb: ArbMessage = {
       id: "arb-1",
       match: "Team A vs Team B",
-      home_win_bookmaker: "Bookmaker 1",
-      away_win_bookmaker: "Bookmaker 2",
-      home_win_odds: 2.0,
-      away_win_odds: 3.5,
-      home_win_stake: 100,
-      away_win_stake: 50,
+      legs: [
+        { outcome: "home_win", bookmaker: "Bookmaker 1", odds: 2.0, stake: 100 },
+        { outcome: "away_win", bookmaker: "Bookmaker 2", odds: 3.5, stake: 50 },
+      ],
       guaranteed_profit: 20,
       status: "detected",
       timestamp: now - Math.floor(ARB_WINDOW / 2), // Recent entry
@@ -53,12 +49,10 @@ describe("useArbitrages hook", () => {
     const expiredArb: ArbMessage = {
       id: "arb-2",
       match: "Team C vs Team D",
-      home_win_bookmaker: "Bookmaker 3",
-      away_win_bookmaker: "Bookmaker 4",
-      home_win_odds: 1.8,
-      away_win_odds: 2.9,
-      home_win_stake: 80,
-      away_win_stake: 40,
+      legs: [
+        { outcome: "home_win", bookmaker: "Bookmaker 3", odds: 1.8, stake: 80 },
+        { outcome: "away_win", bookmaker: "Bookmaker 4", odds: 2.9, stake: 40 },
+      ],
       guaranteed_profit: 15,
       status: "completed",
       timestamp: now - 2 * ARB_WINDOW, // Beyond the 5-minute window - expired
@@ -79,12 +79,10 @@ describe("useOdds Hook", () => {
       const arbMessage: ArbMessage = {
         id: "arb-1",
         match: "Team A vs Team B",
-        home_win_bookmaker: "Bookmaker 1",
-        away_win_bookmaker: "Bookmaker 2",
-        home_win_odds: 2.0,
-        away_win_odds: 3.5,
-        home_win_stake: 100,
-        away_win_stake: 50,
+        legs: [
+          { outcome: "home_win", bookmaker: "Bookmaker 1", odds: 2.0, stake: 100 },
+          { outcome: "away_win", bookmaker: "Bookmaker 2", odds: 3.5, stake: 50 },
+        ],
         guaranteed_profit: 20,
         status,
         timestamp: Date.now(),
@@ -121,12 +119,10 @@ describe("useOdds Hook", () => {
     const arbMessage: ArbMessage = {
       id: "arb-2",
       match: "Team A vs Team B", // Doesn't match the oddsEntry match
-      home_win_bookmaker: "Bookmaker 1",
-      away_win_bookmaker: "Bookmaker 2",
-      home_win_odds: 2.0,
-      away_win_odds: 3.5,
-      home_win_stake: 100,
-      away_win_stake: 50,
+      legs: [
+        { outcome: "home_win", bookmaker: "Bookmaker 1", odds: 2.0, stake: 100 },
+        { outcome: "away_win", bookmaker: "Bookmaker 2", odds: 3.5, stake: 50 },
+      ],
       guaranteed_profit: 20,
       status: "detected",
       timestamp: Date.now(),
@@ -146,4 +142,40 @@ describe("useOdds Hook", () => {
     expect(result.current.odds).toHaveLength(1);
     expect(result.current.odds[0].arb_status).toBeNull();
   });
+
+  test("updates arbitrage status for the draw leg of a three-way arbitrage", () => {
+    // Arrange
+    const { result } = renderHook(() => useOdds());
+    const initialOdds: OddsData = {
+      event: "odds_update",
+      match: "Team A vs Team B",
+      bookmaker: "Bookmaker 2",
+      odds: { home_win: 2.1, draw: 4.0, away_win: 3.1 },
+      arb_status: null,
+      timestamp: Date.now(),
+    };
+    const arbMessage: ArbMessage = {
+      id: "arb-3",
+      match: "Team A vs Team B",
+      legs: [
+        { outcome: "home_win", bookmaker: "Bookmaker 1", odds: 2.5, stake: 40 },
+        { outcome: "draw", bookmaker: "Bookmaker 2", odds: 4.0, stake: 25 },
+        { outcome: "away_win", bookmaker: "Bookmaker 3", odds: 5.0, stake: 20 },
+      ],
+      guaranteed_profit: 17.6,
+      status: "detected",
+      timestamp: Date.now(),
+    };
+
+    // Act
+    act(() => {
+      result.current.updateOdds(initialOdds);
+    });
+    act(() => {
+      result.current.updateOddsWithArbitrage(arbMessage);
+    });
+
+    // Assert
+    expect(result.current.odds[0].arb_status).toBe("detected");
+  });
 });
@@ -10,7 +10,7 @@ import {
   Typography,
 } from "@mui/material";
 import { WebSocketContext } from "../contexts/WebSocketContext";
-import { ArbMessage } from "../types";
+import { ArbLeg, ArbMessage } from "../types";
 import "./styles/Tables.css";
 
 const niceStatuses: Record<ArbMessage["status"], string> = {
@@ -20,8 +20,20 @@ const niceStatuses: Record<ArbMessage["status"], string> = {
   cancelled: "Cancelled",
 };
 
+const niceOutcomes: Record<string, string> = {
+  home_win: "Home",
+  draw: "Draw",
+  away_win: "Away",
+  over: "Over",
+  under: "Under",
+};
+
 const NUM_ARBS = 10; // How many arbs to show
 
+// One line per leg of the arb within a cell
+const renderLegs = (arb: ArbMessage, render: (leg: ArbLeg) => React.ReactNode) =>
+  arb.legs.map((leg) => <div key={leg.outcome}>{render(leg)}</div>);
+
 const ArbitrageTable: React.FC = () => {
   const context = useContext(WebSocketContext);
 
@@ -45,12 +57,10 @@ const ArbitrageTable: React.FC = () => {
           <TableRow>
             <TableCell className="table-header">Status</TableCell>
             <TableCell className="table-header">Match</TableCell>
-            <TableCell className="table-header">Home Bookmaker</TableCell>
-            <TableCell className="table-header">Away Bookmaker</TableCell>
-            <TableCell className="table-header">Home Odds</TableCell>
-            <TableCell className="table-header">Away Odds</TableCell>
-            <TableCell className="table-header">Home Stake</TableCell>
-            <TableCell className="table-header">Away Stake</TableCell>
+            <TableCell className="table-header">Outcome</TableCell>
+            <TableCell className="table-header">Bookmaker</TableCell>
+            <TableCell className="table-header">Odds</TableCell>
+            <TableCell className="table-header">Stake</TableCell>
             <TableCell className="table-header">Profit</TableCell>
           </TableRow>
         </TableHead>
@@ -59,12 +69,10 @@ const ArbitrageTable: React.FC = () => {
             <TableRow key={arb.id} className={`table-row ${arb.status}`}>
               <TableCell className="table-cell">{niceStatuses[arb.status]}</TableCell>
               <TableCell className="table-cell">{arb.match}</TableCell>
-              <TableCell className="table-cell">{arb.home_win_bookmaker}</TableCell>
-              <TableCell className="table-cell">{arb.away_win_bookmaker}</TableCell>
-              <TableCell className="table-cell">{arb.home_win_odds ?? "-"}</TableCell>
-              <TableCell className="table-cell">{arb.away_win_odds ?? "-"}</TableCell>
-              <TableCell className="table-cell right-align">£{arb.home_win_stake.toFixed(2)}</TableCell>
-              <TableCell className="table-cell right-align">£{arb.away_win_stake.toFixed(2)}</TableCell>
+              <TableCell className="table-cell">{renderLegs(arb, (leg) => niceOutcomes[leg.outcome] ?? leg.outcome)}</TableCell>
+              <TableCell className="table-cell">{renderLegs(arb, (leg) => leg.bookmaker)}</TableCell>
+              <TableCell className="table-cell">{renderLegs(arb, (leg) => leg.odds ?? "-")}</TableCell>
+              <TableCell className="table-cell right-align">{renderLegs(arb, (leg) => `£${leg.stake.toFixed(2)}`)}</TableCell>
               <TableCell className="table-cell right-align">£{arb.guaranteed_profit.toFixed(2)}</TableCell>
             </TableRow>
           ))}
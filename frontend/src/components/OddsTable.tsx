@@ -13,6 +13,14 @@ import { WebSocketContext } from "../contexts/WebSocketContext";
 import "./styles/Tables.css";
 import { OddsData } from "../types";
 
+const outcomeNames: Record<string, string> = {
+  home_win: "Home Win",
+  draw: "Draw",
+  away_win: "Away Win",
+  over: "Over",
+  under: "Under",
+};
+
 const OddsTable: React.FC = () => {
   const context = useContext(WebSocketContext);
 
@@ -31,6 +39,9 @@ const OddsTable: React.FC = () => {
     return acc;
   }, {});
 
+  // Outcome columns across all markets, in the order they were first quoted
+  const outcomes = Array.from(new Set(odds.flatMap((odd) => Object.keys(odd.odds ?? {}))));
+
   return (
     <TableContainer component={Paper} className="table-container odds-table">
       <Typography variant="h5" component="h2" className="table-title">
@@ -42,8 +53,9 @@ const OddsTable: React.FC = () => {
           <TableRow>
             <TableCell className="table-header">Match</TableCell>
             <TableCell className="table-header">Bookmaker</TableCell>
-            <TableCell className="table-header">Home Win</TableCell>
-            <TableCell className="table-header">Away Win</TableCell>
+            {outcomes.map((outcome) => (
+              <TableCell key={outcome} className="table-header">{outcomeNames[outcome] ?? outcome}</TableCell>
+            ))}
           </TableRow>
         </TableHead>
         <TableBody>
@@ -51,7 +63,7 @@ const OddsTable: React.FC = () => {
             <React.Fragment key={match}>
               {matchIndex > 0 && (
                 <TableRow>
-                  <TableCell colSpan={4} className="table-spacing" /> {/* Spacing between each match */}
+                  <TableCell colSpan={2 + outcomes.length} className="table-spacing" /> {/* Spacing between each match */}
                 </TableRow>
               )}
               {matchOdds.map((odd, index) => {
@@ -62,8 +74,9 @@ const OddsTable: React.FC = () => {
                   >
                     <TableCell className="table-cell">{index === 0 ? odd.match : ""}</TableCell>
                     <TableCell className="table-cell">{odd.bookmaker}</TableCell>
-                    <TableCell className="table-cell right-align">{odd.odds?.home_win ?? "-"}</TableCell>
-                    <TableCell className="table-cell right-align">{odd.odds?.away_win ?? "-"}</TableCell>
+                    {outcomes.map((outcome) => (
+                      <TableCell key={outcome} className="table-cell right-align">{odd.odds?.[outcome] ?? "-"}</TableCell>
+                    ))}
                   </TableRow>
                 );
               })}
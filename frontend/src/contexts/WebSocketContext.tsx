@@ -26,6 +26,14 @@ export const handleMessage = (
 ) => {
   const { message_type, contents } = message;
 
+  // Sent on connect: the current odds and recent arbs, replayed as the messages they came in
+  if (message_type === "snapshot") {
+    contents.odds.forEach((odds: any) => handleMessage({ message_type: "odds_update", contents: odds }, handlers));
+    contents.arb_detections.forEach((arb: any) => handleMessage({ message_type: "arb_detection", contents: arb }, handlers));
+    contents.arb_executions.forEach((arb: any) => handleMessage({ message_type: "arb_execution", contents: arb }, handlers));
+    return;
+  }
+
   if (message_type === "odds_update") {
     handlers.updateOdds(contents);
     return;
@@ -35,8 +35,7 @@ export const useOdds = () => {
     setOdds((prevOdds) =>
       prevOdds.map((o) =>
         (o.match === arbData.match &&
-          ((o.bookmaker === arbData.home_win_bookmaker && o.odds?.home_win === arbData.home_win_odds) ||
-            (o.bookmaker === arbData.away_win_bookmaker && o.odds?.away_win === arbData.away_win_odds)))
+          arbData.legs.some((leg) => o.bookmaker === leg.bookmaker && o.odds?.[leg.outcome] === leg.odds))
           ? { ...o, arb_status: arbData.status as OddArbStatus }
           : o
       )
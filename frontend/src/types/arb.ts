@@ -1,14 +1,15 @@
 export type ArbStatus = "detected" | "completed" | "cancelled" | "adjusted";
+export interface ArbLeg {
+    outcome: string;
+    bookmaker: string;
+    odds?: number | null;
+    stake: number;
+}
 export interface ArbMessage {
     id: string;
     match: string;
-    home_win_bookmaker: string;
-    away_win_bookmaker: string;
-    home_win_odds?: number;
-    away_win_odds?: number;
-    home_win_stake: number;
-    away_win_stake: number;
+    legs: ArbLeg[]; // One per outcome of the market
     guaranteed_profit: number;
     status: ArbStatus;
     timestamp: number;
-}
\ No newline at end of file
+}
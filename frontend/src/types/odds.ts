@@ -5,10 +5,7 @@ export interface OddsData {
     event: "odds_update" | "odds_close";
     match: string;
     bookmaker: string;
-    odds: {
-        home_win: number;
-        away_win: number;
-    } | null;
+    odds: Record<string, number> | null; // Odds per outcome of the market, e.g. home_win, draw, away_win
     arb_status: OddArbStatus;
     timestamp: number;
 }
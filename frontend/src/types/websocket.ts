@@ -1,4 +1,4 @@
-export type MessageType = "odds_update" | "arb_detection" | "arb_execution";
+export type MessageType = "odds_update" | "arb_detection" | "arb_execution" | "snapshot";
 
 export interface WebSocketMessage {
   message_type: MessageType;